@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+ros2_commands 수신 과부하 보호 (admission control)
+
+출차 버튼 연타 / 만차 해소 같은 폭주 때 handle_command가 받는 명령 수에 제한이 없으면
+대기열이 끝없이 늘고, 급한 출차 명령이 PARKING_GUIDE 뒤에서 기다림.
+
+- 시스템 안 명령 수(수신 ~ completed / failed) 상한 capacity
+- command_type별 할당량 (예: PARKING_GUIDE 최대 16건 → 출차 앞에 쌓이는 안내 작업 제한)
+- 과부하 판정은 히스테리시스: high_watermark 이상이면 과부하, low_watermark 이하로
+  내려와야 해제 (경계에서 켜졌다 꺼졌다 하지 않음)
+- 과부하 중 낮은 우선순위 타입(shed_types)은 바로 failed + error_message (웹 UI가 즉시 알 수 있음)
+- 할당량 초과 / capacity 초과는 보류(defer): DB에 pending으로 그대로 두고
+  가장 오래된 created_at만 기억 → 부하가 내려가면 on_recover로 catch-up 다시 실행
+  (보류한 명령을 메모리에 들고 있지 않음)
+
+사용법 (폭주 시뮬레이션):
+    python admission_control.py --commands 400
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from command_backfill import parse_timestamp
+from command_records import CommandRecord
+
+ACCEPT = 'accept'
+DEFER = 'defer'
+REJECT = 'reject'
+
+# 기본 할당량: 안내는 capacity의 일부만, 출차는 capacity까지
+DEFAULT_QUOTAS = {
+    'PARKING_GUIDE': 16,
+}
+DEFAULT_SHED_TYPES = ('PARKING_GUIDE',)
+
+
+class AdmissionController:
+    """명령 수신 단계의 용량 / 할당량 / 과부하 판정"""
+
+    def __init__(self, capacity: int = 128, quotas: Dict[str, int] = None,
+                 shed_types: Iterable[str] = DEFAULT_SHED_TYPES,
+                 high_watermark: float = 0.75, low_watermark: float = 0.4,
+                 recover_interval: float = 0.5,
+                 on_recover: Callable[[Optional[datetime]], None] = None):
+        """
+        Args:
+            capacity: 시스템 안에 둘 수 있는 최대 명령 수 (넘으면 보류)
+            quotas: command_type별 최대 동시 명령 수 (없는 타입은 capacity까지)
+            shed_types: 과부하 중 바로 실패 처리할 낮은 우선순위 타입
+            high_watermark: capacity 대비 이 비율 이상이면 과부하 진입
+            low_watermark: capacity 대비 이 비율 이하로 내려오면 과부하 해제
+            recover_interval: on_recover 최소 간격 (catch-up 쿼리가 release마다 돌지 않도록)
+            on_recover: 보류한 명령이 있고 부하가 내려왔을 때 호출
+                        (가장 오래된 보류 명령의 created_at, 예: backfill.rewind 후 run_async)
+        """
+        if not 0.0 < low_watermark < high_watermark <= 1.0:
+            raise ValueError("0 < low_watermark < high_watermark <= 1 이어야 함")
+
+        self.capacity = capacity
+        self.quotas = dict(DEFAULT_QUOTAS if quotas is None else quotas)
+        self.shed_types = frozenset(shed_types)
+        self.high_mark = max(1, int(capacity * high_watermark))
+        self.low_mark = int(capacity * low_watermark)
+        self.recover_interval = recover_interval
+        self.on_recover = on_recover
+
+        self._lock = threading.Lock()
+        self._admitted: Dict[str, str] = {}        # command_id → command_type
+        self._by_type: Dict[str, int] = {}
+        self._overloaded = False
+        self._deferred_since: Optional[datetime] = None
+        self._deferred_pending = 0
+        self._last_recover = float('-inf')
+        self._recover_timer: Optional[threading.Timer] = None
+
+        self._stats = {
+            'accepted': 0,
+            'deferred': 0,
+            'rejected': 0,
+            'released': 0,
+            'overload_entered': 0,
+            'recoveries': 0,
+            'max_in_system': 0,
+        }
+
+    def admit(self, command: CommandRecord) -> Tuple[str, Optional[str]]:
+        """
+        명령 수락 여부
+
+        Returns:
+            (ACCEPT / DEFER / REJECT, 사유)
+            REJECT 사유는 error_message로 기록, DEFER는 pending으로 남겨 두고 나중에 다시 받음
+        """
+        command_id = command.command_id
+        command_type = command.command_type
+
+        with self._lock:
+            if command_id in self._admitted:
+                return ACCEPT, None
+
+            in_system = len(self._admitted)
+            if not self._overloaded and in_system >= self.high_mark:
+                self._overloaded = True
+                self._stats['overload_entered'] += 1
+                print(f"🚦 과부하: 시스템 안 명령 {in_system}건 (해제 기준 {self.low_mark}건)")
+
+            if self._overloaded and command_type in self.shed_types:
+                self._stats['rejected'] += 1
+                return REJECT, (f"Shed under load: {command_type} rejected "
+                                f"({in_system}/{self.capacity} commands in progress)")
+
+            quota = self.quotas.get(command_type)
+            if in_system >= self.capacity or (
+                    quota is not None and self._by_type.get(command_type, 0) >= quota):
+                self._defer_locked(command)
+                return DEFER, (f"Deferred: {command_type} over "
+                               f"{'capacity' if in_system >= self.capacity else 'quota'}")
+
+            self._admitted[command_id] = command_type
+            self._by_type[command_type] = self._by_type.get(command_type, 0) + 1
+            self._stats['accepted'] += 1
+            self._stats['max_in_system'] = max(self._stats['max_in_system'],
+                                               len(self._admitted))
+            return ACCEPT, None
+
+    def _defer_locked(self, command: CommandRecord):
+        self._stats['deferred'] += 1
+        self._deferred_pending += 1
+        if command.created_at:
+            created = parse_timestamp(command.created_at)
+            if self._deferred_since is None or created < self._deferred_since:
+                self._deferred_since = created
+
+    def release(self, command_id: str):
+        """명령이 시스템을 떠남 (completed / failed / 다른 컨트롤러가 선점)"""
+        with self._lock:
+            command_type = self._admitted.pop(command_id, None)
+            if command_type is None:
+                return
+            self._stats['released'] += 1
+            self._by_type[command_type] -= 1
+
+            in_system = len(self._admitted)
+            if self._overloaded and in_system <= self.low_mark:
+                self._overloaded = False
+                print(f"🟢 과부하 해제: 시스템 안 명령 {in_system}건")
+
+        self._maybe_recover()
+
+    def _maybe_recover(self):
+        """보류한 명령이 있고 여유가 생겼으면 on_recover (recover_interval마다 최대 한 번)"""
+        with self._lock:
+            if not self._deferred_pending or self._overloaded or not self._has_room_locked():
+                return
+            wait = self._last_recover + self.recover_interval - time.monotonic()
+            if wait > 0:
+                # 간격이 지나면 다시 확인 (그 사이 release가 없어도 보류분이 남지 않도록)
+                if self._recover_timer is None:
+                    self._recover_timer = threading.Timer(wait, self._on_recover_timer)
+                    self._recover_timer.daemon = True
+                    self._recover_timer.start()
+                return
+            since = self._deferred_since
+            self._deferred_since = None
+            self._deferred_pending = 0
+            self._last_recover = time.monotonic()
+            self._stats['recoveries'] += 1
+
+        if self.on_recover:
+            self.on_recover(since)
+
+    def _on_recover_timer(self):
+        with self._lock:
+            self._recover_timer = None
+        self._maybe_recover()
+
+    def _has_room_locked(self) -> bool:
+        """보류한 명령을 다시 받아도 될 만큼 여유가 있는지 (히스테리시스 하한 기준)"""
+        return len(self._admitted) <= self.low_mark
+
+    @property
+    def overloaded(self) -> bool:
+        with self._lock:
+            return self._overloaded
+
+    def stats(self) -> Dict[str, Any]:
+        """수신 제어 통계 스냅샷"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_system'] = len(self._admitted)
+            stats['by_type'] = {k: v for k, v in self._by_type.items() if v}
+            stats['overloaded'] = self._overloaded
+            stats['deferred_pending'] = self._deferred_pending
+            return stats
+
+
+def _simulate(commands: int, use_admission: bool, exit_ratio: float, burst_seconds: float,
+              exit_ms: float, guide_ms: float, workers: int) -> Dict[str, Any]:
+    import random
+    from datetime import timedelta, timezone
+
+    from command_executor import KeyedCommandExecutor
+    from command_records import parse_command
+
+    rng = random.Random(5)
+    executor = KeyedCommandExecutor(max_workers=workers, max_pending=10 ** 6)
+    lock = threading.Lock()
+    done = threading.Event()
+    pending_db: Dict[str, CommandRecord] = {}   # DB에 pending으로 남은 명령 (보류분)
+    arrived: Dict[str, float] = {}                # command_id → 수신 시각
+    result = {'exit_latency': [], 'guide_latency': [], 'rejected': 0, 'in_system': 0,
+              'max_in_system': 0, 'resolved': 0}
+
+    def resolve():
+        result['resolved'] += 1
+        if result['resolved'] >= commands:
+            done.set()
+
+    def run(command: CommandRecord):
+        time.sleep((exit_ms if command.is_exit else guide_ms) / 1000)
+        latency = time.perf_counter() - arrived[command.command_id]
+        with lock:
+            result['exit_latency' if command.is_exit else 'guide_latency'].append(latency)
+            result['in_system'] -= 1
+            resolve()
+        if admission:
+            admission.release(command.command_id)
+
+    def offer(command: CommandRecord):
+        if admission:
+            decision, _ = admission.admit(command)
+            if decision == REJECT:
+                with lock:
+                    pending_db.pop(command.command_id, None)
+                    result['rejected'] += 1
+                    resolve()
+                return
+            if decision == DEFER:
+                with lock:
+                    pending_db[command.command_id] = command
+                return
+        with lock:
+            pending_db.pop(command.command_id, None)
+            result['in_system'] += 1
+            result['max_in_system'] = max(result['max_in_system'], result['in_system'])
+        key = (f"gate:EXIT-0{rng.randrange(4) + 1}" if command.is_exit
+               else f"command:{command.command_id}")
+        executor.submit(key, run, command)
+
+    def recover(since: Optional[datetime]):
+        # backfill.rewind(since) + run_async() 흉내: DB에 남은 pending 명령을 다시 넣음
+        def replay():
+            with lock:
+                rows = sorted(pending_db.values(), key=lambda c: c.created_at)
+            for row in rows:
+                offer(row)
+        threading.Thread(target=replay, daemon=True).start()
+
+    admission = AdmissionController(capacity=64, on_recover=recover) if use_admission else None
+
+    started = time.perf_counter()
+    base = datetime.now(timezone.utc)
+    for i in range(commands):
+        command_type = ('EXIT_GATE_SINGLE' if rng.random() < exit_ratio else 'PARKING_GUIDE')
+        command = parse_command({'command_id': f"cmd-{i}", 'command_type': command_type,
+                                 'status': 'pending',
+                                 'created_at': (base + timedelta(microseconds=i)).isoformat()})
+        arrived[command.command_id] = time.perf_counter()
+        offer(command)
+        time.sleep(burst_seconds / commands)
+    done.wait(timeout=120)
+    result['elapsed'] = time.perf_counter() - started
+    executor.shutdown(wait=False)
+    if admission:
+        result['admission'] = admission.stats()
+    return result
+
+
+def _benchmark(commands: int, exit_ratio: float, burst_seconds: float,
+               exit_ms: float, guide_ms: float, workers: int):
+    def pct(values, q):
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000 if ordered else 0.0
+
+    print(f"🚦 명령 폭주: {commands:,}건 / {burst_seconds}초 (출차 {exit_ratio:.0%}), "
+          f"워커 {workers}, 출차 {exit_ms}ms / 안내 {guide_ms}ms")
+    for label, use_admission in (('제한 없음', False), ('수신 제어', True)):
+        r = _simulate(commands, use_admission, exit_ratio, burst_seconds,
+                      exit_ms, guide_ms, workers)
+        print(f"   [{label}] 출차 지연 p50 {pct(r['exit_latency'], 0.5):,.0f}ms / "
+              f"p99 {pct(r['exit_latency'], 0.99):,.0f}ms, "
+              f"시스템 안 최대 {r['max_in_system']}건, 전체 {r['elapsed']:.1f}초")
+        print(f"   {'':>{len(label) + 2}} 안내 완료 {len(r['guide_latency'])}건, "
+              f"실패 처리(shed) {r['rejected']}건"
+              + (f", 보류 {r['admission']['deferred']}회 / 복구 {r['admission']['recoveries']}회"
+                 if use_admission else ""))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="수신 제어 폭주 시뮬레이션")
+    parser.add_argument("--commands", type=int, default=400)
+    parser.add_argument("--exit-ratio", type=float, default=0.3)
+    parser.add_argument("--burst-seconds", type=float, default=0.5)
+    parser.add_argument("--exit-ms", type=float, default=20.0)
+    parser.add_argument("--guide-ms", type=float, default=100.0)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    _benchmark(args.commands, args.exit_ratio, args.burst_seconds,
+               args.exit_ms, args.guide_ms, args.workers)
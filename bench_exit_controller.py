@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+ExitController 벤치마크 (로컬 Supabase 대역 사용)
+
+실제 Supabase / ROS2 없이 합성 명령(EXIT_GATE_SINGLE / EXIT_GATE_DOUBLE / PARKING_GUIDE)을
+대량으로 넣고 처리량과 지연 시간을 측정.
+
+측정 항목:
+- commands_per_second: 첫 INSERT → 마지막 명령 종료 상태까지 처리량
+- dispatch_p50/p99_ms: created_at → executed_at (선점 시각, DB 기준)
+- status_write_requests: apply_ros2_command_status RPC 호출 수 (명령당 요청 수 포함)
+
+결과는 JSON으로 저장하고, 기준선(bench_baseline.json)과 비교해 회귀 시 종료 코드 1.
+
+사용법:
+    python bench_exit_controller.py --commands 2000
+    python bench_exit_controller.py --async             # asyncio 컨트롤러
+    python bench_exit_controller.py --async --http      # PostgREST/Realtime 스텁 서버 경유
+                                                        # (AsyncClient, 동기 Client는 Realtime 없음)
+    python bench_exit_controller.py --save-baseline     # 기준선 갱신
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+from command_backfill import parse_timestamp
+from local_supabase import (AsyncLocalSupabaseClient, LocalDatabase, LocalSupabaseClient,
+                            LocalSupabaseServer)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+
+# 높을수록 좋은 지표 / 낮을수록 좋은 지표 (기준선 비교용)
+HIGHER_IS_BETTER = ('commands_per_second',)
+LOWER_IS_BETTER = ('dispatch_p50_ms', 'dispatch_p99_ms', 'status_write_requests_per_command')
+
+# 합성 명령 비율
+COMMAND_MIX = (
+    ('EXIT_GATE_SINGLE', 0.5),
+    ('EXIT_GATE_DOUBLE', 0.2),
+    ('PARKING_GUIDE', 0.3),
+)
+
+
+def synthetic_command(index: int, gates: int, gate_seconds: float,
+                      rng: random.Random) -> Dict[str, Any]:
+    """백엔드가 넣는 것과 같은 모양의 ros2_commands 행"""
+    command_type = rng.choices([t for t, _ in COMMAND_MIX], [w for _, w in COMMAND_MIX])[0]
+    spot = f"{chr(ord('A') + index % 4)}-{index % 50 + 1:02d}"
+    plate = f"{index % 100:02d}가{index % 10000:04d}"
+
+    if command_type == 'PARKING_GUIDE':
+        payload = {'target_spot': spot, 'duration_seconds': gate_seconds}
+    else:
+        exit_type = 'double' if command_type == 'EXIT_GATE_DOUBLE' else 'single'
+        payload = {
+            'gate_id': f"EXIT-{index % gates + 1:02d}",
+            'action': 'open_gate',
+            'exit_type': exit_type,
+            'duration_seconds': gate_seconds * (2 if exit_type == 'double' else 1),
+            'total_fee': 3000,
+        }
+    return {
+        'command_type': command_type,
+        'license_plate': plate,
+        'parking_spot_id': spot,
+        'payload': payload,
+        'status': 'pending',
+    }
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def _seconds_between(start: str, end: str) -> float:
+    return (parse_timestamp(end) - parse_timestamp(start)).total_seconds()
+
+
+def _all_finished(db: LocalDatabase) -> bool:
+    return all(r.get('status') in ('completed', 'failed') for r in db.select('ros2_commands'))
+
+
+def _insert_all(db: LocalDatabase, commands: List[Dict[str, Any]]):
+    for command in commands:
+        db.insert('ros2_commands', [command])
+
+
+def _drive_threaded(args, db: LocalDatabase, commands: List[Dict[str, Any]]):
+    """스레드 기반 ExitController 실행 → (controller, 경과 시간)"""
+    from ros2_exit_controller import ExitController
+
+    client = LocalSupabaseClient(db, request_latency=args.request_latency)
+    controller = ExitController(client=client, max_workers=args.workers,
+                                max_pending=max(args.commands, 256),
+                                worker_id='bench-worker',
+                                coalesce_window=args.coalesce_window,
+                                simulate_feedback=True)
+    controller.feedback_simulator.gate_close_seconds = args.gate_close_seconds
+    controller.feedback_simulator.guide_seconds = args.guide_seconds
+
+    channel = client.channel('ros2-commands-channel')
+    channel.on_postgres_changes(
+        event='INSERT',
+        schema='public',
+        table='ros2_commands',
+        callback=controller.handle_command
+    ).subscribe(controller.backfill.on_subscribe_state)
+
+    started = time.perf_counter()
+    _insert_all(db, commands)
+
+    deadline = started + args.timeout
+    while time.perf_counter() < deadline and not _all_finished(db):
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    channel.unsubscribe()
+    if controller.gate_coalescer:
+        controller.gate_coalescer.flush_all()
+    controller.command_executor.shutdown(wait=True)
+    controller.claimer.stop()
+    controller.status_writer.close()
+    return controller, elapsed
+
+
+async def _drive_async(args, db: LocalDatabase, commands: List[Dict[str, Any]]):
+    """asyncio AsyncExitController 실행 → (controller, 경과 시간)"""
+    from ros2_exit_controller_async import AsyncExitController
+
+    server = None
+    if args.http:
+        # 실제 AsyncClient로 PostgREST(HTTP) / Realtime(WebSocket) 스텁 서버에 접속
+        from supabase import acreate_client
+        server = LocalSupabaseServer(db).start()
+        client = await acreate_client(server.url, 'local-anon-key')
+    else:
+        client = AsyncLocalSupabaseClient(db, request_latency=args.request_latency)
+
+    controller = AsyncExitController(client, max_workers=args.workers,
+                                     max_pending=max(args.commands, 256),
+                                     worker_id='bench-worker',
+                                     coalesce_window=args.coalesce_window,
+                                     simulate_feedback=True)
+    controller.feedback_simulator.gate_close_seconds = args.gate_close_seconds
+    controller.feedback_simulator.guide_seconds = args.guide_seconds
+
+    channel = client.channel('ros2-commands-channel')
+    channel.on_postgres_changes(
+        event='INSERT',
+        schema='public',
+        table='ros2_commands',
+        callback=controller.handle_command
+    )
+    await channel.subscribe(controller.backfill.on_subscribe_state)
+
+    # INSERT는 외부(웹 백엔드)에서 들어오므로 이벤트 루프 밖에서
+    started = time.perf_counter()
+    await asyncio.to_thread(_insert_all, db, commands)
+
+    deadline = started + args.timeout
+    while time.perf_counter() < deadline and not _all_finished(db):
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    await controller.drain()
+    await channel.unsubscribe()
+    if server:
+        await asyncio.to_thread(server.stop)
+    return controller, elapsed
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    """벤치마크 1회 실행 → 결과 dict"""
+    db = LocalDatabase(delivery_delay=args.delivery_delay)
+
+    rng = random.Random(args.seed)
+    commands = [synthetic_command(i, args.gates, args.gate_seconds, rng)
+                for i in range(args.commands)]
+
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        if args.use_async:
+            controller, elapsed = asyncio.run(_drive_async(args, db, commands))
+        else:
+            controller, elapsed = _drive_threaded(args, db, commands)
+    db.close()
+
+    rows = db.select('ros2_commands')
+    finished = [r for r in rows if r.get('status') in ('completed', 'failed')]
+    dispatch = [_seconds_between(r['created_at'], r['executed_at'])
+                for r in rows if r.get('executed_at')]
+    status_writes = db.stats['rpc:apply_ros2_command_status']
+    coalescer_stats = controller.gate_coalescer.stats() if controller.gate_coalescer else {}
+
+    return {
+        'config': {
+            'commands': args.commands,
+            'gates': args.gates,
+            'gate_seconds': args.gate_seconds,
+            'gate_close_seconds': args.gate_close_seconds,
+            'guide_seconds': args.guide_seconds,
+            'workers': args.workers,
+            'coalesce_window': args.coalesce_window,
+            'request_latency': args.request_latency,
+            'transport': 'http' if args.http else 'in-process',
+            'runtime': 'asyncio' if args.use_async else 'threads',
+        },
+        'completed': sum(1 for r in finished if r['status'] == 'completed'),
+        'failed': sum(1 for r in finished if r['status'] == 'failed'),
+        'unfinished': len(rows) - len(finished),
+        'elapsed_seconds': round(elapsed, 3),
+        'commands_per_second': round(len(finished) / elapsed, 1) if elapsed else 0.0,
+        'dispatch_p50_ms': round(percentile(dispatch, 0.50) * 1000, 2),
+        'dispatch_p99_ms': round(percentile(dispatch, 0.99) * 1000, 2),
+        'status_write_requests': status_writes,
+        'status_write_requests_per_command': round(status_writes / len(rows), 4) if rows else 0.0,
+        'gate_cycles': coalescer_stats.get('cycles', 0),
+        'gate_cycles_saved': coalescer_stats.get('cycles_saved', 0),
+        'db_requests': db.stats['requests'],
+    }
+
+
+def compare_with_baseline(result: Dict[str, Any], baseline: Dict[str, Any],
+                          tolerance: float) -> List[str]:
+    """기준선 대비 tolerance(비율) 이상 나빠진 지표 목록"""
+    regressions = []
+    for key in HIGHER_IS_BETTER:
+        if key in baseline and result[key] < baseline[key] * (1 - tolerance):
+            regressions.append(f"{key}: {result[key]} < {baseline[key]} (-{tolerance:.0%})")
+    for key in LOWER_IS_BETTER:
+        if key in baseline and result[key] > baseline[key] * (1 + tolerance):
+            regressions.append(f"{key}: {result[key]} > {baseline[key]} (+{tolerance:.0%})")
+    if result['unfinished']:
+        regressions.append(f"unfinished: {result['unfinished']} commands")
+    return regressions
+
+
+def parse_args(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='ExitController benchmark (local Supabase stand-in)')
+    parser.add_argument('--commands', type=int, default=2000, help='합성 명령 수')
+    parser.add_argument('--gates', type=int, default=4, help='출구 게이트 수')
+    parser.add_argument('--gate-seconds', type=float, default=1.0,
+                        help='payload duration_seconds (피드백 타임아웃)')
+    parser.add_argument('--gate-close-seconds', type=float, default=0.005,
+                        help='가짜 게이트 닫힘 신호까지 시간')
+    parser.add_argument('--guide-seconds', type=float, default=0.005,
+                        help='가짜 안내 완료 신호까지 시간')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--coalesce-window', type=float, default=0.02,
+                        help='게이트 병합 시간 (0이면 병합 안 함)')
+    parser.add_argument('--request-latency', type=float, default=0.0,
+                        help='인프로세스 클라이언트 요청당 지연 (초)')
+    parser.add_argument('--delivery-delay', type=float, default=0.0,
+                        help='Realtime 이벤트 전달 지연 (초)')
+    parser.add_argument('--http', action='store_true',
+                        help='PostgREST/Realtime 스텁 서버 경유 (--async 필요, supabase 패키지 필요)')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='AsyncExitController (asyncio) 실행')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--timeout', type=float, default=300.0)
+    parser.add_argument('--output', help='결과 JSON 저장 경로')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='비교할 기준선 JSON')
+    parser.add_argument('--save-baseline', action='store_true', help='결과를 기준선으로 저장')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='허용 회귀 비율 (0.25 = 25%%)')
+    args = parser.parse_args(argv)
+    if args.http and not args.use_async:
+        parser.error("--http는 --async와 함께 사용 (supabase 동기 Client는 Realtime을 지원하지 않음)")
+    return args
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+
+    print(f"🏁 벤치마크 시작: 명령 {args.commands}건, 게이트 {args.gates}개, 워커 {args.workers}")
+    result = run_benchmark(args)
+
+    print(f"   처리량: {result['commands_per_second']} commands/sec "
+          f"({result['elapsed_seconds']}초, 완료 {result['completed']}, 실패 {result['failed']})")
+    print(f"   dispatch 지연: p50={result['dispatch_p50_ms']}ms p99={result['dispatch_p99_ms']}ms")
+    print(f"   상태 기록 요청: {result['status_write_requests']}회 "
+          f"(명령당 {result['status_write_requests_per_command']})")
+    print(f"   게이트 사이클: {result['gate_cycles']} (병합으로 절약: {result['gate_cycles_saved']})")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"💾 기준선 저장: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("ℹ️  기준선 없음 (--save-baseline으로 생성)")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('config') != result['config']:
+        print("ℹ️  기준선과 설정이 달라 비교하지 않음")
+        return 0
+
+    regressions = compare_with_baseline(result, baseline, args.tolerance)
+    if regressions:
+        print("❌ 성능 회귀:")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+
+    print("✅ 기준선 대비 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+놓친 Realtime 이벤트 복구 (catch-up) + 중복 실행 방지
+
+Realtime INSERT만 구독하면 WebSocket 재연결 중이거나 subscribe 전에
+들어온 명령은 유실됨. 시작 시 / 재연결 시마다 pending 명령을 워터마크부터
+keyset 페이지네이션으로 읽어 live 스트림과 합침.
+
+- idx_ros2_commands_status / idx_ros2_commands_created 인덱스 사용
+- SeenIdSet: 크기 제한 LRU로 같은 명령을 두 번 넣지 않음
+- sweep_interval마다 안전 sweep → 재연결 알림이 없어도 복구 지연 상한 보장
+- AsyncCommandBackfill: AsyncClient + 코루틴 sweep (asyncio 컨트롤러용)
+"""
+
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Postgres / PostgREST TIMESTAMPTZ 표기 ("2024-01-01T09:00:05.12345+00:00", "... 09:00:05Z" 등)
+_TIMESTAMP = re.compile(
+    r'(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})(?:\.(\d+))?'
+    r'\s*(?:(Z)|([+-])(\d{2}):?(\d{2})?(?::?\d{2})?)?$'
+)
+
+
+def parse_timestamp(value: str) -> datetime:
+    """
+    Postgres TIMESTAMPTZ 문자열 → datetime (시간대 없으면 UTC)
+
+    Python 3.11 전의 fromisoformat은 소수점 이하 3 / 6자리만 받음 →
+    Postgres가 끝의 0을 잘라 보내는 자릿수("...:05.12345+00:00")나 "+09"도
+    6자리 / "+HH:MM"으로 맞춰서 해석
+
+    Raises:
+        ValueError: 타임스탬프 형식이 아닐 때
+    """
+    match = _TIMESTAMP.match(value.strip())
+    if match is None:
+        parsed = datetime.fromisoformat(value)
+    else:
+        date, clock, fraction, utc, sign, hours, minutes = match.groups()
+        text = f"{date}T{clock}"
+        if fraction:
+            text += '.' + fraction[:6].ljust(6, '0')
+        if utc:
+            text += '+00:00'
+        elif sign:
+            text += f"{sign}{hours}:{minutes or '00'}"
+        parsed = datetime.fromisoformat(text)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class SeenIdSet:
+    """최근 본 command_id 집합 (메모리 상한: capacity개)"""
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self._ids: 'OrderedDict[str, None]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, command_id: str) -> bool:
+        """처음 본 ID면 True, 이미 본 ID면 False"""
+        with self._lock:
+            if command_id in self._ids:
+                self._ids.move_to_end(command_id)
+                return False
+
+            self._ids[command_id] = None
+            if len(self._ids) > self.capacity:
+                self._ids.popitem(last=False)
+            return True
+
+    def discard(self, command_id: str):
+        """다시 처리할 수 있도록 ID 제거 (예: 선점 실패)"""
+        with self._lock:
+            self._ids.pop(command_id, None)
+
+    def __contains__(self, command_id: str) -> bool:
+        with self._lock:
+            return command_id in self._ids
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._ids)
+
+
+class CommandBackfill:
+    """pending 명령 catch-up 리더"""
+
+    def __init__(self, client, on_command: Callable[[Dict[str, Any]], None],
+                 batch_size: int = 100, lookback_seconds: float = 300.0,
+                 clock_skew_seconds: float = 5.0, sweep_interval: float = 60.0):
+        """
+        Args:
+            client: Supabase 클라이언트
+            on_command: 복구한 pending 명령(행)을 받는 콜백
+                        (False 반환 시 이미 받은 명령으로 보고 통계에서 제외)
+            batch_size: 페이지 크기
+            lookback_seconds: 첫 실행 시 얼마나 과거부터 읽을지
+            clock_skew_seconds: DB 시각과 로컬 시각 차이 여유
+            sweep_interval: 주기적 안전 sweep 간격 (복구 지연 상한)
+        """
+        self.client = client
+        self.on_command = on_command
+        self.batch_size = batch_size
+        self.clock_skew_seconds = clock_skew_seconds
+        self.sweep_interval = sweep_interval
+
+        # 이 시각 이전 명령은 이미 모두 확인됨
+        self.watermark = datetime.now(timezone.utc) - timedelta(seconds=lookback_seconds)
+        # 실행 중에 rewind된 시각 (실행이 끝날 때 watermark를 이보다 앞으로 옮기지 않음)
+        self._rewound: Optional[datetime] = None
+        self._watermark_lock = threading.Lock()
+
+        self._run_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._stats = {
+            'runs': 0,
+            'pages': 0,
+            'recovered': 0,
+            'last_run_seconds': 0.0,
+            'max_run_seconds': 0.0,
+            'max_recovery_latency_seconds': 0.0,
+        }
+
+    def _page_query(self, after: Optional[Dict[str, Any]]):
+        """watermark 이후 pending 명령 한 페이지 쿼리 (created_at, command_id 순)"""
+        query = self.client.table('ros2_commands') \
+            .select('*') \
+            .eq('status', 'pending')
+
+        if after is None:
+            query = query.gte('created_at', self.watermark.isoformat())
+        else:
+            # keyset: (created_at, command_id) > (last.created_at, last.command_id)
+            created_at = after['created_at']
+            query = query.or_(
+                f'created_at.gt."{created_at}",'
+                f'and(created_at.eq."{created_at}",command_id.gt.{after["command_id"]})'
+            )
+
+        return query \
+            .order('created_at') \
+            .order('command_id') \
+            .limit(self.batch_size)
+
+    def _fetch_page(self, after: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self._page_query(after).execute().data or []
+
+    def run(self) -> int:
+        """catch-up 1회 실행. 복구한 명령 수 반환"""
+        with self._run_lock:
+            started = time.monotonic()
+            run_started_at = self._begin_run()
+            recovered = 0
+            last = None
+
+            while True:
+                rows = self._fetch_page(last)
+                recovered += self._accept_page(rows, run_started_at)
+
+                if len(rows) < self.batch_size:
+                    break
+                last = rows[-1]
+
+            elapsed = self._finish_run(started, run_started_at, recovered)
+
+        if recovered:
+            print(f"🔁 놓친 명령 복구: {recovered}건 ({elapsed * 1000:.0f}ms)")
+        return recovered
+
+    def _accept_page(self, rows: List[Dict[str, Any]], run_started_at: datetime) -> int:
+        """한 페이지의 명령을 on_command로 넘기고 새로 받은 명령 수 반환"""
+        self._stats['pages'] += 1
+        recovered = 0
+        for row in rows:
+            if self.on_command(row) is False:
+                continue
+
+            age = (run_started_at - parse_timestamp(row['created_at'])).total_seconds()
+            self._stats['max_recovery_latency_seconds'] = max(
+                self._stats['max_recovery_latency_seconds'], age
+            )
+            recovered += 1
+        return recovered
+
+    def _begin_run(self) -> datetime:
+        """실행 시작 (이전 rewind는 이번 실행의 watermark에 이미 반영됨)"""
+        with self._watermark_lock:
+            self._rewound = None
+        return datetime.now(timezone.utc)
+
+    def _finish_run(self, started: float, run_started_at: datetime, recovered: int) -> float:
+        # 다음 실행은 이번 실행 시작 시점부터 (그 이후는 live 스트림이 받음)
+        # 실행 중에 rewind됐으면 그 시각부터
+        with self._watermark_lock:
+            watermark = run_started_at - timedelta(seconds=self.clock_skew_seconds)
+            if self._rewound is not None:
+                watermark = min(watermark, self._rewound)
+                self._rewound = None
+            self.watermark = watermark
+
+        elapsed = time.monotonic() - started
+        self._stats['runs'] += 1
+        self._stats['recovered'] += recovered
+        self._stats['last_run_seconds'] = elapsed
+        self._stats['max_run_seconds'] = max(self._stats['max_run_seconds'], elapsed)
+        return elapsed
+
+    def rewind(self, since: Optional[datetime]):
+        """
+        다음 catch-up이 since부터 다시 읽도록 watermark를 되돌림
+
+        watermark보다 오래된 pending 명령을 다시 받아야 할 때 (보류 / 선점 실패).
+        catch-up 실행 중에 호출돼도 기다리지 않음 (실행이 끝날 때 반영)
+        """
+        if since is None:
+            return
+        target = since - timedelta(seconds=self.clock_skew_seconds)
+        with self._watermark_lock:
+            self.watermark = min(self.watermark, target)
+            if self._rewound is None or target < self._rewound:
+                self._rewound = target
+
+    def run_async(self):
+        """catch-up을 백그라운드 스레드에서 실행 (Realtime 콜백을 막지 않음)"""
+        threading.Thread(target=self._run_safely, name='command-backfill',
+                         daemon=True).start()
+
+    def _run_safely(self):
+        try:
+            self.run()
+        except Exception as e:
+            print(f"⚠️  명령 복구 실패: {e}")
+
+    def on_subscribe_state(self, status, error: Exception = None):
+        """
+        channel.subscribe() 상태 콜백
+
+        SUBSCRIBED (최초 연결 / 재연결) 될 때마다 catch-up 실행
+        """
+        state = getattr(status, 'value', status)
+        if state == 'SUBSCRIBED':
+            self.run_async()
+        elif error is not None:
+            print(f"⚠️  Realtime 연결 상태: {state} ({error})")
+
+    def _sweep(self):
+        while not self._stopped.wait(self.sweep_interval):
+            self._run_safely()
+
+    def start(self):
+        """주기적 안전 sweep 시작"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sweep, name='command-sweep',
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """복구 통계 (max_recovery_latency_seconds: 복구된 명령 중 가장 오래 기다린 시간)"""
+        stats = dict(self._stats)
+        stats['watermark'] = self.watermark.isoformat()
+        stats['worst_case_latency_bound_seconds'] = self.sweep_interval + stats['max_run_seconds']
+        return stats
+
+
+class AsyncCommandBackfill(CommandBackfill):
+    """CommandBackfill의 asyncio 버전 (client는 AsyncClient, sweep은 코루틴)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._run_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def run(self) -> int:
+        """catch-up 1회 실행. 복구한 명령 수 반환"""
+        async with self._run_lock:
+            started = time.monotonic()
+            run_started_at = self._begin_run()
+            recovered = 0
+            last = None
+
+            while True:
+                rows = (await self._page_query(last).execute()).data or []
+                recovered += self._accept_page(rows, run_started_at)
+
+                if len(rows) < self.batch_size:
+                    break
+                last = rows[-1]
+
+            elapsed = self._finish_run(started, run_started_at, recovered)
+
+        if recovered:
+            print(f"🔁 놓친 명령 복구: {recovered}건 ({elapsed * 1000:.0f}ms)")
+        return recovered
+
+    def run_async(self):
+        """catch-up을 별도 태스크로 실행 (이벤트 루프 안에서 호출)"""
+        asyncio.get_running_loop().create_task(self._run_safely())
+
+    async def _run_safely(self):
+        try:
+            await self.run()
+        except Exception as e:
+            print(f"⚠️  명령 복구 실패: {e}")
+
+    async def _sweep(self):
+        while not self._stopped.is_set():
+            await asyncio.sleep(self.sweep_interval)
+            await self._run_safely()
+
+    def start(self):
+        """주기적 안전 sweep 시작 (이벤트 루프 안에서 호출)"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._sweep())
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+ros2_commands 작업 선점 (여러 컨트롤러 인스턴스 수평 확장)
+
+- claim_ros2_command RPC로 pending → processing 전환 (한 인스턴스만 성공)
+- 선점한 명령은 주기적으로 하트비트를 보내 리스 연장
+- 리스가 만료된 명령(죽은 컨트롤러)은 다시 pending으로 돌려 재처리
+- AsyncCommandClaimer: AsyncClient + 코루틴 하트비트 (asyncio 컨트롤러용)
+"""
+
+import asyncio
+import os
+import socket
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+
+
+def default_worker_id() -> str:
+    """호스트명 + PID 기반 컨트롤러 ID"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class CommandClaimer:
+    """명령 선점 + 리스 관리"""
+
+    def __init__(self, client, worker_id: str = None, lease_seconds: int = 30,
+                 heartbeat_interval: float = 10.0, reap_interval: float = 15.0,
+                 max_attempts: int = 3,
+                 on_requeued: Callable[[Dict[str, Any]], None] = None):
+        """
+        Args:
+            client: Supabase 클라이언트
+            worker_id: 이 컨트롤러의 ID (기본: 호스트명-PID)
+            lease_seconds: 리스 길이 (하트비트가 끊기면 이 시간 후 회수)
+            heartbeat_interval: 하트비트 주기 (lease_seconds보다 충분히 짧게)
+            reap_interval: 만료 리스 회수 주기
+            max_attempts: 리스 만료 후 재시도 최대 횟수 (초과 시 failed)
+            on_requeued: 회수되어 pending으로 돌아간 명령을 받는 콜백
+        """
+        self.client = client
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.reap_interval = reap_interval
+        self.max_attempts = max_attempts
+        self.on_requeued = on_requeued
+
+        self._lock = threading.Lock()
+        self._held: Set[str] = set()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._stats = {
+            'claimed': 0,
+            'lost': 0,
+            'heartbeats': 0,
+            'requeued': 0,
+            'errors': 0,
+        }
+
+    def claim(self, command_id: str) -> Optional[Dict[str, Any]]:
+        """
+        명령 선점 시도
+
+        Returns:
+            선점 성공 시 갱신된 명령 행, 다른 인스턴스가 먼저 가져갔으면 None
+        """
+        result = self.client.rpc('claim_ros2_command', {
+            'p_command_id': command_id,
+            'p_worker_id': self.worker_id,
+            'p_lease_seconds': self.lease_seconds,
+        }).execute()
+        return self._record_claim(command_id, result.data or [])
+
+    def _record_claim(self, command_id: str, rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if not rows:
+                self._stats['lost'] += 1
+                return None
+            self._held.add(command_id)
+            self._stats['claimed'] += 1
+        return rows[0]
+
+    def claim_pending(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """가장 오래된 pending 명령 여러 건 선점"""
+        result = self.client.rpc('claim_pending_ros2_commands', {
+            'p_worker_id': self.worker_id,
+            'p_limit': limit,
+            'p_lease_seconds': self.lease_seconds,
+        }).execute()
+
+        rows = result.data or []
+        with self._lock:
+            for row in rows:
+                self._held.add(row['command_id'])
+            self._stats['claimed'] += len(rows)
+        return rows
+
+    def release(self, command_id: str):
+        """명령 처리 종료 (더 이상 하트비트 보내지 않음)"""
+        with self._lock:
+            self._held.discard(command_id)
+
+    def holds(self, command_id: str) -> bool:
+        """이 컨트롤러가 선점 중인 명령인지 (하트비트 대상)"""
+        with self._lock:
+            return command_id in self._held
+
+    def _heartbeat_params(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            held = list(self._held)
+        if not held:
+            return None
+        return {
+            'p_worker_id': self.worker_id,
+            'p_command_ids': held,
+            'p_lease_seconds': self.lease_seconds,
+        }
+
+    def heartbeat(self) -> int:
+        """선점 중인 명령의 리스 연장"""
+        params = self._heartbeat_params()
+        if params is None:
+            return 0
+
+        result = self.client.rpc('heartbeat_ros2_commands', params).execute()
+
+        with self._lock:
+            self._stats['heartbeats'] += 1
+        return result.data or 0
+
+    def reap_expired(self) -> List[Dict[str, Any]]:
+        """리스가 만료된 명령을 회수하고, pending으로 돌아간 명령은 콜백으로 전달"""
+        result = self.client.rpc('requeue_expired_ros2_commands', {
+            'p_max_attempts': self.max_attempts,
+        }).execute()
+        return self._record_requeued(result.data or [])
+
+    def _record_requeued(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if rows:
+            print(f"♻️  만료된 명령 회수: {len(rows)}건")
+            with self._lock:
+                self._stats['requeued'] += len(rows)
+
+        if self.on_requeued:
+            for row in rows:
+                if row.get('status') == 'pending':
+                    self.on_requeued(row)
+        return rows
+
+    def _run(self):
+        next_reap = 0.0
+        elapsed = 0.0
+        while not self._stopped.wait(self.heartbeat_interval):
+            elapsed += self.heartbeat_interval
+            try:
+                self.heartbeat()
+                if elapsed >= next_reap:
+                    next_reap = elapsed + self.reap_interval
+                    self.reap_expired()
+            except Exception as e:
+                with self._lock:
+                    self._stats['errors'] += 1
+                print(f"⚠️  리스 관리 실패: {e}")
+
+    def start(self):
+        """하트비트 / 리스 회수 스레드 시작"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='command-lease',
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def held_count(self) -> int:
+        with self._lock:
+            return len(self._held)
+
+    def stats(self) -> Dict[str, Any]:
+        """선점 통계 스냅샷"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['held'] = len(self._held)
+            stats['worker_id'] = self.worker_id
+            return stats
+
+
+class AsyncCommandClaimer(CommandClaimer):
+    """CommandClaimer의 asyncio 버전 (client는 AsyncClient, 하트비트는 코루틴)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._task: Optional[asyncio.Task] = None
+
+    async def claim(self, command_id: str) -> Optional[Dict[str, Any]]:
+        """명령 선점 시도 (성공 시 갱신된 명령 행, 실패 시 None)"""
+        result = await self.client.rpc('claim_ros2_command', {
+            'p_command_id': command_id,
+            'p_worker_id': self.worker_id,
+            'p_lease_seconds': self.lease_seconds,
+        }).execute()
+        return self._record_claim(command_id, result.data or [])
+
+    async def heartbeat(self) -> int:
+        """선점 중인 명령의 리스 연장"""
+        params = self._heartbeat_params()
+        if params is None:
+            return 0
+
+        result = await self.client.rpc('heartbeat_ros2_commands', params).execute()
+        with self._lock:
+            self._stats['heartbeats'] += 1
+        return result.data or 0
+
+    async def reap_expired(self) -> List[Dict[str, Any]]:
+        """리스가 만료된 명령을 회수하고, pending으로 돌아간 명령은 콜백으로 전달"""
+        result = await self.client.rpc('requeue_expired_ros2_commands', {
+            'p_max_attempts': self.max_attempts,
+        }).execute()
+        return self._record_requeued(result.data or [])
+
+    async def _run(self):
+        next_reap = 0.0
+        elapsed = 0.0
+        while not self._stopped.is_set():
+            await asyncio.sleep(self.heartbeat_interval)
+            elapsed += self.heartbeat_interval
+            try:
+                await self.heartbeat()
+                if elapsed >= next_reap:
+                    next_reap = elapsed + self.reap_interval
+                    await self.reap_expired()
+            except Exception as e:
+                with self._lock:
+                    self._stats['errors'] += 1
+                print(f"⚠️  리스 관리 실패: {e}")
+
+    def start(self):
+        """하트비트 / 리스 회수 코루틴 시작 (이벤트 루프 안에서 호출)"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
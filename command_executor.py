@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+명령 실행 엔진 - Realtime 콜백에서 명령 실행을 분리
+
+- 고정 크기 워커 풀에서 명령 실행 (콜백은 즉시 반환)
+- 같은 키(게이트/로봇)의 명령은 도착 순서대로 하나씩 실행
+- 다른 키의 명령은 병렬 실행
+- 대기열 크기 제한 + 대기/실행 중 명령 수 조회
+- AsyncKeyedCommandExecutor: 같은 규칙의 asyncio 버전 (스레드 대신 코루틴)
+"""
+
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Set, Tuple
+
+Task = Tuple[Callable[..., Any], Tuple[Any, ...]]
+
+
+class KeyedCommandExecutor:
+    """키별 순서를 보장하는 병렬 명령 실행기"""
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 256,
+                 name: str = 'command-worker'):
+        """
+        Args:
+            max_workers: 동시에 실행할 수 있는 명령 수 (워커 스레드 수)
+            max_pending: 실행 대기 중인 명령의 최대 개수 (초과 시 거부)
+            name: 워커 스레드 이름 접두사
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers,
+                                        thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+        # 키별 대기열 / 현재 실행(또는 실행 예약)된 키
+        self._queues: Dict[str, Deque[Task]] = {}
+        self._active_keys: Set[str] = set()
+
+        self._pending = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._closed = False
+
+    def submit(self, key: str, fn: Callable[..., Any], *args: Any) -> bool:
+        """
+        명령 실행 예약
+
+        Returns:
+            True: 대기열에 추가됨, False: 대기열이 가득 차서 거부됨
+        """
+        with self._lock:
+            if self._closed or self._pending >= self.max_pending:
+                self._rejected += 1
+                return False
+
+            queue = self._queues.setdefault(key, deque())
+            queue.append((fn, args))
+            self._pending += 1
+
+            # 이 키를 처리 중인 워커가 없으면 새로 예약
+            if key not in self._active_keys:
+                self._active_keys.add(key)
+                self._pool.submit(self._run_next, key)
+
+        return True
+
+    def _run_next(self, key: str):
+        """키 대기열에서 명령 하나를 꺼내 실행 (다른 키에 워커를 양보하기 위해 1건씩)"""
+        with self._lock:
+            fn, args = self._queues[key].popleft()
+            self._pending -= 1
+            self._in_flight += 1
+
+        failed = False
+        try:
+            fn(*args)
+        except Exception as e:
+            failed = True
+            print(f"❌ 명령 실행 중 처리되지 않은 오류 ({key}): {e}")
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+                if failed:
+                    self._failed += 1
+
+                if self._queues[key]:
+                    # 같은 키의 다음 명령은 풀의 맨 뒤로 다시 예약
+                    self._pool.submit(self._run_next, key)
+                else:
+                    del self._queues[key]
+                    self._active_keys.discard(key)
+
+                if self._pending == 0 and self._in_flight == 0:
+                    self._idle.notify_all()
+
+    @property
+    def queue_depth(self) -> int:
+        """실행 대기 중인 명령 수"""
+        with self._lock:
+            return self._pending
+
+    @property
+    def in_flight(self) -> int:
+        """현재 실행 중인 명령 수"""
+        with self._lock:
+            return self._in_flight
+
+    def stats(self) -> Dict[str, Any]:
+        """실행기 상태 스냅샷"""
+        with self._lock:
+            return {
+                'queue_depth': self._pending,
+                'in_flight': self._in_flight,
+                'active_keys': len(self._active_keys),
+                'completed': self._completed,
+                'failed': self._failed,
+                'rejected': self._rejected,
+                'per_key_depth': {k: len(q) for k, q in self._queues.items()},
+            }
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """대기/실행 중인 명령이 모두 끝날 때까지 대기"""
+        with self._idle:
+            return self._idle.wait_for(
+                lambda: self._pending == 0 and self._in_flight == 0,
+                timeout=timeout
+            )
+
+    def shutdown(self, wait: bool = True):
+        """새 명령을 받지 않고 종료 (wait=True면 남은 명령을 모두 실행 후 종료)"""
+        with self._lock:
+            self._closed = True
+
+        if wait:
+            self.wait_idle()
+        self._pool.shutdown(wait=wait)
+
+
+class AsyncKeyedCommandExecutor:
+    """KeyedCommandExecutor의 asyncio 버전 (fn은 코루틴 함수)"""
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 256):
+        """
+        Args:
+            max_workers: 동시에 실행할 수 있는 명령 수
+            max_pending: 실행 대기 중인 명령의 최대 개수 (초과 시 거부)
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+
+        self._slots = asyncio.Semaphore(max_workers)
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+        # 키별 대기열 / 키별 실행 태스크
+        self._queues: Dict[str, Deque[Task]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+        self._pending = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._closed = False
+
+    def submit(self, key: str, fn: Callable[..., Any], *args: Any) -> bool:
+        """
+        명령 실행 예약 (이벤트 루프 안에서 호출)
+
+        Returns:
+            True: 대기열에 추가됨, False: 대기열이 가득 차서 거부됨
+        """
+        if self._closed or self._pending >= self.max_pending:
+            self._rejected += 1
+            return False
+
+        self._queues.setdefault(key, deque()).append((fn, args))
+        self._pending += 1
+        self._idle.clear()
+
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.get_running_loop().create_task(self._drain(key))
+        return True
+
+    async def _drain(self, key: str):
+        """키 대기열을 순서대로 실행 (명령마다 실행 슬롯을 다시 받아 다른 키에 양보)"""
+        queue = self._queues[key]
+        while queue:
+            async with self._slots:
+                fn, args = queue.popleft()
+                self._pending -= 1
+                self._in_flight += 1
+                try:
+                    await fn(*args)
+                except Exception as e:
+                    self._failed += 1
+                    print(f"❌ 명령 실행 중 처리되지 않은 오류 ({key}): {e}")
+                finally:
+                    self._in_flight -= 1
+                    self._completed += 1
+
+        del self._queues[key]
+        del self._tasks[key]
+        if self._pending == 0 and self._in_flight == 0:
+            self._idle.set()
+
+    @property
+    def queue_depth(self) -> int:
+        """실행 대기 중인 명령 수"""
+        return self._pending
+
+    @property
+    def in_flight(self) -> int:
+        """현재 실행 중인 명령 수"""
+        return self._in_flight
+
+    def stats(self) -> Dict[str, Any]:
+        """실행기 상태 스냅샷"""
+        return {
+            'queue_depth': self._pending,
+            'in_flight': self._in_flight,
+            'active_keys': len(self._tasks),
+            'completed': self._completed,
+            'failed': self._failed,
+            'rejected': self._rejected,
+            'per_key_depth': {k: len(q) for k, q in self._queues.items()},
+        }
+
+    async def wait_idle(self, timeout: float = None) -> bool:
+        """대기/실행 중인 명령이 모두 끝날 때까지 대기"""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def shutdown(self, wait: bool = True):
+        """새 명령을 받지 않고 종료 (wait=True면 남은 명령을 모두 실행 후 종료)"""
+        self._closed = True
+        if wait:
+            await self.wait_idle()
+            return
+
+        for task in list(self._tasks.values()):
+            task.cancel()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+명령 처리 지연 시간 계측
+
+버튼 클릭부터 게이트 개방까지 어디서 시간이 걸리는지 구간별로 측정.
+
+구간 (stage):
+- delivery:     DB INSERT (created_at) → Realtime 수신
+- queue:        수신 → 워커에서 실행 시작 (선점 완료)
+- publish:      실행 시작 → ROS2 토픽 발행
+- execution:    발행 → 완료 (게이트 닫힘 / 안내 완료)
+- status_write: 완료 → DB 상태 기록 확인
+- end_to_end:   INSERT → DB 상태 기록 확인
+
+command_type / gate_id별 히스토그램을 Prometheus 텍스트 형식(/metrics)과
+주기적 요약 로그로 제공.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from command_backfill import parse_timestamp
+from command_records import CommandRecord
+
+# 히스토그램 버킷 경계 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# (구간 이름, 시작 단계, 끝 단계)
+STAGE_SEGMENTS = (
+    ('delivery', 'inserted', 'delivered'),
+    ('queue', 'delivered', 'dispatched'),
+    ('publish', 'dispatched', 'published'),
+    ('execution', 'published', 'completed'),
+    ('status_write', 'completed', 'status_acked'),
+    ('end_to_end', 'inserted', 'status_acked'),
+)
+
+
+class Histogram:
+    """고정 버킷 히스토그램 (Prometheus 방식 누적 버킷)"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막 칸: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """버킷 내 선형 보간으로 분위수 추정"""
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for i, bound in enumerate(self.buckets):
+            if cumulative + self.counts[i] >= rank:
+                fraction = (rank - cumulative) / self.counts[i] if self.counts[i] else 0.0
+                return lower + (bound - lower) * fraction
+            cumulative += self.counts[i]
+            lower = bound
+        return self.buckets[-1]
+
+
+class CommandMetrics:
+    """명령별 단계 시각 기록 + 구간별 지연 히스토그램"""
+
+    def __init__(self, max_spans: int = 10000, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Args:
+            max_spans: 동시에 추적할 최대 명령 수 (초과 시 오래된 것부터 버림)
+            buckets: 히스토그램 버킷 경계 (초)
+        """
+        self.max_spans = max_spans
+        self.buckets = buckets
+
+        self._lock = threading.Lock()
+        # command_id → {'labels': (command_type, gate_id), stage: epoch seconds}
+        self._spans: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        # (stage, command_type, gate_id) → Histogram
+        self._histograms: Dict[Tuple[str, str, str], Histogram] = {}
+        self._dropped_spans = 0
+        # 계측 중 예외 (명령 처리에는 전파하지 않고 여기서 셈)
+        self._errors = 0
+
+        self._summary_thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def labels_for(command: CommandRecord) -> Tuple[str, str]:
+        return command.command_type, command.gate_id if command.is_exit else '-'
+
+    def mark(self, command_id: str, stage: str, command: CommandRecord = None):
+        """
+        명령의 단계 도달 시각 기록
+
+        delivered 단계에서 command를 넘기면 created_at(inserted)과 라벨도 기록
+        계측 오류는 예외로 올리지 않음 (명령 실행 경로에서 호출되므로)
+        """
+        try:
+            self._mark(command_id, stage, command)
+        except Exception as e:
+            self._record_error(f"{stage} 기록 실패 ({command_id}): {e}")
+
+    def _record_error(self, message: str):
+        with self._lock:
+            self._errors += 1
+            first = self._errors == 1
+        if first:
+            print(f"⚠️  지연 계측 오류 (이후 오류는 개수만 집계): {message}")
+
+    def _mark(self, command_id: str, stage: str, command: Optional[CommandRecord]):
+        now = time.time()
+        with self._lock:
+            span = self._spans.get(command_id)
+            if span is None:
+                if command is None:
+                    return
+                span = {'labels': self.labels_for(command)}
+                if command.created_at:
+                    span['inserted'] = parse_timestamp(command.created_at).timestamp()
+                self._spans[command_id] = span
+                if len(self._spans) > self.max_spans:
+                    self._spans.popitem(last=False)
+                    self._dropped_spans += 1
+
+            if stage in span:
+                return
+            span[stage] = now
+            self._observe_locked(span, stage)
+
+            if stage == 'status_acked':
+                self._spans.pop(command_id, None)
+
+    def _observe_locked(self, span: Dict[str, Any], stage: str):
+        command_type, gate_id = span['labels']
+        for name, start, end in STAGE_SEGMENTS:
+            if end != stage or start not in span:
+                continue
+            key = (name, command_type, gate_id)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(max(span[end] - span[start], 0.0))
+
+    def discard(self, command_id: str):
+        """더 이상 추적하지 않음 (예: 다른 컨트롤러가 선점)"""
+        with self._lock:
+            self._spans.pop(command_id, None)
+
+    def on_status_flushed(self, command_ids: List[str]):
+        """CommandStatusWriter.on_flushed 콜백: 완료된 명령의 상태 기록 확인"""
+        for command_id in command_ids or ():
+            with self._lock:
+                span = self._spans.get(command_id)
+                done = span is not None and 'completed' in span
+            if done:
+                self.mark(command_id, 'status_acked')
+
+    def render_prometheus(self) -> str:
+        """Prometheus 텍스트 형식"""
+        lines = [
+            '# HELP ros2_command_stage_seconds Command latency per pipeline stage',
+            '# TYPE ros2_command_stage_seconds histogram',
+        ]
+        with self._lock:
+            for (stage, command_type, gate_id), h in sorted(self._histograms.items()):
+                labels = f'stage="{stage}",command_type="{command_type}",gate_id="{gate_id}"'
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    lines.append(f'ros2_command_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'ros2_command_stage_seconds_bucket{{{labels},le="+Inf"}} {h.count}')
+                lines.append(f'ros2_command_stage_seconds_sum{{{labels}}} {h.sum:.6f}')
+                lines.append(f'ros2_command_stage_seconds_count{{{labels}}} {h.count}')
+
+            lines.append('# TYPE ros2_command_spans_in_flight gauge')
+            lines.append(f'ros2_command_spans_in_flight {len(self._spans)}')
+            lines.append('# TYPE ros2_command_spans_dropped_total counter')
+            lines.append(f'ros2_command_spans_dropped_total {self._dropped_spans}')
+            lines.append('# TYPE ros2_command_metrics_errors_total counter')
+            lines.append(f'ros2_command_metrics_errors_total {self._errors}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> str:
+        """구간별 p50 / p99 요약"""
+        with self._lock:
+            items = sorted(self._histograms.items())
+            rows = [
+                f"   {stage:<13} {command_type:<17} {gate_id:<8} "
+                f"n={h.count:<6} p50={h.quantile(0.5) * 1000:8.1f}ms "
+                f"p99={h.quantile(0.99) * 1000:8.1f}ms"
+                for (stage, command_type, gate_id), h in items
+            ]
+        return "📊 명령 지연 요약\n" + ("\n".join(rows) if rows else "   (데이터 없음)")
+
+    def _log_summary(self, interval: float):
+        while not self._stopped.wait(interval):
+            print(self.summary())
+
+    def start_summary_log(self, interval: float = 60.0):
+        """interval초마다 요약 로그 출력"""
+        if self._summary_thread is None:
+            self._summary_thread = threading.Thread(target=self._log_summary, args=(interval,),
+                                                    name='metrics-summary', daemon=True)
+            self._summary_thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+
+class MetricsServer:
+    """/metrics HTTP 엔드포인트 (Prometheus scrape 용)"""
+
+    def __init__(self, metrics: CommandMetrics, host: str = '0.0.0.0', port: int = 9108):
+        metrics_ref = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics_ref.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever,
+                                        name='metrics-http', daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self):
+        self._thread.start()
+        print(f"📈 메트릭 엔드포인트: http://localhost:{self.port}/metrics")
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+ros2_commands 행 → 타입 있는 명령 레코드 (수신 시 한 번만 검증 / 파싱)
+
+Realtime payload(dict)를 단계마다 command.get(...) / payload.get(...)로 다시 읽고
+command_type 문자열을 비교하던 것을, 수신 시 한 번 검증해서 불변 레코드로 바꿈.
+
+- CommandType: command_type 문자열 → IntEnum (dict 키 / 비교가 정수 연산)
+- CommandRecord: NamedTuple (__slots__ = () → 인스턴스 dict 없음, 불변), 출차 대수 포함
+  payload의 gate_id / duration_seconds 등은 필드로 풀어두고 원본은 읽기 전용 뷰로 보관
+- parse_command(): 형태가 잘못된 명령은 CommandValidationError → 워커에 가기 전에 failed
+- HandlerRegistry: 타입별 처리 함수 (if/elif 대신 dict 조회 한 번)
+"""
+
+import time
+from enum import IntEnum
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional
+
+DEFAULT_GATE_ID = 'EXIT-01'
+MAX_DURATION_SECONDS = 3600
+
+_EMPTY_PAYLOAD = MappingProxyType({})
+
+
+class CommandType(IntEnum):
+    """ros2_commands.command_type"""
+    EXIT_GATE_SINGLE = 1
+    EXIT_GATE_DOUBLE = 2
+    PARKING_GUIDE = 3
+
+
+_VEHICLE_COUNT = {CommandType.EXIT_GATE_SINGLE: 1, CommandType.EXIT_GATE_DOUBLE: 2}
+_TYPES_BY_NAME = {command_type.name: command_type for command_type in CommandType}
+
+# 타입별 duration_seconds 기본값 (기존 컨트롤러 기본값과 같음)
+_DEFAULT_DURATION = {
+    CommandType.EXIT_GATE_SINGLE: 10,
+    CommandType.EXIT_GATE_DOUBLE: 10,
+    CommandType.PARKING_GUIDE: 3,
+}
+
+
+class CommandValidationError(ValueError):
+    """ros2_commands 행 형태가 잘못됨 (command_id를 알면 failed로 기록할 수 있음)"""
+
+    def __init__(self, reason: str, command_id: Optional[str] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.command_id = command_id
+
+
+class CommandRecord(NamedTuple):
+    """검증된 ros2_commands 행"""
+    command_id: str
+    type: CommandType
+    vehicle_count: int          # 출차 대수 (출차 명령이 아니면 0)
+    status: str
+    license_plate: Optional[str]
+    parking_spot_id: Optional[str]
+    created_at: Optional[str]
+    gate_id: str
+    duration_seconds: float
+    target_spot: Optional[str]
+    prep_location: Optional[str]
+    zone: Optional[str]
+    robot_id: Optional[str]
+    total_fee: float
+    payload: Mapping[str, Any]
+
+    @property
+    def command_type(self) -> str:
+        return self.type.name
+
+    @property
+    def is_exit(self) -> bool:
+        return self.vehicle_count > 0
+
+    def as_row(self) -> Dict[str, Any]:
+        """ros2_commands 행 형태 dict (로그 / 직렬화용)"""
+        row = {column: getattr(self, column) for column in _ROW_COLUMNS}
+        row['command_type'] = self.type.name
+        row['payload'] = dict(self.payload)
+        return row
+
+
+_ROW_COLUMNS = ('command_id', 'status', 'license_plate', 'parking_spot_id', 'created_at',
+                'payload')
+
+
+_STRING_FIELDS = ('gate_id', 'target_spot', 'prep_location', 'zone', 'robot_id')
+
+
+def _string_fields(payload: Mapping[str, Any], command_id: str) -> list:
+    """payload 문자열 필드 (없으면 None, 정수 ID는 문자열로)"""
+    values = []
+    for key in _STRING_FIELDS:
+        value = payload.get(key)
+        if value is not None and type(value) is not str:
+            if isinstance(value, bool) or not isinstance(value, (int, str)):
+                raise CommandValidationError(f"payload.{key} must be a string", command_id)
+            value = str(value)
+        values.append(value)
+    return values
+
+
+def _number(payload: Mapping[str, Any], key: str, default: float, command_id: str) -> float:
+    value = payload.get(key)
+    if value is None:
+        return default
+    if type(value) is int or type(value) is float:
+        return value
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise CommandValidationError(f"payload.{key} must be a number", command_id)
+    return value
+
+
+def parse_command(row: Mapping[str, Any]) -> CommandRecord:
+    """
+    ros2_commands 행 검증 → CommandRecord
+
+    Raises:
+        CommandValidationError: command_id / command_type / status / payload 형태가 잘못됨
+    """
+    if type(row) is not dict and not isinstance(row, Mapping):
+        raise CommandValidationError(f"Command row must be an object, got {type(row).__name__}")
+
+    command_id = row.get('command_id')
+    if not command_id or type(command_id) is not str:
+        raise CommandValidationError("Missing command_id")
+
+    status = row.get('status')
+    if not status or type(status) is not str:
+        raise CommandValidationError("Missing status", command_id)
+
+    type_name = row.get('command_type')
+    command_type = _TYPES_BY_NAME.get(type_name) if type(type_name) is str else None
+    if command_type is None:
+        raise CommandValidationError(f"Unknown command type: {type_name}", command_id)
+
+    payload = row.get('payload')
+    if payload is None:
+        payload = {}
+    elif type(payload) is dict or isinstance(payload, Mapping):
+        payload = dict(payload)   # 원본 행이 나중에 바뀌어도 레코드는 그대로
+    else:
+        raise CommandValidationError("payload must be an object", command_id)
+
+    duration = _number(payload, 'duration_seconds', _DEFAULT_DURATION[command_type], command_id)
+    if not 0 < duration <= MAX_DURATION_SECONDS:
+        raise CommandValidationError(
+            f"payload.duration_seconds out of range: {duration}", command_id)
+
+    gate_id, target_spot, prep_location, zone, robot_id = _string_fields(payload, command_id)
+    return CommandRecord(
+        command_id,
+        command_type,
+        _VEHICLE_COUNT.get(command_type, 0),
+        status,
+        row.get('license_plate'),
+        row.get('parking_spot_id'),
+        row.get('created_at'),
+        gate_id or DEFAULT_GATE_ID,
+        duration,
+        target_spot,
+        prep_location,
+        zone,
+        robot_id,
+        _number(payload, 'total_fee', 0, command_id),
+        MappingProxyType(payload) if payload else _EMPTY_PAYLOAD,
+    )
+
+
+class HandlerRegistry:
+    """CommandType → 처리 함수"""
+
+    def __init__(self):
+        self._handlers: Dict[CommandType, Callable[[CommandRecord], Any]] = {}
+
+    def register(self, command_type: CommandType,
+                 handler: Callable[[CommandRecord], Any]) -> 'HandlerRegistry':
+        self._handlers[command_type] = handler
+        return self
+
+    def handler_for(self, command_type: CommandType) -> Optional[Callable[[CommandRecord], Any]]:
+        return self._handlers.get(command_type)
+
+    def dispatch(self, command: CommandRecord) -> Any:
+        """
+        타입에 맞는 처리 함수 호출
+
+        Raises:
+            KeyError: 등록된 처리 함수가 없는 타입
+        """
+        return self._handlers[command.type](command)
+
+    def __contains__(self, command_type: CommandType) -> bool:
+        return command_type in self._handlers
+
+
+# =====================================================
+# 벤치마크
+# =====================================================
+
+def _synthetic_rows(count: int):
+    import uuid
+
+    rows = []
+    for i in range(count):
+        if i % 3 == 2:
+            command_type = 'PARKING_GUIDE'
+            payload = {'target_spot': f"A-{i % 100:02d}", 'prep_location': 'PREP-1',
+                       'robot_id': f"robot-{i % 4}", 'duration_seconds': 3}
+        else:
+            command_type = 'EXIT_GATE_DOUBLE' if i % 3 == 1 else 'EXIT_GATE_SINGLE'
+            payload = {'gate_id': f"EXIT-0{i % 4 + 1}", 'duration_seconds': 10,
+                       'total_fee': 3000 + i % 10 * 500}
+        rows.append({
+            'command_id': str(uuid.UUID(int=i)), 'command_type': command_type,
+            'status': 'pending', 'license_plate': f"{10 + i % 90}가{1000 + i * 7 % 9000}",
+            'parking_spot_id': f"B-{i % 100:02d}", 'created_at': '2024-01-01T00:00:00+00:00',
+            'payload': payload,
+        })
+    return rows
+
+
+def _dict_pipeline(row: Dict[str, Any], sink: list):
+    """기존 컨트롤러의 필드 접근 (handle → submit → execution_key → dispatch → execute → 완료 메시지)"""
+    if row.get('status') != 'pending':
+        return
+    command_id = row.get('command_id')
+    command_type = row.get('command_type')
+    # submit_command
+    if command_type in ('EXIT_GATE_SINGLE', 'EXIT_GATE_DOUBLE'):
+        gate_id = (row.get('payload') or {}).get('gate_id', 'EXIT-01')
+    # execution_key
+    payload_data = row.get('payload') or {}
+    if command_type in ('EXIT_GATE_SINGLE', 'EXIT_GATE_DOUBLE'):
+        key = f"gate:{payload_data.get('gate_id', 'EXIT-01')}"
+    elif command_type == 'PARKING_GUIDE' and payload_data.get('robot_id'):
+        key = f"robot:{payload_data['robot_id']}"
+    else:
+        key = f"command:{command_id}"
+    # run_command (if/elif)
+    command_type = row.get('command_type')
+    if command_type in ('EXIT_GATE_SINGLE', 'EXIT_GATE_DOUBLE'):
+        gate_id = (row.get('payload') or {}).get('gate_id', 'EXIT-01')
+        vehicles = {'EXIT_GATE_SINGLE': 1, 'EXIT_GATE_DOUBLE': 2}[row['command_type']]
+        duration = (row.get('payload') or {}).get('duration_seconds', 10)
+        exit_type = 'double' if row.get('command_type') == 'EXIT_GATE_DOUBLE' else 'single'
+        fee = row.get('payload', {}).get('total_fee', 0)
+        sink.append((key, gate_id, vehicles, duration, exit_type, row.get('license_plate'),
+                     row.get('parking_spot_id'), fee))
+    elif command_type == 'PARKING_GUIDE':
+        payload_data = row.get('payload', {})
+        target = payload_data.get('target_spot')
+        if not target:
+            target = payload_data.get('prep_location')
+        sink.append((key, target, payload_data.get('duration_seconds', 3)))
+
+
+def _record_pipeline(registry: HandlerRegistry, row: Dict[str, Any], sink: list):
+    """레코드: 수신 시 한 번 파싱 → 필드 접근 → 레지스트리 디스패치"""
+    if row.get('status') != 'pending':
+        return
+    command = parse_command(row)
+    if command.is_exit:
+        key = f"gate:{command.gate_id}"
+    elif command.robot_id:
+        key = f"robot:{command.robot_id}"
+    else:
+        key = f"command:{command.command_id}"
+    registry.dispatch(command)
+    sink.append(key)
+
+
+def _benchmark(count: int, repeat: int):
+    rows = _synthetic_rows(count)
+
+    sink: list = []
+
+    def on_exit(command: CommandRecord):
+        sink.append((command.gate_id, command.vehicle_count, command.duration_seconds,
+                     'double' if command.type is CommandType.EXIT_GATE_DOUBLE else 'single',
+                     command.license_plate, command.parking_spot_id, command.total_fee))
+
+    def on_guide(command: CommandRecord):
+        sink.append((command.target_spot or command.prep_location, command.duration_seconds))
+
+    registry = HandlerRegistry()
+    registry.register(CommandType.EXIT_GATE_SINGLE, on_exit)
+    registry.register(CommandType.EXIT_GATE_DOUBLE, on_exit)
+    registry.register(CommandType.PARKING_GUIDE, on_guide)
+
+    def best(fn) -> float:
+        timings = []
+        for _ in range(repeat):
+            sink.clear()
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings) / count * 1e9
+
+    def parse_all():
+        for row in rows:
+            parse_command(row)
+
+    parse_ns = best(parse_all)
+    records = [parse_command(row) for row in rows]
+    dispatch_ns = best(lambda: [registry.dispatch(command) for command in records])
+    dict_ns = best(lambda: [_dict_pipeline(row, sink) for row in rows])
+    record_ns = best(lambda: [_record_pipeline(registry, row, sink) for row in rows])
+
+    bad = [dict(rows[0], command_type='EXIT_GATE_TRIPLE'), dict(rows[1], payload='oops'),
+           dict(rows[2], command_id=None), dict(rows[3], payload={'duration_seconds': '10'})]
+    rejected = []
+    for row in bad:
+        try:
+            parse_command(row)
+        except CommandValidationError as e:
+            rejected.append(e.reason)
+
+    print(f"🧾 명령 레코드 벤치마크: {count:,}건 (최소값 / {repeat}회)")
+    print(f"   파싱 + 검증:          {parse_ns:,.0f}ns/건")
+    print(f"   레지스트리 디스패치:  {dispatch_ns:,.0f}ns/건")
+    print(f"   dict 경로 (기존):     {dict_ns:,.0f}ns/건")
+    print(f"   레코드 경로 (파싱 포함): {record_ns:,.0f}ns/건")
+    print(f"   거절된 잘못된 명령: {len(rejected)}/{len(bad)} → {rejected}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="명령 레코드 파싱 / 디스패치 벤치마크")
+    parser.add_argument("--commands", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    _benchmark(args.commands, args.repeat)
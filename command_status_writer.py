@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+ros2_commands 상태 write-behind 기록기
+
+- update_command_status 호출은 메모리에 기록만 하고 즉시 반환
+- 같은 command_id의 상태 변경은 하나로 합침 (processing + completed → completed 1건)
+- 배치 크기 또는 주기에 도달하면 apply_ros2_command_status RPC 한 번으로 반영
+- 실패한 배치는 백오프 후 재시도
+- 선점한 명령의 쓰기만 claimed_by를 붙임 (선점 전 실패 처리는 pending 행에만 반영, 009)
+- AsyncCommandStatusWriter: AsyncClient + 코루틴 flush (asyncio 컨트롤러용)
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# 상태 진행 순서 (낮은 상태가 높은 상태를 덮어쓰지 않도록)
+STATUS_RANK = {
+    'pending': 0,
+    'processing': 1,
+    'completed': 2,
+    'failed': 2,
+}
+
+
+def merge_status_update(current: Optional[Dict[str, Any]],
+                        update: Dict[str, Any]) -> Dict[str, Any]:
+    """같은 명령의 상태 변경 두 건을 하나로 합침"""
+    if current is None:
+        return dict(update)
+
+    merged = dict(current)
+    if STATUS_RANK.get(update['status'], 0) >= STATUS_RANK.get(current['status'], 0):
+        merged['status'] = update['status']
+
+    for key in ('executed_at', 'completed_at', 'error_message', 'claimed_by'):
+        if update.get(key) is not None:
+            merged[key] = update[key]
+
+    return merged
+
+
+class CommandStatusWriter:
+    """명령 상태 변경을 모아서 일괄 기록"""
+
+    def __init__(self, client, max_batch: int = 50, flush_interval: float = 0.2,
+                 max_retries: int = 5, retry_backoff: float = 0.5,
+                 worker_id: str = None,
+                 on_flushed: Callable[[List[str]], None] = None,
+                 on_dropped: Callable[[List[str]], None] = None):
+        """
+        Args:
+            client: Supabase 클라이언트
+            max_batch: 이 개수만큼 쌓이면 즉시 flush
+            flush_interval: 최대 flush 주기 (초)
+            max_retries: 명령별 최대 재시도 횟수 (초과 시 버림)
+            retry_backoff: 첫 재시도 대기 시간 (실패할 때마다 2배, 최대 30초)
+            worker_id: 명령을 선점한 컨트롤러 ID (지정 시 선점자일 때만 반영)
+            on_flushed: 기록이 확인된 command_id 목록을 받는 콜백
+            on_dropped: 재시도를 포기한 command_id 목록을 받는 콜백
+        """
+        self.client = client
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.worker_id = worker_id
+        self.on_flushed = on_flushed
+        self.on_dropped = on_dropped
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._in_flight: Dict[str, Dict[str, Any]] = {}    # RPC 응답을 기다리는 배치
+        self._attempts: Dict[str, int] = {}
+        self._consecutive_failures = 0
+
+        self._stats = {
+            'recorded': 0,
+            'collapsed': 0,
+            'flushed_rows': 0,
+            'requests': 0,
+            'failed_requests': 0,
+            'dropped': 0,
+        }
+
+    def record(self, command_id: str, status: str, error_message: str = None,
+               claimed: bool = True):
+        """
+        상태 변경 기록 (DB 쓰기는 백그라운드에서)
+
+        Args:
+            claimed: 이 컨트롤러가 선점한 명령인지 (False면 claimed_by 없이 기록
+                     → DB에서 아직 pending인 행에만 반영)
+        """
+        now = datetime.utcnow().isoformat()
+        update = {'command_id': command_id, 'status': status}
+
+        if status == 'processing':
+            update['executed_at'] = now
+        elif status in ['completed', 'failed']:
+            update['completed_at'] = now
+
+        if error_message:
+            update['error_message'] = error_message
+
+        if self.worker_id and claimed:
+            update['claimed_by'] = self.worker_id
+
+        with self._lock:
+            current = self._pending.get(command_id)
+            if current is not None:
+                self._stats['collapsed'] += 1
+            self._pending[command_id] = merge_status_update(current, update)
+            self._stats['recorded'] += 1
+            batch_full = len(self._pending) >= self.max_batch
+
+        if batch_full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """모아둔 상태 변경을 한 번에 기록. 기록된 행 수 반환 (실패 시 0)"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = self._pending
+                self._pending = {}
+                self._in_flight = batch
+
+            rows = list(batch.values())
+            try:
+                self.client.rpc('apply_ros2_command_status', {'p_updates': rows}).execute()
+            except Exception as e:
+                self._requeue(batch, e)
+                return 0
+            return self._acknowledge(batch)
+
+    def _acknowledge(self, batch: Dict[str, Dict[str, Any]]) -> int:
+        """기록이 확인된 배치 정리 + on_flushed"""
+        with self._lock:
+            self._in_flight = {}
+            self._stats['requests'] += 1
+            self._stats['flushed_rows'] += len(batch)
+            self._consecutive_failures = 0
+            for command_id in batch:
+                self._attempts.pop(command_id, None)
+
+        if self.on_flushed:
+            self.on_flushed(list(batch))
+        return len(batch)
+
+    def _requeue(self, batch: Dict[str, Dict[str, Any]], error: Exception):
+        """실패한 배치를 다시 대기열에 넣음 (그 사이 들어온 최신 상태를 우선)"""
+        dropped = []
+        with self._lock:
+            self._in_flight = {}
+            self._stats['requests'] += 1
+            self._stats['failed_requests'] += 1
+            self._consecutive_failures += 1
+
+            for command_id, update in batch.items():
+                attempts = self._attempts.get(command_id, 0) + 1
+                if attempts > self.max_retries:
+                    self._attempts.pop(command_id, None)
+                    self._stats['dropped'] += 1
+                    dropped.append(command_id)
+                    print(f"⚠️  상태 기록 포기: {command_id} ({update['status']})")
+                    continue
+
+                self._attempts[command_id] = attempts
+                newer = self._pending.get(command_id)
+                self._pending[command_id] = (
+                    merge_status_update(update, newer) if newer else update
+                )
+
+        print(f"⚠️  상태 일괄 기록 실패 ({len(batch)}건, 재시도 예정): {error}")
+        if dropped and self.on_dropped:
+            self.on_dropped(dropped)
+
+    def _next_wait(self) -> float:
+        if self._consecutive_failures:
+            return min(self.retry_backoff * (2 ** (self._consecutive_failures - 1)), 30.0)
+        return self.flush_interval
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self._next_wait())
+            self._wakeup.clear()
+            self.flush()
+
+    def start(self):
+        """백그라운드 flush 스레드 시작"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='status-writer',
+                                            daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float = 10.0):
+        """flush 스레드를 멈추고 남은 상태를 모두 기록 (timeout 동안 재시도)"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        deadline = time.monotonic() + timeout
+        while self.pending_count and time.monotonic() < deadline:
+            if not self.flush():
+                time.sleep(min(self._next_wait(), max(deadline - time.monotonic(), 0)))
+
+        if self.pending_count:
+            print(f"⚠️  기록하지 못한 상태 변경 {self.pending_count}건")
+
+    def is_pending(self, command_id: str) -> bool:
+        """아직 기록이 확인되지 않은 상태 변경이 있는지 (대기 중 / RPC 응답 대기 중)"""
+        with self._lock:
+            return command_id in self._pending or command_id in self._in_flight
+
+    @property
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        """기록기 통계 스냅샷"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending)
+            return stats
+
+
+class AsyncCommandStatusWriter(CommandStatusWriter):
+    """CommandStatusWriter의 asyncio 버전 (client는 AsyncClient, flush는 코루틴)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # record()는 이벤트 루프 안에서만 호출 → 스레드 Event 대신 asyncio.Event
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def flush(self) -> int:
+        """모아둔 상태 변경을 한 번에 기록. 기록된 행 수 반환 (실패 시 0)"""
+        async with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = self._pending
+                self._pending = {}
+                self._in_flight = batch
+
+            rows = list(batch.values())
+            try:
+                await self.client.rpc('apply_ros2_command_status', {'p_updates': rows}).execute()
+            except Exception as e:
+                self._requeue(batch, e)
+                return 0
+            return self._acknowledge(batch)
+
+    async def _run(self):
+        while not self._stopped.is_set():
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._next_wait())
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        """flush 코루틴 시작 (이벤트 루프 안에서 호출)"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self, timeout: float = 10.0):
+        """flush 코루틴을 멈추고 남은 상태를 모두 기록 (timeout 동안 재시도)"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.pending_count and loop.time() < deadline:
+            if not await self.flush():
+                await asyncio.sleep(min(self._next_wait(), max(deadline - loop.time(), 0)))
+
+        if self.pending_count:
+            print(f"⚠️  기록하지 못한 상태 변경 {self.pending_count}건")
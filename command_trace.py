@@ -0,0 +1,623 @@
+#!/usr/bin/env python3
+"""
+명령 트래픽 트레이스 기록 / 시간 배율 재생
+
+test_insert_command.py처럼 명령 한 건을 넣어서는 실제 도착 패턴(출근 / 퇴근 피크)에서
+컨트롤러가 어떻게 동작하는지 알 수 없음. ros2_commands / tasks INSERT를 도착 시각과 함께
+로컬 파일에 남기고, 같은 패턴을 로컬 Supabase 대역에 다시 넣어 지연 / 처리량을 비교.
+
+- 트레이스: JSON Lines (.gz면 gzip), 첫 줄 헤더 + 이벤트마다 {'t': 첫 이벤트 기준 초, 'table', 'row'}
+  서버가 채우는 컬럼(ID / 상태 / 타임스탬프 / 선점 정보)은 빼고 저장 → 재생 시 로컬 DB가 다시 채움
+- 기록: TraceRecorder (Realtime 허브 INSERT 라우트) 또는 record_history (created_at 구간 조회)
+- 재생: 1× / 10× / max(대기 없이) → ExitController + TaskScheduler + 가짜 로봇
+  게이트 / 안내 / 작업 처리 시간은 배율과 무관하게 고정 (도착 간격만 줄어듦)
+- 비교: 재생 결과 JSON 여러 개의 지연 / 처리량을 기준 실행 대비 비율로
+
+사용법:
+    python command_trace.py record --output rush.jsonl.gz                 # Realtime으로 실시간 기록
+    python command_trace.py record --output rush.jsonl.gz \\
+        --since 2024-03-04T08:00:00+09:00 --until 2024-03-04T09:30:00+09:00  # 저장된 행에서
+    python command_trace.py synth --output rush.jsonl.gz --minutes 30     # 합성 피크 트레이스
+    python command_trace.py replay rush.jsonl.gz --speed 10 --output run-a.json
+    python command_trace.py compare run-a.json run-b.json
+"""
+
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from bench_exit_controller import percentile, synthetic_command
+from command_backfill import parse_timestamp
+from local_supabase import PRIMARY_KEYS, LocalDatabase, LocalSupabaseClient
+
+TRACE_FORMAT = 'ros2-command-trace'
+TRACE_VERSION = 1
+DEFAULT_TABLES = ('ros2_commands', 'tasks')
+
+# 서버 / 컨트롤러가 채우는 컬럼 (트레이스에 남기지 않음)
+SERVER_COLUMNS = {
+    'ros2_commands': frozenset({
+        'command_id', 'status', 'error_message', 'created_at', 'executed_at', 'completed_at',
+        'claimed_by', 'lease_expires_at', 'attempt_count',
+    }),
+    'tasks': frozenset({
+        'task_id', 'status', 'done', 'assigned_robot', 'helper_robot', 'created_at',
+        'started_at', 'completed_at',
+    }),
+}
+
+# 비교할 지표 (높을수록 좋은 / 낮을수록 좋은)
+HIGHER_IS_BETTER = ('commands_per_second', 'tasks_per_second')
+LOWER_IS_BETTER = ('dispatch_p50_ms', 'dispatch_p99_ms', 'latency_p50_ms', 'latency_p99_ms',
+                   'task_wait_p50_ms', 'task_wait_p99_ms', 'schedule_slip_p99_ms')
+
+
+class TraceEvent(NamedTuple):
+    """트레이스 이벤트 1건"""
+    offset: float           # 첫 이벤트 기준 초
+    table: str
+    row: Dict[str, Any]
+
+
+def trace_row(table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+    """서버가 채우는 컬럼을 뺀 INSERT 행"""
+    drop = SERVER_COLUMNS.get(table, frozenset({PRIMARY_KEYS.get(table), 'created_at'}))
+    return {key: value for key, value in row.items() if key not in drop}
+
+
+def _open(path: str, mode: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+# =====================================================
+# 트레이스 파일
+# =====================================================
+
+class TraceWriter:
+    """트레이스 파일 쓰기 (헤더 + 이벤트 JSON Lines)"""
+
+    def __init__(self, path: str, source: str, tables: Iterable[str] = DEFAULT_TABLES,
+                 **header: Any):
+        """
+        Args:
+            path: 저장 경로 (.gz면 gzip)
+            source: 'realtime' / 'history' / 'synthetic'
+            tables: 기록하는 테이블
+            header: 헤더에 더 남길 값 (구간, 시드 등)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = _open(path, 'w')
+        self._file.write(json.dumps({
+            'format': TRACE_FORMAT,
+            'version': TRACE_VERSION,
+            'source': source,
+            'tables': list(tables),
+            'recorded_at': datetime.now(timezone.utc).isoformat(),
+            **header,
+        }, ensure_ascii=False) + '\n')
+        self.events = 0
+
+    def write(self, offset: float, table: str, row: Dict[str, Any]):
+        line = json.dumps({'t': round(offset, 6), 'table': table, 'row': trace_row(table, row)},
+                          ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self.events += 1
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def read_trace(path: str) -> Tuple[Dict[str, Any], List[TraceEvent]]:
+    """
+    트레이스 파일 읽기 → (헤더, 시각순 이벤트)
+
+    Raises:
+        ValueError: 트레이스 형식 / 버전이 다름
+    """
+    with _open(path, 'r') as f:
+        header = json.loads(f.readline() or '{}')
+        if header.get('format') != TRACE_FORMAT:
+            raise ValueError(f"Not a command trace: {path}")
+        if header.get('version') != TRACE_VERSION:
+            raise ValueError(f"Unsupported trace version: {header.get('version')}")
+        events = [TraceEvent(record['t'], record['table'], record['row'])
+                  for record in map(json.loads, f) if record]
+    events.sort(key=lambda event: event.offset)
+    return header, events
+
+
+# =====================================================
+# 기록
+# =====================================================
+
+class TraceRecorder:
+    """Realtime INSERT를 트레이스 파일로 기록"""
+
+    def __init__(self, path: str, tables: Iterable[str] = DEFAULT_TABLES):
+        """
+        Args:
+            path: 저장 경로 (.gz면 gzip)
+            tables: 기록할 테이블 (INSERT만)
+        """
+        self.tables = tuple(tables)
+        self.writer = TraceWriter(path, 'realtime', self.tables)
+        self._started: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stats = {table: 0 for table in self.tables}
+
+    def route(self, hub) -> 'TraceRecorder':
+        """RealtimeHub에 테이블별 INSERT 라우트 등록"""
+        for table in self.tables:
+            hub.route(table, self.on_insert, event='INSERT', name=f"trace:{table}")
+        return self
+
+    def on_insert(self, change: Dict[str, Any]):
+        """정규화된 INSERT payload 기록 (도착 시각 = 수신 시각)"""
+        now = time.monotonic()
+        table = change.get('table')
+        row = change.get('new') or {}
+        if table not in self._stats or not row:
+            return
+        with self._lock:
+            if self._started is None:
+                self._started = now
+            offset = now - self._started
+            self._stats[table] += 1
+        self.writer.write(offset, table, row)
+
+    def close(self):
+        self.writer.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['seconds'] = round(time.monotonic() - self._started, 1) if self._started else 0.0
+        return stats
+
+
+def _history_pages(client, table: str, since: datetime, until: datetime,
+                   page_size: int) -> Iterable[List[Dict[str, Any]]]:
+    """created_at 구간 행을 (created_at, PK) keyset 페이지로"""
+    pk = PRIMARY_KEYS[table]
+    after = None
+    while True:
+        query = client.table(table).select('*') \
+            .gte('created_at', since.isoformat()).lt('created_at', until.isoformat())
+        if after is not None:
+            last_key, last_id = after
+            query = query.or_(f'created_at.gt."{last_key}",'
+                              f'and(created_at.eq."{last_key}",{pk}.gt.{last_id})')
+        rows = query.order('created_at').order(pk).limit(page_size).execute().data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        after = (rows[-1]['created_at'], rows[-1][pk])
+
+
+def record_history(client, path: str, since: datetime, until: datetime,
+                   tables: Iterable[str] = DEFAULT_TABLES, page_size: int = 1000) -> int:
+    """
+    저장된 행의 created_at으로 트레이스 생성 (지난 피크 시간대 재현용)
+
+    Returns:
+        기록한 이벤트 수
+    """
+    tables = tuple(tables)
+    events = []
+    for table in tables:
+        for rows in _history_pages(client, table, since, until, page_size):
+            events.extend((parse_timestamp(row['created_at']), table, row) for row in rows)
+    events.sort(key=lambda event: event[0])
+
+    writer = TraceWriter(path, 'history', tables, since=since.isoformat(),
+                         until=until.isoformat())
+    try:
+        first = events[0][0] if events else None
+        for created_at, table, row in events:
+            writer.write((created_at - first).total_seconds(), table, row)
+    finally:
+        writer.close()
+    return len(events)
+
+
+def synthesize_rush_hour(path: str, minutes: float = 30.0, peak_per_minute: float = 120.0,
+                         base_per_minute: float = 10.0, gates: int = 4,
+                         seed: int = 7) -> int:
+    """
+    합성 피크 트레이스 (가운데가 가장 붐비는 비균질 포아송 도착)
+
+    출차 명령마다 EXIT 작업, 주차 안내마다 PARK 작업을 같이 넣음.
+
+    Returns:
+        이벤트 수
+    """
+    rng = random.Random(seed)
+    duration = minutes * 60
+    peak_rate = peak_per_minute / 60
+
+    def rate(t: float) -> float:
+        shape = math.exp(-((t / duration - 0.5) ** 2) / (2 * 0.15 ** 2))
+        return (base_per_minute + (peak_per_minute - base_per_minute) * shape) / 60
+
+    writer = TraceWriter(path, 'synthetic', DEFAULT_TABLES, minutes=minutes,
+                         peak_per_minute=peak_per_minute, seed=seed)
+    t = 0.0
+    index = 0
+    try:
+        while True:
+            # thinning: 최대 도착률로 뽑고 rate(t) / peak 확률로 채택
+            t += rng.expovariate(peak_rate)
+            if t >= duration:
+                break
+            if rng.random() > rate(t) / peak_rate:
+                continue
+            command = synthetic_command(index, gates, 1.0, rng)
+            writer.write(t, 'ros2_commands', command)
+            task_type = 'PARK' if command['command_type'] == 'PARKING_GUIDE' else 'EXIT'
+            writer.write(t + 0.05, 'tasks', {
+                'task_type': task_type,
+                'vehicle_plate': command['license_plate'],
+                'start_location': command['parking_spot_id'],
+                'priority': 1 if task_type == 'EXIT' else 0,
+            })
+            index += 1
+    finally:
+        writer.close()
+    return writer.events
+
+
+# =====================================================
+# 재생
+# =====================================================
+
+class _RobotPool:
+    """TaskScheduler에서 작업을 꺼내 task_seconds 뒤 완료하는 가짜 로봇들"""
+
+    def __init__(self, scheduler, client, robots: int, task_seconds: float):
+        self.scheduler = scheduler
+        self.client = client
+        self.task_seconds = task_seconds
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._run, args=(f"robot-{i + 1}",),
+                                          daemon=True) for i in range(robots)]
+
+    def start(self) -> '_RobotPool':
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def _run(self, robot_id: str):
+        while not self._stop.is_set():
+            task = self.scheduler.dispatch(robot_id=robot_id)
+            if task is None:
+                self._stop.wait(0.005)
+                continue
+            self._stop.wait(self.task_seconds)
+            self.client.table('tasks').update({
+                'status': 'completed', 'done': True,
+                'completed_at': datetime.now(timezone.utc).isoformat(),
+            }).eq('task_id', task['task_id']).execute()
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+
+
+def _seconds_between(start: str, end: str) -> float:
+    """타임스탬프 차이 (상태 기록기의 completed_at은 타임존 없는 UTC)"""
+    return (parse_timestamp(end) - parse_timestamp(start)).total_seconds()
+
+
+def _finished(db: LocalDatabase) -> bool:
+    return all(r.get('status') in ('completed', 'failed') for r in db.select('ros2_commands')) \
+        and all(r.get('status') in ('completed', 'failed') for r in db.select('tasks'))
+
+
+def _run_replay(events: List[TraceEvent], db: LocalDatabase, options: Dict[str, Any]):
+    """트레이스를 로컬 DB에 넣고 컨트롤러 / 스케줄러 / 로봇 실행 → (컨트롤러, 경과, 스케줄 지연 목록)"""
+    from ros2_exit_controller import ExitController
+    from task_scheduler import TaskScheduler
+
+    client = LocalSupabaseClient(db, request_latency=options['request_latency'])
+    commands = sum(1 for event in events if event.table == 'ros2_commands')
+    controller = ExitController(client=client, max_workers=options['workers'],
+                                max_pending=max(commands, 256), worker_id='replay-worker',
+                                coalesce_window=options['coalesce_window'],
+                                simulate_feedback=True)
+    controller.feedback_simulator.gate_close_seconds = options['gate_close_seconds']
+    controller.feedback_simulator.guide_seconds = options['guide_seconds']
+
+    scheduler = TaskScheduler(client)
+    channel = client.channel('trace-replay')
+    channel.on_postgres_changes(event='INSERT', schema='public', table='ros2_commands',
+                                callback=controller.handle_command)
+    channel.on_postgres_changes(event='*', schema='public', table='tasks',
+                                callback=scheduler.on_change)
+    channel.subscribe(controller.backfill.on_subscribe_state)
+    robots = _RobotPool(scheduler, client, options['robots'], options['task_seconds']).start()
+
+    speed = options['speed']
+    slips = []
+    started = time.perf_counter()
+    for event in events:
+        if speed:
+            delay = started + event.offset / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            slips.append(max(0.0, -delay))
+        db.insert(event.table, [dict(event.row)])
+
+    deadline = time.perf_counter() + options['timeout']
+    while time.perf_counter() < deadline and not _finished(db):
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    channel.unsubscribe()
+    robots.stop()
+    if controller.gate_coalescer:
+        controller.gate_coalescer.flush_all()
+    controller.command_executor.shutdown(wait=True)
+    controller.claimer.stop()
+    controller.status_writer.close()
+    return controller, elapsed, slips
+
+
+def replay(events: List[TraceEvent], speed: float = 1.0, workers: int = 8,
+           coalesce_window: float = 0.02, request_latency: float = 0.0,
+           gate_close_seconds: float = 0.005, guide_seconds: float = 0.005,
+           robots: int = 4, task_seconds: float = 0.005, timeout: float = 600.0,
+           trace_name: str = None) -> Dict[str, Any]:
+    """
+    트레이스 재생 1회 → 결과 dict
+
+    Args:
+        events: read_trace()의 이벤트
+        speed: 도착 간격 배율 (1 = 실제 속도, 10 = 10배 빠르게, 0 = 대기 없이 최대 속도)
+        workers / coalesce_window: ExitController 설정 (비교하려는 변경)
+        request_latency: PostgREST 요청당 지연 (초)
+        gate_close_seconds / guide_seconds: 가짜 게이트 닫힘 / 안내 완료까지 시간
+        robots / task_seconds: 가짜 로봇 수 / 작업 1건 처리 시간
+        timeout: 마지막 이벤트 이후 처리 완료를 기다리는 최대 시간
+    """
+    options = dict(speed=speed, workers=workers, coalesce_window=coalesce_window,
+                   request_latency=request_latency, gate_close_seconds=gate_close_seconds,
+                   guide_seconds=guide_seconds, robots=robots, task_seconds=task_seconds,
+                   timeout=timeout)
+    db = LocalDatabase()
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        controller, elapsed, slips = _run_replay(events, db, options)
+    db.close()
+
+    commands = db.select('ros2_commands')
+    tasks = db.select('tasks')
+    finished = [r for r in commands if r.get('status') in ('completed', 'failed')]
+    dispatch = [_seconds_between(r['created_at'], r['executed_at'])
+                for r in commands if r.get('executed_at')]
+    latency = [_seconds_between(r['created_at'], r['completed_at'])
+               for r in commands if r.get('completed_at')]
+    task_wait = [_seconds_between(r['created_at'], r['started_at'])
+                 for r in tasks if r.get('started_at')]
+    tasks_done = sum(1 for r in tasks if r.get('status') == 'completed')
+    coalescer_stats = controller.gate_coalescer.stats() if controller.gate_coalescer else {}
+    span = events[-1].offset if events else 0.0
+
+    def ms(values: List[float], q: float) -> float:
+        return round(percentile(values, q) * 1000, 2)
+
+    return {
+        'config': {k: v for k, v in options.items() if k != 'timeout'},
+        'trace': trace_name,
+        'trace_seconds': round(span, 1),
+        'commands': len(commands),
+        'completed': sum(1 for r in finished if r['status'] == 'completed'),
+        'failed': sum(1 for r in finished if r['status'] == 'failed'),
+        'unfinished': len(commands) - len(finished),
+        'elapsed_seconds': round(elapsed, 3),
+        'commands_per_second': round(len(finished) / elapsed, 1) if elapsed else 0.0,
+        'dispatch_p50_ms': ms(dispatch, 0.50),
+        'dispatch_p99_ms': ms(dispatch, 0.99),
+        'latency_p50_ms': ms(latency, 0.50),
+        'latency_p99_ms': ms(latency, 0.99),
+        'tasks': len(tasks),
+        'tasks_completed': tasks_done,
+        'tasks_per_second': round(tasks_done / elapsed, 1) if elapsed else 0.0,
+        'task_wait_p50_ms': ms(task_wait, 0.50),
+        'task_wait_p99_ms': ms(task_wait, 0.99),
+        'schedule_slip_p99_ms': ms(slips, 0.99),
+        'gate_cycles': coalescer_stats.get('cycles', 0),
+        'db_requests': db.stats['requests'],
+    }
+
+
+# =====================================================
+# 비교
+# =====================================================
+
+def compare_runs(results: List[Dict[str, Any]]) -> List[str]:
+    """첫 번째 결과 대비 나머지 결과의 지표 변화 (표 형태 줄 목록)"""
+    base = results[0]
+    names = [os.path.basename(r.get('_path', f"run{i}")) for i, r in enumerate(results)]
+    lines = [f"{'지표':<24}" + ''.join(f"{name:>22}" for name in names)]
+    for key in HIGHER_IS_BETTER + LOWER_IS_BETTER + ('failed', 'unfinished'):
+        if key not in base:
+            continue
+        cells = [f"{base[key]:>22}"]
+        for result in results[1:]:
+            value = result.get(key)
+            if value is None:
+                cells.append(f"{'-':>22}")
+                continue
+            cell = f"{value}"
+            if base[key]:
+                change = value / base[key] - 1
+                better = change > 0 if key in HIGHER_IS_BETTER else change < 0
+                mark = '' if abs(change) < 0.05 or key not in HIGHER_IS_BETTER + LOWER_IS_BETTER \
+                    else (' ✅' if better else ' ❌')
+                cell += f" ({change:+.0%}){mark}"
+            cells.append(f"{cell:>22}")
+        lines.append(f"{key:<24}" + ''.join(cells))
+    return lines
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+def _speed(value: str) -> float:
+    """'1' / '10' / '10x' / 'max' → 배율 (max = 0)"""
+    value = value.strip().lower()
+    if value == 'max':
+        return 0.0
+    return float(value[:-1] if value.endswith(('x', '×')) else value)
+
+
+def _record(args) -> int:
+    from ros2_exit_controller import get_supabase
+
+    client = get_supabase()
+    if args.since:
+        since = parse_timestamp(args.since)
+        until = parse_timestamp(args.until) if args.until else datetime.now(timezone.utc)
+        count = record_history(client, args.output, since, until, args.tables)
+        print(f"💾 {args.output}: {count}건 ({since.isoformat()} ~ {until.isoformat()})")
+        return 0
+
+    from realtime_hub import RealtimeHub
+
+    recorder = TraceRecorder(args.output, args.tables)
+    hub = RealtimeHub(client, name='trace-recorder')
+    recorder.route(hub)
+    hub.start()
+    print(f"⏺️  {', '.join(args.tables)} INSERT 기록 중 → {args.output} (Ctrl+C로 종료)")
+    try:
+        while True:
+            time.sleep(1)
+            recorder.writer.flush()
+    except KeyboardInterrupt:
+        pass
+    hub.close()
+    recorder.close()
+    print(f"\n💾 기록 완료: {recorder.stats()}")
+    return 0
+
+
+def _replay(args) -> int:
+    header, events = read_trace(args.trace)
+    speed_label = 'max' if not args.speed else f"{args.speed:g}×"
+    print(f"▶️  {args.trace}: 이벤트 {len(events)}건, {events[-1].offset if events else 0:.0f}초 "
+          f"({header.get('source')}) → {speed_label}")
+    result = replay(events, speed=args.speed, workers=args.workers,
+                    coalesce_window=args.coalesce_window, request_latency=args.request_latency,
+                    gate_close_seconds=args.gate_close_seconds, guide_seconds=args.guide_seconds,
+                    robots=args.robots, task_seconds=args.task_seconds, timeout=args.timeout,
+                    trace_name=os.path.basename(args.trace))
+
+    print(f"   명령: {result['commands_per_second']}건/초 "
+          f"({result['elapsed_seconds']}초, 완료 {result['completed']}, 실패 {result['failed']}, "
+          f"미완료 {result['unfinished']})")
+    print(f"   dispatch 지연: p50={result['dispatch_p50_ms']}ms p99={result['dispatch_p99_ms']}ms")
+    print(f"   완료 지연:     p50={result['latency_p50_ms']}ms p99={result['latency_p99_ms']}ms")
+    print(f"   작업: {result['tasks_completed']}/{result['tasks']}건, 대기 "
+          f"p50={result['task_wait_p50_ms']}ms p99={result['task_wait_p99_ms']}ms")
+    print(f"   재생 스케줄 지연 p99: {result['schedule_slip_p99_ms']}ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"💾 결과 저장: {args.output}")
+    return 1 if result['unfinished'] else 0
+
+
+def _compare(args) -> int:
+    results = []
+    for path in args.results:
+        with open(path) as f:
+            result = json.load(f)
+        result['_path'] = path
+        results.append(result)
+
+    traces = {r.get('trace') for r in results}
+    if len(traces) > 1:
+        print(f"⚠️  서로 다른 트레이스 비교: {sorted(t or '-' for t in traces)}")
+    speeds = {r['config'].get('speed') for r in results}
+    if len(speeds) > 1:
+        print(f"⚠️  재생 배율이 다름: {sorted(speeds)}")
+    for line in compare_runs(results):
+        print(line)
+    return 0
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="명령 트래픽 트레이스 기록 / 재생 / 비교")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help='Realtime INSERT 또는 저장된 행으로 트레이스 기록')
+    record.add_argument('--output', required=True)
+    record.add_argument('--tables', nargs='+', default=list(DEFAULT_TABLES))
+    record.add_argument('--since', help='저장된 행에서 기록 (created_at 시작, ISO 8601)')
+    record.add_argument('--until', help='created_at 끝 (기본: 지금)')
+
+    synth = commands.add_parser('synth', help='합성 피크 트레이스 생성')
+    synth.add_argument('--output', required=True)
+    synth.add_argument('--minutes', type=float, default=30.0)
+    synth.add_argument('--peak-per-minute', type=float, default=120.0)
+    synth.add_argument('--base-per-minute', type=float, default=10.0)
+    synth.add_argument('--gates', type=int, default=4)
+    synth.add_argument('--seed', type=int, default=7)
+
+    play = commands.add_parser('replay', help='트레이스를 로컬 대역에 재생')
+    play.add_argument('trace')
+    play.add_argument('--speed', type=_speed, default=1.0, help="1 / 10 / max")
+    play.add_argument('--workers', type=int, default=8)
+    play.add_argument('--coalesce-window', type=float, default=0.02)
+    play.add_argument('--request-latency', type=float, default=0.0,
+                      help='PostgREST 요청당 지연 (초)')
+    play.add_argument('--gate-close-seconds', type=float, default=0.005)
+    play.add_argument('--guide-seconds', type=float, default=0.005)
+    play.add_argument('--robots', type=int, default=4)
+    play.add_argument('--task-seconds', type=float, default=0.005)
+    play.add_argument('--timeout', type=float, default=600.0)
+    play.add_argument('--output', help='결과 JSON 저장 경로')
+
+    compare = commands.add_parser('compare', help='재생 결과 비교 (첫 번째가 기준)')
+    compare.add_argument('results', nargs='+')
+
+    args = parser.parse_args(argv)
+    if args.command == 'record':
+        return _record(args)
+    if args.command == 'synth':
+        count = synthesize_rush_hour(args.output, args.minutes, args.peak_per_minute,
+                                     args.base_per_minute, args.gates, args.seed)
+        print(f"💾 {args.output}: 이벤트 {count}건 ({args.minutes:g}분)")
+        return 0
+    if args.command == 'replay':
+        return _replay(args)
+    return _compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
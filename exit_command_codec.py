@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+/parking/exit_command 바이너리 코덱
+
+"EXIT|gate|count|duration|spot|cycle" 문자열 대신 버전이 있는 고정 길이 바이너리 메시지.
+받는 쪽에서 split / int() 파싱이 필요 없고, 발행 시각 / 순번이 함께 전달됨.
+
+메시지 구조 (little-endian):
+    헤더 16바이트: magic 'PK' | version u8 | kind u8 | sequence u32 | timestamp_us i64
+    EXIT  본문 76바이트: vehicle_count u8 | pad 3 | duration_ms u32 | cycle_id u32
+                         | gate_id 32s | parking_spot 32s
+    GUIDE 본문 76바이트: pad 4 | duration_ms u32 | cycle_id u32 | target_spot 32s | prep_location 32s
+    (cycle_id: 게이트가 닫힘 신호 "CLOSED|<gate>|<cycle_id>"로 돌려주는 상관 ID, 안내는 0)
+    (문자열은 UTF-8, 32바이트 NUL 패딩 → gate_id / location_id VARCHAR(20)이 들어가고, 넘으면 ValueError)
+
+- encode_exit / encode_guide: bytes 생성 (pack_*_into: 미리 잡은 버퍼에 쓰기)
+- decode: 버퍼(memoryview / msg.data) 위의 읽기 전용 뷰 반환 (필드는 읽을 때만 해석, 복사 없음)
+- CommandTransport: 발행 / 구독 추상화
+  InProcessTransport(rclpy 없이 테스트), Ros2Transport(std_msgs/UInt8MultiArray)
+
+사용법 (마이크로벤치마크):
+    python exit_command_codec.py --count 200000
+"""
+
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Union
+
+MAGIC = b'PK'
+VERSION = 3  # 2: cycle_id 추가, 3: 문자열 필드 16 → 32바이트
+KIND_EXIT = 1
+KIND_GUIDE = 2
+
+# 바이너리 토픽 (std_msgs/UInt8MultiArray). 기존 String 토픽과 나란히 사용
+EXIT_COMMAND_BINARY_TOPIC = '/parking/exit_command_bin'
+
+FIELD_SIZE = 32  # 문자열 필드 (VARCHAR(20) ID + 여유)
+
+_HEADER = struct.Struct('<2sBBIq')
+_EXIT = struct.Struct(f'<2sBBIqB3xII{FIELD_SIZE}s{FIELD_SIZE}s')
+_GUIDE = struct.Struct(f'<2sBBIq4xII{FIELD_SIZE}s{FIELD_SIZE}s')
+HEADER_SIZE = _HEADER.size
+MESSAGE_SIZE = _EXIT.size  # EXIT / GUIDE 같은 길이 (92바이트)
+_TEXT_OFFSETS = (28, 28 + FIELD_SIZE)  # 문자열 필드 두 개의 위치
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+_FIELD_CACHE: Dict[Optional[str], bytes] = {}
+
+
+def _field(value: Optional[str]) -> bytes:
+    """문자열 필드 인코딩 (게이트 / 주차면 ID는 종류가 적어 캐시)"""
+    encoded = _FIELD_CACHE.get(value)
+    if encoded is None:
+        encoded = (value or '').encode('utf-8')
+        if len(encoded) > FIELD_SIZE:
+            raise ValueError(f"{FIELD_SIZE}바이트 초과: {value!r}")
+        if len(_FIELD_CACHE) < 4096:
+            _FIELD_CACHE[value] = encoded
+    return encoded
+
+
+def _text(raw: bytes) -> str:
+    return raw.rstrip(b'\0').decode('utf-8')
+
+
+def _now_us() -> int:
+    return time.time_ns() // 1000
+
+
+def pack_exit_into(buffer: Union[bytearray, memoryview], offset: int, gate_id: str,
+                   vehicle_count: int, duration_seconds: float, parking_spot: str = None,
+                   cycle_id: int = 0, sequence: int = 0, timestamp_us: int = None):
+    """EXIT 메시지를 buffer[offset:offset + MESSAGE_SIZE]에 쓰기"""
+    _EXIT.pack_into(buffer, offset, MAGIC, VERSION, KIND_EXIT, sequence & 0xFFFFFFFF,
+                    _now_us() if timestamp_us is None else timestamp_us,
+                    vehicle_count, int(duration_seconds * 1000 + 0.5), cycle_id & 0xFFFFFFFF,
+                    _field(gate_id), _field(parking_spot))
+
+
+def pack_guide_into(buffer: Union[bytearray, memoryview], offset: int, target_spot: str,
+                    duration_seconds: float, prep_location: str = None,
+                    sequence: int = 0, timestamp_us: int = None):
+    """GUIDE 메시지를 buffer[offset:offset + MESSAGE_SIZE]에 쓰기"""
+    _GUIDE.pack_into(buffer, offset, MAGIC, VERSION, KIND_GUIDE, sequence & 0xFFFFFFFF,
+                     _now_us() if timestamp_us is None else timestamp_us,
+                     int(duration_seconds * 1000 + 0.5), 0,
+                     _field(target_spot), _field(prep_location))
+
+
+def encode_exit(gate_id: str, vehicle_count: int, duration_seconds: float,
+                parking_spot: str = None, cycle_id: int = 0, sequence: int = 0,
+                timestamp_us: int = None) -> bytes:
+    """출차 명령 → MESSAGE_SIZE바이트"""
+    return _EXIT.pack(MAGIC, VERSION, KIND_EXIT, sequence & 0xFFFFFFFF,
+                      _now_us() if timestamp_us is None else timestamp_us,
+                      vehicle_count, int(duration_seconds * 1000 + 0.5), cycle_id & 0xFFFFFFFF,
+                      _field(gate_id), _field(parking_spot))
+
+
+def encode_guide(target_spot: str, duration_seconds: float, prep_location: str = None,
+                 sequence: int = 0, timestamp_us: int = None) -> bytes:
+    """주차 안내 명령 → MESSAGE_SIZE바이트"""
+    return _GUIDE.pack(MAGIC, VERSION, KIND_GUIDE, sequence & 0xFFFFFFFF,
+                       _now_us() if timestamp_us is None else timestamp_us,
+                       int(duration_seconds * 1000 + 0.5), 0,
+                       _field(target_spot), _field(prep_location))
+
+
+_U8 = struct.Struct('<B')
+_U32 = struct.Struct('<I')
+_I64 = struct.Struct('<q')
+_TEXT = struct.Struct(f'{FIELD_SIZE}s')
+
+
+class _CommandView(ABC):
+    """버퍼 위의 읽기 전용 메시지 뷰 (복사 없이 필드를 읽을 때 해석)"""
+
+    __slots__ = ('_buffer', '_offset')
+    kind = 0
+
+    def __init__(self, buffer: Buffer, offset: int = 0):
+        self._buffer = buffer
+        self._offset = offset
+
+    @property
+    def version(self) -> int:
+        return _U8.unpack_from(self._buffer, self._offset + 2)[0]
+
+    @property
+    def sequence(self) -> int:
+        return _U32.unpack_from(self._buffer, self._offset + 4)[0]
+
+    @property
+    def timestamp_us(self) -> int:
+        return _I64.unpack_from(self._buffer, self._offset + 8)[0]
+
+    @property
+    def duration_seconds(self) -> float:
+        return _U32.unpack_from(self._buffer, self._offset + 20)[0] / 1000
+
+    @property
+    def cycle_id(self) -> int:
+        return _U32.unpack_from(self._buffer, self._offset + 24)[0]
+
+    def _text_at(self, position: int) -> str:
+        return _text(_TEXT.unpack_from(self._buffer, self._offset + position)[0])
+
+    @abstractmethod
+    def to_dict(self) -> Dict[str, Any]:
+        """모든 필드"""
+
+
+class ExitCommandView(_CommandView):
+    __slots__ = ()
+    kind = KIND_EXIT
+
+    @property
+    def vehicle_count(self) -> int:
+        return _U8.unpack_from(self._buffer, self._offset + 16)[0]
+
+    @property
+    def gate_id(self) -> str:
+        return self._text_at(_TEXT_OFFSETS[0])
+
+    @property
+    def parking_spot(self) -> str:
+        return self._text_at(_TEXT_OFFSETS[1])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """모든 필드 (unpack 한 번)"""
+        _, _, _, sequence, timestamp_us, count, duration_ms, cycle_id, gate_id, spot = \
+            _EXIT.unpack_from(self._buffer, self._offset)
+        return {'kind': 'EXIT', 'gate_id': _text(gate_id), 'vehicle_count': count,
+                'duration_seconds': duration_ms / 1000, 'parking_spot': _text(spot),
+                'cycle_id': cycle_id, 'sequence': sequence, 'timestamp_us': timestamp_us}
+
+
+class GuideCommandView(_CommandView):
+    __slots__ = ()
+    kind = KIND_GUIDE
+
+    @property
+    def target_spot(self) -> str:
+        return self._text_at(_TEXT_OFFSETS[0])
+
+    @property
+    def prep_location(self) -> str:
+        return self._text_at(_TEXT_OFFSETS[1])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """모든 필드 (unpack 한 번)"""
+        _, _, _, sequence, timestamp_us, duration_ms, _, target, prep = \
+            _GUIDE.unpack_from(self._buffer, self._offset)
+        return {'kind': 'GUIDE', 'target_spot': _text(target), 'prep_location': _text(prep),
+                'duration_seconds': duration_ms / 1000,
+                'sequence': sequence, 'timestamp_us': timestamp_us}
+
+
+_VIEWS = {KIND_EXIT: ExitCommandView, KIND_GUIDE: GuideCommandView}
+
+
+def decode(buffer: Buffer, offset: int = 0) -> _CommandView:
+    """
+    메시지 뷰 반환 (복사 없음, buffer가 살아 있는 동안만 유효)
+
+    buffer: bytes / bytearray / 1바이트 memoryview / array('B') (ROS2 msg.data)
+
+    Raises:
+        ValueError: 길이 / magic / 버전 / 종류가 맞지 않을 때
+    """
+    try:
+        magic, version, kind, _, _ = _HEADER.unpack_from(buffer, offset)
+    except struct.error as e:
+        raise ValueError(f"메시지 길이 부족: {e}") from None
+    if magic != MAGIC:
+        raise ValueError(f"알 수 없는 메시지: magic {magic!r}")
+    if version != VERSION:
+        raise ValueError(f"지원하지 않는 버전: {version}")
+    view_class = _VIEWS.get(kind)
+    if view_class is None:
+        raise ValueError(f"알 수 없는 명령 종류: {kind}")
+    if len(buffer) - offset < MESSAGE_SIZE:
+        raise ValueError(f"메시지 길이 부족: {MESSAGE_SIZE}바이트 필요")
+    return view_class(buffer, offset)
+
+
+# ----- 기존 문자열 형식 (비교 / 호환용) -----
+
+def encode_exit_string(gate_id: str, vehicle_count: int, duration: int, parking_spot: str,
+                       cycle_id: int = None) -> str:
+    if cycle_id is None:
+        return f"EXIT|{gate_id}|{vehicle_count}|{duration}|{parking_spot}"
+    return f"EXIT|{gate_id}|{vehicle_count}|{duration}|{parking_spot}|{cycle_id}"
+
+
+def decode_exit_string(data: str) -> Optional[Dict[str, Any]]:
+    """"EXIT|gate|count|duration|spot[|cycle]" 파싱 (형식이 다르면 None, cycle이 없으면 cycle_id=None)"""
+    parts = data.split('|')
+    if len(parts) not in (5, 6) or parts[0] != 'EXIT':
+        return None
+    try:
+        return {'gate_id': parts[1], 'vehicle_count': int(parts[2]),
+                'duration_seconds': float(parts[3]), 'parking_spot': parts[4],
+                'cycle_id': int(parts[5]) if len(parts) == 6 else None}
+    except ValueError:
+        return None
+
+
+# ----- 전송 추상화 -----
+
+class CommandTransport(ABC):
+    """명령 메시지 발행 / 구독 인터페이스"""
+
+    @abstractmethod
+    def publish(self, message: Buffer):
+        """인코딩된 메시지 1건 발행"""
+
+    @abstractmethod
+    def subscribe(self, callback: Callable[[memoryview], None]):
+        """메시지를 받을 때마다 callback(memoryview)"""
+
+    def close(self):
+        pass
+
+
+class InProcessTransport(CommandTransport):
+    """같은 프로세스 안에서 전달 (rclpy 없이 테스트 / 벤치마크)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[memoryview], None]] = []
+        self.published = 0
+
+    def publish(self, message: Buffer):
+        with self._lock:
+            callbacks = list(self._callbacks)
+            self.published += 1
+        view = memoryview(message)
+        for callback in callbacks:
+            callback(view)
+
+    def subscribe(self, callback: Callable[[memoryview], None]):
+        with self._lock:
+            self._callbacks.append(callback)
+
+
+class Ros2Transport(CommandTransport):
+    """std_msgs/UInt8MultiArray 토픽으로 전달 (rclpy 필요)"""
+
+    def __init__(self, node, topic: str = EXIT_COMMAND_BINARY_TOPIC, qos: int = 10):
+        from std_msgs.msg import UInt8MultiArray
+
+        self._message_type = UInt8MultiArray
+        self.node = node
+        self.topic = topic
+        self.qos = qos
+        self._publisher = node.create_publisher(UInt8MultiArray, topic, qos)
+        self._subscriptions = []
+
+    def publish(self, message: Buffer):
+        msg = self._message_type()
+        msg.data = bytes(message)
+        self._publisher.publish(msg)
+
+    def subscribe(self, callback: Callable[[memoryview], None]):
+        # msg.data는 array('B') → memoryview로 복사 없이 넘김
+        self._subscriptions.append(self.node.create_subscription(
+            self._message_type, self.topic, lambda msg: callback(memoryview(msg.data)), self.qos))
+
+    def close(self):
+        self.node.destroy_publisher(self._publisher)
+        for subscription in self._subscriptions:
+            self.node.destroy_subscription(subscription)
+        self._subscriptions = []
+
+
+class ExitCommandPublisher:
+    """순번을 붙여 EXIT / GUIDE 명령 발행"""
+
+    def __init__(self, transport: CommandTransport):
+        self.transport = transport
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    def _next(self) -> int:
+        with self._lock:
+            self._sequence = (self._sequence + 1) & 0xFFFFFFFF
+            return self._sequence
+
+    def publish_exit(self, gate_id: str, vehicle_count: int, duration_seconds: float,
+                     parking_spot: str = None, cycle_id: int = 0) -> int:
+        sequence = self._next()
+        self.transport.publish(encode_exit(gate_id, vehicle_count, duration_seconds,
+                                           parking_spot, cycle_id, sequence=sequence))
+        return sequence
+
+    def publish_guide(self, target_spot: str, duration_seconds: float,
+                      prep_location: str = None) -> int:
+        sequence = self._next()
+        self.transport.publish(encode_guide(target_spot, duration_seconds, prep_location,
+                                            sequence=sequence))
+        return sequence
+
+
+def _benchmark(count: int):
+    commands = [(f"EXIT-{i % 4 + 1:02d}", 1 + i % 2, 10 + i % 5, f"A_{i % 50 + 1}_{i % 2 + 1}")
+                for i in range(count)]
+
+    def measure(label: str, func) -> float:
+        elapsed = float('inf')
+        for _ in range(5):
+            started = time.perf_counter()
+            func()
+            elapsed = min(elapsed, time.perf_counter() - started)
+        print(f"   {label:<32} {elapsed / count * 1e9:7.0f}ns/건")
+        return elapsed
+
+    strings: List[str] = []
+    binaries: List[bytes] = []
+    buffer = bytearray(MESSAGE_SIZE * count)
+
+    print(f"📡 출차 명령 코덱 ({count:,}건, 바이너리 {MESSAGE_SIZE}바이트)")
+    string_encode = measure('문자열 인코딩 (f-string)',
+                            lambda: strings.__setitem__(
+                                slice(None), [encode_exit_string(*c) for c in commands]))
+    binary_encode = measure('바이너리 인코딩 (encode_exit)',
+                            lambda: binaries.__setitem__(
+                                slice(None), [encode_exit(*c, timestamp_us=0) for c in commands]))
+    measure('바이너리 인코딩 (pack_exit_into)',
+            lambda: [pack_exit_into(buffer, i * MESSAGE_SIZE, *c, timestamp_us=0)
+                     for i, c in enumerate(commands)])
+
+    string_decode = measure('문자열 디코딩 (split + int)',
+                            lambda: [decode_exit_string(s) for s in strings])
+    binary_decode = measure('바이너리 디코딩 (전체 필드)',
+                            lambda: [decode(b).to_dict() for b in binaries])
+    measure('바이너리 디코딩 (gate_id + count)',
+            lambda: [(v.gate_id, v.vehicle_count) for v in map(decode, binaries)])
+    view = memoryview(buffer)
+    measure('바이너리 디코딩 (한 버퍼, count만)',
+            lambda: [decode(view, i * MESSAGE_SIZE).vehicle_count for i in range(count)])
+
+    string_bytes = sum(len(s.encode('utf-8')) for s in strings) / count
+    print(f"   크기: 문자열 평균 {string_bytes:.0f}바이트 / 바이너리 {MESSAGE_SIZE}바이트 "
+          f"(버전 / 순번 / 타임스탬프 포함)")
+    print(f"   왕복: 문자열 {(string_encode + string_decode) / count * 1e9:.0f}ns, "
+          f"바이너리 {(binary_encode + binary_decode) / count * 1e9:.0f}ns")
+
+    received = []
+    transport = InProcessTransport()
+    transport.subscribe(lambda message: received.append(decode(message).to_dict()))
+    ExitCommandPublisher(transport).publish_exit('EXIT-01', 2, 10, 'A_1_2')
+    assert received[0]['gate_id'] == 'EXIT-01' and received[0]['vehicle_count'] == 2
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Exit command codec microbenchmark')
+    parser.add_argument('--count', type=int, default=200000)
+    args = parser.parse_args()
+    _benchmark(args.count)
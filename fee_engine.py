@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+주차 요금 일괄 계산 (parking_fee_policy, NumPy 벡터화)
+
+DB 함수 calculate_parking_fee()와 같은 규칙을 세션 배열 전체에 한 번에 적용.
+보고서 / 감사 / 정책 변경 시 한 달치 parking_sessions를 한 번의 호출로 재계산.
+
+규칙 (calculate_parking_fee와 동일):
+- 주차 시간(분) = (exit_time - entry_time) / 60초, 정수 반올림 (Postgres INTEGER 대입과 같음)
+- 주차 시간 <= free_minutes → 0원
+- 그 외 base_fee + ceil((과금 시간 - base_time_minutes) / additional_unit_minutes) × additional_fee
+  (과금 시간 = 주차 시간 - free_minutes)
+- 총액은 daily_max_fee를 넘지 않음 (NULL이면 상한 없음)
+- 정책 선택: is_active이고 출차 시각이 [valid_from, valid_to) 안인 정책 중 가장 최근 생성
+  (DB 함수는 valid_from / valid_to 없이 최근 활성 정책만 사용)
+
+금액은 원 단위 2자리(DECIMAL(10,2))이므로 내부 계산은 정수(센트 단위) → 반올림 오차 없음.
+free_minutes가 NULL이면 0분으로 취급 (DB 함수는 이 경우 NULL 요금 반환).
+
+사용법 (벤치마크):
+    python fee_engine.py --sessions 2000000
+"""
+
+from datetime import datetime, timedelta, timezone
+from decimal import ROUND_CEILING, Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from command_backfill import parse_timestamp
+
+MICROS_PER_MINUTE = 60_000_000
+NO_LIMIT = np.iinfo(np.int64).max
+
+
+def _cents(value: Any) -> int:
+    return int(Decimal(str(value)) * 100)
+
+
+def _timestamp(value: Any) -> Optional[datetime]:
+    """TIMESTAMPTZ 문자열 / datetime → UTC datetime (None 유지)"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = parse_timestamp(value)
+    elif value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def to_datetime64(values: Iterable[Any]) -> np.ndarray:
+    """TIMESTAMPTZ 문자열 / datetime 목록 → datetime64[us] (UTC, None → NaT)"""
+    converted = []
+    for value in values:
+        value = _timestamp(value)
+        converted.append(np.datetime64(value.replace(tzinfo=None), 'us') if value else np.datetime64('NaT'))
+    return np.array(converted, dtype='datetime64[us]')
+
+
+def duration_minutes(entry_time: datetime, exit_time: datetime) -> int:
+    """EXTRACT(EPOCH FROM exit - entry) / 60 → INTEGER (반올림, .5는 0에서 먼 쪽)"""
+    micros = (exit_time - entry_time) // timedelta(microseconds=1)
+    minutes, remainder = divmod(abs(micros), MICROS_PER_MINUTE)
+    minutes += 2 * remainder >= MICROS_PER_MINUTE
+    return minutes if micros >= 0 else -minutes
+
+
+def select_policy(policies: List[Dict[str, Any]], at: datetime) -> Optional[Dict[str, Any]]:
+    """at 시점에 적용되는 정책 (활성 + valid_from <= at < valid_to, 최근 생성 우선)"""
+    at = _timestamp(at)
+    candidates = [
+        p for p in policies
+        if p.get('is_active', True)
+        and (p.get('valid_from') is None or _timestamp(p['valid_from']) <= at)
+        and (p.get('valid_to') is None or at < _timestamp(p['valid_to']))
+    ]
+    if not candidates:
+        return None
+    epoch = datetime.min.replace(tzinfo=timezone.utc)
+    return max(candidates, key=lambda p: _timestamp(p.get('created_at')) or epoch)
+
+
+def calculate_fee(policy: Dict[str, Any], entry_time: Any, exit_time: Any) -> Dict[str, Any]:
+    """
+    요금 1건 계산 (기준 구현, calculate_parking_fee를 한 줄씩 옮김)
+
+    Returns:
+        {'base_fee', 'additional_fee', 'total_fee': Decimal, 'duration_minutes': int}
+    """
+    duration = duration_minutes(_timestamp(entry_time), _timestamp(exit_time))
+    free_minutes = policy.get('free_minutes') or 0
+
+    if duration <= free_minutes:
+        zero = Decimal('0')
+        return {'base_fee': zero, 'additional_fee': zero, 'total_fee': zero,
+                'duration_minutes': duration}
+
+    billable = duration - free_minutes
+    base_fee = Decimal(str(policy['base_fee']))
+
+    if billable <= policy['base_time_minutes']:
+        additional_fee = Decimal('0')
+    else:
+        extra = billable - policy['base_time_minutes']
+        units = (Decimal(extra) / Decimal(policy['additional_unit_minutes'])) \
+            .to_integral_value(rounding=ROUND_CEILING)
+        additional_fee = units * Decimal(str(policy['additional_fee']))
+
+    total_fee = base_fee + additional_fee
+    if policy.get('daily_max_fee') is not None and total_fee > Decimal(str(policy['daily_max_fee'])):
+        total_fee = Decimal(str(policy['daily_max_fee']))
+
+    return {'base_fee': base_fee, 'additional_fee': additional_fee, 'total_fee': total_fee,
+            'duration_minutes': duration}
+
+
+class FeeEngine:
+    """parking_fee_policy 기반 벡터화 요금 계산기"""
+
+    def __init__(self, policies: List[Dict[str, Any]] = None):
+        """
+        Args:
+            policies: parking_fee_policy 행 목록 (없으면 load()로 읽기)
+        """
+        self.policies: List[Dict[str, Any]] = []
+        self._stats = {'calls': 0, 'sessions': 0, 'unpriced': 0}
+        self.set_policies(policies or [])
+
+    def load(self, client) -> int:
+        """활성 정책 전체 로드. 정책 수 반환"""
+        rows = client.table('parking_fee_policy').select('*').eq('is_active', True).execute().data or []
+        self.set_policies(rows)
+        print(f"💰 요금 정책 {len(rows)}개 로드")
+        return len(rows)
+
+    def set_policies(self, policies: List[Dict[str, Any]]):
+        """정책 목록 교체 (최근 생성 순으로 정렬 → 먼저 맞는 정책 적용)"""
+        epoch = datetime.min.replace(tzinfo=timezone.utc)
+        active = [p for p in policies if p.get('is_active', True)]
+        active.sort(key=lambda p: _timestamp(p.get('created_at')) or epoch, reverse=True)
+        self.policies = active
+
+        def window(key: str, default: str) -> np.ndarray:
+            return np.array([
+                np.datetime64(_timestamp(p[key]).replace(tzinfo=None), 'us')
+                if p.get(key) is not None else np.datetime64(default, 'us')
+                for p in active
+            ], dtype='datetime64[us]')
+
+        # 정책별 파라미터 배열 (마지막 칸은 정책 없음용 자리)
+        self._valid_from = window('valid_from', '0001-01-01')
+        self._valid_to = window('valid_to', '9999-12-31')
+        self._free = np.array([p.get('free_minutes') or 0 for p in active] + [0], dtype=np.int64)
+        self._base_time = np.array([p['base_time_minutes'] for p in active] + [0], dtype=np.int64)
+        self._unit = np.array([p['additional_unit_minutes'] for p in active] + [1], dtype=np.int64)
+        self._base_fee = np.array([_cents(p['base_fee']) for p in active] + [0], dtype=np.int64)
+        self._additional_fee = np.array([_cents(p['additional_fee']) for p in active] + [0],
+                                        dtype=np.int64)
+        self._max_fee = np.array([
+            _cents(p['daily_max_fee']) if p.get('daily_max_fee') is not None else NO_LIMIT
+            for p in active
+        ] + [NO_LIMIT], dtype=np.int64)
+
+    def policy_index(self, exit_time: np.ndarray) -> np.ndarray:
+        """세션별 적용 정책 번호 (self.policies 기준, 없으면 -1)"""
+        index = np.full(len(exit_time), -1, dtype=np.int64)
+        for p in range(len(self.policies)):
+            match = (index < 0) & (exit_time >= self._valid_from[p]) & (exit_time < self._valid_to[p])
+            index[match] = p
+        return index
+
+    def price(self, entry_time: np.ndarray, exit_time: np.ndarray,
+              now: datetime = None) -> Dict[str, np.ndarray]:
+        """
+        세션 배열 요금 계산
+
+        Args:
+            entry_time / exit_time: datetime64 배열 (UTC). exit_time이 NaT면 now까지 (주차 중)
+            now: 주차 중 세션 기준 시각 (기본: 현재)
+
+        Returns:
+            {'duration_minutes', 'base_fee', 'additional_fee', 'total_fee' (원, float64),
+             'policy_index'} — 정책이 없는 세션은 요금 NaN, policy_index -1
+        """
+        entry_time = np.asarray(entry_time, dtype='datetime64[us]')
+        exit_time = np.asarray(exit_time, dtype='datetime64[us]')
+        if np.isnat(exit_time).any():
+            now = _timestamp(now or datetime.now(timezone.utc))
+            exit_time = np.where(np.isnat(exit_time),
+                                 np.datetime64(now.replace(tzinfo=None), 'us'), exit_time)
+
+        micros = (exit_time - entry_time).astype(np.int64)
+        minutes, remainder = np.divmod(np.abs(micros), MICROS_PER_MINUTE)
+        minutes += 2 * remainder >= MICROS_PER_MINUTE
+        minutes = np.where(micros < 0, -minutes, minutes)
+
+        index = self.policy_index(exit_time)
+        p = np.where(index < 0, len(self.policies), index)  # 정책 없음 → 마지막 칸 (0원, 이후 NaN)
+
+        billable = minutes - self._free[p]
+        charged = billable > 0
+        extra = billable - self._base_time[p]
+        units = np.where(extra > 0, -(-extra // self._unit[p]), 0)
+
+        base = np.where(charged, self._base_fee[p], 0)
+        additional = np.where(charged, units * self._additional_fee[p], 0)
+        total = np.minimum(base + additional, self._max_fee[p])
+
+        unpriced = index < 0
+        self._stats['calls'] += 1
+        self._stats['sessions'] += len(minutes)
+        self._stats['unpriced'] += int(unpriced.sum())
+
+        def won(cents: np.ndarray) -> np.ndarray:
+            result = cents / 100.0
+            result[unpriced] = np.nan
+            return result
+
+        return {
+            'duration_minutes': minutes,
+            'base_fee': won(base),
+            'additional_fee': won(additional),
+            'total_fee': won(total),
+            'policy_index': index,
+        }
+
+    def price_sessions(self, sessions: List[Dict[str, Any]], now: datetime = None) -> List[Dict[str, Any]]:
+        """parking_sessions 행 목록 → parking_fees 형태 행 (session_id, base_fee, additional_fee, total_fee)"""
+        result = self.price(to_datetime64(s['entry_time'] for s in sessions),
+                            to_datetime64(s.get('exit_time') for s in sessions), now=now)
+        return [
+            {
+                'session_id': session.get('session_id'),
+                'base_fee': float(result['base_fee'][i]),
+                'additional_fee': float(result['additional_fee'][i]),
+                'total_fee': float(result['total_fee'][i]),
+                'duration_minutes': int(result['duration_minutes'][i]),
+            }
+            for i, session in enumerate(sessions)
+            if result['policy_index'][i] >= 0
+        ]
+
+    def verify(self, entry_time: np.ndarray, exit_time: np.ndarray) -> int:
+        """모든 행을 기준 구현(calculate_fee)과 비교. 불일치 건수 반환"""
+        result = self.price(entry_time, exit_time)
+        mismatched = 0
+        for i, (entry, exit_) in enumerate(zip(entry_time.tolist(), exit_time.tolist())):
+            entry = entry.replace(tzinfo=timezone.utc)
+            exit_ = exit_.replace(tzinfo=timezone.utc)
+            policy = select_policy(self.policies, exit_)
+            if policy is None:
+                mismatched += result['policy_index'][i] >= 0
+                continue
+            expected = calculate_fee(policy, entry, exit_)
+            actual = (result['duration_minutes'][i], _cents(result['base_fee'][i]),
+                      _cents(result['additional_fee'][i]), _cents(result['total_fee'][i]))
+            if actual != (expected['duration_minutes'], int(expected['base_fee'] * 100),
+                          int(expected['additional_fee'] * 100), int(expected['total_fee'] * 100)):
+                mismatched += 1
+        return mismatched
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats['policies'] = len(self.policies)
+        return stats
+
+
+def _benchmark(sessions: int, verify: int, seed: int):
+    import time
+
+    rng = np.random.default_rng(seed)
+    engine = FeeEngine([
+        {'policy_id': 'old', 'policy_name': '기존 요금', 'base_time_minutes': 30, 'base_fee': 2000,
+         'additional_unit_minutes': 10, 'additional_fee': 1000, 'free_minutes': 10,
+         'daily_max_fee': 20000, 'is_active': True,
+         'valid_from': '2025-01-01T00:00:00+00:00', 'valid_to': '2025-01-16T00:00:00+00:00',
+         'created_at': '2024-12-01T00:00:00+00:00'},
+        {'policy_id': 'new', 'policy_name': '변경 요금', 'base_time_minutes': 60, 'base_fee': 3000.5,
+         'additional_unit_minutes': 15, 'additional_fee': 1200.25, 'free_minutes': None,
+         'daily_max_fee': None, 'is_active': True,
+         'valid_from': '2025-01-16T00:00:00+00:00', 'valid_to': None,
+         'created_at': '2025-01-10T00:00:00+00:00'},
+    ])
+
+    month = np.datetime64('2025-01-01T00:00:00', 'us')
+    entry = month + rng.integers(0, 31 * 86400 * 10**6, sessions).astype('timedelta64[us]')
+    stay = rng.exponential(90 * 60 * 10**6, sessions).astype(np.int64)
+    # 무료 시간 근처 / 30초 경계(반올림) 세션 섞기
+    short = rng.random(sessions) < 0.05
+    stay[short] = rng.integers(0, 60, int(short.sum())) * (MICROS_PER_MINUTE // 2)
+    exit_ = entry + stay.astype('timedelta64[us]')
+
+    engine.price(entry[:1000], exit_[:1000])  # 워밍업
+    times = []
+    for _ in range(5):
+        started = time.perf_counter()
+        result = engine.price(entry, exit_)
+        times.append(time.perf_counter() - started)
+    best = min(times)
+
+    print(f"💰 세션 {sessions:,}건 요금 계산: {best * 1e3:.0f}ms ({sessions / best / 1e6:.1f}M 세션/초)")
+    print(f"   총 요금 합계: ₩{np.nansum(result['total_fee']):,.0f}")
+
+    sample = rng.choice(sessions, size=min(verify, sessions), replace=False)
+    started = time.perf_counter()
+    mismatched = engine.verify(entry[sample], exit_[sample])
+    elapsed = time.perf_counter() - started
+    print(f"   기준 구현 비교: {len(sample):,}건 중 불일치 {mismatched}건 "
+          f"(기준 구현 {len(sample) / elapsed:,.0f} 세션/초)")
+    return mismatched
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='FeeEngine benchmark')
+    parser.add_argument('--sessions', type=int, default=2_000_000)
+    parser.add_argument('--verify', type=int, default=100_000, help='기준 구현과 비교할 세션 수')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    sys.exit(1 if _benchmark(args.sessions, args.verify, args.seed) else 0)
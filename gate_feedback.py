@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+피드백 기반 명령 완료 처리
+
+고정 시간 time.sleep(duration) 대신 게이트/로봇의 완료 신호를 기다림.
+duration_seconds는 타임아웃으로만 사용 → 4초 만에 닫힌 게이트는 4초 후 바로 다음 명령 처리.
+
+- CompletionSignals: 완료 신호 대기/전달
+  (key: ('gate', gate_id, cycle_id), ('guide', command_id))
+- CycleIds: 게이트 사이클 상관 ID 발급 (발행한 명령과 닫힘 신호를 짝지음)
+- InProcessFeedbackSimulator: ROS2 없이 테스트용 가짜 게이트/로봇
+- parse_feedback_message: /parking/exit_feedback 문자열 메시지 파싱
+- AsyncCompletionSignals / AsyncInProcessFeedbackSimulator: asyncio 버전
+  (대기 중인 게이트 타이머가 스레드를 점유하지 않음)
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# 피드백 토픽 (std_msgs/String: "CLOSED|EXIT-01|<cycle_id>", "GUIDE_DONE|<command_id>")
+FEEDBACK_TOPIC = '/parking/exit_feedback'
+
+
+class CycleIds:
+    """
+    게이트 사이클 상관 ID (u32, 프로세스마다 임의 시작값에서 1씩 증가)
+
+    게이트 ID만으로 기다리면 타임아웃된 사이클의 늦은 닫힘 신호가
+    같은 게이트의 다음 사이클을 바로 끝내버림 → 사이클마다 새 ID를 명령에 싣고
+    게이트는 닫힘 신호에 그 ID를 그대로 돌려줌
+    """
+
+    def __init__(self, start: int = None):
+        self._lock = threading.Lock()
+        self._next = random.getrandbits(32) if start is None else start & 0xFFFFFFFF
+
+    def next(self) -> int:
+        with self._lock:
+            cycle_id = self._next
+            self._next = (self._next + 1) & 0xFFFFFFFF
+            return cycle_id
+
+
+def gate_key(gate_id: str, cycle_id) -> Tuple[str, str, Optional[str]]:
+    """게이트 닫힘 신호 key (cycle_id는 문자열로 맞춤, 없으면 어떤 대기와도 맞지 않음)"""
+    return 'gate', gate_id, None if cycle_id is None else str(cycle_id)
+
+
+class _Waiter:
+    __slots__ = ('key', 'event', 'result', 'started')
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.event = threading.Event()
+        self.result: Optional[str] = None
+        self.started = time.monotonic()
+
+
+class CompletionSignals:
+    """완료 신호 대기열"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters: Dict[Hashable, _Waiter] = {}
+        self._stats = {
+            'signaled': 0,
+            'timed_out': 0,
+            'unmatched': 0,
+            'seconds_saved': 0.0,
+        }
+
+    def expect(self, key: Hashable) -> _Waiter:
+        """
+        완료 신호 대기 등록
+
+        ⚠️ 명령 발행 전에 호출해야 함 (발행 직후 도착한 신호를 놓치지 않도록)
+        """
+        waiter = _Waiter(key)
+        with self._lock:
+            self._waiters[key] = waiter
+        return waiter
+
+    def signal(self, key: Hashable, result: str = 'done') -> bool:
+        """완료 신호 전달. 기다리는 명령이 있으면 True"""
+        with self._lock:
+            waiter = self._waiters.pop(key, None)
+            if waiter is None:
+                self._stats['unmatched'] += 1
+                return False
+
+        waiter.result = result
+        waiter.event.set()
+        return True
+
+    def wait(self, waiter: _Waiter, timeout: float) -> Optional[str]:
+        """
+        완료 신호 대기
+
+        Returns:
+            신호 결과 (예: 'closed'), 타임아웃이면 None
+        """
+        received = waiter.event.wait(timeout)
+        return self._finish(waiter, timeout, received)
+
+    def _finish(self, waiter: _Waiter, timeout: float, received: bool) -> Optional[str]:
+        with self._lock:
+            if self._waiters.get(waiter.key) is waiter:
+                del self._waiters[waiter.key]
+
+            if received:
+                self._stats['signaled'] += 1
+                self._stats['seconds_saved'] += max(
+                    timeout - (time.monotonic() - waiter.started), 0.0
+                )
+            else:
+                self._stats['timed_out'] += 1
+
+        return waiter.result if received else None
+
+    def stats(self) -> Dict[str, Any]:
+        """신호 통계 (seconds_saved: 타임아웃 대비 일찍 끝난 시간 합계)"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['waiting'] = len(self._waiters)
+            return stats
+
+
+def parse_feedback_message(data: str) -> Optional[Tuple[Tuple, str]]:
+    """
+    피드백 문자열 → (신호 key, 결과)
+
+    - "CLOSED|EXIT-01|<cycle_id>" → (('gate', 'EXIT-01', '<cycle_id>'), 'closed')
+    - "CLOSED|EXIT-01"            → (('gate', 'EXIT-01', None), 'closed')
+      (상관 ID 없는 예전 형식: 어떤 사이클도 끝내지 않음 → unmatched)
+    - "GUIDE_DONE|<command_id>"   → (('guide', '<command_id>'), 'done')
+    """
+    kind, _, target = data.partition('|')
+    if kind == 'CLOSED' and target:
+        gate_id, _, cycle_id = target.partition('|')
+        if gate_id:
+            return gate_key(gate_id, cycle_id or None), 'closed'
+        return None
+    if kind == 'GUIDE_DONE' and target:
+        return ('guide', target), 'done'
+    return None
+
+
+class InProcessFeedbackSimulator:
+    """가짜 게이트/안내 로봇 (ROS2 없이 피드백 흐름 테스트용)"""
+
+    def __init__(self, signals: CompletionSignals, gate_close_seconds: float = 4.0,
+                 guide_seconds: float = 2.0):
+        """
+        Args:
+            signals: 완료 신호를 보낼 CompletionSignals
+            gate_close_seconds: 게이트가 열린 후 닫힘 신호까지 걸리는 시간
+            guide_seconds: 주차 안내 완료 신호까지 걸리는 시간
+        """
+        self.signals = signals
+        self.gate_close_seconds = gate_close_seconds
+        self.guide_seconds = guide_seconds
+
+    def _later(self, delay: float, key: Tuple, result: str):
+        timer = threading.Timer(delay, self.signals.signal, args=(key, result))
+        timer.daemon = True
+        timer.start()
+
+    def on_exit_command(self, gate_id: str, vehicle_count: int, duration: float,
+                        cycle_id: int = None):
+        """출차 명령 수신 → 게이트 닫힘 신호 예약 (명령의 cycle_id를 그대로 돌려줌)"""
+        self._later(min(self.gate_close_seconds, duration), gate_key(gate_id, cycle_id),
+                    'closed')
+
+    def on_guide_command(self, command_id: str, target_spot: str):
+        """주차 안내 명령 수신 → 안내 완료 신호 예약"""
+        self._later(self.guide_seconds, ('guide', command_id), 'done')
+
+
+class AsyncCompletionSignals(CompletionSignals):
+    """CompletionSignals의 asyncio 버전 (expect / signal / wait 모두 이벤트 루프 안에서 호출)"""
+
+    def expect(self, key: Hashable) -> _Waiter:
+        waiter = _Waiter(key)
+        waiter.event = asyncio.Event()
+        with self._lock:
+            self._waiters[key] = waiter
+        return waiter
+
+    async def wait(self, waiter: _Waiter, timeout: float) -> Optional[str]:
+        """완료 신호 대기 (타임아웃이면 None)"""
+        try:
+            await asyncio.wait_for(waiter.event.wait(), timeout)
+            received = True
+        except asyncio.TimeoutError:
+            received = False
+        return self._finish(waiter, timeout, received)
+
+
+class AsyncInProcessFeedbackSimulator(InProcessFeedbackSimulator):
+    """InProcessFeedbackSimulator의 asyncio 버전 (스레드 타이머 대신 loop.call_later)"""
+
+    def _later(self, delay: float, key: Tuple, result: str):
+        asyncio.get_running_loop().call_later(delay, self.signals.signal, key, result)
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+이력 테이블 스트리밍 내보내기 (Parquet / Arrow IPC)
+
+parking_events / parking_sessions / parking_fees / ros2_commands를
+keyset 페이지로 읽어 압축 컬럼 파일로 저장. 테이블 전체를 메모리에 올리지 않음.
+
+- keyset: (정렬 키, PK) > (마지막 키, 마지막 PK) → OFFSET 없이 인덱스 범위 조회
+  parking_events(추가만 됨)는 event_time (007), 나머지는 updated_at (010 마이그레이션의 복합 인덱스)
+- 내보낸 뒤 바뀐 행(출차 / 결제 / 명령 완료)은 updated_at이 워터마크 뒤로 옮겨져 다음 실행에서
+  새 버전으로 다시 내보냄 → 같은 PK가 여러 파트에 있을 수 있으므로 읽는 쪽은 PK별 최신
+  updated_at 행만 사용
+- 메모리: 페이지(page_size) + 행 그룹 버퍼(row_group_size)만 유지 → 테이블 크기와 무관
+- 파일은 rows_per_file마다 새 파트로 나누고, 파트가 닫힐 때마다 체크포인트 저장
+  (중단 후 다시 실행하면 마지막으로 완료된 파트 다음부터 이어서)
+- settle_seconds: 최근 행은 다음 실행으로 미룸 (진행 중인 트랜잭션 / 출차 전 세션 등)
+  → 매일 밤 같은 명령으로 증분 실행
+
+사용법:
+    python history_exporter.py --output exports/ --format parquet
+    python history_exporter.py --tables parking_events --format arrow
+    python history_exporter.py --bench 1000000  # 처리량 / 메모리 측정
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from command_backfill import parse_timestamp
+
+_TYPES = {
+    'string': pa.string(),
+    'timestamp': pa.timestamp('us', tz='UTC'),
+    'int': pa.int64(),
+    'float': pa.float64(),
+    'bool': pa.bool_(),
+    'decimal': pa.decimal128(10, 2),
+    'json': pa.string(),
+}
+
+# 테이블별 keyset 키 / PK / 컬럼 타입 (001, 002, 006, 010 마이그레이션 기준)
+EXPORT_TABLES: Dict[str, Dict[str, Any]] = {
+    'parking_events': {
+        'key': 'event_time',
+        'id': 'event_id',
+        'columns': [
+            ('event_id', 'string'), ('vehicle_id', 'string'), ('license_plate', 'string'),
+            ('event_type', 'string'), ('gate_id', 'string'), ('event_time', 'timestamp'),
+            ('confidence', 'float'), ('is_registered', 'bool'), ('image_url', 'string'),
+            ('notes', 'string'), ('created_at', 'timestamp'),
+        ],
+    },
+    'parking_sessions': {
+        'key': 'updated_at',
+        'id': 'session_id',
+        'columns': [
+            ('session_id', 'string'), ('vehicle_id', 'string'), ('customer_id', 'string'),
+            ('license_plate', 'string'), ('parking_spot_id', 'string'),
+            ('entry_time', 'timestamp'), ('exit_time', 'timestamp'), ('duration_minutes', 'int'),
+            ('status', 'string'), ('notes', 'string'), ('created_at', 'timestamp'),
+            ('updated_at', 'timestamp'),
+        ],
+    },
+    'parking_fees': {
+        'key': 'updated_at',
+        'id': 'fee_id',
+        'columns': [
+            ('fee_id', 'string'), ('session_id', 'string'), ('base_fee', 'decimal'),
+            ('additional_fee', 'decimal'), ('total_fee', 'decimal'),
+            ('payment_status', 'string'), ('payment_method', 'string'),
+            ('payment_method_id', 'string'), ('payment_time', 'timestamp'),
+            ('payment_note', 'string'), ('paid_by', 'string'),
+            ('created_at', 'timestamp'), ('updated_at', 'timestamp'),
+        ],
+    },
+    'ros2_commands': {
+        'key': 'updated_at',
+        'id': 'command_id',
+        'columns': [
+            ('command_id', 'string'), ('command_type', 'string'), ('session_id', 'string'),
+            ('license_plate', 'string'), ('parking_spot_id', 'string'), ('payload', 'json'),
+            ('status', 'string'), ('error_message', 'string'), ('created_at', 'timestamp'),
+            ('executed_at', 'timestamp'), ('completed_at', 'timestamp'),
+            ('claimed_by', 'string'), ('heartbeat_at', 'timestamp'),
+            ('lease_expires_at', 'timestamp'), ('attempt_count', 'int'),
+            ('updated_at', 'timestamp'),
+        ],
+    },
+}
+
+# 키를 기록하지 않은 예전 체크포인트의 keyset 키
+_LEGACY_KEYS = {'parking_events': 'event_time'}
+
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+def arrow_schema(table: str) -> pa.Schema:
+    return pa.schema([(name, _TYPES[kind]) for name, kind in EXPORT_TABLES[table]['columns']])
+
+
+def _convert(value: Any, kind: str) -> Any:
+    if value is None:
+        return None
+    if kind == 'timestamp':
+        return parse_timestamp(value) if isinstance(value, str) else value
+    if kind == 'decimal':
+        return Decimal(str(value)).quantize(Decimal('0.01'))
+    if kind == 'json':
+        return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _column(values: List[Any], kind: str) -> pa.Array:
+    if kind == 'timestamp':
+        try:
+            # ISO 8601 문자열은 Arrow cast로 한 번에 파싱 (값마다 datetime 만들지 않음)
+            return pc.cast(pa.array(values, type=pa.string()), _TYPES[kind])
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+    elif kind in ('string', 'int', 'float', 'bool'):
+        return pa.array(values, type=_TYPES[kind])
+    return pa.array([_convert(value, kind) for value in values], type=_TYPES[kind])
+
+
+def rows_to_batch(table: str, rows: List[Dict[str, Any]]) -> pa.RecordBatch:
+    """Supabase 행(dict) 목록 → RecordBatch (스키마에 없는 컬럼은 버림)"""
+    arrays = [
+        _column([row.get(name) for row in rows], kind)
+        for name, kind in EXPORT_TABLES[table]['columns']
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=arrow_schema(table))
+
+
+class _PartWriter:
+    """파트 파일 1개 (임시 이름으로 쓰고 close 시 확정)"""
+
+    def __init__(self, path: str, schema: pa.Schema, file_format: str, compression: str):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.rows = 0
+        if file_format == 'parquet':
+            self._writer = pq.ParquetWriter(self.tmp_path, schema, compression=compression)
+        else:
+            self._sink = pa.OSFile(self.tmp_path, 'wb')
+            self._writer = pa.ipc.new_file(
+                self._sink, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+
+    def write(self, batch: pa.RecordBatch):
+        self._writer.write_batch(batch)
+        self.rows += batch.num_rows
+
+    def close(self):
+        self._writer.close()
+        if hasattr(self, '_sink'):
+            self._sink.close()
+        os.replace(self.tmp_path, self.path)
+
+
+class HistoryExporter:
+    """keyset 페이지 → 압축 컬럼 파일 (체크포인트로 이어서 실행)"""
+
+    def __init__(self, client, output_dir: str, checkpoint_path: str = None,
+                 file_format: str = 'parquet', compression: str = 'zstd',
+                 page_size: int = 1000, row_group_size: int = 50000,
+                 rows_per_file: int = 1000000, settle_seconds: float = 3600.0):
+        """
+        Args:
+            client: Supabase 클라이언트
+            output_dir: 출력 디렉터리 (테이블별 하위 디렉터리)
+            checkpoint_path: 체크포인트 JSON (기본: output_dir/checkpoint.json)
+            file_format: 'parquet' 또는 'arrow' (Arrow IPC 파일)
+            compression: 'zstd' / 'lz4' / 'snappy'(parquet만) 등
+            page_size: 한 번에 읽는 행 수
+            row_group_size: 파일에 한 번에 쓰는 행 수 (메모리 상한)
+            rows_per_file: 파트 파일 하나의 최대 행 수 (체크포인트 단위)
+            settle_seconds: 이 시간보다 최근 행은 다음 실행으로 미룸
+        """
+        if file_format not in FORMATS:
+            raise ValueError(f"지원하지 않는 형식: {file_format}")
+
+        self.client = client
+        self.output_dir = output_dir
+        self.checkpoint_path = checkpoint_path or os.path.join(output_dir, 'checkpoint.json')
+        self.file_format = file_format
+        self.compression = compression
+        self.page_size = page_size
+        self.row_group_size = max(row_group_size, page_size)
+        self.rows_per_file = max(rows_per_file, self.row_group_size)
+        self.settle_seconds = settle_seconds
+
+        self.checkpoint: Dict[str, Dict[str, Any]] = self._load_checkpoint()
+        self._stats = {
+            'rows': 0,
+            'pages': 0,
+            'files': 0,
+            'max_buffered_rows': 0,
+        }
+
+    # ----- 체크포인트 -----
+
+    def _load_checkpoint(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_checkpoint(self):
+        os.makedirs(os.path.dirname(self.checkpoint_path) or '.', exist_ok=True)
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.checkpoint, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    # ----- 읽기 -----
+
+    def _fetch_page(self, table: str, after: Optional[Tuple[str, str]],
+                    cutoff: datetime) -> List[Dict[str, Any]]:
+        """(key, id) > after 이고 key < cutoff인 다음 페이지"""
+        key, pk = EXPORT_TABLES[table]['key'], EXPORT_TABLES[table]['id']
+        query = self.client.table(table).select('*').lt(key, cutoff.isoformat())
+        if after is not None:
+            last_key, last_id = after
+            query = query.or_(
+                f'{key}.gt."{last_key}",'
+                f'and({key}.eq."{last_key}",{pk}.gt.{last_id})'
+            )
+        return query.order(key).order(pk).limit(self.page_size).execute().data or []
+
+    def iter_pages(self, table: str, after: Optional[Tuple[str, str]] = None,
+                   cutoff: datetime = None) -> Iterable[List[Dict[str, Any]]]:
+        """after 이후 cutoff 이전 행을 페이지 단위로"""
+        cutoff = cutoff or datetime.now(timezone.utc)
+        key, pk = EXPORT_TABLES[table]['key'], EXPORT_TABLES[table]['id']
+        while True:
+            rows = self._fetch_page(table, after, cutoff)
+            if rows:
+                self._stats['pages'] += 1
+                yield rows
+            if len(rows) < self.page_size:
+                return
+            after = (rows[-1][key], rows[-1][pk])
+
+    # ----- 내보내기 -----
+
+    def _part_path(self, table: str, part: int) -> str:
+        directory = os.path.join(self.output_dir, table)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{table}-{part:06d}{FORMATS[self.file_format]}")
+
+    def export_table(self, table: str) -> int:
+        """테이블 1개 증분 내보내기. 이번에 쓴 행 수 반환"""
+        config = EXPORT_TABLES[table]
+        state = self.checkpoint.setdefault(table, {'key': config['key'], 'last_key': None,
+                                                   'last_id': None, 'next_part': 0, 'rows': 0,
+                                                   'files': []})
+        if state.get('key', _LEGACY_KEYS.get(table, 'created_at')) != config['key']:
+            # 정렬 키가 바뀐 워터마크는 비교할 수 없음 → 처음부터 (이전 파트는 같은 PK의 옛 버전)
+            print(f"⚠️  {table}: keyset 키가 {config['key']}로 바뀜 → 처음부터 다시 내보냄")
+            state['last_key'] = state['last_id'] = None
+        state['key'] = config['key']
+        after = (state['last_key'], state['last_id']) if state['last_key'] is not None else None
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.settle_seconds)
+        schema = arrow_schema(table)
+
+        writer: Optional[_PartWriter] = None
+        buffer: List[Dict[str, Any]] = []
+        exported = 0
+        started = time.monotonic()
+
+        def flush():
+            nonlocal writer
+            if not buffer:
+                return
+            if writer is None:
+                writer = _PartWriter(self._part_path(table, state['next_part']), schema,
+                                     self.file_format, self.compression)
+            writer.write(rows_to_batch(table, buffer))
+            # 버퍼를 쓴 뒤에야 마지막 키를 옮김 (파트가 닫힐 때 체크포인트에 반영)
+            state['pending_key'] = buffer[-1][config['key']]
+            state['pending_id'] = buffer[-1][config['id']]
+            buffer.clear()
+
+        def close_part():
+            nonlocal writer
+            if writer is None:
+                return
+            writer.close()
+            state['last_key'] = state.pop('pending_key')
+            state['last_id'] = state.pop('pending_id')
+            state['next_part'] += 1
+            state['rows'] += writer.rows
+            state['files'].append(os.path.basename(writer.path))
+            self._stats['files'] += 1
+            self._save_checkpoint()
+            writer = None
+
+        try:
+            for rows in self.iter_pages(table, after, cutoff):
+                buffer.extend(rows)
+                exported += len(rows)
+                self._stats['max_buffered_rows'] = max(self._stats['max_buffered_rows'], len(buffer))
+                if len(buffer) >= self.row_group_size:
+                    flush()
+                    if writer.rows >= self.rows_per_file:
+                        close_part()
+            flush()
+            close_part()
+        except BaseException:
+            # 닫히지 않은 파트는 버림 (다음 실행에서 같은 파트 번호로 다시 씀)
+            if writer is not None:
+                try:
+                    os.remove(writer.tmp_path)
+                except OSError:
+                    pass
+            state.pop('pending_key', None)
+            state.pop('pending_id', None)
+            raise
+
+        state['exported_until'] = cutoff.isoformat()
+        self._save_checkpoint()
+        self._stats['rows'] += exported
+        elapsed = time.monotonic() - started
+        print(f"📦 {table}: {exported:,}행 → {self.file_format} "
+              f"({elapsed:.1f}s, 누적 {state['rows']:,}행 / 파일 {len(state['files'])}개)")
+        return exported
+
+    def export(self, tables: Iterable[str] = tuple(EXPORT_TABLES)) -> Dict[str, int]:
+        """여러 테이블 순서대로 내보내기"""
+        return {table: self.export_table(table) for table in tables}
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats)
+
+
+class _SyntheticEvents:
+    """벤치마크용 parking_events 원본 (keyset 위치에서 행을 만들어 냄 → 원본도 메모리에 안 둠)"""
+
+    def __init__(self, rows: int):
+        self.rows = rows
+        self.start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def page(self, after: Optional[Tuple[str, str]], limit: int) -> List[Dict[str, Any]]:
+        first = int(after[1].rsplit('-', 1)[1]) + 1 if after else 0
+        return [{
+            'event_id': f"00000000-0000-4000-8000-{i:012d}",
+            'license_plate': f"{10 + i % 90}가{1000 + i * 7 % 9000}",
+            'event_type': 'entry' if i % 2 else 'exit',
+            'gate_id': f"GATE-{1 + i % 4:02d}",
+            'event_time': (self.start + timedelta(seconds=i * 13)).isoformat(),
+            'confidence': (i * 37 % 100) / 100,
+            'is_registered': i % 3 == 0,
+            'created_at': (self.start + timedelta(seconds=i * 13)).isoformat(),
+        } for i in range(first, min(first + limit, self.rows))]
+
+
+def _benchmark(rows: int, file_format: str):
+    import resource
+    import tempfile
+
+    from local_supabase import LocalDatabase, LocalSupabaseClient
+
+    # 1) 로컬 DB로 keyset / 체크포인트 / 증분 확인
+    db = LocalDatabase()
+    client = LocalSupabaseClient(db)
+    source = _SyntheticEvents(5000)
+    db.insert('parking_events', source.page(None, 5000))
+    output_dir = tempfile.mkdtemp(prefix='history-export-')
+    exporter = HistoryExporter(client, output_dir, file_format=file_format,
+                               page_size=700, row_group_size=1000, rows_per_file=2000)
+    assert exporter.export_table('parking_events') == 5000
+    assert HistoryExporter(client, output_dir, file_format=file_format).export_table('parking_events') == 0
+    db.insert('parking_events', _SyntheticEvents(6000).page(
+        (None, source.page(None, 5000)[-1]['event_id']), 1000))
+    assert HistoryExporter(client, output_dir, file_format=file_format).export_table('parking_events') == 1000
+    db.close()
+
+    # 2) 처리량 / 메모리 (원본 조회 비용 제외, 행 수가 늘어도 최대 RSS가 그대로여야 함)
+    for size in (rows // 4, rows):
+        source = _SyntheticEvents(size)
+        output_dir = tempfile.mkdtemp(prefix='history-export-')
+        exporter = HistoryExporter(None, output_dir, file_format=file_format,
+                                   rows_per_file=max(size // 4, 50000))
+        exporter._fetch_page = lambda table, after, cutoff: source.page(after, exporter.page_size)
+
+        arrow_peak = 0
+        original_write = _PartWriter.write
+
+        def tracking_write(self, batch):
+            nonlocal arrow_peak
+            original_write(self, batch)
+            arrow_peak = max(arrow_peak, pa.total_allocated_bytes())
+
+        _PartWriter.write = tracking_write
+        try:
+            started = time.perf_counter()
+            exporter.export_table('parking_events')
+            elapsed = time.perf_counter() - started
+        finally:
+            _PartWriter.write = original_write
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        size_mb = sum(os.path.getsize(os.path.join(output_dir, 'parking_events', f))
+                      for f in exporter.checkpoint['parking_events']['files']) / 1e6
+        print(f"   {size:>9,}행: {size / elapsed:,.0f}행/초, 파일 {size_mb:.1f}MB, "
+              f"최대 RSS {max_rss:.0f}MB, Arrow 피크 {arrow_peak / 1e6:.1f}MB")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='이력 테이블 Parquet / Arrow 내보내기')
+    parser.add_argument('--output', default='exports')
+    parser.add_argument('--tables', nargs='+', default=list(EXPORT_TABLES), choices=list(EXPORT_TABLES))
+    parser.add_argument('--format', dest='file_format', default='parquet', choices=list(FORMATS))
+    parser.add_argument('--compression', default='zstd')
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--settle-seconds', type=float, default=3600.0)
+    parser.add_argument('--bench', type=int, default=0, help='N행 합성 데이터로 처리량 / 메모리 측정')
+    args = parser.parse_args()
+
+    if args.bench:
+        print(f"📦 HistoryExporter 벤치마크 ({args.file_format})")
+        _benchmark(args.bench, args.file_format)
+    else:
+        from ros2_exit_controller import get_supabase
+
+        HistoryExporter(get_supabase(), args.output, file_format=args.file_format,
+                        compression=args.compression, page_size=args.page_size,
+                        settle_seconds=args.settle_seconds).export(args.tables)
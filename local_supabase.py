@@ -0,0 +1,1014 @@
+#!/usr/bin/env python3
+"""
+로컬 Supabase 대역 (벤치마크 / 오프라인 테스트용)
+
+실제 Supabase 프로젝트 없이 컨트롤러를 실행하기 위한 인메모리 백엔드.
+
+- LocalDatabase: 인메모리 테이블 + ros2_commands RPC 함수 (마이그레이션 005/006/009와 같은 동작)
+  + calculate_parking_fee (001과 같은 동작, fee_engine 비교용)
+- LocalSupabaseClient: supabase-py와 같은 모양의 인프로세스 클라이언트
+  (table().select().eq()...execute(), rpc(), channel().on_postgres_changes().subscribe())
+- AsyncLocalSupabaseClient: 같은 클라이언트의 AsyncClient 버전 (await execute())
+- LocalSupabaseServer: PostgREST 호환 HTTP 스텁 (/rest/v1) + Realtime WebSocket 스텁
+  (/realtime/v1/websocket, Phoenix 프로토콜) → 실제 create_client(url, key)로 접속 가능
+
+요청 수는 LocalDatabase.stats에 집계 (status 기록 횟수 비교용).
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import queue
+import socket
+import struct
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from decimal import ROUND_CEILING, ROUND_HALF_UP, Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlparse
+
+from command_backfill import parse_timestamp
+
+# 테이블별 기본 키
+PRIMARY_KEYS = {
+    'ros2_commands': 'command_id',
+    'tasks': 'task_id',
+    'robots': 'robot_id',
+    'parking_locations': 'location_id',
+    'parking_current_status': 'spot_id',
+    'parking_events': 'event_id',
+    'parking_sessions': 'session_id',
+    'parking_fees': 'fee_id',
+    'parking_fee_policy': 'policy_id',
+    'vehicles': 'vehicle_id',
+    'notifications': 'notification_id',
+}
+
+Filter = Callable[[Dict[str, Any]], bool]
+
+# updated_at 트리거가 있는 테이블 (001 update_updated_at / calculate_duration, 010)
+UPDATED_AT_TABLES = frozenset({
+    'customers', 'vehicles', 'payment_methods', 'parking_sessions', 'parking_fees',
+    'parking_fee_policy', 'ros2_commands',
+})
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _row_defaults(table: str) -> Dict[str, Any]:
+    """INSERT 시 DB 기본값 (DEFAULT gen_random_uuid(), NOW() 등)"""
+    now = utc_now()
+    if table == 'ros2_commands':
+        return {'command_id': str(uuid.uuid4()), 'status': 'pending', 'created_at': now,
+                'updated_at': now, 'attempt_count': 0}
+    if table == 'tasks':
+        return {'task_id': str(uuid.uuid4()), 'status': 'pending', 'priority': 0,
+                'done': False, 'created_at': now}
+    key = PRIMARY_KEYS.get(table)
+    defaults = {'created_at': now}
+    if table in UPDATED_AT_TABLES:
+        defaults['updated_at'] = now
+    if key and key.endswith('_id') and table not in ('robots', 'parking_locations',
+                                                     'parking_current_status'):
+        defaults[key] = str(uuid.uuid4())
+    return defaults
+
+
+def _touch(table: str, row: Dict[str, Any]):
+    """BEFORE UPDATE 트리거처럼 updated_at 갱신"""
+    if table in UPDATED_AT_TABLES:
+        row['updated_at'] = utc_now()
+
+
+# =====================================================
+# 필터 (PostgREST 연산자)
+# =====================================================
+
+def _coerce(value: Any) -> Any:
+    """타임스탬프 문자열은 datetime으로 비교"""
+    if isinstance(value, str) and len(value) >= 19 and value[4:5] == '-' and value[10:11] in 'T ':
+        try:
+            return parse_timestamp(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _parse_literal(text: str) -> Any:
+    if len(text) >= 2 and text[0] == '"' and text[-1] == '"':
+        return text[1:-1]
+    return text
+
+
+def make_filter(column: str, op: str, value: Any) -> Filter:
+    """column op value → 행 판별 함수"""
+    def compare(row: Dict[str, Any]) -> bool:
+        current = row.get(column)
+        if op == 'is':
+            target = {'null': None, 'true': True, 'false': False}.get(str(value).lower(), value)
+            return current is target or current == target
+        if op == 'in':
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            return str(current) in {str(v) for v in values}
+        if current is None:
+            return False
+        left, right = _coerce(current), _coerce(value)
+        if isinstance(left, (int, float)) and isinstance(right, str):
+            try:
+                right = type(left)(right)
+            except ValueError:
+                pass
+        if isinstance(left, bool) and isinstance(right, str):
+            right = right.lower() == 'true'
+        if op == 'eq':
+            return left == right or str(left) == str(right)
+        if op == 'neq':
+            return not (left == right or str(left) == str(right))
+        if op == 'gt':
+            return left > right
+        if op == 'gte':
+            return left >= right
+        if op == 'lt':
+            return left < right
+        if op == 'lte':
+            return left <= right
+        raise ValueError(f"Unsupported operator: {op}")
+
+    return compare
+
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, quoted, current = [], 0, False, []
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == '(':
+            depth += 1
+        elif not quoted and ch == ')':
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ',':
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(ch)
+    if current:
+        parts.append(''.join(current))
+    return parts
+
+
+def parse_logic_filter(expression: str, combine: str = 'or') -> Filter:
+    """PostgREST or=(a.gt.1,and(b.eq.2,c.lt.3)) 표현식 → 행 판별 함수"""
+    expression = expression.strip()
+    if expression.startswith('(') and expression.endswith(')'):
+        expression = expression[1:-1]
+
+    filters = []
+    for term in _split_top_level(expression):
+        term = term.strip()
+        if term.startswith('and(') or term.startswith('or('):
+            name, _, rest = term.partition('(')
+            filters.append(parse_logic_filter('(' + rest, combine=name))
+        else:
+            column, op, value = term.split('.', 2)
+            if op == 'in':
+                value = [_parse_literal(v) for v in _split_top_level(value.strip('()'))]
+            else:
+                value = _parse_literal(value)
+            filters.append(make_filter(column, op, value))
+
+    if combine == 'and':
+        return lambda row: all(f(row) for f in filters)
+    return lambda row: any(f(row) for f in filters)
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    value = _coerce(value)
+    if value is None:
+        return (1, 0)
+    if isinstance(value, datetime):
+        return (0, value.timestamp())
+    return (0, value)
+
+
+# =====================================================
+# 인메모리 DB
+# =====================================================
+
+class LocalDatabase:
+    """인메모리 테이블 + RPC + 변경 이벤트"""
+
+    def __init__(self, delivery_delay: float = 0.0):
+        """
+        Args:
+            delivery_delay: Realtime 이벤트 전달 지연 (초, 네트워크 흉내)
+        """
+        self.delivery_delay = delivery_delay
+        self.tables: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.stats: Counter = Counter()
+        self.functions: Dict[str, Callable[..., Any]] = {
+            'apply_ros2_command_status': self._apply_ros2_command_status,
+            'claim_ros2_command': self._claim_ros2_command,
+            'claim_pending_ros2_commands': self._claim_pending_ros2_commands,
+            'heartbeat_ros2_commands': self._heartbeat_ros2_commands,
+            'requeue_expired_ros2_commands': self._requeue_expired_ros2_commands,
+            'calculate_parking_fee': self._calculate_parking_fee,
+        }
+
+        self._lock = threading.RLock()
+        self._listeners: Dict[int, Tuple[str, str, Callable[[Dict[str, Any]], None]]] = {}
+        self._next_listener = 1
+
+        # 이벤트는 별도 스레드에서 전달 (실제 Realtime처럼 INSERT 호출자와 분리)
+        self._events: 'queue.Queue[Optional[Tuple[Callable, Dict[str, Any]]]]' = queue.Queue()
+        self._delivery_thread = threading.Thread(target=self._deliver, name='local-realtime',
+                                                 daemon=True)
+        self._delivery_thread.start()
+
+    # ----- 변경 이벤트 -----
+
+    def listen(self, table: str, event: str, callback: Callable[[Dict[str, Any]], None]) -> int:
+        """table의 event('INSERT'/'UPDATE'/'DELETE'/'*') 구독. 구독 ID 반환"""
+        with self._lock:
+            listener_id = self._next_listener
+            self._next_listener += 1
+            self._listeners[listener_id] = (table, event, callback)
+            return listener_id
+
+    def unlisten(self, listener_id: int):
+        with self._lock:
+            self._listeners.pop(listener_id, None)
+
+    def _emit(self, table: str, event: str, new: Dict[str, Any], old: Dict[str, Any]):
+        payload = {
+            'eventType': event,
+            'schema': 'public',
+            'table': table,
+            'commit_timestamp': utc_now(),
+            'new': dict(new),
+            'old': dict(old),
+            'errors': None,
+        }
+        for listened_table, listened_event, callback in list(self._listeners.values()):
+            if listened_table == table and listened_event in (event, '*'):
+                self._events.put((callback, payload))
+
+    def _deliver(self):
+        while True:
+            item = self._events.get()
+            if item is None:
+                return
+            callback, payload = item
+            if self.delivery_delay:
+                time.sleep(self.delivery_delay)
+            try:
+                callback(payload)
+            except Exception as e:
+                print(f"⚠️  로컬 Realtime 콜백 오류: {e}")
+
+    def close(self):
+        self._events.put(None)
+
+    # ----- 테이블 연산 -----
+
+    def insert(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.stats['insert'] += 1
+        inserted = []
+        with self._lock:
+            for row in rows:
+                record = _row_defaults(table)
+                record.update(row)
+                self.tables[table].append(record)
+                inserted.append(dict(record))
+                self._emit(table, 'INSERT', record, {})
+        return inserted
+
+    def upsert(self, table: str, rows: List[Dict[str, Any]],
+               on_conflict: str = None) -> List[Dict[str, Any]]:
+        self.stats['upsert'] += 1
+        keys = (on_conflict or PRIMARY_KEYS.get(table, 'id')).split(',')
+        result = []
+        with self._lock:
+            for row in rows:
+                existing = next(
+                    (r for r in self.tables[table]
+                     if all(str(r.get(k)) == str(row.get(k)) for k in keys)),
+                    None
+                )
+                if existing is None:
+                    record = _row_defaults(table)
+                    record.update(row)
+                    self.tables[table].append(record)
+                    self._emit(table, 'INSERT', record, {})
+                else:
+                    old = dict(existing)
+                    existing.update(row)
+                    _touch(table, existing)
+                    record = existing
+                    self._emit(table, 'UPDATE', record, old)
+                result.append(dict(record))
+        return result
+
+    def select(self, table: str, filters: List[Filter] = (),
+               order: List[Tuple[str, bool]] = (), limit: int = None,
+               offset: int = 0) -> List[Dict[str, Any]]:
+        self.stats['select'] += 1
+        with self._lock:
+            rows = [r for r in self.tables[table] if all(f(r) for f in filters)]
+            for column, desc in reversed(list(order)):
+                rows.sort(key=lambda r: _sort_key(r.get(column)), reverse=desc)
+            rows = rows[offset:offset + limit] if limit is not None else rows[offset:]
+            # 페이지에 들어가는 행만 복사
+            return [dict(r) for r in rows]
+
+    def update(self, table: str, data: Dict[str, Any],
+               filters: List[Filter] = ()) -> List[Dict[str, Any]]:
+        self.stats['update'] += 1
+        updated = []
+        with self._lock:
+            for row in self.tables[table]:
+                if all(f(row) for f in filters):
+                    old = dict(row)
+                    row.update(data)
+                    _touch(table, row)
+                    updated.append(dict(row))
+                    self._emit(table, 'UPDATE', row, old)
+        return updated
+
+    def delete(self, table: str, filters: List[Filter] = ()) -> List[Dict[str, Any]]:
+        self.stats['delete'] += 1
+        with self._lock:
+            keep, removed = [], []
+            for row in self.tables[table]:
+                (removed if all(f(row) for f in filters) else keep).append(row)
+            self.tables[table] = keep
+            for row in removed:
+                self._emit(table, 'DELETE', {}, row)
+        return [dict(r) for r in removed]
+
+    def rpc(self, name: str, params: Dict[str, Any]) -> Any:
+        self.stats['rpc'] += 1
+        self.stats[f'rpc:{name}'] += 1
+        function = self.functions.get(name)
+        if function is None:
+            raise KeyError(f"Unknown function: {name}")
+        with self._lock:
+            return function(**params)
+
+    # ----- ros2_commands 함수 (005 / 006 / 009 마이그레이션과 동일 동작) -----
+
+    def _commands(self) -> List[Dict[str, Any]]:
+        return self.tables['ros2_commands']
+
+    def _find_command(self, command_id: str) -> Optional[Dict[str, Any]]:
+        return next((r for r in self._commands() if r['command_id'] == command_id), None)
+
+    def _set(self, row: Dict[str, Any], data: Dict[str, Any]):
+        old = dict(row)
+        row.update(data)
+        _touch('ros2_commands', row)
+        self._emit('ros2_commands', 'UPDATE', row, old)
+
+    def _apply_ros2_command_status(self, p_updates: List[Dict[str, Any]]) -> int:
+        count = 0
+        for update in p_updates:
+            row = self._find_command(update['command_id'])
+            if row is None:
+                continue
+            # 선점자 쓰기는 선점 중일 때만, 선점 없는 쓰기는 pending일 때만 (009)
+            claimed_by = update.get('claimed_by')
+            if claimed_by:
+                if row.get('claimed_by') != claimed_by:
+                    continue
+            elif row.get('status') != 'pending':
+                continue
+            data = {'status': update['status']}
+            for key in ('executed_at', 'completed_at', 'error_message'):
+                if update.get(key) is not None:
+                    data[key] = update[key]
+            if update['status'] in ('completed', 'failed', 'pending'):
+                data['lease_expires_at'] = None
+            if update['status'] == 'pending':
+                data['claimed_by'] = None
+            self._set(row, data)
+            count += 1
+        return count
+
+    def _claim(self, row: Dict[str, Any], worker_id: str, lease_seconds: int):
+        now = datetime.now(timezone.utc)
+        self._set(row, {
+            'status': 'processing',
+            'claimed_by': worker_id,
+            'executed_at': now.isoformat(),
+            'heartbeat_at': now.isoformat(),
+            'lease_expires_at': (now + timedelta(seconds=lease_seconds)).isoformat(),
+            'attempt_count': (row.get('attempt_count') or 0) + 1,
+        })
+
+    def _claim_ros2_command(self, p_command_id: str, p_worker_id: str,
+                            p_lease_seconds: int = 30) -> List[Dict[str, Any]]:
+        row = self._find_command(p_command_id)
+        if row is None or row.get('status') != 'pending':
+            return []
+        self._claim(row, p_worker_id, p_lease_seconds)
+        return [dict(row)]
+
+    def _claim_pending_ros2_commands(self, p_worker_id: str, p_limit: int = 10,
+                                     p_lease_seconds: int = 30) -> List[Dict[str, Any]]:
+        pending = sorted((r for r in self._commands() if r.get('status') == 'pending'),
+                         key=lambda r: _sort_key(r.get('created_at')))[:p_limit]
+        for row in pending:
+            self._claim(row, p_worker_id, p_lease_seconds)
+        return [dict(r) for r in pending]
+
+    def _heartbeat_ros2_commands(self, p_worker_id: str, p_command_ids: List[str],
+                                 p_lease_seconds: int = 30) -> int:
+        now = datetime.now(timezone.utc)
+        ids = set(p_command_ids)
+        count = 0
+        for row in self._commands():
+            if (row['command_id'] in ids and row.get('status') == 'processing'
+                    and row.get('claimed_by') == p_worker_id):
+                row['heartbeat_at'] = now.isoformat()
+                row['lease_expires_at'] = (now + timedelta(seconds=p_lease_seconds)).isoformat()
+                _touch('ros2_commands', row)
+                count += 1
+        return count
+
+    def _requeue_expired_ros2_commands(self, p_max_attempts: int = 3) -> List[Dict[str, Any]]:
+        now = datetime.now(timezone.utc)
+        requeued = []
+        for row in self._commands():
+            lease = row.get('lease_expires_at')
+            if row.get('status') != 'processing' or not lease or _coerce(lease) >= now:
+                continue
+            exhausted = (row.get('attempt_count') or 0) >= p_max_attempts
+            data = {
+                'status': 'failed' if exhausted else 'pending',
+                'claimed_by': None,
+                'lease_expires_at': None,
+                'completed_at': now.isoformat() if exhausted else None,
+            }
+            if exhausted:
+                data['error_message'] = (f"Lease expired ({row.get('attempt_count')} attempts, "
+                                         f"last worker: {row.get('claimed_by')})")
+            self._set(row, data)
+            requeued.append(dict(row))
+        return requeued
+
+    # ----- 요금 함수 (001 calculate_parking_fee와 같은 동작) -----
+
+    def _calculate_parking_fee(self, p_entry_time: str, p_exit_time: str) -> List[Dict[str, Any]]:
+        """
+        SQL을 한 줄씩 옮김: 최근 생성 활성 정책, 분 = EPOCH / 60의 INTEGER 대입(반올림),
+        NULL 비교는 거짓 (free_minutes / daily_max_fee가 NULL이면 SQL과 같은 결과)
+        """
+        policies = [r for r in self.tables['parking_fee_policy'] if r.get('is_active')]
+        if not policies:
+            raise ValueError('활성화된 요금 정책이 없습니다')
+        policy = max(policies, key=lambda r: _coerce(r['created_at']))
+
+        def numeric(value: Any) -> Optional[Decimal]:
+            return None if value is None else Decimal(str(value))
+
+        def row(base: Optional[Decimal], additional: Optional[Decimal],
+                total: Optional[Decimal], minutes: int) -> List[Dict[str, Any]]:
+            as_json = lambda value: None if value is None else float(value)
+            return [{'base_fee': as_json(base), 'additional_fee': as_json(additional),
+                     'total_fee': as_json(total), 'duration_minutes': minutes}]
+
+        micros = (_coerce(p_exit_time) - _coerce(p_entry_time)) // timedelta(microseconds=1)
+        duration = int((Decimal(micros) / 1_000_000 / 60).quantize(Decimal(1), ROUND_HALF_UP))
+
+        free_minutes = policy.get('free_minutes')
+        if free_minutes is not None and duration <= free_minutes:
+            return row(Decimal(0), Decimal(0), Decimal(0), duration)
+        if free_minutes is None:
+            return row(numeric(policy['base_fee']), None, None, duration)
+
+        billable = duration - free_minutes
+        base_fee = numeric(policy['base_fee'])
+        if billable <= policy['base_time_minutes']:
+            additional_fee = Decimal(0)
+        else:
+            extra = billable - policy['base_time_minutes']
+            units = (Decimal(extra) / Decimal(policy['additional_unit_minutes'])) \
+                .to_integral_value(rounding=ROUND_CEILING)
+            additional_fee = units * numeric(policy['additional_fee'])
+
+        total_fee = base_fee + additional_fee
+        daily_max = numeric(policy.get('daily_max_fee'))
+        if daily_max is not None and total_fee > daily_max:
+            total_fee = daily_max
+        return row(base_fee, additional_fee, total_fee, duration)
+
+
+# =====================================================
+# 인프로세스 클라이언트 (supabase-py와 같은 모양)
+# =====================================================
+
+class LocalResponse:
+    def __init__(self, data: Any, count: int = None):
+        self.data = data
+        self.count = count
+
+
+class _LocalQuery:
+    """supabase-py 쿼리 빌더 흉내"""
+
+    def __init__(self, client: 'LocalSupabaseClient', table: str):
+        self._client = client
+        self._table = table
+        self._op = 'select'
+        self._payload: Any = None
+        self._on_conflict: Optional[str] = None
+        self._filters: List[Filter] = []
+        self._order: List[Tuple[str, bool]] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._single = False
+
+    def select(self, columns: str = '*', count: str = None) -> '_LocalQuery':
+        if self._op == 'select':
+            self._op = 'select'
+        return self
+
+    def insert(self, rows) -> '_LocalQuery':
+        self._op, self._payload = 'insert', rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict: str = None, **kwargs) -> '_LocalQuery':
+        self._op, self._payload = 'upsert', rows if isinstance(rows, list) else [rows]
+        self._on_conflict = on_conflict or None
+        return self
+
+    def update(self, data: Dict[str, Any]) -> '_LocalQuery':
+        self._op, self._payload = 'update', data
+        return self
+
+    def delete(self) -> '_LocalQuery':
+        self._op = 'delete'
+        return self
+
+    def _add(self, column: str, op: str, value: Any) -> '_LocalQuery':
+        self._filters.append(make_filter(column, op, value))
+        return self
+
+    def eq(self, column, value):
+        return self._add(column, 'eq', value)
+
+    def neq(self, column, value):
+        return self._add(column, 'neq', value)
+
+    def gt(self, column, value):
+        return self._add(column, 'gt', value)
+
+    def gte(self, column, value):
+        return self._add(column, 'gte', value)
+
+    def lt(self, column, value):
+        return self._add(column, 'lt', value)
+
+    def lte(self, column, value):
+        return self._add(column, 'lte', value)
+
+    def in_(self, column, values):
+        return self._add(column, 'in', list(values))
+
+    def is_(self, column, value):
+        return self._add(column, 'is', value)
+
+    def or_(self, expression: str) -> '_LocalQuery':
+        self._filters.append(parse_logic_filter(expression))
+        return self
+
+    def order(self, column: str, desc: bool = False, **kwargs) -> '_LocalQuery':
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int) -> '_LocalQuery':
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int) -> '_LocalQuery':
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self) -> '_LocalQuery':
+        self._single = True
+        return self
+
+    def execute(self) -> LocalResponse:
+        self._client._request()
+        db = self._client.db
+        if self._op == 'insert':
+            data = db.insert(self._table, self._payload)
+        elif self._op == 'upsert':
+            data = db.upsert(self._table, self._payload, self._on_conflict)
+        elif self._op == 'update':
+            data = db.update(self._table, self._payload, self._filters)
+        elif self._op == 'delete':
+            data = db.delete(self._table, self._filters)
+        else:
+            data = db.select(self._table, self._filters, self._order, self._limit, self._offset)
+        if self._single:
+            data = data[0] if data else None
+        return LocalResponse(data, count=len(data) if isinstance(data, list) else None)
+
+
+class _LocalRpc:
+    def __init__(self, client: 'LocalSupabaseClient', name: str, params: Dict[str, Any]):
+        self._client, self._name, self._params = client, name, params or {}
+
+    def execute(self) -> LocalResponse:
+        self._client._request()
+        return LocalResponse(self._client.db.rpc(self._name, self._params))
+
+
+class LocalChannel:
+    """Realtime 채널 흉내 (on_postgres_changes + subscribe)"""
+
+    def __init__(self, db: LocalDatabase, name: str):
+        self.db = db
+        self.name = name
+        self._bindings: List[Tuple[str, str, Callable]] = []
+        self._listener_ids: List[int] = []
+
+    def on_postgres_changes(self, event: str, callback: Callable, table: str = '*',
+                            schema: str = 'public', filter: str = None) -> 'LocalChannel':
+        self._bindings.append((table, event, callback))
+        return self
+
+    def subscribe(self, callback: Callable = None) -> 'LocalChannel':
+        for table, event, handler in self._bindings:
+            self._listener_ids.append(self.db.listen(table, event, handler))
+        if callback:
+            callback('SUBSCRIBED', None)
+        return self
+
+    def unsubscribe(self):
+        for listener_id in self._listener_ids:
+            self.db.unlisten(listener_id)
+        self._listener_ids = []
+
+
+class LocalSupabaseClient:
+    """인프로세스 Supabase 클라이언트 (HTTP 왕복 지연은 request_latency로 흉내)"""
+
+    def __init__(self, db: LocalDatabase, request_latency: float = 0.0):
+        self.db = db
+        self.request_latency = request_latency
+
+    def _request(self):
+        self.db.stats['requests'] += 1
+        if self.request_latency:
+            time.sleep(self.request_latency)
+
+    def table(self, name: str) -> _LocalQuery:
+        return _LocalQuery(self, name)
+
+    def from_(self, name: str) -> _LocalQuery:
+        return self.table(name)
+
+    def rpc(self, name: str, params: Dict[str, Any] = None) -> _LocalRpc:
+        return _LocalRpc(self, name, params)
+
+    def channel(self, name: str) -> LocalChannel:
+        return LocalChannel(self.db, name)
+
+
+# =====================================================
+# HTTP 스텁 서버 (PostgREST + Realtime WebSocket)
+# =====================================================
+
+_WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+def _parse_postgrest_params(query: str) -> Tuple[List[Filter], List[Tuple[str, bool]],
+                                                 Optional[int], int, Optional[str]]:
+    filters, order, limit, offset, on_conflict = [], [], None, 0, None
+    for key, value in parse_qsl(query, keep_blank_values=True):
+        if key == 'select':
+            continue
+        if key == 'order':
+            for part in value.split(','):
+                column, _, direction = part.partition('.')
+                order.append((column, direction.startswith('desc')))
+        elif key == 'limit':
+            limit = int(value)
+        elif key == 'offset':
+            offset = int(value)
+        elif key == 'on_conflict':
+            on_conflict = value
+        elif key in ('or', 'and'):
+            filters.append(parse_logic_filter(value, combine=key))
+        else:
+            op, _, operand = value.partition('.')
+            if op == 'in':
+                operand = [_parse_literal(v) for v in _split_top_level(operand.strip('()'))]
+            else:
+                operand = _parse_literal(unquote(operand))
+            filters.append(make_filter(key, op, operand))
+    return filters, order, limit, offset, on_conflict
+
+
+class _WebSocket:
+    """최소 WebSocket 서버측 구현 (텍스트 프레임)"""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self._send_lock = threading.Lock()
+
+    def _recv_exact(self, size: int) -> bytes:
+        data = b''
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError('closed')
+            data += chunk
+        return data
+
+    def receive(self) -> Optional[str]:
+        while True:
+            first, second = self._recv_exact(2)
+            opcode = first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack('!H', self._recv_exact(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', self._recv_exact(8))[0]
+            mask = self._recv_exact(4) if second & 0x80 else b''
+            data = bytearray(self._recv_exact(length))
+            if mask:
+                for i in range(len(data)):
+                    data[i] ^= mask[i % 4]
+            if opcode == 0x8:
+                return None
+            if opcode == 0x9:
+                self._send_frame(0xA, bytes(data))
+                continue
+            if opcode in (0x1, 0x2):
+                return data.decode()
+
+    def _send_frame(self, opcode: int, data: bytes):
+        header = bytes([0x80 | opcode])
+        if len(data) < 126:
+            header += bytes([len(data)])
+        elif len(data) < 65536:
+            header += bytes([126]) + struct.pack('!H', len(data))
+        else:
+            header += bytes([127]) + struct.pack('!Q', len(data))
+        with self._send_lock:
+            self.sock.sendall(header + data)
+
+    def send(self, text: str):
+        self._send_frame(0x1, text.encode())
+
+
+class LocalSupabaseServer:
+    """PostgREST 호환 HTTP + Realtime WebSocket 스텁 (create_client(server.url, key)로 접속)"""
+
+    def __init__(self, db: LocalDatabase, host: str = '127.0.0.1', port: int = 0):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _body(self) -> Any:
+                length = int(self.headers.get('Content-Length') or 0)
+                return json.loads(self.rfile.read(length) or b'null') if length else None
+
+            def _reply(self, status: int, data: Any):
+                body = json.dumps(data, default=str).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _handle(self, method: str):
+                url = urlparse(self.path)
+                if url.path.startswith('/realtime/v1/websocket'):
+                    server._serve_websocket(self)
+                    return
+                if not url.path.startswith('/rest/v1/'):
+                    self._reply(404, {'message': 'not found'})
+                    return
+
+                db.stats['requests'] += 1
+                resource = url.path[len('/rest/v1/'):]
+                try:
+                    if resource.startswith('rpc/'):
+                        data = db.rpc(resource[4:], self._body() or {})
+                        self._reply(200, data)
+                        return
+
+                    filters, order, limit, offset, on_conflict = _parse_postgrest_params(url.query)
+                    if method == 'GET':
+                        data = db.select(resource, filters, order, limit, offset)
+                    elif method == 'POST':
+                        rows = self._body()
+                        rows = rows if isinstance(rows, list) else [rows]
+                        prefer = self.headers.get('Prefer') or ''
+                        if 'resolution=merge-duplicates' in prefer:
+                            data = db.upsert(resource, rows, on_conflict)
+                        else:
+                            data = db.insert(resource, rows)
+                    elif method == 'PATCH':
+                        data = db.update(resource, self._body() or {}, filters)
+                    elif method == 'DELETE':
+                        data = db.delete(resource, filters)
+                    else:
+                        self._reply(405, {'message': 'method not allowed'})
+                        return
+                    self._reply(201 if method == 'POST' else 200, data)
+                except Exception as e:
+                    self._reply(400, {'message': str(e)})
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def do_PATCH(self):
+                self._handle('PATCH')
+
+            def do_DELETE(self):
+                self._handle('DELETE')
+
+        self.db = db
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever,
+                                        name='local-supabase', daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'LocalSupabaseServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _serve_websocket(self, handler: BaseHTTPRequestHandler):
+        """Phoenix 채널 프로토콜 (phx_join / heartbeat / postgres_changes)"""
+        key = handler.headers.get('Sec-WebSocket-Key', '')
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+        handler.send_response(101, 'Switching Protocols')
+        handler.send_header('Upgrade', 'websocket')
+        handler.send_header('Connection', 'Upgrade')
+        handler.send_header('Sec-WebSocket-Accept', accept)
+        handler.end_headers()
+        handler.wfile.flush()
+
+        ws = _WebSocket(handler.connection)
+        listener_ids: List[int] = []
+        next_binding = [1]
+
+        def reply(topic: str, ref: Any, response: Dict[str, Any], join_ref: Any = None):
+            ws.send(json.dumps({'topic': topic, 'event': 'phx_reply', 'ref': ref,
+                                'join_ref': join_ref,
+                                'payload': {'status': 'ok', 'response': response}}))
+
+        def forwarder(topic: str, binding_id: int, join_ref: Any):
+            def forward(change: Dict[str, Any]):
+                data = {
+                    'schema': change['schema'],
+                    'table': change['table'],
+                    'commit_timestamp': change['commit_timestamp'],
+                    'type': change['eventType'],
+                    'record': change['new'],
+                    'old_record': change['old'],
+                    'columns': [],
+                    'errors': None,
+                }
+                try:
+                    ws.send(json.dumps({'topic': topic, 'event': 'postgres_changes', 'ref': None,
+                                        'join_ref': join_ref,
+                                        'payload': {'ids': [binding_id], 'data': data}},
+                                       default=str))
+                except OSError:
+                    pass
+            return forward
+
+        try:
+            while True:
+                text = ws.receive()
+                if text is None:
+                    break
+                message = json.loads(text)
+                topic, event, ref = message.get('topic'), message.get('event'), message.get('ref')
+                join_ref = message.get('join_ref')
+
+                if event == 'phx_join':
+                    config = (message.get('payload') or {}).get('config') or {}
+                    bindings = []
+                    for change in config.get('postgres_changes') or []:
+                        binding_id = next_binding[0]
+                        next_binding[0] += 1
+                        listener_ids.append(self.db.listen(
+                            change.get('table', '*'), change.get('event', '*'),
+                            forwarder(topic, binding_id, join_ref or ref)
+                        ))
+                        bindings.append(dict(change, id=binding_id))
+                    reply(topic, ref, {'postgres_changes': bindings}, join_ref)
+                    ws.send(json.dumps({'topic': topic, 'event': 'system', 'ref': None,
+                                        'payload': {'status': 'ok', 'extension': 'postgres_changes',
+                                                    'message': 'Subscribed to PostgreSQL',
+                                                    'channel': topic}}))
+                else:
+                    # heartbeat / access_token / phx_leave 등은 ok 응답
+                    reply(topic, ref, {}, join_ref)
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            for listener_id in listener_ids:
+                self.db.unlisten(listener_id)
+            handler.close_connection = True
+
+
+# =====================================================
+# asyncio 클라이언트 (AsyncClient와 같은 모양)
+# =====================================================
+
+class _AsyncLocalRequest:
+    """execute()를 await 하는 요청 래퍼"""
+
+    def __init__(self, client: 'AsyncLocalSupabaseClient', request):
+        self._client = client
+        self._request = request
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._request, name)
+        if not callable(attr):
+            return attr
+
+        def chain(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return self if result is self._request else result
+        return chain
+
+    async def execute(self) -> LocalResponse:
+        if self._client.request_latency:
+            await asyncio.sleep(self._client.request_latency)
+        return self._request.execute()
+
+
+class AsyncLocalChannel(LocalChannel):
+    """Realtime 채널 (콜백은 이벤트 루프에서 호출 - AsyncClient와 동일)"""
+
+    def __init__(self, db: LocalDatabase, name: str, loop: asyncio.AbstractEventLoop):
+        super().__init__(db, name)
+        self._loop = loop
+
+    def on_postgres_changes(self, event: str, callback: Callable, table: str = '*',
+                            schema: str = 'public', filter: str = None) -> 'AsyncLocalChannel':
+        def on_loop(payload: Dict[str, Any]):
+            self._loop.call_soon_threadsafe(callback, payload)
+        return super().on_postgres_changes(event, on_loop, table, schema, filter)
+
+    async def subscribe(self, callback: Callable = None) -> 'AsyncLocalChannel':
+        return super().subscribe(callback)
+
+    async def unsubscribe(self):
+        super().unsubscribe()
+
+
+class AsyncLocalSupabaseClient:
+    """asyncio용 인프로세스 클라이언트 (요청 지연은 asyncio.sleep → 스레드를 막지 않음)"""
+
+    def __init__(self, db: LocalDatabase, request_latency: float = 0.0):
+        self.db = db
+        self.request_latency = request_latency
+        # 실제 지연은 위에서 await 하므로 동기 클라이언트는 지연 없이 사용
+        self.sync = LocalSupabaseClient(db)
+
+    def table(self, name: str) -> _AsyncLocalRequest:
+        return _AsyncLocalRequest(self, self.sync.table(name))
+
+    def from_(self, name: str) -> _AsyncLocalRequest:
+        return self.table(name)
+
+    def rpc(self, name: str, params: Dict[str, Any] = None) -> _AsyncLocalRequest:
+        return _AsyncLocalRequest(self, self.sync.rpc(name, params))
+
+    def channel(self, name: str) -> AsyncLocalChannel:
+        return AsyncLocalChannel(self.db, name, asyncio.get_running_loop())
+
+    async def remove_channel(self, channel: AsyncLocalChannel):
+        await channel.unsubscribe()
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+주차면 점유 인덱스 (빈자리 조회를 DB 없이)
+
+parking_locations를 시작 시 한 번 읽고 Realtime UPDATE로 점유 상태를 유지.
+
+- 구역/층(zone, floor)별 빈자리 비트맵 (bit = 1: 빈자리)
+- 준비 위치(preparation)마다 주차면을 거리순으로 미리 정렬한 비트맵
+  → 가장 가까운 빈자리 = 가장 낮은 1 비트 (DB 조회 / 정렬 없음)
+- 점유 변경은 준비 위치 수만큼 비트 하나씩 뒤집기
+- 레이아웃 변경(주차면 추가/삭제/좌표 변경)이면 인덱스 재구성
+- nearest_free(reserve=True)로 예약한 자리는 release()로 되돌림 (안내 실패 / 타임아웃)
+- check_consistency(): 테이블과 비교해 어긋난 주차면 확인 / 보정
+  (start_consistency_check()로 주기 실행)
+"""
+
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from realtime_payload import normalize_change
+
+ZoneKey = Tuple[str, str]
+
+
+def _lowest_bit(mask: int) -> int:
+    return (mask & -mask).bit_length() - 1
+
+
+def _popcount(mask: int) -> int:
+    # int.bit_count()는 Python 3.10+
+    return bin(mask).count('1')
+
+
+class OccupancyIndex:
+    """parking_locations 점유 상태 인메모리 인덱스"""
+
+    def __init__(self, reservation_seconds: float = 600.0):
+        """
+        Args:
+            reservation_seconds: 예약한 자리를 DB 반영 없이 점유로 유지하는 최대 시간
+                (지나면 check_consistency가 테이블 값으로 되돌림)
+        """
+        self._lock = threading.Lock()
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self.reservation_seconds = reservation_seconds
+        self._reserved: Dict[str, float] = {}           # 예약한 주차면 → 예약 시각 (monotonic)
+
+        self._check_thread: Optional[threading.Thread] = None
+        self._check_stopped = threading.Event()
+
+        # 주차면 번호 (location_id 순)
+        self._spots: List[str] = []
+        self._spot_index: Dict[str, int] = {}
+        self._spot_zone: List[ZoneKey] = []
+        self._free = 0                                  # 전체 빈자리 (bit: 주차면 번호)
+        self._zone_masks: Dict[ZoneKey, int] = {}       # 구역/층별 주차면 (bit: 주차면 번호)
+
+        # 준비 위치별 거리순
+        self._preps: List[str] = []
+        self._prep_index: Dict[str, int] = {}
+        self._order: List[List[int]] = []               # prep → [rank → 주차면 번호]
+        self._rank: List[List[int]] = []                # prep → [주차면 번호 → rank]
+        self._free_by_rank: List[int] = []              # prep → 빈자리 (bit: rank)
+        self._zone_by_rank: List[Dict[ZoneKey, int]] = []  # prep → 구역/층별 (bit: rank)
+
+        self._stats = {
+            'lookups': 0,
+            'misses': 0,
+            'updates': 0,
+            'rebuilds': 0,
+            'repairs': 0,
+            'released': 0,
+            'checks': 0,
+            'check_errors': 0,
+        }
+
+    # ----- 구성 -----
+
+    def load(self, client) -> int:
+        """parking_locations 전체 로드 후 인덱스 구성. 주차면 수 반환"""
+        rows = client.table('parking_locations').select('*').execute().data or []
+        return self.load_rows(rows)
+
+    def load_rows(self, rows: List[Dict[str, Any]]) -> int:
+        """이미 읽은 parking_locations 행으로 인덱스 구성 (AsyncClient 등)"""
+        with self._lock:
+            self._rows = {r['location_id']: dict(r) for r in rows}
+            # 재로드해도 아직 DB에 반영되지 않은 예약은 점유로 유지
+            for spot in list(self._reserved):
+                if spot in self._rows and self._reservation_active_locked(spot):
+                    self._rows[spot]['is_occupied'] = True
+            self._rebuild_locked()
+        print(f"🅿️  점유 인덱스: 주차면 {len(self._spots)}개, 준비 위치 {len(self._preps)}개, "
+              f"빈자리 {_popcount(self._free)}개")
+        return len(self._spots)
+
+    def _rebuild_locked(self):
+        spots = sorted(r for r, row in self._rows.items() if row.get('location_type') == 'parking')
+        preps = sorted(r for r, row in self._rows.items() if row.get('location_type') == 'preparation')
+
+        self._spots = spots
+        self._spot_index = {s: i for i, s in enumerate(spots)}
+        self._spot_zone = [(self._rows[s].get('zone'), self._rows[s].get('floor')) for s in spots]
+
+        self._free = 0
+        self._zone_masks = {}
+        for i, spot in enumerate(spots):
+            self._zone_masks[self._spot_zone[i]] = self._zone_masks.get(self._spot_zone[i], 0) | (1 << i)
+            if not self._rows[spot].get('is_occupied'):
+                self._free |= 1 << i
+
+        coords = [(float(self._rows[s]['x']), float(self._rows[s]['y'])) for s in spots]
+        self._preps = preps
+        self._prep_index = {p: i for i, p in enumerate(preps)}
+        self._order, self._rank, self._free_by_rank, self._zone_by_rank = [], [], [], []
+        for prep in preps:
+            px, py = float(self._rows[prep]['x']), float(self._rows[prep]['y'])
+            order = sorted(range(len(spots)),
+                           key=lambda i: (math.hypot(coords[i][0] - px, coords[i][1] - py), i))
+            rank = [0] * len(spots)
+            free = 0
+            zones: Dict[ZoneKey, int] = {}
+            for r, i in enumerate(order):
+                rank[i] = r
+                zones[self._spot_zone[i]] = zones.get(self._spot_zone[i], 0) | (1 << r)
+                if self._free >> i & 1:
+                    free |= 1 << r
+            self._order.append(order)
+            self._rank.append(rank)
+            self._free_by_rank.append(free)
+            self._zone_by_rank.append(zones)
+
+        self._stats['rebuilds'] += 1
+
+    # ----- 점유 상태 -----
+
+    def _set_occupied_locked(self, spot_id: str, occupied: bool) -> bool:
+        i = self._spot_index.get(spot_id)
+        if i is None:
+            return False
+        was_free = bool(self._free >> i & 1)
+        if was_free != occupied:
+            return False
+
+        bit = 1 << i
+        self._free ^= bit
+        for p, rank in enumerate(self._rank):
+            self._free_by_rank[p] ^= 1 << rank[i]
+        self._rows[spot_id]['is_occupied'] = occupied
+        self._stats['updates'] += 1
+        return True
+
+    def set_occupied(self, spot_id: str, occupied: bool) -> bool:
+        """점유 상태 변경 (바뀌었으면 True)"""
+        with self._lock:
+            return self._set_occupied_locked(spot_id, occupied)
+
+    def is_free(self, spot_id: str) -> bool:
+        with self._lock:
+            i = self._spot_index.get(spot_id)
+            return i is not None and bool(self._free >> i & 1)
+
+    def free_count(self, zone: str = None, floor: str = None) -> int:
+        """빈자리 수 (zone / floor 지정 시 해당 구역/층만)"""
+        with self._lock:
+            mask = self._free
+            if zone is not None or floor is not None:
+                mask &= self._zone_mask_locked(zone, floor)
+            return _popcount(mask)
+
+    def _zone_mask_locked(self, zone: Optional[str], floor: Optional[str],
+                          by_rank: Dict[ZoneKey, int] = None) -> int:
+        masks = self._zone_masks if by_rank is None else by_rank
+        result = 0
+        for (z, f), mask in masks.items():
+            if (zone is None or z == zone) and (floor is None or f == floor):
+                result |= mask
+        return result
+
+    def nearest_free(self, prep_id: str = None, zone: str = None, floor: str = None,
+                     reserve: bool = False) -> Optional[str]:
+        """
+        가장 가까운 빈 주차면
+
+        Args:
+            prep_id: 기준 준비 위치 (없으면 location_id 순 첫 빈자리)
+            zone / floor: 구역 / 층 제한
+            reserve: True면 바로 점유 처리 (DB 반영 전 같은 자리를 두 번 안내하지 않도록)
+        """
+        with self._lock:
+            self._stats['lookups'] += 1
+            p = self._prep_index.get(prep_id)
+
+            if p is None:
+                mask = self._free
+                if zone is not None or floor is not None:
+                    mask &= self._zone_mask_locked(zone, floor)
+                spot = self._spots[_lowest_bit(mask)] if mask else None
+            else:
+                mask = self._free_by_rank[p]
+                if zone is not None or floor is not None:
+                    mask &= self._zone_mask_locked(zone, floor, self._zone_by_rank[p])
+                spot = self._spots[self._order[p][_lowest_bit(mask)]] if mask else None
+
+            if spot is None:
+                self._stats['misses'] += 1
+            elif reserve:
+                self._set_occupied_locked(spot, True)
+                self._reserved[spot] = time.monotonic()
+            return spot
+
+    def release(self, spot_id: str) -> bool:
+        """
+        nearest_free(reserve=True)로 예약한 자리 되돌리기 (안내 실패 / 타임아웃)
+
+        예약 후 DB에서 점유가 확인된 자리(또는 예약하지 않은 자리)는 그대로 둠.
+        되돌렸으면 True
+        """
+        with self._lock:
+            if self._reserved.pop(spot_id, None) is None:
+                return False
+            self._set_occupied_locked(spot_id, False)
+            self._stats['released'] += 1
+            return True
+
+    def _reservation_active_locked(self, spot_id: str) -> bool:
+        reserved_at = self._reserved.get(spot_id)
+        if reserved_at is None:
+            return False
+        if time.monotonic() - reserved_at > self.reservation_seconds:
+            del self._reserved[spot_id]
+            return False
+        return True
+
+    def location(self, location_id: str) -> Optional[Dict[str, Any]]:
+        """위치 행 (좌표 / 구역 등)"""
+        with self._lock:
+            row = self._rows.get(location_id)
+            return dict(row) if row else None
+
+    # ----- Realtime 동기화 -----
+
+    def on_change(self, payload: Dict[str, Any]):
+        """
+        parking_locations Realtime 콜백 (event='*')
+
+        is_occupied만 바뀌면 비트 갱신, 레이아웃이 바뀌면 재구성
+        """
+        change = normalize_change(payload)
+        event = change.get('eventType')
+        new = change.get('new') or {}
+        old = change.get('old') or {}
+
+        with self._lock:
+            if event == 'DELETE':
+                if self._rows.pop(old.get('location_id'), None) is not None:
+                    self._rebuild_locked()
+                return
+
+            location_id = new.get('location_id')
+            if not location_id:
+                return
+
+            current = self._rows.get(location_id)
+            layout_keys = ('location_type', 'zone', 'floor', 'x', 'y')
+            if current is None or any(
+                key in new and new[key] != current.get(key) for key in layout_keys
+            ):
+                self._rows[location_id] = dict(current or {}, **new)
+                self._rebuild_locked()
+                return
+
+            current.update(new)
+            if current.get('location_type') == 'parking' and 'is_occupied' in new:
+                occupied = bool(new['is_occupied'])
+                if occupied:
+                    # DB에서 점유 확인 → 더 이상 되돌릴 예약 아님
+                    self._reserved.pop(location_id, None)
+                elif self._reservation_active_locked(location_id):
+                    # 예약 직후 다른 컬럼 UPDATE (is_occupied=false 그대로) → 예약 유지
+                    return
+                self._set_occupied_locked(location_id, occupied)
+
+    def check_consistency(self, client, repair: bool = True) -> List[str]:
+        """
+        테이블과 인덱스 비교
+
+        Returns:
+            점유 상태가 어긋난 location_id 목록 (repair=True면 테이블 값으로 보정)
+        """
+        rows = client.table('parking_locations').select('*').execute().data or []
+        return self.check_rows(rows, repair)
+
+    def check_rows(self, rows: List[Dict[str, Any]], repair: bool = True) -> List[str]:
+        """이미 읽은 parking_locations 전체 행과 비교 (AsyncClient 등, check_consistency 참고)"""
+        all_rows = rows
+        rows = [row for row in rows if row.get('location_type') == 'parking']
+
+        mismatched = []
+        layout_changed = False
+        with self._lock:
+            for row in rows:
+                i = self._spot_index.get(row['location_id'])
+                if i is None:
+                    mismatched.append(row['location_id'])
+                    layout_changed = True
+                    continue
+                if bool(self._free >> i & 1) == bool(row.get('is_occupied')):
+                    if not row.get('is_occupied') and self._reservation_active_locked(row['location_id']):
+                        continue  # 예약 후 DB 반영 전
+                    mismatched.append(row['location_id'])
+                    if repair:
+                        self._set_occupied_locked(row['location_id'], bool(row.get('is_occupied')))
+                        self._stats['repairs'] += 1
+
+            known = {row['location_id'] for row in rows}
+            missing = [s for s in self._spots if s not in known]
+            mismatched.extend(missing)
+            layout_changed = layout_changed or bool(missing)
+
+            # 준비 위치별 비트맵도 전체 빈자리 비트맵과 일치해야 함
+            for p, order in enumerate(self._order):
+                expected = sum(1 << r for r, i in enumerate(order) if self._free >> i & 1)
+                if expected != self._free_by_rank[p]:
+                    print(f"⚠️  준비 위치 비트맵 불일치: {self._preps[p]} (재구성)")
+                    self._rebuild_locked()
+                    break
+
+        if mismatched:
+            print(f"⚠️  점유 인덱스 불일치 {len(mismatched)}건: {mismatched[:10]}")
+        if repair and layout_changed:
+            self.load_rows(all_rows)
+        return mismatched
+
+    def start_consistency_check(self, client, interval: float = 300.0):
+        """interval초마다 check_consistency(repair=True) (놓친 Realtime 이벤트 / 만료된 예약 보정)"""
+        if self._check_thread is None:
+            self._check_stopped.clear()
+            self._check_thread = threading.Thread(target=self._run_consistency_check,
+                                                  args=(client, interval),
+                                                  name='occupancy-check', daemon=True)
+            self._check_thread.start()
+
+    def stop(self):
+        """주기 점검 중지"""
+        self._check_stopped.set()
+        if self._check_thread is not None:
+            self._check_thread.join(timeout=5)
+            self._check_thread = None
+
+    def _run_consistency_check(self, client, interval: float):
+        while not self._check_stopped.wait(interval):
+            try:
+                self.check_consistency(client)
+                key = 'checks'
+            except Exception as e:
+                key = 'check_errors'
+                print(f"⚠️  점유 인덱스 점검 실패: {e}")
+            with self._lock:
+                self._stats[key] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """인덱스 통계 (free: 전체 빈자리 수)"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['spots'] = len(self._spots)
+            stats['preparations'] = len(self._preps)
+            stats['free'] = _popcount(self._free)
+            stats['reserved'] = len(self._reserved)
+            return stats
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+YOLO 점유 감지 → parking_current_status 반영 단계
+
+비전 파이프라인은 매 프레임 모든 주차면의 감지 결과를 내보냄 (30fps × 500면 = 초당 15,000건).
+그대로 쓰면 테이블과 Realtime 구독자가 감당하지 못하므로:
+
+- 주차면별 상태를 numpy 배열로 유지 (프레임 하나 = 벡터 연산 한 번)
+- 신뢰도 히스테리시스: 점유 확률이 on_threshold 이상이면 점유, off_threshold 이하면 빈자리,
+  그 사이는 현재 상태 유지 (경계 근처에서 깜빡이지 않음)
+- 시간 디바운스: 바뀐 판정이 debounce_seconds 동안 유지돼야 상태 변경으로 확정
+  (대기 중인 판정을 주차면별로 기억 → 판정이 뒤집히면 대기 시간을 처음부터 다시 셈)
+- 확정된 변경만 모아 flush_interval마다 다중 행 upsert 한 번
+
+사용법 (합성 스트림 벤치마크):
+    python occupancy_ingest.py --spots 500 --fps 30 --seconds 60
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class OccupancyIngest:
+    """주차면 감지 결과를 디바운스해서 parking_current_status에 일괄 반영"""
+
+    def __init__(self, client, on_threshold: float = 0.7, off_threshold: float = 0.3,
+                 debounce_seconds: float = 0.5, flush_interval: float = 1.0,
+                 capacity: int = 1024):
+        """
+        Args:
+            client: Supabase 클라이언트
+            on_threshold: 점유 확률이 이 값 이상이면 점유 판정
+            off_threshold: 점유 확률이 이 값 이하이면 빈자리 판정
+            debounce_seconds: 판정이 이 시간 동안 유지돼야 상태 변경 확정
+            flush_interval: 확정된 변경을 upsert하는 주기 (초)
+            capacity: 초기 주차면 배열 크기 (넘으면 두 배로 늘림)
+        """
+        if not 0.0 <= off_threshold < on_threshold <= 1.0:
+            raise ValueError("0 <= off_threshold < on_threshold <= 1 이어야 함")
+
+        self.client = client
+        self.on_threshold = on_threshold
+        self.off_threshold = off_threshold
+        self.debounce_seconds = debounce_seconds
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._spots: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._state = np.zeros(capacity, dtype=bool)           # 확정된 점유 상태
+        self._known = np.zeros(capacity, dtype=bool)           # 상태를 한 번이라도 확정했는지
+        self._since = np.full(capacity, np.nan)                # 다른 판정이 시작된 시각
+        self._pending = np.zeros(capacity, dtype=bool)         # 확정을 기다리는 판정
+        self._confidence = np.zeros(capacity, dtype=np.float32)
+        self._changed_at = np.zeros(capacity)                  # 확정 시각 (epoch 초)
+        self._dirty = np.zeros(capacity, dtype=bool)           # 기록 대기
+
+        self._stats = {
+            'frames': 0,
+            'detections': 0,
+            'initial': 0,
+            'changes': 0,
+            'written_rows': 0,
+            'requests': 0,
+            'failed_requests': 0,
+        }
+
+    # ----- 주차면 -----
+
+    def _grow(self, size: int):
+        capacity = len(self._state)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name, fill in (('_state', False), ('_known', False), ('_since', np.nan),
+                           ('_pending', False), ('_confidence', 0.0), ('_changed_at', 0.0),
+                           ('_dirty', False)):
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def register_spots(self, spot_ids: Sequence[str]) -> np.ndarray:
+        """주차면 ID → 배열 인덱스 (처음 보는 주차면은 추가). ingest_array에 넘길 인덱스"""
+        with self._lock:
+            return self._indices_locked(spot_ids)
+
+    def _indices_locked(self, spot_ids: Sequence[str]) -> np.ndarray:
+        indices = np.empty(len(spot_ids), dtype=np.intp)
+        for i, spot_id in enumerate(spot_ids):
+            index = self._index.get(spot_id)
+            if index is None:
+                index = len(self._spots)
+                self._index[spot_id] = index
+                self._spots.append(spot_id)
+            indices[i] = index
+        self._grow(len(self._spots))
+        return indices
+
+    def load(self) -> int:
+        """parking_current_status 현재 상태 로드 (재시작 직후 같은 상태를 다시 쓰지 않도록)"""
+        rows = self.client.table('parking_current_status').select(
+            'spot_id,is_occupied,confidence'
+        ).execute().data or []
+        with self._lock:
+            indices = self._indices_locked([row['spot_id'] for row in rows])
+            self._state[indices] = [bool(row.get('is_occupied')) for row in rows]
+            self._confidence[indices] = [row.get('confidence') or 0.0 for row in rows]
+            self._known[indices] = True
+        print(f"🅿️  점유 감지 상태 로드: {len(rows)}면")
+        return len(rows)
+
+    # ----- 감지 입력 -----
+
+    def ingest_array(self, indices: np.ndarray, occupied_probability: np.ndarray,
+                     at: float = None) -> int:
+        """
+        프레임 하나 반영 (벡터 연산). 이번 프레임에서 확정된 변경 수 반환
+
+        Args:
+            indices: register_spots()로 받은 주차면 인덱스
+            occupied_probability: 주차면별 점유 확률 (0.0~1.0)
+            at: 프레임 시각 (epoch 초, 기본: 현재)
+        """
+        at = time.time() if at is None else at
+        p = np.asarray(occupied_probability, dtype=np.float32)
+
+        with self._lock:
+            state = self._state[indices]
+            decisive = (p >= self.on_threshold) | (p <= self.off_threshold)
+            want = np.where(decisive, p >= self.on_threshold, state)
+            differs = decisive & ((want != state) | ~self._known[indices])
+
+            # 대기 중인 판정과 다르면 (처음 보는 주차면의 점유 ↔ 빈자리 포함) 다시 셈
+            since = self._since[indices]
+            restart = np.isnan(since) | (want != self._pending[indices])
+            since = np.where(differs, np.where(restart, at, since), np.nan)
+            commit = differs & (at - since >= self.debounce_seconds)
+            since[commit] = np.nan
+            self._since[indices] = since
+            self._pending[indices] = want
+
+            changed = indices[commit]
+            if len(changed):
+                first = int((~self._known[changed]).sum())
+                self._stats['initial'] += first
+                self._stats['changes'] += len(changed) - first
+                won = want[commit]
+                self._state[changed] = won
+                self._known[changed] = True
+                self._confidence[changed] = np.where(won, p[commit], 1.0 - p[commit])
+                self._changed_at[changed] = at
+                self._dirty[changed] = True
+
+            self._stats['frames'] += 1
+            self._stats['detections'] += len(indices)
+        return len(changed)
+
+    def ingest(self, detections: Dict[str, Tuple[bool, float]], at: float = None) -> int:
+        """
+        감지 결과 dict 반영: {spot_id: (is_occupied, confidence)}
+
+        confidence는 판정 클래스의 신뢰도 → 점유 확률로 변환
+        (빈자리 0.9 = 점유 확률 0.1)
+        """
+        spot_ids = list(detections)
+        with self._lock:
+            indices = self._indices_locked(spot_ids)
+        probability = np.fromiter(
+            (conf if occupied else 1.0 - conf for occupied, conf in detections.values()),
+            dtype=np.float32, count=len(spot_ids)
+        )
+        return self.ingest_array(indices, probability, at)
+
+    # ----- 기록 -----
+
+    def flush(self) -> int:
+        """확정된 상태 변경을 upsert 한 번으로 기록. 기록된 행 수 반환 (실패 시 0)"""
+        with self._flush_lock:
+            with self._lock:
+                changed = np.flatnonzero(self._dirty[:len(self._spots)])
+                if not len(changed):
+                    return 0
+                self._dirty[changed] = False
+                rows = [
+                    {
+                        'spot_id': self._spots[i],
+                        'is_occupied': bool(self._state[i]),
+                        'confidence': round(float(self._confidence[i]), 3),
+                        'last_updated': datetime.fromtimestamp(
+                            float(self._changed_at[i]), timezone.utc).isoformat(),
+                    }
+                    for i in changed
+                ]
+
+            try:
+                self.client.table('parking_current_status').upsert(
+                    rows, on_conflict='spot_id'
+                ).execute()
+            except Exception as e:
+                with self._lock:
+                    # 실패한 주차면은 다음 flush에 최신 상태로 다시 기록
+                    self._dirty[changed] = True
+                    self._stats['requests'] += 1
+                    self._stats['failed_requests'] += 1
+                print(f"⚠️  점유 상태 기록 실패 ({len(rows)}면, 재시도 예정): {e}")
+                return 0
+
+            with self._lock:
+                self._stats['requests'] += 1
+                self._stats['written_rows'] += len(rows)
+            return len(rows)
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+
+    def start(self):
+        """백그라운드 flush 스레드 시작"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='occupancy-ingest',
+                                            daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """flush 스레드를 멈추고 남은 변경을 기록"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def snapshot(self) -> Dict[str, bool]:
+        """확정된 주차면 상태"""
+        with self._lock:
+            return {spot_id: bool(self._state[i]) for i, spot_id in enumerate(self._spots)
+                    if self._known[i]}
+
+    def stats(self) -> Dict[str, Any]:
+        """감지 / 기록 통계 스냅샷"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['spots'] = len(self._spots)
+            stats['pending'] = int(self._dirty.sum())
+            return stats
+
+
+def _benchmark(spots: int, fps: float, seconds: float, dwell_seconds: float, noise: float):
+    from local_supabase import LocalDatabase, LocalSupabaseClient
+
+    db = LocalDatabase()
+    client = LocalSupabaseClient(db)
+    ingest = OccupancyIngest(client)
+    rng = np.random.default_rng(11)
+
+    spot_ids = [f"{chr(65 + i // 100)}-{i % 100 + 1:02d}" for i in range(spots)]
+    indices = ingest.register_spots(spot_ids)
+    truth = rng.random(spots) < 0.5
+    frames = int(seconds * fps)
+    flip_probability = 1.0 / (dwell_seconds * fps)
+
+    start_at = time.time()
+    next_flush = start_at + ingest.flush_interval
+    true_changes = 0
+    processing = 0.0
+    for frame in range(frames):
+        at = start_at + frame / fps
+        flips = rng.random(spots) < flip_probability
+        truth ^= flips
+        true_changes += int(flips.sum())
+
+        # 감지 신뢰도 + 가끔 틀린 프레임 (가림 / 조명)
+        confidence = np.clip(rng.normal(0.85, 0.1, spots), 0.5, 1.0)
+        wrong = rng.random(spots) < noise
+        occupied = truth ^ wrong
+        probability = np.where(occupied, confidence, 1.0 - confidence)
+
+        started = time.perf_counter()
+        ingest.ingest_array(indices, probability, at)
+        if at >= next_flush:
+            ingest.flush()
+            next_flush += ingest.flush_interval
+        processing += time.perf_counter() - started
+    ingest.flush()
+
+    stats = ingest.stats()
+    detections_per_second = stats['detections'] / seconds
+    print(f"🎥 합성 감지 스트림: {spots}면 × {fps:.0f}fps × {seconds:.0f}초 "
+          f"(노이즈 {noise:.0%}, 평균 유지 {dwell_seconds:.0f}초)")
+    print(f"   직접 쓰기:  {detections_per_second:,.0f}행/초 ({stats['detections']:,}건)")
+    print(f"   디바운스:   {stats['written_rows'] / seconds:,.1f}행/초, "
+          f"{stats['requests'] / seconds:.1f}요청/초 "
+          f"(첫 확정 {stats['initial']:,}면 + 변경 {stats['changes']:,}건, "
+          f"실제 변경 {true_changes:,}건)")
+    print(f"   처리: 프레임당 {processing / frames * 1e6:,.0f}µs "
+          f"({frames / processing:,.0f}fps 가능)")
+    snapshot = ingest.snapshot()
+    mismatched = sum(snapshot.get(s) != bool(t) for s, t in zip(spot_ids, truth))
+    print(f"   마지막 상태 불일치: {mismatched}면 (디바운스 중인 최근 변경)")
+    db.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="점유 감지 디바운스 벤치마크")
+    parser.add_argument("--spots", type=int, default=500)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--dwell", type=float, default=600.0, help="주차면 상태 평균 유지 시간 (초)")
+    parser.add_argument("--noise", type=float, default=0.03, help="틀린 감지 비율")
+    args = parser.parse_args()
+    _benchmark(args.spots, args.fps, args.seconds, args.dwell, args.noise)
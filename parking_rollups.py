@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+구역 / 게이트 집계 (Realtime 이벤트 → 고정 구간 버킷 → parking_rollups)
+
+대시보드가 차트마다 parking_events / parking_sessions를 다시 훑지 않도록
+이벤트가 들어올 때 바로 5분(bucket_seconds) 버킷에 더해 두고 주기적으로 일괄 upsert.
+
+- parking_events INSERT: gate_id별 entries / exits
+- parking_sessions INSERT(parked) / UPDATE(exited, cancelled): 구역별 세션 시작 / 종료 + 점유 대수
+- 버킷은 (키 × 슬롯 × 지표) NumPy 링 버퍼 (slots개 구간만 유지, 오래된 슬롯은 재사용)
+- 버킷 시각은 이벤트 시각(event_time / entry_time / exit_time) 기준 → 늦게 온 이벤트도 제 구간으로
+- flush: 바뀐 버킷만 구간 누적값(절대값)으로 upsert → 실패 후 재시도해도 중복 집계 없음
+- load(): 시작 시 최근 버킷과 현재 주차 중 세션을 읽어 이어서 집계
+- 구역은 parking_locations.zone (ReferenceCache, 주차면 ID 모양과 무관)
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from command_backfill import parse_timestamp
+from realtime_payload import normalize_change
+from reference_cache import ReferenceCache
+
+METRICS = ('entries', 'exits', 'occupied', 'peak_occupied')
+ENTRIES, EXITS, OCCUPIED, PEAK = range(len(METRICS))
+
+
+class RollupRing:
+    """키별 고정 구간 링 버퍼 (int32 지표 배열)"""
+
+    def __init__(self, bucket_seconds: int = 300, slots: int = 288, capacity: int = 16):
+        """
+        Args:
+            bucket_seconds: 구간 길이 (초)
+            slots: 유지할 구간 수 (기본 288 = 5분 × 1일)
+            capacity: 처음 확보할 키 수 (넘으면 2배로 늘림)
+        """
+        self.bucket_seconds = bucket_seconds
+        self.slots = slots
+        self.keys: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._data = np.zeros((capacity, slots, len(METRICS)), dtype=np.int32)
+        self._bucket = np.full((capacity, slots), -1, dtype=np.int64)  # 슬롯에 들어 있는 구간 번호
+        self._dirty = np.zeros((capacity, slots), dtype=bool)
+        self._evicted: List[Tuple[str, int, np.ndarray]] = []  # flush 전에 재사용된 슬롯
+        self.late_dropped = 0
+
+    def bucket_number(self, at: datetime) -> int:
+        return int(at.timestamp()) // self.bucket_seconds
+
+    def bucket_start(self, number: int) -> datetime:
+        return datetime.fromtimestamp(number * self.bucket_seconds, tz=timezone.utc)
+
+    def _key_index(self, key: str) -> int:
+        k = self.keys.get(key)
+        if k is None:
+            k = len(self._names)
+            if k == len(self._data):
+                grow = len(self._data)
+                self._data = np.concatenate([self._data, np.zeros_like(self._data[:grow])])
+                self._bucket = np.concatenate([self._bucket, np.full_like(self._bucket[:grow], -1)])
+                self._dirty = np.concatenate([self._dirty, np.zeros_like(self._dirty[:grow])])
+            self.keys[key] = k
+            self._names.append(key)
+        return k
+
+    def cell(self, key: str, at: datetime) -> Optional[Tuple[int, int]]:
+        """(키 번호, 슬롯) — 링보다 오래된 구간이면 None"""
+        number = self.bucket_number(at)
+        k = self._key_index(key)
+        slot = number % self.slots
+        current = self._bucket[k, slot]
+        if current == number:
+            return k, slot
+        if current > number:
+            self.late_dropped += 1
+            return None
+
+        if self._dirty[k, slot]:
+            self._evicted.append((key, int(current), self._data[k, slot].copy()))
+        self._bucket[k, slot] = number
+        self._data[k, slot] = 0
+        # 게이지(점유 대수)는 직전 구간 값에서 이어감
+        previous = self._bucket[k, (slot - 1) % self.slots]
+        if previous == number - 1:
+            self._data[k, slot, OCCUPIED] = self._data[k, (slot - 1) % self.slots, OCCUPIED]
+            self._data[k, slot, PEAK] = self._data[k, slot, OCCUPIED]
+        return k, slot
+
+    def add(self, key: str, at: datetime, metric: int, count: int = 1) -> bool:
+        cell = self.cell(key, at)
+        if cell is None:
+            return False
+        self._data[cell + (metric,)] += count
+        self._dirty[cell] = True
+        return True
+
+    def set_gauge(self, key: str, at: datetime, value: int) -> bool:
+        cell = self.cell(key, at)
+        if cell is None:
+            return False
+        self._data[cell + (OCCUPIED,)] = value
+        self._data[cell + (PEAK,)] = max(self._data[cell + (PEAK,)], value)
+        self._dirty[cell] = True
+        return True
+
+    def restore(self, key: str, at: datetime, values: List[int]):
+        """DB에 저장된 버킷 값으로 슬롯 채우기 (재시작 시)"""
+        cell = self.cell(key, at)
+        if cell is not None:
+            self._data[cell] = values
+
+    def take_dirty(self) -> List[Tuple[str, int, np.ndarray]]:
+        """바뀐 버킷 (키, 구간 번호, 지표) 목록을 꺼내고 dirty 해제"""
+        rows = self._evicted
+        self._evicted = []
+        ks, slots = np.nonzero(self._dirty)
+        for k, slot in zip(ks.tolist(), slots.tolist()):
+            rows.append((self._names[k], int(self._bucket[k, slot]), self._data[k, slot].copy()))
+        self._dirty[ks, slots] = False
+        return rows
+
+    def mark_dirty(self, key: str, number: int, values: np.ndarray):
+        """flush 실패한 버킷 되돌리기 (그 사이 값이 바뀌었으면 최신 값 유지)"""
+        k = self._key_index(key)
+        slot = number % self.slots
+        if self._bucket[k, slot] == number:
+            self._dirty[k, slot] = True
+        elif self._bucket[k, slot] < number:
+            self._bucket[k, slot] = number
+            self._data[k, slot] = values
+            self._dirty[k, slot] = True
+        else:
+            # 그 사이 슬롯이 새 구간으로 재사용됨 → 따로 보관했다가 다음 flush에
+            self._evicted.append((key, number, values))
+
+    def series(self, key: str, since: datetime = None) -> List[Dict[str, Any]]:
+        """메모리에 있는 구간 (시간순)"""
+        k = self.keys.get(key)
+        if k is None:
+            return []
+        first = self.bucket_number(since) if since else -1
+        rows = []
+        for slot in np.argsort(self._bucket[k]):
+            number = int(self._bucket[k, slot])
+            if number >= 0 and number >= first:
+                rows.append(dict(zip(METRICS, self._data[k, slot].tolist()),
+                                 bucket_start=self.bucket_start(number)))
+        return rows
+
+    @property
+    def dirty_count(self) -> int:
+        return int(self._dirty.sum()) + len(self._evicted)
+
+
+class ParkingRollups:
+    """parking_events / parking_sessions → parking_rollups 증분 집계"""
+
+    def __init__(self, client, bucket_seconds: int = 300, slots: int = 288,
+                 flush_interval: float = 10.0, max_batch: int = 500,
+                 reference: ReferenceCache = None,
+                 zone_of: Callable[[Optional[str]], Optional[str]] = None):
+        """
+        Args:
+            client: Supabase 클라이언트
+            bucket_seconds: 구간 길이 (초, 기본 5분)
+            slots: 메모리에 유지할 구간 수 (이보다 늦게 온 이벤트는 버림)
+            flush_interval: upsert 주기 (초)
+            max_batch: upsert 한 번에 보낼 최대 행 수
+            reference: 주차면 구역 조회용 참조 캐시 (컨트롤러와 공유, 없으면 새로 만듦)
+            zone_of: 주차면 ID → 구역 (기본: parking_locations.zone)
+        """
+        self.client = client
+        self.bucket_seconds = bucket_seconds
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._owns_reference = reference is None
+        self.reference = reference or ReferenceCache(client)
+        self.zone_of = zone_of or self.zone_from_reference
+
+        self.rings = {
+            'gate': RollupRing(bucket_seconds, slots),
+            'zone': RollupRing(bucket_seconds, slots),
+        }
+        self._occupied: Dict[str, int] = {}
+        self._parked: Dict[str, str] = {}   # 주차 중 session_id → 구역
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._stats = {
+            'events': 0,
+            'sessions_started': 0,
+            'sessions_ended': 0,
+            'ignored': 0,
+            'flushed_rows': 0,
+            'requests': 0,
+            'failed_requests': 0,
+        }
+
+    # ----- 시작 상태 -----
+
+    def load(self) -> int:
+        """최근 버킷 / 주차 중 세션 로드 (재시작 후 이어서 집계). 주차 중 세션 수 반환"""
+        since = datetime.now(timezone.utc) - timedelta(
+            seconds=self.bucket_seconds * self.rings['zone'].slots)
+        rows = self.client.table('parking_rollups') \
+            .select('*') \
+            .eq('bucket_seconds', self.bucket_seconds) \
+            .gte('bucket_start', since.isoformat()) \
+            .execute().data or []
+
+        sessions = self.client.table('parking_sessions') \
+            .select('session_id,parking_spot_id') \
+            .eq('status', 'parked') \
+            .execute().data or []
+
+        # 구역 조회는 캐시를 거치므로 잠금 밖에서 (직접 만든 캐시는 주차면을 한 번에 채움)
+        if self._owns_reference and self.zone_of == self.zone_from_reference:
+            self.reference.locations.load()
+        zones = {s['session_id']: self.zone_of(s.get('parking_spot_id')) for s in sessions}
+
+        with self._lock:
+            for row in rows:
+                self.rings[row['dimension']].restore(
+                    row['dimension_key'], parse_timestamp(row['bucket_start']),
+                    [row[m] for m in METRICS])
+            self._parked = {}
+            self._occupied = {}
+            for session in sessions:
+                zone = zones[session['session_id']]
+                if zone:
+                    self._parked[session['session_id']] = zone
+                    self._occupied[zone] = self._occupied.get(zone, 0) + 1
+
+        print(f"📊 집계 로드: 버킷 {len(rows)}개, 주차 중 {len(sessions)}대")
+        return len(sessions)
+
+    def zone_from_reference(self, spot_id: Optional[str]) -> Optional[str]:
+        """parking_locations.zone (등록되지 않은 주차면이면 None)"""
+        location = self.reference.location(spot_id) if spot_id else None
+        return location.zone if location is not None else None
+
+    # ----- Realtime 콜백 -----
+
+    def route(self, hub) -> 'ParkingRollups':
+        """
+        RealtimeHub에 parking_events / parking_sessions 핸들러 등록
+
+        직접 만든 참조 캐시도 함께 등록 (공유 캐시는 소유자가 등록)
+        """
+        hub.route('parking_events', self.on_event, event='INSERT', name='rollups:events')
+        hub.route('parking_sessions', self.on_session, event='*', name='rollups:sessions')
+        if self._owns_reference:
+            self.reference.route(hub)
+            hub.on_state(self.reference.on_subscribe_state)
+        return self
+
+    def on_event(self, payload: Dict[str, Any]):
+        """parking_events Realtime 콜백 (event='INSERT')"""
+        event = normalize_change(payload).get('new') or {}
+        gate = event.get('gate_id')
+        metric = {'entry': ENTRIES, 'exit': EXITS}.get(event.get('event_type'))
+        if not gate or metric is None:
+            with self._lock:
+                self._stats['ignored'] += 1
+            return
+
+        at = self._time(event.get('event_time') or event.get('created_at'))
+        with self._lock:
+            self.rings['gate'].add(gate, at, metric)
+            self._stats['events'] += 1
+
+    def on_session(self, payload: Dict[str, Any]):
+        """parking_sessions Realtime 콜백 (event='*': INSERT로 시작, UPDATE로 종료)"""
+        change = normalize_change(payload)
+        session = change.get('new') or {}
+        session_id = session.get('session_id')
+        if not session_id:
+            return
+
+        # 캐시에 없으면 DB를 읽으므로 잠금 밖에서 조회
+        zone = None
+        if session.get('status') == 'parked':
+            zone = self.zone_of(session.get('parking_spot_id'))
+
+        with self._lock:
+            if session.get('status') == 'parked' and session_id not in self._parked:
+                if not zone:
+                    self._stats['ignored'] += 1
+                    return
+                self._parked[session_id] = zone
+                self._change_occupancy(zone, +1, self._time(session.get('entry_time')), ENTRIES)
+                self._stats['sessions_started'] += 1
+
+            elif session.get('status') in ('exited', 'cancelled') and session_id in self._parked:
+                zone = self._parked.pop(session_id)
+                at = self._time(session.get('exit_time') or session.get('updated_at'))
+                self._change_occupancy(zone, -1, at,
+                                       EXITS if session['status'] == 'exited' else None)
+                self._stats['sessions_ended'] += 1
+
+    def _change_occupancy(self, zone: str, delta: int, at: datetime, metric: Optional[int]):
+        ring = self.rings['zone']
+        self._occupied[zone] = max(self._occupied.get(zone, 0) + delta, 0)
+        if metric is not None:
+            ring.add(zone, at, metric)
+        ring.set_gauge(zone, at, self._occupied[zone])
+
+    @staticmethod
+    def _time(value: Any) -> datetime:
+        return parse_timestamp(value) if value else datetime.now(timezone.utc)
+
+    # ----- flush -----
+
+    def flush(self) -> int:
+        """바뀐 버킷을 parking_rollups에 upsert. 기록한 행 수 반환"""
+        with self._flush_lock:
+            with self._lock:
+                taken = {name: ring.take_dirty() for name, ring in self.rings.items()}
+
+            rows = []
+            for name, cells in taken.items():
+                ring = self.rings[name]
+                for key, number, values in cells:
+                    row = dict(zip(METRICS, values.tolist()))
+                    row.update({
+                        'bucket_start': ring.bucket_start(number).isoformat(),
+                        'bucket_seconds': self.bucket_seconds,
+                        'dimension': name,
+                        'dimension_key': key,
+                        'updated_at': datetime.now(timezone.utc).isoformat(),
+                    })
+                    rows.append(row)
+
+            written = 0
+            for start in range(0, len(rows), self.max_batch):
+                batch = rows[start:start + self.max_batch]
+                try:
+                    self.client.table('parking_rollups').upsert(
+                        batch, on_conflict='dimension,dimension_key,bucket_seconds,bucket_start'
+                    ).execute()
+                except Exception as e:
+                    self._restore_dirty(rows[start:], e)
+                    break
+                written += len(batch)
+                with self._lock:
+                    self._stats['requests'] += 1
+                    self._stats['flushed_rows'] += len(batch)
+            return written
+
+    def _restore_dirty(self, rows: List[Dict[str, Any]], error: Exception):
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['failed_requests'] += 1
+            for row in rows:
+                ring = self.rings[row['dimension']]
+                number = ring.bucket_number(parse_timestamp(row['bucket_start']))
+                ring.mark_dirty(row['dimension_key'], number,
+                                np.array([row[m] for m in METRICS], dtype=np.int32))
+        print(f"⚠️  집계 기록 실패 ({len(rows)}건, 다음 주기에 재시도): {error}")
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+
+    def start(self):
+        """백그라운드 flush 스레드 시작"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='parking-rollups', daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """flush 스레드를 멈추고 남은 버킷 기록"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    # ----- 조회 -----
+
+    def series(self, dimension: str, key: str, since: datetime = None) -> List[Dict[str, Any]]:
+        """메모리 버킷 조회 (DB 왕복 없이 최근 구간)"""
+        with self._lock:
+            return self.rings[dimension].series(key, since)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending_buckets'] = sum(r.dirty_count for r in self.rings.values())
+            stats['late_dropped'] = sum(r.late_dropped for r in self.rings.values())
+            stats['occupied'] = dict(self._occupied)
+            stats['gates'] = len(self.rings['gate'].keys)
+            stats['zones'] = len(self.rings['zone'].keys)
+            return stats
+
+
+def fetch_rollups(client, dimension: str, since: datetime, until: datetime = None,
+                  bucket_seconds: int = 300) -> List[Dict[str, Any]]:
+    """대시보드용: 기간 내 버킷 조회 (원본 테이블 대신)"""
+    query = client.table('parking_rollups') \
+        .select('*') \
+        .eq('dimension', dimension) \
+        .eq('bucket_seconds', bucket_seconds) \
+        .gte('bucket_start', since.isoformat())
+    if until is not None:
+        query = query.lt('bucket_start', until.isoformat())
+    return query.order('bucket_start').order('dimension_key').execute().data or []
+
+
+def _benchmark(events: int, gates: int, zones: int):
+    import random
+
+    from local_supabase import LocalDatabase, LocalSupabaseClient
+
+    db = LocalDatabase()
+    client = LocalSupabaseClient(db)
+    db.upsert('parking_locations', [
+        {'location_id': f"{chr(65 + z)}_{n}_1", 'location_type': 'parking',
+         'zone': chr(65 + z), 'floor': 'B1'}
+        for z in range(zones) for n in range(50)
+    ])
+    rollups = ParkingRollups(client)
+    rollups.load()
+    rng = random.Random(7)
+    now = datetime.now(timezone.utc)
+
+    started = time.perf_counter()
+    for i in range(events):
+        at = (now - timedelta(seconds=(events - i) * 0.5)).isoformat()
+        rollups.on_event({'eventType': 'INSERT', 'new': {
+            'gate_id': f"GATE-{rng.randrange(gates) + 1:02d}",
+            'event_type': rng.choice(('entry', 'exit')), 'event_time': at}})
+        session_id = f"s-{i}"
+        rollups.on_session({'eventType': 'INSERT', 'new': {
+            'session_id': session_id, 'status': 'parked', 'entry_time': at,
+            'parking_spot_id': f"{chr(65 + rng.randrange(zones))}_{rng.randrange(50)}_1"}})
+        if i >= 100:
+            rollups.on_session({'eventType': 'UPDATE', 'new': {
+                'session_id': f"s-{i - 100}", 'status': 'exited', 'exit_time': at}})
+    ingest = time.perf_counter() - started
+
+    started = time.perf_counter()
+    written = rollups.flush()
+    flush = time.perf_counter() - started
+
+    stored = fetch_rollups(client, 'zone', now - timedelta(days=1))
+    print(f"📊 이벤트 {events:,}건 × 3 (게이트 {gates}, 구역 {zones})")
+    print(f"   집계: {events * 3 / ingest:,.0f} 이벤트/초, flush {written}행 "
+          f"({rollups.stats()['requests']}요청, {flush * 1e3:.0f}ms)")
+    print(f"   점유: {rollups.stats()['occupied']} (저장된 구역 버킷 {len(stored)}개)")
+    db.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='ParkingRollups benchmark')
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--gates', type=int, default=4)
+    parser.add_argument('--zones', type=int, default=6)
+    args = parser.parse_args()
+    _benchmark(args.events, args.gates, args.zones)
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Realtime 구독 허브 (프로세스당 채널 하나)
+
+스크립트마다 테이블별로 채널을 따로 열면 ros2_commands / tasks / robots /
+parking_locations / notifications 구독이 프로세스마다 테이블 수만큼 늘어남.
+
+- 채널 하나에 필요한 (테이블, 필터) 바인딩을 모두 걸고 subscribe 한 번
+  (같은 테이블에 이벤트가 다른 핸들러가 있으면 '*' 하나로 받아서 나눔 → 중복 수신 없음)
+- 변경 이벤트는 정규화 한 번 후 디스패치 테이블((테이블, 필터, 이벤트) → 핸들러)로 라우팅
+- 핸들러마다 큐 + 워커 스레드 → 느린 핸들러가 다른 핸들러 / 수신 루프를 막지 않음
+  (큐가 차면 가장 오래된 이벤트를 버리고 on_drop 콜백으로 재동기화 요청)
+- 연결 끊김(CHANNEL_ERROR / TIMED_OUT / CLOSED) 시 백오프 후 채널을 다시 구성
+- stats(): 이벤트당 팬아웃 비용, 핸들러별 큐 깊이 / 지연 / 버림, 테이블별 재연결 시간
+
+사용법 (로컬 벤치마크):
+    python realtime_hub.py --events 20000
+"""
+
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from realtime_payload import normalize_change
+
+Handler = Callable[[Dict[str, Any]], None]
+BindingKey = Tuple[str, Optional[str]]  # (table, filter)
+
+# subscribe 상태 콜백으로 오는 연결 끊김 상태
+DISCONNECTED_STATES = ('CHANNEL_ERROR', 'TIMED_OUT', 'CLOSED')
+
+
+class _Route:
+    """핸들러 하나 (전용 큐 + 워커 스레드)"""
+
+    def __init__(self, name: str, table: str, event: str, filter: Optional[str],
+                 handler: Handler, queue_size: int,
+                 on_drop: Optional[Callable[[int], None]]):
+        self.name = name
+        self.table = table
+        self.event = event
+        self.filter = filter
+        self.handler = handler
+        self.on_drop = on_drop
+        self.queue: 'queue.Queue[Optional[Tuple[float, Dict[str, Any]]]]' = queue.Queue(queue_size)
+        self.thread: Optional[threading.Thread] = None
+
+        self.lock = threading.Lock()
+        self.unreported_drops = 0
+        self.stats = {
+            'delivered': 0,
+            'dropped': 0,
+            'errors': 0,
+            'max_depth': 0,
+            'handler_seconds': 0.0,
+            'max_handler_ms': 0.0,
+            'lag_seconds': 0.0,
+            'max_lag_ms': 0.0,
+        }
+
+    def offer(self, payload: Dict[str, Any]):
+        """큐에 넣기 (가득 차면 가장 오래된 이벤트를 버림). 수신 스레드에서 호출"""
+        item = (time.perf_counter(), payload)
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                break
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    continue
+                with self.lock:
+                    self.stats['dropped'] += 1
+                    self.unreported_drops += 1
+
+        depth = self.queue.qsize()
+        if depth > self.stats['max_depth']:
+            self.stats['max_depth'] = depth
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            enqueued, payload = item
+            started = time.perf_counter()
+            try:
+                self.handler(payload)
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"⚠️  Realtime 핸들러 오류 ({self.name}): {e}")
+            finished = time.perf_counter()
+
+            with self.lock:
+                stats = self.stats
+                stats['delivered'] += 1
+                lag = started - enqueued
+                stats['lag_seconds'] += lag
+                stats['max_lag_ms'] = max(stats['max_lag_ms'], lag * 1000)
+                stats['handler_seconds'] += finished - started
+                stats['max_handler_ms'] = max(stats['max_handler_ms'],
+                                              (finished - started) * 1000)
+                drops, self.unreported_drops = self.unreported_drops, 0
+
+            if drops and self.on_drop:
+                try:
+                    self.on_drop(drops)
+                except Exception as e:
+                    print(f"⚠️  재동기화 콜백 오류 ({self.name}): {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.stats)
+        delivered = stats['delivered'] or 1
+        return {
+            'table': self.table,
+            'event': self.event,
+            'delivered': stats['delivered'],
+            'dropped': stats['dropped'],
+            'errors': stats['errors'],
+            'queue_depth': self.queue.qsize(),
+            'max_depth': stats['max_depth'],
+            'avg_lag_ms': round(stats['lag_seconds'] / delivered * 1000, 3),
+            'max_lag_ms': round(stats['max_lag_ms'], 3),
+            'avg_handler_ms': round(stats['handler_seconds'] / delivered * 1000, 3),
+            'max_handler_ms': round(stats['max_handler_ms'], 3),
+        }
+
+
+class RealtimeHub:
+    """채널 하나로 여러 테이블 변경을 받아 핸들러별 큐로 라우팅"""
+
+    def __init__(self, client, name: str = 'controller-hub', queue_size: int = 1000,
+                 rejoin_backoff: float = 1.0, max_rejoin_backoff: float = 30.0):
+        """
+        Args:
+            client: Supabase 클라이언트 (client.channel() 사용)
+            name: 채널 이름
+            queue_size: 핸들러별 기본 큐 크기
+            rejoin_backoff: 연결이 끊겼을 때 첫 재구독 대기 (실패할 때마다 2배)
+            max_rejoin_backoff: 재구독 대기 최대값
+        """
+        self.client = client
+        self.name = name
+        self.queue_size = queue_size
+        self.rejoin_backoff = rejoin_backoff
+        self.max_rejoin_backoff = max_rejoin_backoff
+
+        self._lock = threading.Lock()
+        self._routes: List[_Route] = []
+        # (table, filter) → {event → [route]}, 수신 시 조회
+        self._dispatch: Dict[BindingKey, Dict[str, List[_Route]]] = {}
+        self._state_listeners: List[Callable[..., None]] = []
+
+        self._channel = None
+        self._started = False
+        self._stopped = threading.Event()
+        self._rejoin_thread: Optional[threading.Thread] = None
+        self._rejoin_attempts = 0
+
+        self._state = 'CLOSED'
+        self._disconnected_at: Optional[float] = None
+        self._table_stats: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
+            'events': 0,
+            'fanout': 0,
+            'dispatch_seconds': 0.0,
+            'reconnects': 0,
+            'last_reconnect_ms': None,
+            'max_reconnect_ms': 0.0,
+            'first_event_after_reconnect_ms': None,
+        })
+        self._subscribed_at: Optional[float] = None
+        self._awaiting_first_event: set = set()
+
+    # ----- 등록 -----
+
+    def route(self, table: str, handler: Handler, event: str = '*', filter: str = None,
+              name: str = None, queue_size: int = None,
+              on_drop: Callable[[int], None] = None) -> 'RealtimeHub':
+        """
+        핸들러 등록 (start() 전에 호출)
+
+        Args:
+            table: 테이블 이름
+            handler: 정규화된 payload({'eventType', 'table', 'new', 'old', ...})를 받는 함수
+            event: 'INSERT' / 'UPDATE' / 'DELETE' / '*'
+            filter: postgres_changes 필터 (예: 'status=eq.pending')
+            name: 통계 / 로그용 이름 (기본: table:event)
+            queue_size: 이 핸들러의 큐 크기 (기본: 허브 queue_size)
+            on_drop: 큐가 넘쳐 이벤트를 버렸을 때 버린 수를 받는 콜백
+                     (핸들러 스레드에서 호출, 예: backfill.run_async로 재동기화)
+        """
+        if self._started:
+            raise RuntimeError("start() 이후에는 핸들러를 추가할 수 없음")
+        route = _Route(name or f"{table}:{event}", table, event, filter, handler,
+                       queue_size or self.queue_size, on_drop)
+        self._routes.append(route)
+        self._dispatch.setdefault((table, filter), {}).setdefault(event, []).append(route)
+        return self
+
+    def on_state(self, callback: Callable[..., None]) -> 'RealtimeHub':
+        """subscribe 상태 콜백 추가 (예: CommandBackfill.on_subscribe_state)"""
+        self._state_listeners.append(callback)
+        return self
+
+    def bindings(self) -> List[Tuple[str, str, Optional[str]]]:
+        """채널에 걸 바인딩 (table, event, filter). 이벤트가 여러 개면 '*' 하나로"""
+        result = []
+        for (table, filter), by_event in self._dispatch.items():
+            events = set(by_event)
+            event = events.pop() if len(events) == 1 else '*'
+            result.append((table, event, filter))
+        return result
+
+    # ----- 연결 -----
+
+    def _build_channel(self):
+        channel = self.client.channel(self.name)
+        for table, event, filter in self.bindings():
+            callback = self._make_dispatcher((table, filter))
+            if filter:
+                channel = channel.on_postgres_changes(event=event, schema='public', table=table,
+                                                      filter=filter, callback=callback)
+            else:
+                channel = channel.on_postgres_changes(event=event, schema='public', table=table,
+                                                      callback=callback)
+        return channel
+
+    def start(self) -> 'RealtimeHub':
+        """핸들러 워커 시작 후 채널 구독"""
+        if self._started:
+            return self
+        self._started = True
+        for route in self._routes:
+            route.thread = threading.Thread(target=route.run, name=f"hub-{route.name}",
+                                            daemon=True)
+            route.thread.start()
+
+        self._channel = self._build_channel()
+        self._channel.subscribe(self._on_status)
+        print(f"📡 Realtime 허브: 채널 1개 ({self.name}), 바인딩 {len(self._dispatch)}개, "
+              f"핸들러 {len(self._routes)}개")
+        return self
+
+    def _on_status(self, status, error: Exception = None):
+        """채널 상태 콜백 → 재연결 시간 기록 / 재구독 / 리스너 전달"""
+        state = getattr(status, 'value', status)
+        now = time.perf_counter()
+        with self._lock:
+            previous, self._state = self._state, state
+            if state == 'SUBSCRIBED':
+                self._rejoin_attempts = 0
+                self._subscribed_at = now
+                if self._disconnected_at is not None:
+                    elapsed = (now - self._disconnected_at) * 1000
+                    for table, _ in self._dispatch:
+                        stats = self._table_stats[table]
+                        stats['reconnects'] += 1
+                        stats['last_reconnect_ms'] = round(elapsed, 1)
+                        stats['max_reconnect_ms'] = round(max(stats['max_reconnect_ms'],
+                                                              elapsed), 1)
+                    self._awaiting_first_event = {table for table, _ in self._dispatch}
+                    self._disconnected_at = None
+            elif state in DISCONNECTED_STATES and previous == 'SUBSCRIBED':
+                self._disconnected_at = now
+
+        if state in DISCONNECTED_STATES and not self._stopped.is_set():
+            print(f"⚠️  Realtime 허브 연결 끊김: {state}" + (f" ({error})" if error else ""))
+            self._schedule_rejoin()
+
+        for listener in self._state_listeners:
+            try:
+                listener(status, error)
+            except Exception as e:
+                print(f"⚠️  상태 콜백 오류: {e}")
+
+    def _schedule_rejoin(self):
+        with self._lock:
+            if self._rejoin_thread is not None and self._rejoin_thread.is_alive():
+                return
+            self._rejoin_attempts += 1
+            delay = min(self.rejoin_backoff * (2 ** (self._rejoin_attempts - 1)),
+                        self.max_rejoin_backoff)
+            self._rejoin_thread = threading.Thread(target=self._rejoin, args=(delay,),
+                                                   name='hub-rejoin', daemon=True)
+            self._rejoin_thread.start()
+
+    def _rejoin(self, delay: float):
+        """채널을 새로 만들어 다시 구독 (같은 바인딩 / 핸들러 큐 유지)"""
+        if self._stopped.wait(delay):
+            return
+        old = self._channel
+        try:
+            old.unsubscribe()
+        except Exception:
+            pass
+        with self._lock:
+            # 구독 결과가 다시 끊김이면 새 재구독을 예약할 수 있도록
+            self._rejoin_thread = None
+        try:
+            self._channel = self._build_channel()
+            self._channel.subscribe(self._on_status)
+        except Exception as e:
+            print(f"⚠️  Realtime 허브 재구독 실패: {e}")
+            self._schedule_rejoin()
+
+    # ----- 디스패치 -----
+
+    def _make_dispatcher(self, key: BindingKey) -> Handler:
+        by_event = self._dispatch[key]
+        wildcard = by_event.get('*', [])
+        table = key[0]
+        stats = self._table_stats[table]
+
+        def dispatch(payload: Dict[str, Any]):
+            started = time.perf_counter()
+            change = normalize_change(payload)
+            routes = by_event.get(change.get('eventType'))
+            if routes:
+                routes = routes + wildcard if wildcard else routes
+            else:
+                routes = wildcard
+            for route in routes:
+                route.offer(change)
+
+            finished = time.perf_counter()
+            stats['events'] += 1
+            stats['fanout'] += len(routes)
+            stats['dispatch_seconds'] += finished - started
+            if self._awaiting_first_event and table in self._awaiting_first_event:
+                self._awaiting_first_event.discard(table)
+                if self._subscribed_at is not None:
+                    stats['first_event_after_reconnect_ms'] = round(
+                        (finished - self._subscribed_at) * 1000, 1)
+
+        return dispatch
+
+    # ----- 종료 / 통계 -----
+
+    def close(self, drain: bool = True):
+        """구독 해제 후 핸들러 워커 종료 (drain이면 큐에 남은 이벤트까지 처리)"""
+        self._stopped.set()
+        if self._channel is not None:
+            self._channel.unsubscribe()
+            self._channel = None
+        for route in self._routes:
+            if not drain:
+                while True:
+                    try:
+                        route.queue.get_nowait()
+                    except queue.Empty:
+                        break
+            route.queue.put(None)
+        for route in self._routes:
+            if route.thread is not None:
+                route.thread.join()
+                route.thread = None
+        self._state = 'CLOSED'
+
+    def stats(self) -> Dict[str, Any]:
+        """허브 통계: 테이블별 팬아웃 / 재연결, 핸들러별 큐 / 지연"""
+        tables = {}
+        for table, stats in self._table_stats.items():
+            events = stats['events'] or 1
+            tables[table] = {
+                'events': stats['events'],
+                'avg_fanout': round(stats['fanout'] / events, 2),
+                'dispatch_us': round(stats['dispatch_seconds'] / events * 1e6, 2),
+                'reconnects': stats['reconnects'],
+                'last_reconnect_ms': stats['last_reconnect_ms'],
+                'max_reconnect_ms': stats['max_reconnect_ms'],
+                'first_event_after_reconnect_ms': stats['first_event_after_reconnect_ms'],
+            }
+        return {
+            'state': self._state,
+            'channels': 1,
+            'bindings': len(self._dispatch),
+            'tables': tables,
+            'handlers': {route.name: route.snapshot() for route in self._routes},
+        }
+
+
+def _benchmark(events: int, slow_ms: float):
+    from local_supabase import LocalDatabase, LocalSupabaseClient
+
+    tables = ('ros2_commands', 'tasks', 'robots', 'parking_locations', 'notifications')
+
+    def run(use_hub: bool) -> Dict[str, Any]:
+        db = LocalDatabase()
+        client = LocalSupabaseClient(db)
+        received = defaultdict(list)
+        done = threading.Event()
+        total = events * len(tables)
+
+        def make_handler(table: str, delay: float = 0.0):
+            def handler(payload):
+                if delay:
+                    time.sleep(delay)
+                received[table].append(time.perf_counter() - payload['new']['sent'])
+                if sum(len(v) for v in received.values()) >= total:
+                    done.set()
+            return handler
+
+        handlers = {table: make_handler(table) for table in tables}
+        # 알림 핸들러는 느린 소비자 (예: 외부 알림 전송)
+        handlers['notifications'] = make_handler('notifications', slow_ms / 1000)
+
+        if use_hub:
+            hub = RealtimeHub(client, queue_size=events)
+            for table, handler in handlers.items():
+                hub.route(table, handler, event='INSERT', name=table)
+            hub.start()
+        else:
+            # 기존 방식: 테이블마다 채널, 콜백이 수신 루프에서 바로 실행
+            channels = []
+            for table, handler in handlers.items():
+                channel = client.channel(f"{table}-channel").on_postgres_changes(
+                    event='INSERT', schema='public', table=table, callback=handler)
+                channels.append(channel.subscribe())
+
+        started = time.perf_counter()
+        for i in range(events):
+            for table in tables:
+                db._emit(table, 'INSERT', {'id': i, 'sent': time.perf_counter()}, {})
+        done.wait(timeout=events * slow_ms / 1000 * 2 + 30)
+        elapsed = time.perf_counter() - started
+
+        result = {'elapsed': elapsed, 'received': received}
+        if use_hub:
+            # 재연결 흉내: 끊김 → 채널 재구성 → SUBSCRIBED
+            hub.rejoin_backoff = 0.05
+            rejoin = threading.Thread(target=hub._on_status, args=('CHANNEL_ERROR', None))
+            rejoin.start()
+            rejoin.join()
+            while hub.stats()['state'] != 'SUBSCRIBED':
+                time.sleep(0.005)
+            db._emit('ros2_commands', 'INSERT', {'id': -1, 'sent': time.perf_counter()}, {})
+            time.sleep(0.1)
+            hub.close()
+            result['stats'] = hub.stats()
+        else:
+            for channel in channels:
+                channel.unsubscribe()
+        db.close()
+        return result
+
+    def p99(values: List[float]) -> float:
+        ordered = sorted(values)
+        return ordered[int(len(ordered) * 0.99) - 1] * 1000 if ordered else 0.0
+
+    direct = run(use_hub=False)
+    hubbed = run(use_hub=True)
+
+    print(f"📡 Realtime 허브: 테이블 {len(tables)}개 × 이벤트 {events:,}건 "
+          f"(notifications 핸들러 {slow_ms}ms)")
+    print(f"   {'':<20}{'테이블별 채널':>16}{'허브':>12}   (빠른 핸들러 p99 지연)")
+    for table in tables:
+        print(f"   {table:<20}{p99(direct['received'][table]):>14.1f}ms"
+              f"{p99(hubbed['received'][table]):>10.1f}ms")
+    print(f"   채널 수: {len(tables)} → 1")
+    stats = hubbed['stats']
+    for table, table_stats in stats['tables'].items():
+        print(f"   {table:<20} 팬아웃 {table_stats['dispatch_us']:.1f}µs/이벤트, "
+              f"재연결 {table_stats['last_reconnect_ms']}ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Realtime 허브 벤치마크 (로컬)")
+    parser.add_argument("--events", type=int, default=2000, help="테이블별 이벤트 수")
+    parser.add_argument("--slow-ms", type=float, default=1.0, help="느린 핸들러 처리 시간")
+    args = parser.parse_args()
+    _benchmark(args.events, args.slow_ms)
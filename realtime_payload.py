@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Realtime postgres_changes 콜백 payload 정규화
+
+클라이언트 버전에 따라 콜백이 받는 payload 형태가 다름:
+- {'eventType': 'INSERT', 'new': {...}, 'old': {...}, 'table': ...}
+- {'data': {'type': 'INSERT', 'record': {...}, 'old_record': {...}, 'table': ...}, 'ids': [...]}
+
+두 형태 모두 첫 번째 형태로 맞춰서 사용.
+"""
+
+from typing import Any, Dict
+
+
+def normalize_change(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """postgres_changes payload → {'eventType', 'table', 'new', 'old', 'commit_timestamp'}"""
+    if 'eventType' in payload:
+        return payload
+
+    data = payload.get('data') or {}
+    return {
+        'eventType': data.get('type') or data.get('eventType'),
+        'schema': data.get('schema'),
+        'table': data.get('table'),
+        'commit_timestamp': data.get('commit_timestamp'),
+        'new': data.get('record') or {},
+        'old': data.get('old_record') or {},
+    }
@@ -0,0 +1,614 @@
+#!/usr/bin/env python3
+"""
+참조 데이터 read-through 캐시 (LRU + TTL + Realtime 무효화)
+
+명령 처리 중에 읽는 데이터(주차면 좌표 / 구역, 등록 차량, 활성 요금 정책)는
+거의 바뀌지 않는데, 매번 조회하면 명령마다 PostgREST 왕복이 생김.
+
+- TableCache: 키 → 타입 있는 레코드 (NamedTuple), 없으면 DB에서 읽어서 채움
+- 크기 상한(max_entries)을 넘으면 가장 오래 안 쓴 항목부터 제거 (LRU)
+- TTL은 안전망, 실제 무효화는 Realtime UPDATE / DELETE (INSERT는 "없음" 항목 무효화)
+- 캐시하는 컬럼이 안 바뀐 UPDATE(예: is_occupied)는 무시 → 점유 변경마다 캐시가 비지 않음
+- 같은 키를 동시에 놓치면 조회는 한 번만 (나머지는 결과를 기다림)
+- hit / miss / eviction / invalidation 카운터
+- AsyncClient로 만든 캐시는 *_async 메서드 사용 (hit는 바로 반환, 미스는 await 조회)
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import (Any, Callable, Dict, Generic, Hashable, List, NamedTuple, Optional, Tuple,
+                    TypeVar)
+
+from fee_engine import select_policy
+from realtime_payload import normalize_change
+
+T = TypeVar('T')
+
+_ALL = '*'   # get_all() 항목 키
+
+
+# =====================================================
+# 레코드
+# =====================================================
+
+class ParkingLocation(NamedTuple):
+    """parking_locations 캐시 레코드 (점유 상태는 OccupancyIndex가 관리)"""
+    location_id: str
+    location_type: Optional[str]
+    zone: Optional[str]
+    floor: Optional[str]
+    x: Optional[float]
+    y: Optional[float]
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> 'ParkingLocation':
+        return cls(row['location_id'], row.get('location_type'), row.get('zone'),
+                   row.get('floor'), row.get('x'), row.get('y'))
+
+
+class Vehicle(NamedTuple):
+    """vehicles 캐시 레코드 (license_plate로 조회)"""
+    vehicle_id: str
+    license_plate: str
+    customer_id: Optional[str]
+    vehicle_type: Optional[str]
+    vehicle_color: Optional[str]
+    is_primary: bool
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> 'Vehicle':
+        return cls(row['vehicle_id'], row['license_plate'], row.get('customer_id'),
+                   row.get('vehicle_type'), row.get('vehicle_color'),
+                   bool(row.get('is_primary', True)))
+
+
+class _Entry:
+    __slots__ = ('value', 'expires_at', 'pk')
+
+    def __init__(self, value: Any, expires_at: float, pk: Any):
+        self.value = value
+        self.expires_at = expires_at
+        self.pk = pk
+
+
+# =====================================================
+# 테이블 캐시
+# =====================================================
+
+class TableCache(Generic[T]):
+    """테이블 하나의 read-through LRU / TTL 캐시"""
+
+    def __init__(self, client, table: str, key_column: str,
+                 factory: Callable[[Dict[str, Any]], T] = dict,
+                 primary_key: str = None, columns: str = '*',
+                 filters: Dict[str, Any] = None, max_entries: int = 1024,
+                 ttl_seconds: float = 300.0, negative_ttl_seconds: float = 30.0):
+        """
+        Args:
+            client: Supabase 클라이언트 (AsyncClient면 get_async / get_all_async / load_async)
+            table: 테이블 이름
+            key_column: 조회 키 컬럼 (예: vehicles는 license_plate)
+            factory: 행 → 캐시 레코드 (기본: dict 복사)
+            primary_key: 기본 키 컬럼 (DELETE payload에는 기본 키만 오므로 역참조용, 기본: key_column)
+            columns: select 컬럼
+            filters: 항상 붙일 eq 필터 (예: {'is_active': True})
+            max_entries: 최대 항목 수 (넘으면 LRU 제거)
+            ttl_seconds: 항목 유효 시간 (Realtime을 놓쳤을 때의 안전망)
+            negative_ttl_seconds: "없음" 결과 유효 시간 (미등록 차량 반복 조회 방지)
+        """
+        self.client = client
+        self.table = table
+        self.key_column = key_column
+        self.factory = factory
+        self.primary_key = primary_key or key_column
+        self.columns = columns
+        self.filters = dict(filters or {})
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, _Entry]' = OrderedDict()
+        self._keys_by_pk: Dict[Any, Hashable] = {}
+        self._loading: Dict[Hashable, threading.Event] = {}
+        self._loading_async: Dict[Hashable, asyncio.Future] = {}
+        self._generation = 0   # 조회 중 무효화되면 결과를 캐시하지 않음
+
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'negative_hits': 0,
+            'expired': 0,
+            'evictions': 0,
+            'invalidations': 0,
+            'ignored_updates': 0,
+            'fetches': 0,
+            'fetch_errors': 0,
+        }
+
+    # ----- 조회 -----
+
+    def get(self, key: Hashable) -> Optional[T]:
+        """키로 조회 (캐시에 없으면 DB에서 읽어서 채움, 행이 없으면 None)"""
+        if key is None:
+            return None
+        while True:
+            with self._lock:
+                found, value = self._cached_locked(key)
+                if found:
+                    return value
+
+                loading = self._loading.get(key)
+                if loading is None:
+                    self._loading[key] = threading.Event()
+                    self._stats['misses'] += 1
+                    generation = self._generation
+                    break
+
+            # 다른 스레드가 같은 키를 읽는 중 → 끝나면 캐시에서 다시 확인
+            loading.wait()
+
+        try:
+            rows = self._fetch({self.key_column: key}, limit=1)
+            value = self.factory(rows[0]) if rows else None
+            pk = rows[0].get(self.primary_key) if rows else None
+            with self._lock:
+                if generation == self._generation:
+                    self._store_locked(key, value, pk)
+            return value
+        finally:
+            with self._lock:
+                self._loading.pop(key).set()
+
+    async def get_async(self, key: Hashable) -> Optional[T]:
+        """get (AsyncClient): hit는 await 없이 바로, 같은 키 동시 미스는 조회 한 번"""
+        if key is None:
+            return None
+        while True:
+            with self._lock:
+                found, value = self._cached_locked(key)
+                if found:
+                    return value
+
+                loading = self._loading_async.get(key)
+                if loading is None:
+                    self._loading_async[key] = asyncio.get_running_loop().create_future()
+                    self._stats['misses'] += 1
+                    generation = self._generation
+                    break
+
+            # 다른 코루틴이 같은 키를 읽는 중 → 끝나면 캐시에서 다시 확인
+            await loading
+
+        try:
+            rows = await self._fetch_async({self.key_column: key}, limit=1)
+            value = self.factory(rows[0]) if rows else None
+            pk = rows[0].get(self.primary_key) if rows else None
+            with self._lock:
+                if generation == self._generation:
+                    self._store_locked(key, value, pk)
+            return value
+        finally:
+            with self._lock:
+                self._loading_async.pop(key).set_result(None)
+
+    def peek(self, key: Hashable) -> Tuple[bool, Optional[T]]:
+        """
+        캐시에서만 조회 (DB 조회 없음, 이벤트 루프에서 hit를 바로 처리할 때)
+
+        Returns:
+            (찾음, 값) - "없음" 항목은 (True, None), 캐시에 없으면 (False, None)
+        """
+        if key is None:
+            return True, None
+        with self._lock:
+            return self._cached_locked(key)
+
+    def _cached_locked(self, key: Hashable) -> Tuple[bool, Optional[T]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if entry.expires_at <= time.monotonic():
+            self._drop_locked(key)
+            self._stats['expired'] += 1
+            return False, None
+        self._entries.move_to_end(key)
+        if entry.value is None:
+            self._stats['negative_hits'] += 1
+        else:
+            self._stats['hits'] += 1
+        return True, entry.value
+
+    def get_all(self) -> List[T]:
+        """필터에 맞는 전체 행 (한 항목으로 캐시, 테이블이 바뀌면 무효화 - 작은 테이블용)"""
+        found, values, generation = self._cached_all()
+        if found:
+            return values
+        return self._store_all(self._fetch({}), generation)
+
+    async def get_all_async(self) -> List[T]:
+        """get_all (AsyncClient)"""
+        found, values, generation = self._cached_all()
+        if found:
+            return values
+        return self._store_all(await self._fetch_async({}), generation)
+
+    def _cached_all(self) -> Tuple[bool, Optional[List[T]], int]:
+        with self._lock:
+            entry = self._entries.get(_ALL)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self._entries.move_to_end(_ALL)
+                self._stats['hits'] += 1
+                return True, entry.value, self._generation
+            self._stats['misses'] += 1
+            return False, None, self._generation
+
+    def _store_all(self, rows: List[Dict[str, Any]], generation: int) -> List[T]:
+        values = [self.factory(row) for row in rows]
+        with self._lock:
+            if generation == self._generation:
+                self._store_locked(_ALL, values, None)
+        return values
+
+    def load(self, limit: int = None) -> int:
+        """미리 채우기 (시작 시 1회). 채운 항목 수 반환"""
+        return self._store_rows(self._fetch({}, limit=limit or self.max_entries))
+
+    async def load_async(self, limit: int = None) -> int:
+        """load (AsyncClient)"""
+        return self._store_rows(await self._fetch_async({}, limit=limit or self.max_entries))
+
+    def _store_rows(self, rows: List[Dict[str, Any]]) -> int:
+        with self._lock:
+            for row in rows:
+                self._store_locked(row.get(self.key_column), self.factory(row),
+                                   row.get(self.primary_key))
+        return len(rows)
+
+    def _query(self, conditions: Dict[str, Any], limit: int = None):
+        query = self.client.table(self.table).select(self.columns)
+        for column, value in {**self.filters, **conditions}.items():
+            query = query.eq(column, value)
+        if limit:
+            query = query.limit(limit)
+        return query
+
+    def _fetch(self, conditions: Dict[str, Any], limit: int = None) -> List[Dict[str, Any]]:
+        try:
+            result = self._query(conditions, limit).execute()
+        except Exception:
+            self._count_fetch(False)
+            raise
+        self._count_fetch(True)
+        return result.data or []
+
+    async def _fetch_async(self, conditions: Dict[str, Any],
+                           limit: int = None) -> List[Dict[str, Any]]:
+        try:
+            result = await self._query(conditions, limit).execute()
+        except Exception:
+            self._count_fetch(False)
+            raise
+        self._count_fetch(True)
+        return result.data or []
+
+    def _count_fetch(self, ok: bool):
+        with self._lock:
+            self._stats['fetches' if ok else 'fetch_errors'] += 1
+
+    # ----- 항목 관리 -----
+
+    def _store_locked(self, key: Hashable, value: Any, pk: Any):
+        if key is None:
+            return
+        ttl = self.ttl_seconds if value is not None else self.negative_ttl_seconds
+        self._drop_locked(key)
+        self._entries[key] = _Entry(value, time.monotonic() + ttl, pk)
+        if pk is not None:
+            self._keys_by_pk[pk] = key
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._drop_locked(oldest)
+            self._stats['evictions'] += 1
+
+    def _drop_locked(self, key: Hashable) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        if entry.pk is not None and self._keys_by_pk.get(entry.pk) == key:
+            del self._keys_by_pk[entry.pk]
+        return True
+
+    def invalidate(self, key: Hashable) -> bool:
+        """항목 하나 무효화. 있었으면 True"""
+        with self._lock:
+            self._generation += 1
+            dropped = self._drop_locked(key)
+            if dropped:
+                self._stats['invalidations'] += 1
+            return dropped
+
+    def clear(self):
+        """전체 무효화 (예: Realtime 재연결 후 놓친 변경이 있을 수 있을 때)"""
+        with self._lock:
+            self._generation += 1
+            self._stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+            self._keys_by_pk.clear()
+
+    # ----- Realtime 무효화 -----
+
+    def on_change(self, payload: Dict[str, Any]):
+        """
+        Realtime 콜백 (event='*')
+
+        - INSERT: 같은 키의 "없음" 항목 무효화
+        - UPDATE: 캐시 레코드가 달라지면 무효화 (키가 바뀌면 옛 키도)
+        - DELETE: 기본 키로 캐시 키를 찾아 무효화
+        """
+        change = normalize_change(payload)
+        event = change.get('eventType')
+        new = change.get('new') or {}
+        old = change.get('old') or {}
+
+        with self._lock:
+            # 테이블 전체 항목은 어떤 변경이든 무효화
+            if self._drop_locked(_ALL):
+                self._stats['invalidations'] += 1
+
+            keys = set()
+            pk = new.get(self.primary_key, old.get(self.primary_key))
+            if pk is not None and pk in self._keys_by_pk:
+                keys.add(self._keys_by_pk[pk])
+            for row in (new, old):
+                if row.get(self.key_column) is not None:
+                    keys.add(row[self.key_column])
+
+            if event == 'UPDATE' and len(keys) == 1:
+                key = next(iter(keys))
+                entry = self._entries.get(key)
+                if entry is not None and entry.value is not None \
+                        and self._matches_filters(new) and self._same_record(entry.value, new):
+                    self._stats['ignored_updates'] += 1
+                    return
+
+            self._generation += 1
+            for key in keys:
+                if self._drop_locked(key):
+                    self._stats['invalidations'] += 1
+
+    def _matches_filters(self, row: Dict[str, Any]) -> bool:
+        return all(row.get(column, value) == value for column, value in self.filters.items())
+
+    def _same_record(self, value: Any, row: Dict[str, Any]) -> bool:
+        try:
+            return self.factory(row) == value
+        except (KeyError, TypeError, ValueError):
+            return False
+
+    # ----- 상태 -----
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['negative_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + stats['negative_hits']) / lookups, 4) \
+            if lookups else 0.0
+        return stats
+
+
+# =====================================================
+# 컨트롤러용 참조 데이터
+# =====================================================
+
+class ReferenceCache:
+    """명령 처리 중 읽는 참조 데이터 (주차면 / 등록 차량 / 요금 정책)"""
+
+    TABLES = ('parking_locations', 'vehicles', 'parking_fee_policy')
+
+    def __init__(self, client, max_entries: int = 4096, ttl_seconds: float = 300.0,
+                 negative_ttl_seconds: float = 30.0):
+        """
+        Args:
+            client: Supabase 클라이언트 (AsyncClient면 *_async 메서드 사용)
+            max_entries: 테이블별 최대 항목 수
+            ttl_seconds: 항목 유효 시간 (Realtime 무효화를 놓쳤을 때의 안전망)
+            negative_ttl_seconds: 미등록 차량 등 "없음" 결과 유효 시간
+        """
+        options = dict(max_entries=max_entries, ttl_seconds=ttl_seconds,
+                       negative_ttl_seconds=negative_ttl_seconds)
+        self.locations: TableCache[ParkingLocation] = TableCache(
+            client, 'parking_locations', 'location_id', ParkingLocation.from_row, **options)
+        self.vehicles: TableCache[Vehicle] = TableCache(
+            client, 'vehicles', 'license_plate', Vehicle.from_row,
+            primary_key='vehicle_id', **options)
+        self.fee_policies: TableCache[Dict[str, Any]] = TableCache(
+            client, 'parking_fee_policy', 'policy_id', filters={'is_active': True}, **options)
+        self._subscribed = False
+        self._caches = {
+            'parking_locations': self.locations,
+            'vehicles': self.vehicles,
+            'parking_fee_policy': self.fee_policies,
+        }
+
+    def load(self) -> Dict[str, int]:
+        """주차면 / 요금 정책 미리 채우기 (차량은 조회할 때 채움)"""
+        return self._loaded({
+            'parking_locations': self.locations.load(),
+            'parking_fee_policy': len(self.fee_policies.get_all()),
+        })
+
+    async def load_async(self) -> Dict[str, int]:
+        """load (AsyncClient)"""
+        return self._loaded({
+            'parking_locations': await self.locations.load_async(),
+            'parking_fee_policy': len(await self.fee_policies.get_all_async()),
+        })
+
+    @staticmethod
+    def _loaded(counts: Dict[str, int]) -> Dict[str, int]:
+        print(f"🗂️  참조 데이터 캐시: 주차면 {counts['parking_locations']}개, "
+              f"요금 정책 {counts['parking_fee_policy']}개")
+        return counts
+
+    def location(self, location_id: str) -> Optional[ParkingLocation]:
+        return self.locations.get(location_id)
+
+    async def location_async(self, location_id: str) -> Optional[ParkingLocation]:
+        return await self.locations.get_async(location_id)
+
+    def vehicle(self, license_plate: str) -> Optional[Vehicle]:
+        """등록 차량 (미등록이면 None)"""
+        return self.vehicles.get(license_plate)
+
+    async def vehicle_async(self, license_plate: str) -> Optional[Vehicle]:
+        return await self.vehicles.get_async(license_plate)
+
+    def active_fee_policy(self, at: datetime) -> Optional[Dict[str, Any]]:
+        """at 시점에 적용되는 요금 정책 (fee_engine.select_policy)"""
+        return select_policy(self.fee_policies.get_all(), at)
+
+    def route(self, hub) -> 'ReferenceCache':
+        """RealtimeHub에 무효화 핸들러 등록 (테이블별 event='*')"""
+        for table, cache in self._caches.items():
+            hub.route(table, cache.on_change, event='*', name=f"cache:{table}")
+        return self
+
+    def bind_channel(self, channel):
+        """허브 없이 Realtime 채널(동기 / async)에 무효화 콜백 등록. channel 반환"""
+        for table, cache in self._caches.items():
+            channel.on_postgres_changes(event='*', schema='public', table=table,
+                                        callback=cache.on_change)
+        return channel
+
+    def on_subscribe_state(self, status, error=None):
+        """재연결(두 번째 SUBSCRIBED부터) 시 끊긴 동안 놓친 변경이 있을 수 있으므로 전체 무효화"""
+        if getattr(status, 'value', status) != 'SUBSCRIBED':
+            return
+        if self._subscribed:
+            self.clear()
+        self._subscribed = True
+
+    def clear(self):
+        for cache in self._caches.values():
+            cache.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {table: cache.stats() for table, cache in self._caches.items()}
+
+
+# =====================================================
+# 벤치마크
+# =====================================================
+
+def _benchmark(lookups: int, spots: int, vehicles: int, request_latency: float,
+               update_every: int):
+    import random
+
+    from local_supabase import LocalDatabase, LocalSupabaseClient
+
+    db = LocalDatabase()
+    client = LocalSupabaseClient(db, request_latency=request_latency)
+    rng = random.Random(5)
+
+    db.insert('parking_locations', [
+        {'location_id': f"{chr(65 + i // 100)}-{i % 100 + 1:02d}", 'location_type': 'parking',
+         'zone': chr(65 + i // 100), 'floor': 'B1', 'x': float(i % 100), 'y': float(i // 100),
+         'is_occupied': False}
+        for i in range(spots)
+    ])
+    plates = [f"{10 + i % 90}가{1000 + i * 7 % 9000}" for i in range(vehicles)]
+    db.insert('vehicles', [{'license_plate': plate, 'vehicle_type': 'sedan'}
+                           for plate in plates[: vehicles * 4 // 5]])   # 20%는 미등록
+    location_ids = [row['location_id'] for row in db.select('parking_locations')]
+
+    # 조회 분포: 자주 오는 차량이 몰림 (파레토)
+    def pick(items):
+        return items[min(int(rng.paretovariate(1.2)) - 1, len(items) - 1)]
+    workload = [(pick(plates), pick(location_ids)) for _ in range(lookups)]
+
+    # 직접 조회 (일부만 측정 후 환산)
+    sample = workload[: max(1, min(lookups, 200))]
+    started = time.perf_counter()
+    for plate, location_id in sample:
+        client.table('vehicles').select('*').eq('license_plate', plate).limit(1).execute()
+        client.table('parking_locations').select('*').eq('location_id', location_id) \
+            .limit(1).execute()
+    direct_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+    cache = ReferenceCache(client, max_entries=2048)
+    channel = client.channel('reference-cache')
+    for table, table_cache in cache._caches.items():
+        channel.on_postgres_changes(event='*', schema='public', table=table,
+                                    callback=table_cache.on_change)
+    channel.subscribe()
+    cache.locations.load()
+
+    stale = 0
+    lookup_seconds = 0.0
+    for index, (plate, location_id) in enumerate(workload):
+        started = time.perf_counter()
+        cache.vehicle(plate)
+        cache.location(location_id)
+        lookup_seconds += time.perf_counter() - started
+        if update_every and index % update_every == update_every - 1:
+            # 점유 변경(캐시 컬럼 아님) + 차량 정보 변경
+            db.update('parking_locations', {'is_occupied': True},
+                      [lambda row, lid=location_id: row['location_id'] == lid])
+            db.update('vehicles', {'vehicle_color': f"c{index}"},
+                      [lambda row, p=plate: row['license_plate'] == p])
+    cached_us = lookup_seconds / lookups * 1e6
+
+    # hit 경로만 (전부 캐시에 있는 주차면 조회)
+    started = time.perf_counter()
+    for _, location_id in workload:
+        cache.location(location_id)
+    hit_us = (time.perf_counter() - started) / lookups * 1e6
+    time.sleep(0.2)   # Realtime 전달 대기
+
+    # 무효화 확인: 캐시 값과 DB 값 비교
+    for plate in set(p for p, _ in workload):
+        rows = db.select('vehicles', [lambda row, p=plate: row['license_plate'] == p])
+        expected = Vehicle.from_row(rows[0]) if rows else None
+        if cache.vehicle(plate) != expected:
+            stale += 1
+
+    stats = cache.stats()
+    print(f"🗂️  참조 데이터 조회 {lookups:,}회 × 2테이블 "
+          f"(주차면 {spots}, 차량 {vehicles}, 요청 지연 {request_latency * 1000:.1f}ms)")
+    print(f"   직접 조회: 명령당 {direct_us:,.0f}µs")
+    print(f"   캐시:      명령당 {cached_us:,.1f}µs (DB 조회 "
+          f"{stats['vehicles']['fetches'] + stats['parking_locations']['fetches']:,}회), "
+          f"hit 1회 {hit_us:.2f}µs")
+    for table in ('vehicles', 'parking_locations'):
+        s = stats[table]
+        print(f"   {table}: hit {s['hits']:,} / 없음 hit {s['negative_hits']:,} / "
+              f"miss {s['misses']:,} / 무효화 {s['invalidations']:,} / "
+              f"무시한 UPDATE {s['ignored_updates']:,} / 제거 {s['evictions']:,} "
+              f"(hit ratio {s['hit_ratio']:.1%})")
+    print(f"   변경 후 오래된 값: {stale}건")
+    channel.unsubscribe()
+    db.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="참조 데이터 캐시 벤치마크")
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--spots", type=int, default=600)
+    parser.add_argument("--vehicles", type=int, default=3000)
+    parser.add_argument("--request-latency", type=float, default=0.002,
+                        help="PostgREST 요청 지연 (초)")
+    parser.add_argument("--update-every", type=int, default=200,
+                        help="N회 조회마다 주차면 점유 / 차량 정보 변경 (0이면 변경 없음)")
+    args = parser.parse_args()
+    _benchmark(args.lookups, args.spots, args.vehicles, args.request_latency,
+               args.update_every)
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+robots 테이블 텔레메트리 기록기
+
+오도메트리 주기(수십~수백 Hz)로 들어오는 위치 / 배터리를 그대로 UPDATE하면
+초당 수천 건의 쓰기와 create_notification_on_low_battery 트리거가 매번 실행됨.
+
+- record()는 로봇별 최신 샘플만 메모리에 남기고 즉시 반환 (샘플 합치기)
+- 마지막으로 기록한 값과 비교해 위치 / 방향 / 배터리 변화가 데드밴드 미만이면 버림
+  (샘플끼리가 아니라 기록된 값과 비교 → 천천히 움직여도 누적되면 기록됨)
+- 로봇별 최대 max_rate_hz로 제한, 한 주기에 모인 로봇을 upsert 한 번으로 반영
+- status 변경과 배터리 알림 기준(30%) 통과는 데드밴드와 무관하게 기록
+- upsert에는 샘플에 들어온 컬럼만 (기록기가 기억하는 값으로 다른 경로의 status 등을 덮지 않음)
+- stats(): 합쳐진 / 데드밴드로 버린 / 속도 제한으로 미룬 쓰기 수
+
+사용법 (시뮬레이션):
+    python robot_telemetry_writer.py --robots 20 --hz 200 --seconds 3
+"""
+
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+def angle_delta(a: float, b: float) -> float:
+    """두 방향(라디안)의 차이 절대값 (-π~π 경계를 넘어도 최소 각도)"""
+    return abs((a - b + math.pi) % (2 * math.pi) - math.pi)
+
+
+class RobotTelemetryWriter:
+    """로봇 텔레메트리를 데드밴드 / 속도 제한 후 일괄 upsert"""
+
+    def __init__(self, client, max_rate_hz: float = 2.0,
+                 position_deadband: float = 0.05, orientation_deadband: float = 0.05,
+                 battery_deadband: int = 1, battery_alert_level: int = 30,
+                 heartbeat_seconds: float = 30.0, max_retries: int = 5,
+                 retry_backoff: float = 0.5):
+        """
+        Args:
+            client: Supabase 클라이언트
+            max_rate_hz: 로봇별 최대 기록 빈도 (flush 주기도 1 / max_rate_hz)
+            position_deadband: 이 거리(m) 미만으로 움직이면 기록하지 않음
+            orientation_deadband: 이 각도(라디안) 미만으로 회전하면 기록하지 않음
+            battery_deadband: 이 값(%) 미만으로 바뀌면 기록하지 않음
+            battery_alert_level: 배터리 알림 트리거 기준 (통과 시 항상 기록)
+            heartbeat_seconds: 변화가 없어도 이 간격마다 last_updated 갱신 (0이면 끔)
+            max_retries: 로봇별 최대 재시도 횟수 (초과 시 해당 샘플 버림)
+            retry_backoff: 첫 재시도 대기 시간 (실패할 때마다 2배, 최대 30초)
+        """
+        self.client = client
+        self.min_interval = 1.0 / max_rate_hz
+        self.position_deadband = position_deadband
+        self.orientation_deadband = orientation_deadband
+        self.battery_deadband = battery_deadband
+        self.battery_alert_level = battery_alert_level
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # robot_id → 기록 대기 중인 최신 샘플 / 마지막으로 기록된 값 / 마지막 기록 시각
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._written: Dict[str, Dict[str, Any]] = {}
+        self._last_write: Dict[str, float] = {}
+        self._attempts: Dict[str, int] = {}
+        self._consecutive_failures = 0
+
+        self._stats = {
+            'samples': 0,
+            'coalesced': 0,
+            'deadband': 0,
+            'rate_limited': 0,
+            'written_rows': 0,
+            'requests': 0,
+            'failed_requests': 0,
+            'dropped': 0,
+        }
+
+    def record(self, robot_id: str, x: float = None, y: float = None,
+               orientation: float = None, battery_level: int = None,
+               status: str = None):
+        """텔레메트리 샘플 기록 (DB 쓰기는 백그라운드에서). None인 값은 이전 값 유지"""
+        sample = {}
+        if x is not None:
+            sample['current_x'] = float(x)
+        if y is not None:
+            sample['current_y'] = float(y)
+        if orientation is not None:
+            sample['current_orientation'] = float(orientation)
+        if battery_level is not None:
+            sample['battery_level'] = int(round(battery_level))
+        if status is not None:
+            sample['status'] = status
+
+        with self._lock:
+            self._stats['samples'] += 1
+            current = self._pending.get(robot_id)
+            if current is None:
+                self._pending[robot_id] = sample
+            else:
+                self._stats['coalesced'] += 1
+                current.update(sample)
+
+    def _significant(self, robot_id: str, sample: Dict[str, Any], now: float) -> bool:
+        """마지막 기록 대비 데드밴드 이상 바뀌었는지"""
+        written = self._written.get(robot_id)
+        if written is None:
+            return True
+
+        if 'status' in sample and sample['status'] != written.get('status'):
+            return True
+
+        battery = sample.get('battery_level')
+        if battery is not None:
+            previous = written.get('battery_level')
+            if previous is None or abs(battery - previous) >= self.battery_deadband:
+                return True
+            # 알림 트리거는 30% 미만으로 내려가는 UPDATE에서만 동작 → 통과는 항상 기록
+            if (battery < self.battery_alert_level) != (previous < self.battery_alert_level):
+                return True
+
+        x = sample.get('current_x', written.get('current_x'))
+        y = sample.get('current_y', written.get('current_y'))
+        if x is not None and y is not None:
+            wx, wy = written.get('current_x'), written.get('current_y')
+            if wx is None or wy is None or math.hypot(x - wx, y - wy) >= self.position_deadband:
+                return True
+
+        orientation = sample.get('current_orientation')
+        if orientation is not None:
+            previous = written.get('current_orientation')
+            if previous is None or angle_delta(orientation, previous) >= self.orientation_deadband:
+                return True
+
+        return bool(self.heartbeat_seconds) and \
+            now - self._last_write.get(robot_id, 0.0) >= self.heartbeat_seconds
+
+    def _take_batch(self, now: float) -> Dict[str, Dict[str, Any]]:
+        """기록할 로봇 샘플을 꺼냄 (속도 제한에 걸린 로봇은 다음 주기로)"""
+        batch = {}
+        with self._lock:
+            for robot_id in list(self._pending):
+                if now - self._last_write.get(robot_id, -math.inf) < self.min_interval:
+                    self._stats['rate_limited'] += 1
+                    continue
+                sample = self._pending.pop(robot_id)
+                if not self._significant(robot_id, sample, now):
+                    self._stats['deadband'] += 1
+                    continue
+                batch[robot_id] = sample
+        return batch
+
+    def flush(self) -> int:
+        """대기 중인 샘플을 upsert. 기록된 행 수 반환 (실패 시 0)"""
+        with self._flush_lock:
+            now = time.monotonic()
+            batch = self._take_batch(now)
+            if not batch:
+                return 0
+
+            updated_at = datetime.now(timezone.utc).isoformat()
+            # PostgREST 일괄 upsert는 모든 행의 컬럼이 같아야 함 → 컬럼 조합별로 요청
+            # 샘플에 없는 컬럼은 보내지 않음 (마지막 기록 값을 다시 쓰면 그 사이
+            # 다른 프로세스가 바꾼 status 등을 예전 값으로 되돌림)
+            groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+            for robot_id, sample in batch.items():
+                row = dict(sample)
+                row['robot_id'] = robot_id
+                row['last_updated'] = updated_at
+                groups.setdefault(tuple(sorted(row)), []).append(row)
+
+            written = 0
+            for rows in groups.values():
+                try:
+                    self.client.table('robots').upsert(rows, on_conflict='robot_id').execute()
+                except Exception as e:
+                    self._requeue({row['robot_id']: batch[row['robot_id']] for row in rows}, e)
+                    continue
+
+                with self._lock:
+                    self._stats['requests'] += 1
+                    self._stats['written_rows'] += len(rows)
+                    self._consecutive_failures = 0
+                    for row in rows:
+                        robot_id = row['robot_id']
+                        self._written[robot_id] = dict(self._written.get(robot_id, {}),
+                                                       **batch[robot_id])
+                        self._last_write[robot_id] = now
+                        self._attempts.pop(robot_id, None)
+                written += len(rows)
+            return written
+
+    def _requeue(self, batch: Dict[str, Dict[str, Any]], error: Exception):
+        """실패한 샘플을 다시 대기열에 넣음 (그 사이 들어온 최신 샘플을 우선)"""
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['failed_requests'] += 1
+            self._consecutive_failures += 1
+
+            for robot_id, sample in batch.items():
+                attempts = self._attempts.get(robot_id, 0) + 1
+                if attempts > self.max_retries:
+                    self._attempts.pop(robot_id, None)
+                    self._stats['dropped'] += 1
+                    continue
+
+                self._attempts[robot_id] = attempts
+                restored = dict(sample)
+                restored.update(self._pending.get(robot_id, {}))
+                self._pending[robot_id] = restored
+
+        print(f"⚠️  텔레메트리 기록 실패 ({len(batch)}대, 재시도 예정): {error}")
+
+    def _next_wait(self) -> float:
+        if self._consecutive_failures:
+            return min(self.retry_backoff * (2 ** (self._consecutive_failures - 1)), 30.0)
+        return self.min_interval
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self._next_wait())
+            self._wakeup.clear()
+            self.flush()
+
+    def start(self):
+        """백그라운드 flush 스레드 시작"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='telemetry-writer',
+                                            daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """flush 스레드를 멈추고 마지막 샘플을 기록 (속도 제한 무시)"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        with self._lock:
+            self._last_write.clear()
+        self.flush()
+
+        if self.pending_count:
+            print(f"⚠️  기록하지 못한 텔레메트리 {self.pending_count}대")
+
+    @property
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        """기록기 통계 스냅샷 (suppressed = 합쳐짐 + 데드밴드)"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['suppressed'] = stats['coalesced'] + stats['deadband']
+            stats['pending'] = len(self._pending)
+            stats['robots'] = len(self._written)
+            return stats
+
+
+def _simulate(robots: int, hz: float, seconds: float, max_rate_hz: float):
+    import random
+
+    from local_supabase import LocalDatabase, LocalSupabaseClient
+
+    db = LocalDatabase()
+    client = LocalSupabaseClient(db)
+    writer = RobotTelemetryWriter(client, max_rate_hz=max_rate_hz)
+    writer.start()
+
+    rng = random.Random(3)
+    state = {f"robot_{i + 1:02d}": [rng.uniform(0, 50), rng.uniform(0, 20), 0.0, 100.0]
+             for i in range(robots)}
+    # 절반은 주행(0.5m/s), 절반은 정지 (센서 노이즈만)
+    moving = {robot_id: i % 2 == 0 for i, robot_id in enumerate(state)}
+
+    dt = 1.0 / hz
+    ticks = int(seconds * hz)
+    started = time.perf_counter()
+    for tick in range(ticks):
+        for robot_id, (x, y, theta, battery) in state.items():
+            if moving[robot_id]:
+                x += 0.5 * dt * math.cos(theta)
+                y += 0.5 * dt * math.sin(theta)
+                theta = (theta + 0.2 * dt + math.pi) % (2 * math.pi) - math.pi
+                battery -= 2.0 * dt
+            state[robot_id] = [x, y, theta, battery]
+            writer.record(robot_id, x + rng.gauss(0, 0.005), y + rng.gauss(0, 0.005),
+                          theta + rng.gauss(0, 0.002), battery)
+        # 실시간 속도로 재생
+        delay = started + (tick + 1) * dt - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    writer.close()
+
+    stats = writer.stats()
+    print(f"🤖 로봇 {robots}대 × {hz:.0f}Hz × {seconds:.0f}초 = 샘플 {stats['samples']:,}건")
+    print(f"   기록: {stats['written_rows']:,}행 / {stats['requests']:,}요청 "
+          f"(DB upsert {db.stats['upsert']:,}회)")
+    print(f"   억제: {stats['suppressed']:,}건 (합쳐짐 {stats['coalesced']:,}, "
+          f"데드밴드 {stats['deadband']:,}), 속도 제한 {stats['rate_limited']:,}회")
+    db.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="로봇 텔레메트리 기록기 시뮬레이션")
+    parser.add_argument("--robots", type=int, default=20)
+    parser.add_argument("--hz", type=float, default=200.0, help="로봇별 샘플 빈도")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--max-rate", type=float, default=2.0, help="로봇별 최대 기록 빈도")
+    args = parser.parse_args()
+    _simulate(args.robots, args.hz, args.seconds, args.max_rate)
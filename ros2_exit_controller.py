@@ -6,24 +6,141 @@ ROS2 출차 컨트롤러 - Supabase Realtime Subscribe 방식
 
 import os
 import time
-from datetime import datetime
 from supabase import create_client, Client
-from typing import Dict, Any
+from typing import Dict, Any, List, Mapping, Optional, Union
+
+from admission_control import DEFER, REJECT, AdmissionController
+from command_backfill import CommandBackfill, SeenIdSet, parse_timestamp
+from command_claim import CommandClaimer
+from command_records import (CommandRecord, CommandType, CommandValidationError,
+                             HandlerRegistry, parse_command)
+from command_journal import (CLAIMED, COMPLETED, FAILED, GATE_CLOSED, GATE_OPENED, PUBLISHED,
+                             RECEIVED, CommandJournal, reconcile)
+from command_executor import KeyedCommandExecutor
+from command_metrics import CommandMetrics, MetricsServer
+from command_status_writer import CommandStatusWriter
+from gate_coalescer import DEFAULT_COALESCE_WINDOW, GateCycleCoalescer, merged_duration
+from gate_feedback import (CompletionSignals, CycleIds, InProcessFeedbackSimulator, gate_key,
+                           parse_feedback_message)
+from occupancy_index import OccupancyIndex
+from parking_rollups import ParkingRollups
+from realtime_hub import RealtimeHub
+from realtime_payload import normalize_change
+from reference_cache import ParkingLocation, ReferenceCache, Vehicle
 
 # Supabase 클라이언트 설정
 SUPABASE_URL = os.getenv("SUPABASE_URL", "your-supabase-url")
 SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY", "your-supabase-key")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase: Client = None
+
+
+def get_supabase() -> Client:
+    """환경 변수로 만든 Supabase 클라이언트 (처음 사용할 때 생성)"""
+    global supabase
+    if supabase is None:
+        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return supabase
 
 
 class ExitController:
     """출차 게이트 컨트롤러"""
 
-    def __init__(self):
-        self.gate_status = False  # False: 닫힘, True: 열림
+    def __init__(self, client: Client = None, max_workers: int = 4, max_pending: int = 256,
+                 worker_id: str = None,
+                 coalesce_window: float = DEFAULT_COALESCE_WINDOW,
+                 extra_seconds_per_command: float = 5.0, simulate_feedback: bool = False,
+                 fail_on_timeout: bool = False,
+                 occupancy_index: OccupancyIndex = None,
+                 journal: CommandJournal = None,
+                 admission: AdmissionController = None,
+                 reference: ReferenceCache = None):
+        """
+        Args:
+            client: Supabase 클라이언트 (기본: 환경 변수로 만든 클라이언트)
+            max_workers: 동시에 실행할 명령 수
+            max_pending: 실행 대기열 최대 크기
+            worker_id: 컨트롤러 ID (명령 선점용)
+            coalesce_window: 같은 게이트 출차 명령을 모으는 시간 (0이면 병합 안 함)
+                             혼자 온 출차도 이만큼 늦어지므로 게이트 사이클보다 훨씬 짧게
+            extra_seconds_per_command: 병합된 명령 1건당 추가 개방 시간
+            simulate_feedback: 가짜 게이트/로봇 피드백 사용 (ROS2 없이 테스트)
+            fail_on_timeout: 피드백 없이 타임아웃되면 failed 처리 (기본: completed)
+            occupancy_index: 주차 안내 목적지를 고를 OccupancyIndex
+                             (payload에 target_spot이 없을 때 가장 가까운 빈자리)
+            journal: 명령 처리 단계를 남길 CommandJournal (재시작 시 복구용)
+            admission: 수신 제어 (용량 / 타입별 할당량 / 과부하 시 낮은 우선순위 실패 처리)
+            reference: 참조 데이터 캐시 (주차면 / 등록 차량 조회를 DB 왕복 없이)
+        """
+        self._init_common(client or get_supabase(), extra_seconds_per_command, fail_on_timeout,
+                          occupancy_index, journal, admission, reference)
+
+        # 완료 신호 (게이트 닫힘 / 안내 완료) - duration_seconds는 타임아웃으로만 사용
+        self.completion = CompletionSignals()
+        self.feedback_simulator = None
+        if simulate_feedback:
+            self.feedback_simulator = InProcessFeedbackSimulator(self.completion)
+
+        # 여러 컨트롤러가 떠 있어도 명령은 한 인스턴스만 실행 (선점 + 리스)
+        self.claimer = CommandClaimer(self.supabase, worker_id=worker_id,
+                                      on_requeued=self.requeue_command)
+        self.claimer.start()
+
+        # 상태 업데이트는 모아서 일괄 기록 (게이트 제어를 지연시키지 않음)
+        # 선점은 최종 상태 기록이 확인될 때까지 유지 (그 전에 리스가 만료되면 다시 실행됨)
+        self.status_writer = CommandStatusWriter(self.supabase,
+                                                 worker_id=self.claimer.worker_id,
+                                                 on_flushed=self.on_status_flushed,
+                                                 on_dropped=self.on_status_dropped)
+        self.status_writer.start()
+
+        # 재연결/시작 시 놓친 pending 명령 복구
+        self.backfill = CommandBackfill(self.supabase, on_command=self.ingest_command)
+
+        # 명령 실행은 워커 풀에서 (Realtime 콜백을 막지 않음)
+        self.command_executor = KeyedCommandExecutor(max_workers=max_workers,
+                                                     max_pending=max_pending)
+
+        # 같은 게이트 출차 명령을 한 번의 게이트 개방으로 병합
+        self.gate_coalescer = None
+        if coalesce_window > 0:
+            self.gate_coalescer = GateCycleCoalescer(self.submit_gate_cycle,
+                                                     window_seconds=coalesce_window)
         print("🚀 Exit Controller 초기화 완료")
 
+    def _init_common(self, client, extra_seconds_per_command: float, fail_on_timeout: bool,
+                     occupancy_index: Optional[OccupancyIndex], journal: Optional[CommandJournal],
+                     admission: Optional[AdmissionController],
+                     reference: Optional[ReferenceCache]):
+        """
+        스레드 / asyncio 버전 공통 구성 (AsyncExitController.__init__도 호출)
+
+        실행 방식에 따라 다른 구성요소(완료 신호 / 선점 / 상태 기록 / 실행기)는 각 __init__에서
+        """
+        self.supabase = client
+        self.gate_status: Dict[str, bool] = {}  # 게이트별 False: 닫힘, True: 열림
+        self.extra_seconds_per_command = extra_seconds_per_command
+        self.cycle_ids = CycleIds()
+        self.fail_on_timeout = fail_on_timeout
+
+        self.occupancy_index = occupancy_index
+        self.journal = journal
+        self.reference = reference
+
+        # 과부하 보호: 보류한 명령은 pending으로 남기고 부하가 내려가면 catch-up으로 다시 받음
+        self.admission = admission
+        if admission is not None and admission.on_recover is None:
+            admission.on_recover = self.resume_deferred
+
+        # 구간별 지연 시간 계측 (INSERT → 수신 → 실행 → 발행 → 완료 → 상태 기록)
+        self.metrics = CommandMetrics()
+
+        # 중복 수신 방지 (live 스트림 / catch-up / 저널 복구 공통)
+        self.seen_ids = SeenIdSet(capacity=10000)
+
+        # 명령 타입별 처리 함수 (선점 후 워커에서 호출)
+        self.handlers = self.build_handlers()
+
     def handle_command(self, payload: Dict[str, Any]):
         """
         Realtime Subscribe로부터 받은 명령 처리
@@ -31,9 +148,12 @@ class ExitController:
         ⚠️ 중요: Polling이 아닌 Subscribe 방식!
         - DB를 계속 조회하지 않음
         - 명령이 INSERT될 때만 이 함수가 호출됨
+        - 실제 실행은 워커 풀에서 하므로 콜백은 즉시 반환됨
         """
+        command_id = None
         try:
             # payload 구조: {'eventType': 'INSERT', 'new': {...}, 'old': {}, ...}
+            payload = normalize_change(payload)
             if payload.get('eventType') != 'INSERT':
                 return
 
@@ -44,83 +164,303 @@ class ExitController:
                 return
 
             command_id = command.get('command_id')
-            command_type = command.get('command_type')
-
-            print(f"\n📨 새 명령 수신: {command_type} (ID: {command_id})")
-            print(f"   차량번호: {command.get('license_plate')}")
-            print(f"   주차위치: {command.get('parking_spot_id')}")
-
-            # 명령 타입에 따라 처리
-            if command_type == 'EXIT_GATE_SINGLE':
-                self.execute_exit_gate(command, exit_type='single')
-            elif command_type == 'EXIT_GATE_DOUBLE':
-                self.execute_exit_gate(command, exit_type='double')
-            elif command_type == 'PARKING_GUIDE':
-                self.execute_parking_guide(command)
-            else:
-                print(f"⚠️  알 수 없는 명령 타입: {command_type}")
-                self.update_command_status(command_id, 'failed', f"Unknown command type: {command_type}")
+            self.ingest_command(command)
 
         except Exception as e:
             print(f"❌ 명령 처리 중 오류: {e}")
             if command_id:
                 self.update_command_status(command_id, 'failed', str(e))
 
-    def execute_exit_gate(self, command: Dict[str, Any], exit_type: str = 'single'):
+    def parse_command(self, row: Union[Mapping[str, Any], CommandRecord]) -> Optional[CommandRecord]:
+        """ros2_commands 행 검증 → CommandRecord (잘못된 명령은 워커로 보내지 않고 바로 failed)"""
+        if isinstance(row, CommandRecord):
+            return row
+        try:
+            return parse_command(row)
+        except CommandValidationError as e:
+            print(f"🚫 잘못된 명령: {e.reason} (ID: {e.command_id})")
+            if e.command_id:
+                self.update_command_status(e.command_id, 'failed', f"Invalid command: {e.reason}")
+            return None
+
+    def ingest_command(self, row: Union[Mapping[str, Any], CommandRecord]) -> bool:
+        """live 스트림 / catch-up 공통 입구 (이미 받은 명령은 무시하고 False 반환)"""
+        command_id = row.command_id if isinstance(row, CommandRecord) else row.get('command_id')
+        if not self.seen_ids.add(command_id):
+            return False
+
+        command = self.parse_command(row)
+        if command is None:
+            return True
+
+        if self.admission is not None:
+            decision, reason = self.admission.admit(command)
+            if decision == DEFER:
+                # pending 그대로 → resume_deferred의 catch-up에서 다시 받음
+                self.seen_ids.discard(command_id)
+                print(f"⏸️  명령 보류: {command.command_type} ({reason})")
+                return False
+            if decision == REJECT:
+                print(f"🚦 명령 거절: {command.command_type} ({reason})")
+                self.update_command_status(command_id, 'failed', reason)
+                return True
+
+        self.metrics.mark(command_id, 'delivered', command)
+        self.record_journal(RECEIVED, command_id, {'type': command.command_type})
+        self.submit_command(command)
+        return True
+
+    def requeue_command(self, row: Dict[str, Any]):
+        """
+        리스 만료로 pending으로 돌아온 명령 다시 실행 (CommandClaimer on_requeued)
+
+        처음 받은 명령과 같은 입구(ingest_command)로 → 수신 제어 / 저널 RECEIVED / 계측을 거침
+        """
+        self.seen_ids.discard(row.get('command_id'))
+        self.ingest_command(row)
+
+    def submit_command(self, command: CommandRecord):
+        """pending 명령을 실행 대기열에 추가 (Realtime 수신 / 리스 회수 공통)"""
+        print(f"\n📨 새 명령 수신: {command.command_type} (ID: {command.command_id})")
+        print(f"   차량번호: {command.license_plate}")
+        print(f"   주차위치: {command.parking_spot_id}")
+
+        # 출차 명령은 잠시 모았다가 게이트 사이클 단위로 실행
+        if self.gate_coalescer and command.is_exit:
+            self.gate_coalescer.offer(command.gate_id, command)
+            return
+
+        # 같은 게이트/로봇 명령은 순서대로, 다른 게이트는 병렬로 실행
+        key = self.execution_key(command)
+        if not self.command_executor.submit(key, self.dispatch_command, command):
+            print(f"⚠️  실행 대기열이 가득 찼습니다 (대기: {self.command_executor.queue_depth})")
+            self.update_command_status(command.command_id, 'failed', 'Command queue full')
+
+    def submit_gate_cycle(self, gate_id: str, commands: List[CommandRecord]):
+        """병합된 출차 명령 묶음을 게이트 대기열에 추가"""
+        if not self.command_executor.submit(f"gate:{gate_id}", self.dispatch_gate_cycle, commands):
+            print(f"⚠️  실행 대기열이 가득 찼습니다 (대기: {self.command_executor.queue_depth})")
+            for command in commands:
+                self.update_command_status(command.command_id, 'failed', 'Command queue full')
+
+    @staticmethod
+    def execution_key(command: CommandRecord) -> str:
+        """
+        실행 순서를 보장할 단위 (같은 키의 명령은 순차 실행)
+
+        - 출차 명령: 게이트별
+        - 주차 안내: 로봇별 (로봇 지정이 없으면 명령별로 병렬 실행)
+        """
+        if command.is_exit:
+            return f"gate:{command.gate_id}"
+        if command.robot_id:
+            return f"robot:{command.robot_id}"
+        return f"command:{command.command_id}"
+
+    def dispatch_command(self, command: CommandRecord):
+        """
+        명령 타입에 따라 처리 (워커 스레드에서 실행)
+
+        실행 전에 명령을 선점 (pending → processing).
+        다른 컨트롤러가 먼저 선점했으면 실행하지 않음.
+        """
+        command_id = command.command_id
+        if not self.claim_command(command):
+            return
+
+        try:
+            self.run_command(command)
+        finally:
+            self.finish_claim(command_id)
+
+    def dispatch_gate_cycle(self, commands: List[CommandRecord]):
+        """병합된 출차 명령 묶음 실행 (선점에 성공한 명령만 게이트 사이클에 포함)"""
+        claimed = [c for c in commands if self.claim_command(c)]
+        if not claimed:
+            return
+
+        try:
+            self.execute_exit_gate(claimed)
+        finally:
+            for command in claimed:
+                self.finish_claim(command.command_id)
+
+    def claim_command(self, command: CommandRecord) -> bool:
+        """명령 선점 (pending → processing). 다른 컨트롤러가 먼저 가져갔으면 False"""
+        command_id = command.command_id
+        try:
+            if self.claimer.claim(command_id) is None:
+                print(f"↪️  다른 컨트롤러가 처리 중: {command_id}")
+                self.metrics.discard(command_id)
+                self.release_admission(command_id)
+                return False
+        except Exception as e:
+            print(f"⚠️  명령 선점 실패: {e}")
+            self.on_claim_error(command)
+            return False
+
+        print(f"   상태 업데이트: processing (선점: {self.claimer.worker_id})")
+        self.metrics.mark(command_id, 'dispatched')
+        self.record_journal(CLAIMED, command_id, {'worker': self.claimer.worker_id})
+        return True
+
+    def finish_claim(self, command_id: str):
+        """
+        명령 실행이 끝남
+
+        최종 상태가 아직 기록되지 않았으면 선점(하트비트)을 유지하고
+        on_status_flushed에서 놓음 (기록 재시도 중 리스 만료 → 재실행 방지)
         """
-        출구 게이트 제어 실행
+        if not self.status_writer.is_pending(command_id):
+            self.claimer.release(command_id)
+
+    def on_status_flushed(self, command_ids: List[str]):
+        """CommandStatusWriter.on_flushed: 상태 기록 확인 → 지연 계측 + 선점 해제"""
+        self.metrics.on_status_flushed(command_ids)
+        for command_id in command_ids:
+            self.claimer.release(command_id)
+
+    def on_status_dropped(self, command_ids: List[str]):
+        """CommandStatusWriter.on_dropped: 기록을 포기한 명령은 리스 만료 후 회수되도록 놓음"""
+        for command_id in command_ids:
+            self.claimer.release(command_id)
+
+    def on_claim_error(self, command: CommandRecord):
+        """
+        선점 요청 실패 (DB 오류) → 명령은 pending 그대로
+
+        대기열에서 오래 기다린 명령은 이미 catch-up watermark보다 오래됐을 수 있으므로
+        watermark를 created_at까지 되돌려 다음 catch-up sweep에서 다시 받음
+        """
+        self.seen_ids.discard(command.command_id)
+        self.metrics.discard(command.command_id)
+        self.release_admission(command.command_id)
+        if command.created_at:
+            self.backfill.rewind(parse_timestamp(command.created_at))
+
+    def build_handlers(self) -> HandlerRegistry:
+        """CommandType → 처리 함수 (새 명령 타입은 여기에 등록)"""
+        return HandlerRegistry() \
+            .register(CommandType.EXIT_GATE_SINGLE, self.execute_exit_command) \
+            .register(CommandType.EXIT_GATE_DOUBLE, self.execute_exit_command) \
+            .register(CommandType.PARKING_GUIDE, self.execute_parking_guide)
+
+    def run_command(self, command: CommandRecord):
+        """선점한 명령 실행 (타입별 처리 함수)"""
+        handler = self.handlers.handler_for(command.type)
+        if handler is None:
+            print(f"⚠️  처리 함수가 없는 명령 타입: {command.command_type}")
+            self.update_command_status(command.command_id, 'failed',
+                                       f"No handler for command type: {command.command_type}")
+            return
+        handler(command)
+
+    def execute_exit_command(self, command: CommandRecord):
+        """병합하지 않은 출차 명령 1건 (게이트 사이클 1회)"""
+        self.execute_exit_gate([command])
+
+    def execute_exit_gate(self, commands: List[CommandRecord]):
+        """
+        출구 게이트 제어 실행 (게이트 1사이클)
 
         Args:
-            command: 명령 데이터
-            exit_type: 'single' (1대) 또는 'double' (2대)
+            commands: 같은 게이트의 출차 명령 목록
+                      (병합된 경우 여러 건 - 한 번 열어서 모두 내보냄)
         """
-        command_id = command['command_id']
-        payload_data = command.get('payload', {})
-        gate_id = payload_data.get('gate_id', 'EXIT-01')
-        duration = payload_data.get('duration_seconds', 10)
-        parking_spot = command.get('parking_spot_id', 'Unknown')
+        gate_id = commands[0].gate_id
+        vehicle_count = sum(c.vehicle_count for c in commands)
+        duration = merged_duration(commands, self.extra_seconds_per_command)
 
         try:
-            # 1. 상태 업데이트: processing
-            print(f"⏳ 처리 시작... (타입: {exit_type.upper()})")
-            self.update_command_status(command_id, 'processing')
+            # 1. 처리 시작 (processing 전환은 선점 시 완료됨)
+            print(f"⏳ 처리 시작... ({len(commands)}건, 총 {vehicle_count}대)")
+
+            # 발행 전에 닫힘 신호 대기 등록 (빠른 피드백을 놓치지 않도록)
+            # 사이클 ID로 짝지음 → 이전 사이클의 늦은 닫힘 신호는 이 사이클을 끝내지 않음
+            cycle_id = self.cycle_ids.next()
+            waiter = self.completion.expect(gate_key(gate_id, cycle_id))
 
             # 2. ROS2 토픽 발행 (실제 게이트 제어)
-            if exit_type == 'double':
-                print(f"🚗🚗 DOUBLE 출차: 2대가 나갑니다!")
-                print(f"   위치: {parking_spot}")
-                self.publish_exit_command(gate_id, vehicle_count=2, duration=duration)
-            else:
-                print(f"🚗 SINGLE 출차: 1대가 나갑니다")
-                print(f"   위치: {parking_spot}")
-                self.publish_exit_command(gate_id, vehicle_count=1, duration=duration)
+            for command in commands:
+                if self.exit_type(command) == 'double':
+                    print(f"🚗🚗 DOUBLE 출차: 2대가 나갑니다!")
+                else:
+                    print(f"🚗 SINGLE 출차: 1대가 나갑니다")
+                print(f"   차량: {self.vehicle_label(command.license_plate)}")
+                print(f"   위치: {self.location_label(command.parking_spot_id)}")
+            # 게이트를 열기 전에 디스크에 남김 (재시작 시 다시 열지 않도록, fsync 대기 한 번)
+            self.record_journal_many(PUBLISHED, commands, {'gate': gate_id}, durable=True)
+            self.publish_exit_command(gate_id, vehicle_count=vehicle_count, duration=duration,
+                                      cycle_id=cycle_id)
+            for command in commands:
+                self.metrics.mark(command.command_id, 'published')
 
             # 3. 게이트 제어 시뮬레이션
             print(f"🔓 {gate_id} 게이트 열기")
-            self.gate_status = True
+            self.gate_status[gate_id] = True
+            for command in commands:
+                self.record_journal(GATE_OPENED, command.command_id)
 
-            print(f"⏱️  {duration}초 동안 대기...")
-            time.sleep(duration)
+            print(f"⏱️  닫힘 신호 대기 (최대 {duration}초)...")
+            self.wait_for_completion(waiter, duration, f"{gate_id} 게이트")
 
             print(f"🔒 {gate_id} 게이트 닫기")
-            self.gate_status = False
+            self.gate_status[gate_id] = False
+            for command in commands:
+                self.record_journal(GATE_CLOSED, command.command_id)
 
-            # 4. 상태 업데이트: completed
+            # 4. 상태 업데이트: completed (병합된 명령 모두)
             print(f"✅ 명령 완료!")
-            self.update_command_status(command_id, 'completed')
+            for command in commands:
+                self.update_command_status(command.command_id, 'completed')
 
-            # 출차 완료 메시지 출력
-            self.display_exit_complete_message(command, exit_type)
+                # 출차 완료 메시지 출력
+                self.display_exit_complete_message(command, self.exit_type(command))
 
         except Exception as e:
             print(f"❌ 게이트 제어 실패: {e}")
-            self.update_command_status(command_id, 'failed', str(e))
+            for command in commands:
+                self.update_command_status(command.command_id, 'failed', str(e))
+
+    def wait_for_completion(self, waiter, timeout: float, target: str) -> bool:
+        """완료 신호 대기 (신호를 받았으면 True, 타임아웃 시 fail_on_timeout이면 예외)"""
+        result = self.completion.wait(waiter, timeout)
+        if result is not None:
+            print(f"📶 {target} 완료 신호 수신: {result}")
+            return True
+
+        print(f"⌛ {target} 피드백 없음 ({timeout}초 타임아웃)")
+        if self.fail_on_timeout:
+            raise TimeoutError(f"No feedback from {target} within {timeout}s")
+        return False
+
+    def on_feedback(self, data: str):
+        """
+        외부 피드백 수신 (예: /parking/exit_feedback 구독 콜백)
 
-    def publish_exit_command(self, gate_id: str, vehicle_count: int, duration: int):
+        "CLOSED|EXIT-01|<cycle_id>", "GUIDE_DONE|<command_id>" 형식
+        """
+        parsed = parse_feedback_message(data)
+        if parsed is None:
+            print(f"⚠️  알 수 없는 피드백: {data}")
+            return
+        key, result = parsed
+        if not self.completion.signal(key, result) and key[0] == 'gate':
+            # 타임아웃된 사이클의 늦은 신호 / 사이클 ID 없는 신호는 무시
+            print(f"⚠️  대기 중인 사이클 없음 (무시): {data}")
+
+    @staticmethod
+    def exit_type(command: CommandRecord) -> str:
+        """'single' (1대) 또는 'double' (2대)"""
+        return 'double' if command.type is CommandType.EXIT_GATE_DOUBLE else 'single'
+
+    def publish_exit_command(self, gate_id: str, vehicle_count: int, duration: int,
+                             cycle_id: int = None):
         """
         ROS2 토픽으로 출차 명령 발행
 
         실제 ROS2 환경에서는 이 함수를 사용하여 토픽 발행
+        게이트는 닫힘 신호에 cycle_id를 그대로 실어 보내야 함 ("CLOSED|<gate>|<cycle_id>")
         """
         # ===== ROS2 토픽 발행 예시 =====
         #
@@ -133,6 +473,7 @@ class ExitController:
         # msg.gate_id = gate_id
         # msg.vehicle_count = vehicle_count
         # msg.duration_seconds = duration
+        # msg.cycle_id = cycle_id
         # msg.timestamp = int(time.time())
         #
         # self.exit_publisher.publish(msg)
@@ -144,58 +485,150 @@ class ExitController:
         print(f"   Gate ID: {gate_id}")
         print(f"   차량 대수: {vehicle_count}")
         print(f"   지속 시간: {duration}초")
+        print(f"   사이클: {cycle_id}")
 
-    def execute_parking_guide(self, command: Dict[str, Any]):
+        if self.feedback_simulator:
+            self.feedback_simulator.on_exit_command(gate_id, vehicle_count, duration, cycle_id)
+
+    def guide_target(self, command: CommandRecord) -> Optional[str]:
+        """
+        주차 안내 목적지
+
+        payload의 target_spot, 없으면 점유 인덱스에서 준비 위치(prep_location)에
+        가장 가까운 빈자리를 골라 예약 (DB 조회 없음)
+        """
+        if command.target_spot or self.occupancy_index is None:
+            return command.target_spot
+        return self.occupancy_index.nearest_free(command.prep_location, zone=command.zone,
+                                                 reserve=True)
+
+    def release_guide_target(self, command: CommandRecord, target_spot: Optional[str]):
+        """guide_target이 예약한 빈자리 되돌리기 (안내 실패 / 타임아웃, payload 지정 자리는 제외)"""
+        if target_spot and not command.target_spot and self.occupancy_index is not None:
+            if self.occupancy_index.release(target_spot):
+                print(f"↩️  {target_spot} 예약 해제")
+
+    def vehicle_label(self, license_plate: Optional[str]) -> str:
+        """차량번호 + 등록 여부 (참조 캐시에서, 캐시가 없거나 조회 실패면 차량번호만)"""
+        if not license_plate or self.reference is None:
+            return license_plate or 'Unknown'
+        try:
+            vehicle = self.reference.vehicle(license_plate)
+        except Exception as e:
+            print(f"⚠️  차량 조회 실패: {e}")
+            return license_plate
+        return self.describe_vehicle(license_plate, vehicle)
+
+    @staticmethod
+    def describe_vehicle(license_plate: str, vehicle: Optional[Vehicle]) -> str:
+        if vehicle is None:
+            return f"{license_plate} (미등록)"
+        return f"{license_plate} (등록 {vehicle.vehicle_type or '차량'})"
+
+    def location_label(self, location_id: Optional[str]) -> str:
+        """주차면 + 구역/층 (참조 캐시에서)"""
+        if not location_id or self.reference is None:
+            return location_id or 'Unknown'
+        try:
+            location = self.reference.location(location_id)
+        except Exception as e:
+            print(f"⚠️  주차면 조회 실패: {e}")
+            return location_id
+        return self.describe_location(location_id, location)
+
+    @staticmethod
+    def describe_location(location_id: str, location: Optional[ParkingLocation]) -> str:
+        if location is None:
+            return location_id
+        parts = [f"{location.zone}구역" if location.zone else None, location.floor]
+        parts = [part for part in parts if part]
+        return f"{location_id} ({' '.join(parts)})" if parts else location_id
+
+    def execute_parking_guide(self, command: CommandRecord):
         """주차 안내 로봇 제어 (예시)"""
-        command_id = command['command_id']
-        payload_data = command.get('payload', {})
-        target_spot = payload_data.get('target_spot')
+        command_id = command.command_id
+        target_spot = self.guide_target(command)
+        timeout = command.duration_seconds
 
         try:
-            print(f"🚗 {target_spot}로 주차 안내 시작")
-            self.update_command_status(command_id, 'processing')
+            print(f"🚗 {self.location_label(target_spot)}로 주차 안내 시작")
+            waiter = self.completion.expect(('guide', command_id))
 
-            # 주차 안내 로직...
-            time.sleep(3)  # 시뮬레이션
+            # 주차 안내 로직... (로봇이 GUIDE_DONE 피드백을 보내면 바로 완료)
+            self.record_journal(PUBLISHED, command_id, {'spot': target_spot}, durable=True)
+            if self.feedback_simulator:
+                self.feedback_simulator.on_guide_command(command_id, target_spot)
+            self.metrics.mark(command_id, 'published')
+            if not self.wait_for_completion(waiter, timeout, f"{target_spot} 주차 안내"):
+                self.release_guide_target(command, target_spot)
 
             print(f"✅ 주차 안내 완료")
             self.update_command_status(command_id, 'completed')
 
         except Exception as e:
             print(f"❌ 주차 안내 실패: {e}")
+            self.release_guide_target(command, target_spot)
             self.update_command_status(command_id, 'failed', str(e))
 
     def update_command_status(self, command_id: str, status: str, error_message: str = None):
-        """명령 상태 업데이트 (DB에 기록)"""
-        update_data = {
-            'status': status,
-        }
-
-        if status == 'processing':
-            update_data['executed_at'] = datetime.utcnow().isoformat()
-        elif status in ['completed', 'failed']:
-            update_data['completed_at'] = datetime.utcnow().isoformat()
-
-        if error_message:
-            update_data['error_message'] = error_message
-
-        try:
-            supabase.table('ros2_commands') \
-                .update(update_data) \
-                .eq('command_id', command_id) \
-                .execute()
+        """
+        명령 상태 업데이트 (DB에 기록)
 
-            print(f"   상태 업데이트: {status}")
+        write-behind 방식: 메모리에 기록만 하고 즉시 반환,
+        실제 DB 반영은 CommandStatusWriter가 모아서 일괄 처리
+        """
+        if status in ('completed', 'failed'):
+            self.metrics.mark(command_id, 'completed')
+            self.record_journal(COMPLETED if status == 'completed' else FAILED, command_id)
+            self.release_admission(command_id)
+        # 선점하지 않은 명령(거절 / 대기열 가득 참)은 pending 행에만 반영됨
+        self.status_writer.record(command_id, status, error_message,
+                                  claimed=self.claimer.holds(command_id))
+        print(f"   상태 업데이트: {status}")
+
+    def release_admission(self, command_id: str):
+        """수신 제어에서 명령 제외 (완료 / 실패 / 다른 컨트롤러가 선점)"""
+        if self.admission is not None:
+            self.admission.release(command_id)
+
+    def resume_deferred(self, since):
+        """부하가 내려가면 보류했던 pending 명령을 catch-up으로 다시 받음"""
+        print("▶️  보류한 명령 다시 받기")
+        self.backfill.rewind(since)
+        self.backfill.run_async()
+
+    def record_journal(self, event: int, command_id: str, detail: Dict[str, Any] = None,
+                       durable: bool = False):
+        """명령 처리 단계를 저널에 기록 (저널이 없으면 무시)"""
+        if self.journal is not None and command_id:
+            self.journal.append(event, command_id, detail, durable=durable)
+
+    def record_journal_many(self, event: int, commands: List[CommandRecord],
+                            detail: Dict[str, Any] = None, durable: bool = False):
+        """합쳐진 명령들의 같은 단계를 한 번에 기록 (durable이면 fsync 대기 한 번)"""
+        if self.journal is not None:
+            self.journal.append_many(event, [c.command_id for c in commands if c.command_id],
+                                     detail, durable=durable)
+
+    def recover_from_journal(self, in_flight: Dict[str, Dict[str, Any]]):
+        """
+        재시작 시 저널의 진행 중 명령을 DB와 맞춤
 
-        except Exception as e:
-            print(f"⚠️  상태 업데이트 실패: {e}")
+        - 게이트 사이클이 끝난 명령 → completed 기록
+        - 발행 후 죽은 명령 → 게이트 상태를 알 수 없으므로 failed (다시 열지 않음)
+        - 발행 전에 죽은 명령 → 리스 만료를 기다리지 않고 바로 재실행
+        """
+        if not in_flight:
+            return
+        result = reconcile(self.supabase, in_flight, self.journal)
+        for command in result['requeued']:
+            self.ingest_command(command)
 
-    def display_exit_complete_message(self, command: Dict[str, Any], exit_type: str = 'single'):
+    def display_exit_complete_message(self, command: CommandRecord, exit_type: str = 'single'):
         """출차 완료 메시지 출력"""
-        license_plate = command.get('license_plate', 'Unknown')
-        parking_spot = command.get('parking_spot_id', 'Unknown')
-        payload_data = command.get('payload', {})
-        total_fee = payload_data.get('total_fee', 0)
+        license_plate = command.license_plate or 'Unknown'
+        parking_spot = command.parking_spot_id or 'Unknown'
+        total_fee = command.total_fee
 
         print("\n" + "="*50)
         if exit_type == 'double':
@@ -221,19 +654,58 @@ def main():
     print("⚠️  DB를 계속 조회하지 않습니다! (WebSocket으로 푸시 받음)")
     print("="*50 + "\n")
 
-    controller = ExitController()
+    # 주차 안내 목적지용 점유 인덱스 (시작 시 1회 로드, 이후 Realtime으로 갱신)
+    occupancy_index = OccupancyIndex()
+    occupancy_index.load(get_supabase())
+    # 놓친 Realtime 이벤트 / 만료된 예약은 주기 점검으로 테이블 값에 맞춤
+    occupancy_index.start_consistency_check(
+        get_supabase(), interval=float(os.getenv("OCCUPANCY_CHECK_INTERVAL", "300")))
+
+    # 명령 처리 저널 (재시작 시 진행 중이던 명령 복구)
+    journal = CommandJournal(os.getenv("COMMAND_JOURNAL_PATH", "ros2_commands.journal"))
+    in_flight = journal.open()
+    journal.start()
+
+    # 수신 제어 (폭주 시 메모리 / 출차 지연 상한)
+    admission = AdmissionController(capacity=int(os.getenv("ADMISSION_CAPACITY", "128")))
+
+    # 참조 데이터 캐시 (주차면 / 등록 차량 / 요금 정책, Realtime으로 무효화)
+    reference = ReferenceCache(get_supabase())
+    reference.load()
+
+    controller = ExitController(occupancy_index=occupancy_index, journal=journal,
+                                admission=admission, reference=reference)
+    controller.recover_from_journal(in_flight)
+
+    # 대시보드 집계 (PARKING_ROLLUPS=1인 프로세스 하나에서만, 구역은 참조 캐시 공유)
+    rollups = None
+    if os.getenv("PARKING_ROLLUPS", "0") == "1":
+        rollups = ParkingRollups(get_supabase(), reference=reference)
+        rollups.load()
+        rollups.start()
+
+    # 지연 시간 메트릭: /metrics 엔드포인트 + 1분마다 요약 로그
+    metrics_server = MetricsServer(controller.metrics, port=int(os.getenv("METRICS_PORT", "9108")))
+    metrics_server.start()
+    controller.metrics.start_summary_log(interval=60)
 
     # Realtime Subscribe 설정
     # ✅ 이 방식은 Polling이 아님! WebSocket으로 실시간 푸시받음
-    channel = supabase.channel('ros2-commands-channel')
-
-    # INSERT 이벤트만 구독
-    channel.on_postgres_changes(
-        event='INSERT',
-        schema='public',
-        table='ros2_commands',
-        callback=controller.handle_command
-    ).subscribe()
+    # 테이블마다 채널을 열지 않고 허브 채널 하나에 모두 구독 (핸들러별 큐로 분리)
+    hub = RealtimeHub(controller.supabase, name='ros2-controller')
+
+    # 명령은 INSERT만 구독, 큐가 넘쳐 버린 명령은 catch-up으로 다시 받음
+    # (SUBSCRIBED 될 때마다 놓친 pending 명령 catch-up)
+    hub.route('ros2_commands', controller.handle_command, event='INSERT', name='commands',
+              on_drop=lambda dropped: controller.backfill.run_async())
+    hub.route('parking_locations', occupancy_index.on_change, event='*', name='occupancy')
+    reference.route(hub)
+    if rollups is not None:
+        rollups.route(hub)
+    hub.on_state(controller.backfill.on_subscribe_state)
+    hub.on_state(reference.on_subscribe_state)
+    hub.start()
+    controller.backfill.start()
 
     print("✅ Realtime Subscribe 연결 완료!")
     print("💡 출차 버튼을 누르면 즉시 반응합니다...\n")
@@ -244,7 +716,32 @@ def main():
             time.sleep(1)
     except KeyboardInterrupt:
         print("\n\n👋 프로그램 종료")
-        channel.unsubscribe()
+        hub.close()
+        print(f"   Realtime 허브 통계: {hub.stats()['handlers']}")
+        controller.backfill.stop()
+
+        stats = controller.command_executor.stats()
+        print(f"   남은 명령 처리 중... (대기: {stats['queue_depth']}, 실행 중: {stats['in_flight']})")
+        if controller.gate_coalescer:
+            controller.gate_coalescer.flush_all()
+            print(f"   게이트 병합 통계: {controller.gate_coalescer.stats()}")
+        controller.command_executor.shutdown(wait=True)
+        controller.claimer.stop()
+        controller.status_writer.close()
+        print(f"   상태 기록 통계: {controller.status_writer.stats()}")
+        print(f"   수신 제어 통계: {admission.stats()}")
+        print(f"   참조 캐시 통계: {reference.stats()}")
+        occupancy_index.stop()
+        print(f"   점유 인덱스 통계: {occupancy_index.stats()}")
+        if rollups is not None:
+            rollups.close()
+            print(f"   대시보드 집계 통계: {rollups.stats()}")
+        journal.close()
+        print(f"   저널 통계: {journal.stats()}")
+
+        print(controller.metrics.summary())
+        controller.metrics.stop()
+        metrics_server.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+ROS2 출차 컨트롤러 - asyncio 버전 (AsyncClient)
+
+ros2_exit_controller.py와 같은 동작을 이벤트 루프 하나에서 실행:
+- Realtime 수신, 명령 실행, 상태 일괄 기록, 게이트 타이머가 모두 코루틴
+- PostgREST 요청은 AsyncClient의 HTTP 커넥션 풀 하나를 공유
+- 게이트 닫힘 대기는 스레드를 점유하지 않음 (대기 중인 게이트 수천 개도 부담 없음)
+- 종료 시 새 명령 수신을 멈추고 실행 중인 명령을 모두 끝낸 뒤 channel.unsubscribe()
+- 참조 캐시 / 저널 복구(reconcile_async)도 같은 AsyncClient로 조회 (동기 Client를 따로 만들지 않음)
+- 저널 fsync 대기는 파일 I/O라 기본 executor에서
+"""
+
+import asyncio
+import functools
+import os
+import signal
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+from admission_control import AdmissionController
+from command_backfill import AsyncCommandBackfill
+from command_claim import AsyncCommandClaimer
+from command_journal import (CLAIMED, GATE_CLOSED, GATE_OPENED, PUBLISHED, CommandJournal,
+                             reconcile_async)
+from command_records import CommandRecord
+from command_executor import AsyncKeyedCommandExecutor
+from command_metrics import MetricsServer
+from command_status_writer import AsyncCommandStatusWriter
+from gate_coalescer import DEFAULT_COALESCE_WINDOW, GateCycleCoalescer, merged_duration
+from gate_feedback import AsyncCompletionSignals, AsyncInProcessFeedbackSimulator, gate_key
+from occupancy_index import OccupancyIndex
+from reference_cache import ReferenceCache
+from ros2_exit_controller import SUPABASE_KEY, SUPABASE_URL, ExitController
+
+
+class AsyncExitController(ExitController):
+    """
+    출차 게이트 컨트롤러 (asyncio)
+
+    명령 수신 / 병합 / 상태 기록 등 동기 로직은 ExitController를 그대로 쓰고,
+    선점 → 발행 → 완료 대기 흐름만 코루틴으로 바꿈.
+    ⚠️ 이벤트 루프 안에서 생성해야 함 (타이머 / 백그라운드 코루틴 등록)
+    """
+
+    def __init__(self, client, max_workers: int = 64, max_pending: int = 4096,
+                 worker_id: str = None,
+                 coalesce_window: float = DEFAULT_COALESCE_WINDOW,
+                 extra_seconds_per_command: float = 5.0, simulate_feedback: bool = False,
+                 fail_on_timeout: bool = False,
+                 occupancy_index: OccupancyIndex = None,
+                 journal: CommandJournal = None,
+                 admission: AdmissionController = None,
+                 reference: ReferenceCache = None):
+        """
+        Args:
+            client: Supabase AsyncClient (acreate_client로 생성)
+            max_workers: 동시에 실행할 명령 수 (코루틴이므로 스레드 풀보다 크게 잡아도 됨)
+            max_pending: 실행 대기열 최대 크기
+            reference: 같은 AsyncClient로 만든 ReferenceCache (*_async로 조회)
+            나머지: ExitController와 동일
+        """
+        # ExitController.__init__은 스레드 기반 구성요소를 만들므로 공통 구성만 호출
+        self.loop = asyncio.get_running_loop()
+        self._init_common(client, extra_seconds_per_command, fail_on_timeout,
+                          occupancy_index, journal, admission, reference)
+        self.draining = False
+
+        self.completion = AsyncCompletionSignals()
+        self.feedback_simulator = None
+        if simulate_feedback:
+            self.feedback_simulator = AsyncInProcessFeedbackSimulator(self.completion)
+
+        self.claimer = AsyncCommandClaimer(self.supabase, worker_id=worker_id,
+                                           on_requeued=self.requeue_command)
+        self.claimer.start()
+
+        self.status_writer = AsyncCommandStatusWriter(self.supabase,
+                                                      worker_id=self.claimer.worker_id,
+                                                      on_flushed=self.on_status_flushed,
+                                                      on_dropped=self.on_status_dropped)
+        self.status_writer.start()
+
+        self.backfill = AsyncCommandBackfill(self.supabase, on_command=self.ingest_command)
+
+        self.command_executor = AsyncKeyedCommandExecutor(max_workers=max_workers,
+                                                          max_pending=max_pending)
+
+        self.gate_coalescer = None
+        if coalesce_window > 0:
+            self.gate_coalescer = GateCycleCoalescer(self.submit_gate_cycle,
+                                                     window_seconds=coalesce_window,
+                                                     schedule=self.loop.call_later)
+        print("🚀 Async Exit Controller 초기화 완료")
+
+    def ingest_command(self, command: Union[Mapping[str, Any], CommandRecord]) -> bool:
+        """종료 중에는 새 명령을 받지 않음 (pending으로 남아 다른 컨트롤러 / 재시작 시 처리)"""
+        if self.draining:
+            return False
+        return super().ingest_command(command)
+
+    async def dispatch_command(self, command: CommandRecord):
+        """명령 선점 후 실행 (다른 컨트롤러가 먼저 선점했으면 실행하지 않음)"""
+        command_id = command.command_id
+        if not await self.claim_command(command):
+            return
+
+        try:
+            await self.run_command(command)
+        finally:
+            self.finish_claim(command_id)
+
+    async def dispatch_gate_cycle(self, commands: List[CommandRecord]):
+        """병합된 출차 명령 묶음 실행 (선점 요청은 동시에 보냄)"""
+        results = await asyncio.gather(*(self.claim_command(c) for c in commands))
+        claimed = [c for c, ok in zip(commands, results) if ok]
+        if not claimed:
+            return
+
+        try:
+            await self.execute_exit_gate(claimed)
+        finally:
+            for command in claimed:
+                self.finish_claim(command.command_id)
+
+    async def claim_command(self, command: CommandRecord) -> bool:
+        """명령 선점 (pending → processing). 다른 컨트롤러가 먼저 가져갔으면 False"""
+        command_id = command.command_id
+        try:
+            if await self.claimer.claim(command_id) is None:
+                print(f"↪️  다른 컨트롤러가 처리 중: {command_id}")
+                self.metrics.discard(command_id)
+                self.release_admission(command_id)
+                return False
+        except Exception as e:
+            print(f"⚠️  명령 선점 실패: {e}")
+            self.on_claim_error(command)
+            return False
+
+        print(f"   상태 업데이트: processing (선점: {self.claimer.worker_id})")
+        self.metrics.mark(command_id, 'dispatched')
+        self.record_journal(CLAIMED, command_id, {'worker': self.claimer.worker_id})
+        return True
+
+    async def run_command(self, command: CommandRecord):
+        """선점한 명령 실행 (타입별 처리 코루틴)"""
+        handler = self.handlers.handler_for(command.type)
+        if handler is None:
+            print(f"⚠️  처리 함수가 없는 명령 타입: {command.command_type}")
+            self.update_command_status(command.command_id, 'failed',
+                                       f"No handler for command type: {command.command_type}")
+            return
+        await handler(command)
+
+    async def execute_exit_command(self, command: CommandRecord):
+        """병합하지 않은 출차 명령 1건 (게이트 사이클 1회)"""
+        await self.execute_exit_gate([command])
+
+    async def execute_exit_gate(self, commands: List[CommandRecord]):
+        """출구 게이트 제어 실행 (게이트 1사이클, 닫힘 대기는 코루틴)"""
+        gate_id = commands[0].gate_id
+        vehicle_count = sum(c.vehicle_count for c in commands)
+        duration = merged_duration(commands, self.extra_seconds_per_command)
+
+        try:
+            print(f"⏳ 처리 시작... ({len(commands)}건, 총 {vehicle_count}대)")
+            cycle_id = self.cycle_ids.next()
+            waiter = self.completion.expect(gate_key(gate_id, cycle_id))
+
+            for command in commands:
+                vehicle, location = await self.command_labels(command)
+                print(f"   차량: {vehicle}")
+                print(f"   위치: {location}")
+            # 게이트를 열기 전에 디스크에 남김 (재시작 시 다시 열지 않도록, fsync 대기 한 번)
+            if self.journal is not None:
+                await self.run_blocking(
+                    functools.partial(self.record_journal_many, durable=True),
+                    PUBLISHED, commands, {'gate': gate_id})
+            self.publish_exit_command(gate_id, vehicle_count=vehicle_count, duration=duration,
+                                      cycle_id=cycle_id)
+            for command in commands:
+                self.metrics.mark(command.command_id, 'published')
+
+            print(f"🔓 {gate_id} 게이트 열기")
+            self.gate_status[gate_id] = True
+            for command in commands:
+                self.record_journal(GATE_OPENED, command.command_id)
+
+            print(f"⏱️  닫힘 신호 대기 (최대 {duration}초)...")
+            await self.wait_for_completion(waiter, duration, f"{gate_id} 게이트")
+
+            print(f"🔒 {gate_id} 게이트 닫기")
+            self.gate_status[gate_id] = False
+            for command in commands:
+                self.record_journal(GATE_CLOSED, command.command_id)
+
+            print(f"✅ 명령 완료!")
+            for command in commands:
+                self.update_command_status(command.command_id, 'completed')
+                self.display_exit_complete_message(command, self.exit_type(command))
+
+        except Exception as e:
+            print(f"❌ 게이트 제어 실패: {e}")
+            for command in commands:
+                self.update_command_status(command.command_id, 'failed', str(e))
+
+    async def wait_for_completion(self, waiter, timeout: float, target: str) -> bool:
+        """완료 신호 대기 (신호를 받았으면 True, 타임아웃 시 fail_on_timeout이면 예외)"""
+        result = await self.completion.wait(waiter, timeout)
+        if result is not None:
+            print(f"📶 {target} 완료 신호 수신: {result}")
+            return True
+
+        print(f"⌛ {target} 피드백 없음 ({timeout}초 타임아웃)")
+        if self.fail_on_timeout:
+            raise TimeoutError(f"No feedback from {target} within {timeout}s")
+        return False
+
+    async def execute_parking_guide(self, command: CommandRecord):
+        """주차 안내 로봇 제어 (예시)"""
+        command_id = command.command_id
+        target_spot = self.guide_target(command)
+        timeout = command.duration_seconds
+
+        try:
+            print(f"🚗 {await self.location_label_async(target_spot)}로 주차 안내 시작")
+            waiter = self.completion.expect(('guide', command_id))
+
+            await self.record_journal_durable(PUBLISHED, command_id, {'spot': target_spot})
+            if self.feedback_simulator:
+                self.feedback_simulator.on_guide_command(command_id, target_spot)
+            self.metrics.mark(command_id, 'published')
+            if not await self.wait_for_completion(waiter, timeout, f"{target_spot} 주차 안내"):
+                self.release_guide_target(command, target_spot)
+
+            print(f"✅ 주차 안내 완료")
+            self.update_command_status(command_id, 'completed')
+
+        except Exception as e:
+            print(f"❌ 주차 안내 실패: {e}")
+            self.release_guide_target(command, target_spot)
+            self.update_command_status(command_id, 'failed', str(e))
+
+    async def run_blocking(self, func, *args):
+        """동기 I/O 함수를 기본 executor에서 실행 (이벤트 루프를 막지 않음)"""
+        return await self.loop.run_in_executor(None, functools.partial(func, *args))
+
+    async def vehicle_label_async(self, license_plate: Optional[str]) -> str:
+        """vehicle_label (캐시 hit는 바로, 미스는 AsyncClient로 조회)"""
+        if not license_plate or self.reference is None:
+            return license_plate or 'Unknown'
+        try:
+            vehicle = await self.reference.vehicle_async(license_plate)
+        except Exception as e:
+            print(f"⚠️  차량 조회 실패: {e}")
+            return license_plate
+        return self.describe_vehicle(license_plate, vehicle)
+
+    async def location_label_async(self, location_id: Optional[str]) -> str:
+        """location_label (캐시 hit는 바로, 미스는 AsyncClient로 조회)"""
+        if not location_id or self.reference is None:
+            return location_id or 'Unknown'
+        try:
+            location = await self.reference.location_async(location_id)
+        except Exception as e:
+            print(f"⚠️  주차면 조회 실패: {e}")
+            return location_id
+        return self.describe_location(location_id, location)
+
+    async def command_labels(self, command: CommandRecord) -> Tuple[str, str]:
+        """차량 / 주차면 라벨"""
+        return (await self.vehicle_label_async(command.license_plate),
+                await self.location_label_async(command.parking_spot_id))
+
+    async def record_journal_durable(self, event: int, command_id: str,
+                                     detail: Dict[str, Any] = None):
+        """fsync까지 기다리는 저널 기록 (대기는 executor에서, 저널이 없으면 무시)"""
+        if self.journal is not None and command_id:
+            await self.run_blocking(functools.partial(self.journal.append, durable=True),
+                                    event, command_id, detail)
+
+    def resume_deferred(self, since):
+        """수신 제어 복구 (타이머 스레드에서 불릴 수 있으므로 이벤트 루프로 넘김)"""
+        self.loop.call_soon_threadsafe(super().resume_deferred, since)
+
+    async def recover_from_journal(self, in_flight: Dict[str, Dict[str, Any]]):
+        """재시작 시 저널의 진행 중 명령을 DB와 맞춤 (ExitController.recover_from_journal 참고)"""
+        if not in_flight:
+            return
+        result = await reconcile_async(self.supabase, in_flight, self.journal)
+        for command in result['requeued']:
+            self.ingest_command(command)
+
+    async def drain(self):
+        """
+        새 명령 수신을 멈추고 실행 중인 명령을 모두 끝낸 뒤 상태 기록까지 마무리
+
+        channel.unsubscribe() 전에 호출 (드레인 중 도착한 명령은 pending으로 남음)
+        """
+        self.draining = True
+        await self.backfill.stop()
+
+        stats = self.command_executor.stats()
+        print(f"   남은 명령 처리 중... (대기: {stats['queue_depth']}, 실행 중: {stats['in_flight']})")
+        if self.gate_coalescer:
+            self.gate_coalescer.flush_all()
+            print(f"   게이트 병합 통계: {self.gate_coalescer.stats()}")
+        await self.command_executor.shutdown(wait=True)
+        await self.claimer.stop()
+        await self.status_writer.close()
+        print(f"   상태 기록 통계: {self.status_writer.stats()}")
+
+
+async def check_occupancy(client, occupancy_index: OccupancyIndex, interval: float):
+    """interval초마다 점유 인덱스를 테이블과 비교 / 보정 (놓친 Realtime 이벤트 / 만료된 예약)"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            rows = (await client.table('parking_locations').select('*').execute()).data or []
+            occupancy_index.check_rows(rows)
+        except Exception as e:
+            print(f"⚠️  점유 인덱스 점검 실패: {e}")
+
+
+async def main():
+    """메인 코루틴"""
+    from supabase import acreate_client
+
+    print("="*50)
+    print("🤖 ROS2 출차 컨트롤러 시작 (asyncio)")
+    print("="*50)
+    print(f"Supabase URL: {SUPABASE_URL}")
+    print("Realtime Subscribe 방식으로 명령 대기 중...")
+    print("="*50 + "\n")
+
+    client = await acreate_client(SUPABASE_URL, SUPABASE_KEY)
+    occupancy_index = OccupancyIndex()
+    rows = (await client.table('parking_locations').select('*').execute()).data or []
+    occupancy_index.load_rows(rows)
+    occupancy_check = asyncio.create_task(check_occupancy(
+        client, occupancy_index, float(os.getenv("OCCUPANCY_CHECK_INTERVAL", "300"))))
+
+    # 명령 처리 저널 (재시작 시 진행 중이던 명령 복구)
+    journal = CommandJournal(os.getenv("COMMAND_JOURNAL_PATH", "ros2_commands.journal"))
+    in_flight = journal.open()
+    journal.start()
+
+    # 수신 제어 (폭주 시 메모리 / 출차 지연 상한)
+    admission = AdmissionController(capacity=int(os.getenv("ADMISSION_CAPACITY", "128")))
+
+    # 참조 데이터 캐시 (같은 AsyncClient로 적재 / 미스 조회)
+    reference = ReferenceCache(client)
+    await reference.load_async()
+
+    controller = AsyncExitController(client, occupancy_index=occupancy_index, journal=journal,
+                                     admission=admission, reference=reference)
+    await controller.recover_from_journal(in_flight)
+
+    metrics_server = MetricsServer(controller.metrics, port=int(os.getenv("METRICS_PORT", "9108")))
+    metrics_server.start()
+    controller.metrics.start_summary_log(interval=60)
+
+    channel = client.channel('ros2-commands-channel')
+    channel.on_postgres_changes(
+        event='INSERT',
+        schema='public',
+        table='ros2_commands',
+        callback=controller.handle_command
+    ).on_postgres_changes(
+        event='*',
+        schema='public',
+        table='parking_locations',
+        callback=occupancy_index.on_change
+    )
+    reference.bind_channel(channel)  # 참조 캐시 무효화
+
+    def on_subscribe_state(status, error=None):
+        controller.backfill.on_subscribe_state(status, error)
+        reference.on_subscribe_state(status, error)
+
+    await channel.subscribe(on_subscribe_state)
+    controller.backfill.start()
+
+    print("✅ Realtime Subscribe 연결 완료!")
+    print("💡 출차 버튼을 누르면 즉시 반응합니다...\n")
+
+    # Ctrl+C / SIGTERM 까지 대기
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopped.set)
+    await stopped.wait()
+
+    print("\n\n👋 프로그램 종료")
+    await controller.drain()
+    await channel.unsubscribe()
+    occupancy_check.cancel()
+    print(f"   점유 인덱스 통계: {occupancy_index.stats()}")
+    print(f"   수신 제어 통계: {admission.stats()}")
+    print(f"   참조 캐시 통계: {reference.stats()}")
+    journal.close()
+    print(f"   저널 통계: {journal.stats()}")
+
+    print(controller.metrics.summary())
+    controller.metrics.stop()
+    metrics_server.stop()
+
+
+if __name__ == "__main__":
+    if SUPABASE_URL == "your-supabase-url":
+        print("⚠️  환경 변수를 설정해주세요:")
+        print("export SUPABASE_URL='https://your-project.supabase.co'")
+        print("export SUPABASE_ANON_KEY='your-anon-key'")
+        exit(1)
+
+    asyncio.run(main())
@@ -6,8 +6,6 @@ ROS2 패키지로 만들 때 사용할 예시 코드
 """
 
 import os
-import time
-from datetime import datetime
 from typing import Dict, Any
 
 import rclpy
@@ -17,6 +15,13 @@ from std_msgs.msg import String
 
 from supabase import create_client, Client
 
+from command_claim import CommandClaimer
+from command_executor import KeyedCommandExecutor
+from command_status_writer import CommandStatusWriter
+from exit_command_codec import EXIT_COMMAND_BINARY_TOPIC, ExitCommandPublisher, Ros2Transport
+from gate_feedback import (FEEDBACK_TOPIC, CompletionSignals, CycleIds, gate_key,
+                           parse_feedback_message)
+
 
 class ParkingExitController(Node):
     """
@@ -26,6 +31,7 @@ class ParkingExitController(Node):
     1. Supabase Realtime Subscribe로 출차 명령 수신
     2. ROS2 토픽으로 출차 명령 발행
     3. Single/Double 출차 타입 구분
+    4. 워커 풀에서 실행 (rclpy.spin / Realtime 콜백을 막지 않음)
     """
 
     def __init__(self):
@@ -36,6 +42,20 @@ class ParkingExitController(Node):
         supabase_key = os.getenv("SUPABASE_ANON_KEY")
         self.supabase: Client = create_client(supabase_url, supabase_key)
 
+        # 명령 선점 (여러 노드 동시 실행 시 한 노드만 실행)
+        self.claimer = CommandClaimer(self.supabase)
+        self.claimer.start()
+
+        # 상태 업데이트 일괄 기록기 (최종 상태 기록이 확인되면 선점 해제)
+        self.status_writer = CommandStatusWriter(self.supabase,
+                                                 worker_id=self.claimer.worker_id,
+                                                 on_flushed=self.release_claims,
+                                                 on_dropped=self.release_claims)
+        self.status_writer.start()
+
+        # 명령 실행기 (게이트별 순차, 게이트 간 병렬)
+        self.command_executor = KeyedCommandExecutor(max_workers=4, max_pending=256)
+
         # ROS2 Publisher 생성
         self.exit_publisher = self.create_publisher(
             String,  # 실제로는 ExitCommand 같은 커스텀 메시지 사용
@@ -43,6 +63,22 @@ class ParkingExitController(Node):
             10
         )
 
+        # 바이너리 출차 명령 (EXIT_COMMAND_FORMAT=binary 일 때 /parking/exit_command_bin 으로 발행)
+        self.exit_command_format = os.getenv("EXIT_COMMAND_FORMAT", "string")
+        self.binary_publisher = None
+        if self.exit_command_format == 'binary':
+            self.binary_publisher = ExitCommandPublisher(Ros2Transport(self))
+
+        # 게이트 피드백 구독 (고정 sleep 대신 닫힘 신호로 완료 처리)
+        self.completion = CompletionSignals()
+        self.cycle_ids = CycleIds()
+        self.feedback_subscription = self.create_subscription(
+            String,
+            FEEDBACK_TOPIC,
+            self.handle_feedback,
+            10
+        )
+
         # Supabase Realtime Subscribe 설정
         self.setup_realtime_subscription()
 
@@ -76,14 +112,22 @@ class ParkingExitController(Node):
 
             self.get_logger().info(f'📨 새 명령: {command_type}')
 
-            # 명령 타입에 따라 처리
+            # 명령 타입에 따라 처리 (같은 게이트는 순서대로 실행)
             if command_type == 'EXIT_GATE_SINGLE':
-                self.execute_exit(command, vehicle_count=1)
+                task = (self.execute_exit, command, 1)
             elif command_type == 'EXIT_GATE_DOUBLE':
-                self.execute_exit(command, vehicle_count=2)
+                task = (self.execute_exit, command, 2)
             else:
                 self.get_logger().warn(f'알 수 없는 명령: {command_type}')
                 self.update_command_status(command_id, 'failed', 'Unknown command')
+                return
+
+            gate_id = (command.get('payload') or {}).get('gate_id', 'EXIT-01')
+            if not self.command_executor.submit(f'gate:{gate_id}', *task):
+                self.get_logger().warn(
+                    f'실행 대기열 가득 참 (대기: {self.command_executor.queue_depth})'
+                )
+                self.update_command_status(command_id, 'failed', 'Command queue full')
 
         except Exception as e:
             self.get_logger().error(f'명령 처리 오류: {e}')
@@ -97,14 +141,23 @@ class ParkingExitController(Node):
         parking_spot = command.get('parking_spot_id', 'Unknown')
 
         try:
-            # 1. 상태 업데이트
-            self.update_command_status(command_id, 'processing')
+            # 1. 선점 (pending → processing)
+            if self.claimer.claim(command_id) is None:
+                self.get_logger().info(f'↪️  다른 노드가 처리 중: {command_id}')
+                return
+        except Exception as e:
+            self.get_logger().error(f'명령 선점 실패: {e}')
+            return
 
-            # 2. ROS2 토픽 발행
-            self.publish_exit_command(gate_id, vehicle_count, duration, parking_spot)
+        try:
+            # 2. ROS2 토픽 발행 (발행 전에 이 사이클의 닫힘 신호 대기 등록)
+            cycle_id = self.cycle_ids.next()
+            waiter = self.completion.expect(gate_key(gate_id, cycle_id))
+            self.publish_exit_command(gate_id, vehicle_count, duration, parking_spot, cycle_id)
 
-            # 3. 완료 대기 (실제로는 피드백 구독)
-            time.sleep(duration)
+            # 3. 완료 대기: 게이트 닫힘 피드백 (duration은 타임아웃)
+            if self.completion.wait(waiter, duration) is None:
+                self.get_logger().warn(f'⌛ {gate_id} 피드백 없음 ({duration}초 타임아웃)')
 
             # 4. 완료 처리
             self.update_command_status(command_id, 'completed')
@@ -115,18 +168,50 @@ class ParkingExitController(Node):
             self.get_logger().error(f'출차 실패: {e}')
             self.update_command_status(command_id, 'failed', str(e))
 
+        finally:
+            # 상태 기록이 남아 있으면 release_claims에서 놓음 (그때까지 하트비트 유지)
+            if not self.status_writer.is_pending(command_id):
+                self.claimer.release(command_id)
+
+    def release_claims(self, command_ids):
+        """상태 기록 확인(또는 포기)된 명령의 선점 해제"""
+        for command_id in command_ids:
+            self.claimer.release(command_id)
+
+    def handle_feedback(self, msg: String):
+        """게이트/로봇 피드백 콜백 ("CLOSED|EXIT-01|<cycle_id>")"""
+        parsed = parse_feedback_message(msg.data)
+        if parsed is None:
+            self.get_logger().warn(f'알 수 없는 피드백: {msg.data}')
+            return
+        key, result = parsed
+        if not self.completion.signal(key, result) and key[0] == 'gate':
+            self.get_logger().warn(f'대기 중인 사이클 없음 (무시): {msg.data}')
+
     def publish_exit_command(self, gate_id: str, vehicle_count: int,
-                            duration: int, parking_spot: str):
+                            duration: int, parking_spot: str, cycle_id: int):
         """
         ROS2 토픽으로 출차 명령 발행
 
+        게이트는 닫힘 신호에 cycle_id를 그대로 돌려줌 ("CLOSED|<gate>|<cycle_id>")
+
         실제 사용 시:
         - String 대신 커스텀 메시지 타입 사용
         - ExitCommand.msg 정의 필요
+        - EXIT_COMMAND_FORMAT=binary 이면 exit_command_codec 바이너리로 발행
         """
+        if self.binary_publisher is not None:
+            self.binary_publisher.publish_exit(gate_id, vehicle_count, duration, parking_spot,
+                                               cycle_id)
+            self.get_logger().info(
+                f'📡 토픽 발행: {EXIT_COMMAND_BINARY_TOPIC} '
+                f'(Gate: {gate_id}, 차량: {vehicle_count}대, 위치: {parking_spot})'
+            )
+            return
+
         # 임시: String 메시지로 발행
         msg = String()
-        msg.data = f"EXIT|{gate_id}|{vehicle_count}|{duration}|{parking_spot}"
+        msg.data = f"EXIT|{gate_id}|{vehicle_count}|{duration}|{parking_spot}|{cycle_id}"
 
         # 실제 커스텀 메시지 사용 예시:
         # msg = ExitCommand()
@@ -134,6 +219,7 @@ class ParkingExitController(Node):
         # msg.vehicle_count = vehicle_count
         # msg.duration_seconds = duration
         # msg.parking_spot_id = parking_spot
+        # msg.cycle_id = cycle_id
         # msg.timestamp = self.get_clock().now().to_msg()
 
         self.exit_publisher.publish(msg)
@@ -147,24 +233,9 @@ class ParkingExitController(Node):
 
     def update_command_status(self, command_id: str, status: str,
                              error_message: str = None):
-        """명령 상태 업데이트"""
-        update_data = {'status': status}
-
-        if status == 'processing':
-            update_data['executed_at'] = datetime.utcnow().isoformat()
-        elif status in ['completed', 'failed']:
-            update_data['completed_at'] = datetime.utcnow().isoformat()
-
-        if error_message:
-            update_data['error_message'] = error_message
-
-        try:
-            self.supabase.table('ros2_commands') \
-                .update(update_data) \
-                .eq('command_id', command_id) \
-                .execute()
-        except Exception as e:
-            self.get_logger().error(f'상태 업데이트 실패: {e}')
+        """명령 상태 업데이트 (write-behind: 모아서 일괄 기록)"""
+        self.status_writer.record(command_id, status, error_message,
+                                  claimed=self.claimer.holds(command_id))
 
 
 def main(args=None):
@@ -176,6 +247,9 @@ def main(args=None):
     except KeyboardInterrupt:
         pass
     finally:
+        node.command_executor.shutdown(wait=True)
+        node.claimer.stop()
+        node.status_writer.close()
         node.destroy_node()
         rclpy.shutdown()
 
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+경로 그래프 / 이중 주차 출차 계획
+
+parking_locations 좌표로 그래프를 만들고, 앞 칸 차량에 막힌 출차 요청에
+MOVE(앞 차량 임시 이동) → EXIT 작업 순서를 만듦.
+
+- 그래프: 준비 위치(preparation)끼리 가까운 neighbors개 연결 (통로),
+  준비 위치 → X_n_1 → X_n_2 … 주차 칸 줄(lane)로 연결
+- 통로 노드(준비 위치) 사이 최단 거리를 미리 전부 계산 (all-pairs)
+  주차면 → 주차면 거리 = 줄 안 깊이 + 통로 거리 + 줄 안 깊이 (행렬 조회 한 번)
+  (scipy가 있으면 csgraph.dijkstra, 없으면 내장 Dijkstra)
+- X_n_k는 같은 줄의 X_n_1 … X_n_(k-1) 중 점유된 칸에 막힘
+- 임시 위치(temp_location): 앞이 비어 있는 빈 칸 중 앞 차량에서 가장 가까운 곳
+- 레이아웃 변경(추가/삭제/좌표 변경)이면 거리 캐시 무효화 → 다음 계획 때 재계산,
+  점유 변경은 빈자리 배열만 갱신
+
+사용법 (벤치마크):
+    python route_planner.py --spots 100 1000 10000
+"""
+
+import heapq
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from realtime_payload import normalize_change
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra
+except ImportError:  # scipy는 선택 의존성
+    dijkstra = None
+
+LANE_PATTERN = re.compile(r'^(.+)_(\d+)$')
+LAYOUT_KEYS = ('location_type', 'zone', 'floor', 'x', 'y')
+
+
+def _dijkstra_rows(adjacency: List[List[Tuple[int, float]]], sources: range) -> np.ndarray:
+    """내장 Dijkstra (sources 각각에서 모든 노드까지 거리)"""
+    n = len(adjacency)
+    rows = np.full((len(sources), n), np.inf, dtype=np.float32)
+    for row, source in zip(rows, sources):
+        dist = [np.inf] * n
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > dist[node]:
+                continue
+            for other, weight in adjacency[node]:
+                nd = d + weight
+                if nd < dist[other]:
+                    dist[other] = nd
+                    heapq.heappush(heap, (nd, other))
+        row[:] = dist
+    return rows
+
+
+class RoutePlanner:
+    """parking_locations 경로 그래프 + 출차 계획"""
+
+    def __init__(self, client=None, neighbors: int = 4, chunk_size: int = 512):
+        """
+        Args:
+            client: Supabase 클라이언트 (load / submit에 사용)
+            neighbors: 준비 위치마다 연결할 가까운 준비 위치 수 (같은 층)
+            chunk_size: 최단 거리 계산 시 한 번에 처리할 출발 노드 수 (메모리 상한)
+        """
+        self.client = client
+        self.neighbors = neighbors
+        self.chunk_size = chunk_size
+
+        self._lock = threading.Lock()
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._dirty = True
+
+        self._preps: List[str] = []
+        self._prep_index: Dict[str, int] = {}
+        self._distances = np.zeros((0, 0), dtype=np.float32)  # 준비 위치 간 최단 거리
+
+        self._spots: List[str] = []
+        self._spot_index: Dict[str, int] = {}
+        self._spot_prep = np.zeros(0, dtype=np.int64)   # 주차면 → 준비 위치 번호 (-1: 없음)
+        self._spot_depth = np.zeros(0)                  # 준비 위치에서 줄을 따라간 거리
+        self._spot_front = np.zeros(0, dtype=np.int64)  # 바로 앞 칸 (-1: 맨 앞)
+        self._free = np.zeros(0, dtype=bool)
+        self._max_lane = 0
+
+        self._stats = {
+            'plans': 0,
+            'blocked_plans': 0,
+            'no_temp_location': 0,
+            'rebuilds': 0,
+            'invalidations': 0,
+            'last_build_seconds': 0.0,
+        }
+
+    # ----- 그래프 구성 -----
+
+    def load(self) -> int:
+        """parking_locations 전체 로드 후 그래프 구성. 주차면 수 반환"""
+        rows = self.client.table('parking_locations').select('*').execute().data or []
+        return self.load_rows(rows)
+
+    def load_rows(self, rows: List[Dict[str, Any]]) -> int:
+        """이미 읽은 parking_locations 행으로 그래프 구성"""
+        with self._lock:
+            self._rows = {r['location_id']: dict(r) for r in rows}
+            self._rebuild_locked()
+        print(f"🗺️  경로 그래프: 준비 위치 {len(self._preps)}개, 주차면 {len(self._spots)}개 "
+              f"({self._stats['last_build_seconds'] * 1e3:.0f}ms)")
+        return len(self._spots)
+
+    def _ensure_locked(self):
+        if self._dirty:
+            self._rebuild_locked()
+
+    def _rebuild_locked(self):
+        import time
+
+        started = time.perf_counter()
+        preps = sorted(r for r, row in self._rows.items() if row.get('location_type') == 'preparation')
+        spots = sorted(r for r, row in self._rows.items() if row.get('location_type') == 'parking')
+        self._preps = preps
+        self._prep_index = {p: i for i, p in enumerate(preps)}
+        self._distances = self._aisle_distances(preps)
+
+        # 줄(lane): 준비 위치 X_n 아래 X_n_1, X_n_2 … (번호가 작을수록 통로 쪽)
+        lanes: Dict[str, List[Tuple[int, str]]] = {}
+        for spot in spots:
+            match = LANE_PATTERN.match(spot)
+            if match and match.group(1) in self._prep_index:
+                lanes.setdefault(match.group(1), []).append((int(match.group(2)), spot))
+
+        self._spots = spots
+        self._spot_index = {s: i for i, s in enumerate(spots)}
+        n = len(spots)
+        self._spot_prep = np.full(n, -1, dtype=np.int64)
+        self._spot_depth = np.zeros(n)
+        self._spot_front = np.full(n, -1, dtype=np.int64)
+        self._free = np.array([not self._rows[s].get('is_occupied') for s in spots], dtype=bool)
+        self._max_lane = 0
+
+        for prep, members in lanes.items():
+            members.sort()
+            previous = prep
+            depth = 0.0
+            for position, (_, spot) in enumerate(members):
+                i = self._spot_index[spot]
+                depth += self._euclidean(previous, spot)
+                self._spot_prep[i] = self._prep_index[prep]
+                self._spot_depth[i] = depth
+                if position > 0:
+                    self._spot_front[i] = self._spot_index[members[position - 1][1]]
+                previous = spot
+            self._max_lane = max(self._max_lane, len(members))
+
+        self._dirty = False
+        self._stats['rebuilds'] += 1
+        self._stats['last_build_seconds'] = time.perf_counter() - started
+
+    def _euclidean(self, a: str, b: str) -> float:
+        ra, rb = self._rows[a], self._rows[b]
+        return float(np.hypot(float(ra['x']) - float(rb['x']), float(ra['y']) - float(rb['y'])))
+
+    def _aisle_distances(self, preps: List[str]) -> np.ndarray:
+        """준비 위치 그래프 (같은 층 최근접 neighbors개) + all-pairs 최단 거리"""
+        n = len(preps)
+        if n == 0:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        coords = np.array([(float(self._rows[p]['x']), float(self._rows[p]['y'])) for p in preps])
+        floors = np.array([str(self._rows[p].get('floor')) for p in preps])
+        edges: Dict[Tuple[int, int], float] = {}
+        for floor in np.unique(floors):
+            members = np.flatnonzero(floors == floor)
+            k = min(self.neighbors, len(members) - 1)
+            if k <= 0:
+                continue
+            for start in range(0, len(members), self.chunk_size):
+                block = members[start:start + self.chunk_size]
+                dist = np.hypot(coords[block, None, 0] - coords[None, members, 0],
+                                coords[block, None, 1] - coords[None, members, 1])
+                dist[np.arange(len(block)), start + np.arange(len(block))] = np.inf
+                nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+                for row, i in enumerate(block):
+                    for col in nearest[row]:
+                        j = members[col]
+                        a, b = (int(i), int(j)) if i < j else (int(j), int(i))
+                        edges[(a, b)] = float(dist[row, col])
+
+        if dijkstra is not None:
+            pairs = np.array(list(edges.keys()), dtype=np.int64).reshape(-1, 2)
+            weights = np.array(list(edges.values()))
+            graph = csr_matrix((weights, (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+            result = np.empty((n, n), dtype=np.float32)
+            for start in range(0, n, self.chunk_size):
+                sources = np.arange(start, min(start + self.chunk_size, n))
+                result[sources] = dijkstra(graph, directed=False, indices=sources)
+            return result
+
+        adjacency: List[List[Tuple[int, float]]] = [[] for _ in range(n)]
+        for (a, b), weight in edges.items():
+            adjacency[a].append((b, weight))
+            adjacency[b].append((a, weight))
+        return _dijkstra_rows(adjacency, range(n))
+
+    # ----- 거리 / 점유 -----
+
+    def distance(self, a: str, b: str) -> float:
+        """두 위치(준비 위치 / 주차면) 사이 최단 거리 (연결 안 되면 inf)"""
+        with self._lock:
+            self._ensure_locked()
+            return self._distance_locked(a, b)
+
+    def _node_locked(self, location_id: str) -> Tuple[int, float, Optional[int]]:
+        """(준비 위치 번호, 준비 위치에서의 깊이, 주차면 번호)"""
+        p = self._prep_index.get(location_id)
+        if p is not None:
+            return p, 0.0, None
+        i = self._spot_index.get(location_id)
+        if i is None or self._spot_prep[i] < 0:
+            raise KeyError(f"경로 그래프에 없는 위치: {location_id}")
+        return int(self._spot_prep[i]), float(self._spot_depth[i]), i
+
+    def _distance_locked(self, a: str, b: str) -> float:
+        pa, da, _ = self._node_locked(a)
+        pb, db, _ = self._node_locked(b)
+        if pa == pb:
+            return abs(da - db)
+        return da + float(self._distances[pa, pb]) + db
+
+    def set_occupied(self, spot_id: str, occupied: bool):
+        with self._lock:
+            i = self._spot_index.get(spot_id)
+            if i is not None:
+                self._free[i] = not occupied
+            if spot_id in self._rows:
+                self._rows[spot_id]['is_occupied'] = occupied
+
+    def blockers(self, spot_id: str) -> List[str]:
+        """spot_id 앞을 막고 있는 점유 칸 (통로 쪽부터)"""
+        with self._lock:
+            self._ensure_locked()
+            return [self._spots[i] for i in self._blockers_locked(self._spot_index[spot_id])]
+
+    def _blockers_locked(self, i: int) -> List[int]:
+        blocking = []
+        front = self._spot_front[i]
+        while front >= 0:
+            if not self._free[front]:
+                blocking.append(int(front))
+            front = self._spot_front[front]
+        blocking.reverse()
+        return blocking
+
+    def _reachable_free_locked(self) -> np.ndarray:
+        """빈 칸 중 앞 칸이 모두 비어 있는 칸 (임시 위치 후보)"""
+        ok = self._free & (self._spot_prep >= 0)
+        front = self._spot_front
+        for _ in range(self._max_lane):
+            has_front = front >= 0
+            ok &= ~has_front | self._free[np.where(has_front, front, 0)]
+            front = np.where(has_front, self._spot_front[np.where(has_front, front, 0)], -1)
+        return ok
+
+    # ----- 출차 계획 -----
+
+    def plan_exit(self, start_location: str, vehicle_plate: str = None,
+                  exit_location: str = None, vehicles: Dict[str, str] = None,
+                  priority: int = 0) -> Dict[str, Any]:
+        """
+        출차 작업 순서 계획
+
+        Args:
+            start_location: 출차할 차량의 주차면
+            vehicle_plate: 출차 차량 번호
+            exit_location: 출차 후 목적지 (없으면 해당 줄의 준비 위치)
+            vehicles: 주차면 → 차량 번호 (blocking_vehicle 채우기용, 선택)
+            priority: EXIT 작업 우선순위 (앞 차량 MOVE는 +1로 먼저 배분)
+
+        Returns:
+            {'tasks': [MOVE…, EXIT] (tasks 테이블 행), 'cost': 총 이동 거리,
+             'blocked': 막혀 있었는지}
+            임시 위치가 모자라면 tasks는 빈 리스트
+        """
+        vehicles = vehicles or {}
+        with self._lock:
+            self._ensure_locked()
+            self._stats['plans'] += 1
+
+            target, depth, spot = self._node_locked(start_location)
+            if spot is None:
+                raise KeyError(f"주차면이 아님: {start_location}")
+            exit_location = exit_location or self._preps[target]
+
+            free = self._free.copy()
+            tasks: List[Dict[str, Any]] = []
+            cost = 0.0
+            blocking = self._blockers_locked(spot)
+            if blocking:
+                self._stats['blocked_plans'] += 1
+
+            try:
+                for blocker in blocking:
+                    temp = self._nearest_temp_locked(blocker, spot)
+                    if temp is None:
+                        self._stats['no_temp_location'] += 1
+                        return {'tasks': [], 'cost': float('inf'), 'blocked': True}
+                    self._free[temp] = False
+                    cost += self._distance_locked(self._spots[blocker], self._spots[temp])
+                    tasks.append({
+                        'task_type': 'MOVE',
+                        'vehicle_plate': vehicles.get(self._spots[blocker]),
+                        'start_location': self._spots[blocker],
+                        'target_location': self._spots[temp],
+                        'priority': priority + 1,
+                        'status': 'pending',
+                    })
+            finally:
+                self._free = free
+
+            cost += self._distance_locked(start_location, exit_location)
+            exit_task = {
+                'task_type': 'EXIT',
+                'vehicle_plate': vehicle_plate,
+                'start_location': start_location,
+                'target_location': exit_location,
+                'priority': priority,
+                'status': 'pending',
+            }
+            if tasks:
+                exit_task['blocking_vehicle'] = tasks[0]['vehicle_plate']
+                exit_task['blocking_location'] = tasks[0]['start_location']
+                exit_task['temp_location'] = tasks[0]['target_location']
+            tasks.append(exit_task)
+            return {'tasks': tasks, 'cost': cost, 'blocked': bool(blocking)}
+
+    def _nearest_temp_locked(self, blocker: int, exiting: int) -> Optional[int]:
+        candidates = self._reachable_free_locked()
+        # 출차 중인 줄은 제외 (앞 차량을 같은 줄 뒤로 옮길 수 없음)
+        candidates &= self._spot_prep != self._spot_prep[exiting]
+        if not candidates.any():
+            return None
+
+        index = np.flatnonzero(candidates)
+        p = self._spot_prep[blocker]
+        cost = self._spot_depth[blocker] + self._distances[p, self._spot_prep[index]] \
+            + self._spot_depth[index]
+        best = int(np.argmin(cost))
+        return int(index[best]) if np.isfinite(cost[best]) else None
+
+    def submit(self, plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """계획된 작업을 tasks 테이블에 INSERT (순서대로)"""
+        if not plan['tasks']:
+            return []
+        result = self.client.table('tasks').insert(plan['tasks']).execute()
+        print(f"🗺️  출차 계획 등록: {' → '.join(t['task_type'] for t in plan['tasks'])} "
+              f"(이동 {plan['cost']:.1f}m)")
+        return result.data or []
+
+    # ----- Realtime 동기화 -----
+
+    def on_change(self, payload: Dict[str, Any]):
+        """
+        parking_locations Realtime 콜백 (event='*')
+
+        레이아웃 변경 / DELETE → 거리 캐시 무효화, 점유 변경 → 빈자리만 갱신
+        """
+        change = normalize_change(payload)
+        event = change.get('eventType')
+        new = change.get('new') or {}
+        old = change.get('old') or {}
+
+        with self._lock:
+            if event == 'DELETE':
+                if self._rows.pop(old.get('location_id'), None) is not None:
+                    self._invalidate_locked()
+                return
+
+            location_id = new.get('location_id')
+            if not location_id:
+                return
+
+            current = self._rows.get(location_id)
+            if current is None or any(
+                key in new and new[key] != current.get(key) for key in LAYOUT_KEYS
+            ):
+                self._rows[location_id] = dict(current or {}, **new)
+                self._invalidate_locked()
+                return
+
+            current.update(new)
+            i = self._spot_index.get(location_id)
+            if i is not None and 'is_occupied' in new and not self._dirty:
+                self._free[i] = not new['is_occupied']
+
+    def route(self, hub) -> 'RoutePlanner':
+        """RealtimeHub에 parking_locations 변경 핸들러 등록 (프로세스 채널 하나를 공유)"""
+        hub.route('parking_locations', self.on_change, event='*', name='route-planner')
+        return self
+
+    def _invalidate_locked(self):
+        if not self._dirty:
+            self._dirty = True
+            self._stats['invalidations'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """계획 통계 + 그래프 크기"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['preparations'] = len(self._preps)
+            stats['spots'] = len(self._spots)
+            stats['free'] = int(self._free.sum())
+            stats['dirty'] = self._dirty
+            stats['solver'] = 'scipy' if dijkstra is not None else 'builtin'
+            return stats
+
+
+def _layout(spots: int, lane_depth: int, occupancy: float, seed: int) -> List[Dict[str, Any]]:
+    """벤치마크용 격자 레이아웃 (통로 양쪽에 lane_depth칸 줄)"""
+    rng = np.random.default_rng(seed)
+    lanes = max(spots // lane_depth, 1)
+    per_row = max(int(np.sqrt(lanes)), 1)
+    rows = []
+    for n in range(lanes):
+        prep = f"P_{n + 1}"
+        px, py = (n % per_row) * 3.0, (n // per_row) * 8.0
+        rows.append({'location_id': prep, 'location_type': 'preparation', 'zone': 'P',
+                     'floor': '1F', 'x': px, 'y': py, 'is_occupied': None})
+        for k in range(1, lane_depth + 1):
+            rows.append({'location_id': f"{prep}_{k}", 'location_type': 'parking', 'zone': 'P',
+                         'floor': '1F', 'x': px, 'y': py + 1.5 + k * 1.0,
+                         'is_occupied': bool(rng.random() < occupancy)})
+    return rows
+
+
+def _benchmark(sizes: List[int], lane_depth: int, occupancy: float, repeat: int):
+    import time
+
+    for size in sizes:
+        rows = _layout(size, lane_depth, occupancy, seed=size)
+        planner = RoutePlanner()
+        started = time.perf_counter()
+        planner.load_rows(rows)
+        build = time.perf_counter() - started
+
+        deep = [r['location_id'] for r in rows
+                if r['location_type'] == 'parking' and r['location_id'].endswith(f"_{lane_depth}")]
+        times = []
+        blocked = 0
+        for i in range(repeat):
+            spot = deep[i % len(deep)]
+            started = time.perf_counter()
+            plan = planner.plan_exit(spot)
+            times.append(time.perf_counter() - started)
+            blocked += plan['blocked']
+
+        print(f"   주차면 {size:>6}개 (solver: {planner.stats()['solver']}): "
+              f"그래프 구성 {build * 1e3:.0f}ms, 계획 중앙값 {np.median(times) * 1e6:.0f}µs "
+              f"/ p99 {np.percentile(times, 99) * 1e6:.0f}µs (막힘 {blocked}/{repeat})")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='RoutePlanner benchmark')
+    parser.add_argument('--spots', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--lane-depth', type=int, default=2)
+    parser.add_argument('--occupancy', type=float, default=0.7)
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    print("🗺️  RoutePlanner 벤치마크")
+    _benchmark(args.spots, args.lane_depth, args.occupancy, args.repeat)
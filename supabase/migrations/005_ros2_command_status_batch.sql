@@ -0,0 +1,35 @@
+-- =====================================================
+-- ROS2 명령 상태 일괄 업데이트 (write-behind)
+-- =====================================================
+-- 컨트롤러가 모아둔 상태 변경을 한 번의 RPC 호출로 반영
+-- (명령마다 processing / completed UPDATE를 따로 보내지 않음)
+
+CREATE OR REPLACE FUNCTION apply_ros2_command_status(p_updates JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    -- p_updates 예시:
+    -- [{"command_id": "...", "status": "completed",
+    --   "executed_at": "...", "completed_at": "...", "error_message": null}]
+    UPDATE ros2_commands c
+    SET
+        status = u.status,
+        executed_at = COALESCE(u.executed_at, c.executed_at),
+        completed_at = COALESCE(u.completed_at, c.completed_at),
+        error_message = COALESCE(u.error_message, c.error_message)
+    FROM jsonb_to_recordset(p_updates) AS u(
+        command_id UUID,
+        status VARCHAR(20),
+        executed_at TIMESTAMPTZ,
+        completed_at TIMESTAMPTZ,
+        error_message TEXT
+    )
+    WHERE c.command_id = u.command_id;
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION apply_ros2_command_status IS 'ROS2 명령 상태 변경 일괄 반영 (컨트롤러 write-behind 용)';
@@ -0,0 +1,183 @@
+-- =====================================================
+-- ROS2 명령 작업 선점 (여러 컨트롤러 동시 실행)
+-- =====================================================
+-- 여러 컨트롤러가 같은 INSERT 이벤트를 받아도
+-- pending → processing 전환은 정확히 한 인스턴스만 성공
+-- 리스(lease) + 하트비트: 죽은 컨트롤러의 명령은 만료 후 다시 pending
+
+-- =====================================================
+-- 1. 선점 정보 컬럼
+-- =====================================================
+
+ALTER TABLE ros2_commands
+    ADD COLUMN IF NOT EXISTS claimed_by VARCHAR(100),
+    ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS attempt_count INTEGER DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_ros2_commands_lease
+    ON ros2_commands(lease_expires_at)
+    WHERE status = 'processing';
+
+COMMENT ON COLUMN ros2_commands.claimed_by IS '명령을 선점한 컨트롤러 ID';
+COMMENT ON COLUMN ros2_commands.lease_expires_at IS '리스 만료 시각 (하트비트로 연장, 만료 시 pending으로 복귀)';
+COMMENT ON COLUMN ros2_commands.attempt_count IS '선점 횟수 (리스 만료 재시도 포함)';
+
+-- =====================================================
+-- 2. 단건 선점 (Realtime INSERT 수신 시)
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION claim_ros2_command(
+    p_command_id UUID,
+    p_worker_id VARCHAR(100),
+    p_lease_seconds INTEGER DEFAULT 30
+)
+RETURNS SETOF ros2_commands AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE ros2_commands
+    SET
+        status = 'processing',
+        claimed_by = p_worker_id,
+        executed_at = NOW(),
+        heartbeat_at = NOW(),
+        lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+        attempt_count = COALESCE(attempt_count, 0) + 1
+    WHERE command_id = p_command_id
+      AND status = 'pending'
+    RETURNING *;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION claim_ros2_command IS 'pending 명령 선점 (성공 시 행 반환, 이미 선점됐으면 빈 결과)';
+
+-- =====================================================
+-- 3. 일괄 선점 (밀린 pending 명령 처리용)
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION claim_pending_ros2_commands(
+    p_worker_id VARCHAR(100),
+    p_limit INTEGER DEFAULT 10,
+    p_lease_seconds INTEGER DEFAULT 30
+)
+RETURNS SETOF ros2_commands AS $$
+BEGIN
+    RETURN QUERY
+    WITH picked AS (
+        SELECT command_id
+        FROM ros2_commands
+        WHERE status = 'pending'
+        ORDER BY created_at
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE ros2_commands c
+    SET
+        status = 'processing',
+        claimed_by = p_worker_id,
+        executed_at = NOW(),
+        heartbeat_at = NOW(),
+        lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+        attempt_count = COALESCE(c.attempt_count, 0) + 1
+    FROM picked
+    WHERE c.command_id = picked.command_id
+    RETURNING c.*;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION claim_pending_ros2_commands IS '가장 오래된 pending 명령 여러 건 선점 (SKIP LOCKED)';
+
+-- =====================================================
+-- 4. 하트비트 (리스 연장)
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION heartbeat_ros2_commands(
+    p_worker_id VARCHAR(100),
+    p_command_ids UUID[],
+    p_lease_seconds INTEGER DEFAULT 30
+)
+RETURNS INTEGER AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    UPDATE ros2_commands
+    SET
+        heartbeat_at = NOW(),
+        lease_expires_at = NOW() + make_interval(secs => p_lease_seconds)
+    WHERE command_id = ANY(p_command_ids)
+      AND status = 'processing'
+      AND claimed_by = p_worker_id;
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION heartbeat_ros2_commands IS '선점한 명령의 리스 연장';
+
+-- =====================================================
+-- 5. 만료된 리스 회수
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION requeue_expired_ros2_commands(
+    p_max_attempts INTEGER DEFAULT 3
+)
+RETURNS SETOF ros2_commands AS $$
+BEGIN
+    -- 최대 시도 횟수 초과 시 failed, 아니면 다시 pending
+    RETURN QUERY
+    UPDATE ros2_commands
+    SET
+        status = CASE WHEN attempt_count >= p_max_attempts THEN 'failed' ELSE 'pending' END,
+        error_message = CASE
+            WHEN attempt_count >= p_max_attempts
+            THEN format('Lease expired (%s attempts, last worker: %s)', attempt_count, claimed_by)
+            ELSE error_message
+        END,
+        completed_at = CASE WHEN attempt_count >= p_max_attempts THEN NOW() ELSE NULL END,
+        claimed_by = NULL,
+        lease_expires_at = NULL
+    WHERE status = 'processing'
+      AND lease_expires_at < NOW()
+    RETURNING *;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION requeue_expired_ros2_commands IS '리스가 만료된 processing 명령을 pending으로 복귀';
+
+-- =====================================================
+-- 6. 상태 일괄 반영: 선점한 컨트롤러만 기록 가능
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION apply_ros2_command_status(p_updates JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    -- claimed_by가 있으면 현재 선점자와 같을 때만 반영
+    -- (리스 만료 후 다른 컨트롤러가 가져간 명령을 덮어쓰지 않음)
+    UPDATE ros2_commands c
+    SET
+        status = u.status,
+        executed_at = COALESCE(u.executed_at, c.executed_at),
+        completed_at = COALESCE(u.completed_at, c.completed_at),
+        error_message = COALESCE(u.error_message, c.error_message),
+        lease_expires_at = CASE
+            WHEN u.status IN ('completed', 'failed') THEN NULL
+            ELSE c.lease_expires_at
+        END
+    FROM jsonb_to_recordset(p_updates) AS u(
+        command_id UUID,
+        status VARCHAR(20),
+        executed_at TIMESTAMPTZ,
+        completed_at TIMESTAMPTZ,
+        error_message TEXT,
+        claimed_by VARCHAR(100)
+    )
+    WHERE c.command_id = u.command_id
+      AND (u.claimed_by IS NULL OR c.claimed_by IS NULL OR c.claimed_by = u.claimed_by);
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
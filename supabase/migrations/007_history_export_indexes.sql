@@ -0,0 +1,17 @@
+-- =====================================================
+-- 이력 내보내기 keyset 인덱스 (history_exporter.py)
+-- =====================================================
+-- (정렬 키, PK) 복합 인덱스 → 페이지마다 OFFSET 없이 인덱스 범위 조회
+-- WHERE (key, id) > (마지막 키, 마지막 id) ORDER BY key, id LIMIT n
+
+CREATE INDEX IF NOT EXISTS idx_events_time_keyset
+    ON parking_events(event_time, event_id);
+
+CREATE INDEX IF NOT EXISTS idx_session_created_keyset
+    ON parking_sessions(created_at, session_id);
+
+CREATE INDEX IF NOT EXISTS idx_fee_created_keyset
+    ON parking_fees(created_at, fee_id);
+
+CREATE INDEX IF NOT EXISTS idx_ros2_commands_created_keyset
+    ON ros2_commands(created_at, command_id);
@@ -0,0 +1,31 @@
+-- =====================================================
+-- 대시보드 집계 버킷 (parking_rollups.py)
+-- =====================================================
+-- parking_events / parking_sessions Realtime 이벤트를 고정 구간(기본 5분)으로 집계
+-- 대시보드는 원본 행 대신 이 테이블을 조회
+--
+-- dimension = 'gate': dimension_key = gate_id, entries / exits = 입출차 이벤트 수
+-- dimension = 'zone': dimension_key = 구역, entries / exits = 세션 시작 / 종료 수,
+--                     occupied = 구간 마지막 점유 대수, peak_occupied = 구간 최대 점유 대수
+
+CREATE TABLE IF NOT EXISTS parking_rollups (
+    bucket_start TIMESTAMPTZ NOT NULL,
+    bucket_seconds INTEGER NOT NULL DEFAULT 300,
+    dimension VARCHAR(10) NOT NULL CHECK (dimension IN ('zone', 'gate')),
+    dimension_key VARCHAR(50) NOT NULL,
+    entries INTEGER NOT NULL DEFAULT 0,
+    exits INTEGER NOT NULL DEFAULT 0,
+    occupied INTEGER NOT NULL DEFAULT 0,
+    peak_occupied INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (dimension, dimension_key, bucket_seconds, bucket_start)
+);
+
+-- 대시보드: 기간별 전체 구역 / 게이트 조회
+CREATE INDEX IF NOT EXISTS idx_parking_rollups_time
+    ON parking_rollups(bucket_seconds, bucket_start DESC);
+
+COMMENT ON TABLE parking_rollups IS '구역 / 게이트별 고정 구간 집계 (Realtime 이벤트로 증분 갱신)';
+COMMENT ON COLUMN parking_rollups.occupied IS '구간 마지막 점유 대수 (zone만)';
+COMMENT ON COLUMN parking_rollups.peak_occupied IS '구간 최대 점유 대수 (zone만)';
+COMMENT ON COLUMN parking_rollups.entries IS '구간 누적값 (절대값 upsert → 재시도해도 중복 집계 없음)';
@@ -0,0 +1,52 @@
+-- =====================================================
+-- 상태 일괄 반영 선점 검사 강화 (006 apply_ros2_command_status 대체)
+-- =====================================================
+-- 006은 claimed_by가 비어 있는 행이면 누구의 쓰기든 반영했음:
+-- - requeue_expired_ros2_commands가 pending으로 되돌린 행(claimed_by = NULL)을
+--   리스를 잃은 이전 컨트롤러의 늦은 completed / failed가 덮어씀
+-- - 선점하지 않고 기록하는 실패(수신 제어 거절, 실행 대기열 가득 참)를
+--   선점자 정보와 함께 보내면 이미 다른 컨트롤러가 가져간 행만 막고,
+--   아직 pending인 행은 과부하 인스턴스가 failed로 만들 수 있었음
+--
+-- 반영 조건:
+-- - claimed_by가 있는 쓰기: 현재 선점자와 같을 때만
+-- - claimed_by가 없는 쓰기: 행이 아직 pending일 때만 (선점 전 실패 처리)
+-- status = 'pending'으로 되돌리는 쓰기(재시작 복구)는 선점 정보도 지움
+
+CREATE OR REPLACE FUNCTION apply_ros2_command_status(p_updates JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    UPDATE ros2_commands c
+    SET
+        status = u.status,
+        executed_at = COALESCE(u.executed_at, c.executed_at),
+        completed_at = COALESCE(u.completed_at, c.completed_at),
+        error_message = COALESCE(u.error_message, c.error_message),
+        claimed_by = CASE WHEN u.status = 'pending' THEN NULL ELSE c.claimed_by END,
+        lease_expires_at = CASE
+            WHEN u.status IN ('completed', 'failed', 'pending') THEN NULL
+            ELSE c.lease_expires_at
+        END
+    FROM jsonb_to_recordset(p_updates) AS u(
+        command_id UUID,
+        status VARCHAR(20),
+        executed_at TIMESTAMPTZ,
+        completed_at TIMESTAMPTZ,
+        error_message TEXT,
+        claimed_by VARCHAR(100)
+    )
+    WHERE c.command_id = u.command_id
+      AND (
+          (u.claimed_by IS NOT NULL AND c.claimed_by = u.claimed_by)
+          OR (u.claimed_by IS NULL AND c.status = 'pending')
+      );
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION apply_ros2_command_status IS
+    'ROS2 명령 상태 일괄 반영 (선점자 쓰기는 선점 중일 때만, 선점 없는 쓰기는 pending일 때만)';
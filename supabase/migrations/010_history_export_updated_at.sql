@@ -0,0 +1,33 @@
+-- =====================================================
+-- 이력 내보내기 증분 키 → updated_at (history_exporter.py)
+-- =====================================================
+-- created_at 기준이면 내보낸 뒤 바뀐 행(출차 / 결제 / 명령 완료)이 다시 나가지 않음.
+-- updated_at 기준 keyset이면 바뀐 행은 워터마크 뒤로 이동 → 다음 실행에서 새 버전으로 다시 내보냄.
+-- parking_sessions / parking_fees는 001의 트리거가 이미 updated_at을 갱신.
+
+ALTER TABLE ros2_commands
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+
+-- 기존 행: 마지막으로 바뀐 시각에 가장 가까운 값
+UPDATE ros2_commands
+SET updated_at = COALESCE(completed_at, heartbeat_at, executed_at, created_at);
+
+DROP TRIGGER IF EXISTS update_ros2_commands_updated_at ON ros2_commands;
+CREATE TRIGGER update_ros2_commands_updated_at
+BEFORE UPDATE ON ros2_commands
+FOR EACH ROW
+EXECUTE FUNCTION update_updated_at();
+
+-- (updated_at, PK) 복합 인덱스
+-- 007의 ros2_commands(created_at, command_id)는 command_backfill.py의 catch-up keyset이 계속 사용
+CREATE INDEX IF NOT EXISTS idx_session_updated_keyset
+    ON parking_sessions(updated_at, session_id);
+
+CREATE INDEX IF NOT EXISTS idx_fee_updated_keyset
+    ON parking_fees(updated_at, fee_id);
+
+CREATE INDEX IF NOT EXISTS idx_ros2_commands_updated_keyset
+    ON ros2_commands(updated_at, command_id);
+
+DROP INDEX IF EXISTS idx_session_created_keyset;
+DROP INDEX IF EXISTS idx_fee_created_keyset;
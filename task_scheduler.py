@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+tasks 우선순위 스케줄러
+
+pending 작업을 메모리 우선순위 큐(heap)로 관리하고 우선순위 순서로 배분.
+매번 ORDER BY priority 쿼리를 하지 않고, 시작 시 한 번 읽은 뒤 Realtime 변경으로 동기화.
+
+- 우선순위: priority가 클수록 먼저 (같으면 먼저 생성된 작업)
+- aging: 기다린 시간만큼 우선순위 상승 (aging_per_minute) → 낮은 우선순위 작업도 굶지 않음
+  유효 우선순위 = priority + aging_per_minute × 대기 분
+               = (priority - aging_per_minute × created_분) + aging_per_minute × 현재_분
+  현재 시각 항은 모든 작업에 같으므로 heap 키는 고정 → push / pop O(log n)
+- 작업 타입(ENTER / EXIT / MOVE / PARK)별 heap → 로봇이 처리 가능한 타입만 골라서 배분
+- 취소 / 상태 변경된 작업은 지연 삭제 (heap에서 꺼낼 때 건너뜀)
+"""
+
+import heapq
+import itertools
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from command_backfill import parse_timestamp
+from realtime_payload import normalize_change
+
+TASK_TYPES = ('ENTER', 'EXIT', 'MOVE', 'PARK')
+
+
+class _Entry:
+    __slots__ = ('key', 'task', 'removed')
+
+    def __init__(self, key: Tuple[float, float, int], task: Dict[str, Any]):
+        self.key = key
+        self.task = task
+        self.removed = False
+
+    def __lt__(self, other: '_Entry') -> bool:
+        return self.key < other.key
+
+
+class TaskScheduler:
+    """pending 작업 우선순위 큐 (aging 포함)"""
+
+    def __init__(self, client=None, aging_per_minute: float = 1.0, page_size: int = 500):
+        """
+        Args:
+            client: Supabase 클라이언트 (load / 작업 선점에 사용, 없으면 메모리만)
+            aging_per_minute: 1분 대기마다 올라가는 우선순위
+            page_size: 시작 시 pending 작업을 읽는 페이지 크기
+        """
+        self.client = client
+        self.aging_per_minute = aging_per_minute
+        self.page_size = page_size
+
+        self._lock = threading.Lock()
+        self._heaps: Dict[str, List[_Entry]] = {t: [] for t in TASK_TYPES}
+        self._entries: Dict[str, _Entry] = {}
+        self._sequence = itertools.count()
+        self._stale = 0
+
+        self._stats = {
+            'pushed': 0,
+            'popped': 0,
+            'removed': 0,
+            'claim_lost': 0,
+            'restored': 0,
+            'max_wait_seconds': 0.0,
+        }
+
+    # ----- 큐 연산 -----
+
+    def _key(self, task: Dict[str, Any]) -> Tuple[float, float, int]:
+        created = task.get('created_at')
+        created_minutes = parse_timestamp(created).timestamp() / 60 if created else 0.0
+        score = (task.get('priority') or 0) - self.aging_per_minute * created_minutes
+        # heapq는 최소 heap → 점수가 클수록 먼저 나오도록 부호 반전
+        return (-score, created_minutes, next(self._sequence))
+
+    def push(self, task: Dict[str, Any]) -> bool:
+        """pending 작업 추가 (이미 있으면 새 값으로 교체). 알 수 없는 타입이면 False"""
+        task_type = task.get('task_type')
+        if task_type not in self._heaps:
+            return False
+
+        with self._lock:
+            self._remove_locked(task['task_id'])
+            entry = _Entry(self._key(task), task)
+            self._entries[task['task_id']] = entry
+            heapq.heappush(self._heaps[task_type], entry)
+            self._stats['pushed'] += 1
+        return True
+
+    def remove(self, task_id: str) -> bool:
+        """작업 제거 (시작 / 취소됨). 큐에 있었으면 True"""
+        with self._lock:
+            return self._remove_locked(task_id)
+
+    def _remove_locked(self, task_id: str) -> bool:
+        entry = self._entries.pop(task_id, None)
+        if entry is None:
+            return False
+        entry.removed = True
+        self._stale += 1
+        self._stats['removed'] += 1
+        if self._stale > 1024 and self._stale > len(self._entries):
+            self._compact_locked()
+        return True
+
+    def _compact_locked(self):
+        """지연 삭제된 항목 정리 (heap 크기가 실제 작업 수의 2배를 넘지 않도록)"""
+        for task_type, heap in self._heaps.items():
+            live = [e for e in heap if not e.removed]
+            heapq.heapify(live)
+            self._heaps[task_type] = live
+        self._stale = 0
+
+    def _top_locked(self, task_type: str) -> Optional[_Entry]:
+        heap = self._heaps[task_type]
+        while heap and heap[0].removed:
+            heapq.heappop(heap)
+            self._stale -= 1
+        return heap[0] if heap else None
+
+    def peek(self, task_types: Iterable[str] = TASK_TYPES) -> Optional[Dict[str, Any]]:
+        """다음에 배분될 작업 (꺼내지 않음)"""
+        with self._lock:
+            best = self._best_locked(task_types)
+            return best.task if best else None
+
+    def _best_locked(self, task_types: Iterable[str]) -> Optional[_Entry]:
+        best = None
+        for task_type in task_types:
+            top = self._top_locked(task_type) if task_type in self._heaps else None
+            if top is not None and (best is None or top < best):
+                best = top
+        return best
+
+    def pop(self, task_types: Iterable[str] = TASK_TYPES) -> Optional[Dict[str, Any]]:
+        """우선순위가 가장 높은 작업 꺼내기 (task_types 중에서)"""
+        with self._lock:
+            best = self._best_locked(task_types)
+            if best is None:
+                return None
+
+            heapq.heappop(self._heaps[best.task['task_type']])
+            del self._entries[best.task['task_id']]
+            self._stats['popped'] += 1
+
+            created = best.task.get('created_at')
+            if created:
+                waited = (datetime.now(timezone.utc) - parse_timestamp(created)).total_seconds()
+                self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], waited)
+            return best.task
+
+    def effective_priority(self, task: Dict[str, Any], now: datetime = None) -> float:
+        """aging이 반영된 현재 우선순위"""
+        created = task.get('created_at')
+        if not created:
+            return float(task.get('priority') or 0)
+        now = now or datetime.now(timezone.utc)
+        waited_minutes = (now - parse_timestamp(created)).total_seconds() / 60
+        return (task.get('priority') or 0) + self.aging_per_minute * max(waited_minutes, 0.0)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    # ----- DB 동기화 -----
+
+    def load(self) -> int:
+        """pending 작업 전체를 keyset 페이지로 읽어 큐 초기화. 읽은 작업 수 반환"""
+        loaded = 0
+        last = None
+        while True:
+            query = self.client.table('tasks').select('*').eq('status', 'pending')
+            if last is not None:
+                query = query.or_(
+                    f'created_at.gt."{last["created_at"]}",'
+                    f'and(created_at.eq."{last["created_at"]}",task_id.gt.{last["task_id"]})'
+                )
+            rows = query.order('created_at').order('task_id') \
+                .limit(self.page_size).execute().data or []
+
+            for row in rows:
+                loaded += self.push(row)
+            if len(rows) < self.page_size:
+                break
+            last = rows[-1]
+
+        print(f"📋 pending 작업 {loaded}건 로드")
+        return loaded
+
+    def on_change(self, payload: Dict[str, Any]):
+        """
+        tasks Realtime 콜백 (event='*')
+
+        - INSERT / UPDATE로 pending → 큐에 추가 (priority 변경 시 재정렬)
+        - pending이 아니게 된 작업 / DELETE → 큐에서 제거
+        """
+        change = normalize_change(payload)
+        event = change.get('eventType')
+
+        if event == 'DELETE':
+            task_id = (change.get('old') or {}).get('task_id')
+            if task_id:
+                self.remove(task_id)
+            return
+
+        task = change.get('new') or {}
+        if not task.get('task_id'):
+            return
+        if task.get('status') == 'pending':
+            self.push(task)
+        else:
+            self.remove(task['task_id'])
+
+    def route(self, hub) -> 'TaskScheduler':
+        """RealtimeHub에 tasks 변경 핸들러 등록 (프로세스 채널 하나를 공유)"""
+        hub.route('tasks', self.on_change, event='*', name='task-scheduler')
+        return self
+
+    def dispatch(self, robot_id: str = None,
+                 task_types: Iterable[str] = TASK_TYPES) -> Optional[Dict[str, Any]]:
+        """
+        다음 작업을 꺼내 in_progress로 선점 (status='pending' 조건부 UPDATE)
+
+        다른 스케줄러가 먼저 가져간 작업은 건너뛰고 다음 작업을 시도.
+        UPDATE가 실패(예외)하면 꺼낸 작업을 큐에 되돌린 뒤 예외를 다시 올림.
+
+        Args:
+            robot_id: 배정할 로봇 (assigned_robot)
+            task_types: 이 로봇이 처리할 수 있는 작업 타입
+        """
+        task_types = tuple(task_types)
+        while True:
+            task = self.pop(task_types)
+            if task is None:
+                return None
+
+            update = {'status': 'in_progress', 'started_at': datetime.now(timezone.utc).isoformat()}
+            if robot_id:
+                update['assigned_robot'] = robot_id
+
+            try:
+                result = self.client.table('tasks') \
+                    .update(update) \
+                    .eq('task_id', task['task_id']) \
+                    .eq('status', 'pending') \
+                    .execute()
+            except Exception:
+                self._restore(task)
+                raise
+            if result.data:
+                print(f"📋 작업 배분: {task['task_type']} {task.get('vehicle_plate')} "
+                      f"(priority {task.get('priority') or 0}) → {robot_id or '-'}")
+                return result.data[0]
+
+            with self._lock:
+                self._stats['claim_lost'] += 1
+
+    def _restore(self, task: Dict[str, Any]):
+        """선점하지 못한 작업을 큐에 되돌림 (그 사이 Realtime으로 다시 들어왔으면 그대로 둠)"""
+        with self._lock:
+            if task['task_id'] in self._entries:
+                return
+            entry = _Entry(self._key(task), task)
+            self._entries[task['task_id']] = entry
+            heapq.heappush(self._heaps[task['task_type']], entry)
+            self._stats['restored'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """스케줄러 통계 (queued: 타입별 대기 작업 수)"""
+        with self._lock:
+            stats = dict(self._stats)
+            queued = {t: 0 for t in TASK_TYPES}
+            for entry in self._entries.values():
+                queued[entry.task['task_type']] += 1
+            stats['queued'] = queued
+            stats['stale_entries'] = self._stale
+            return stats
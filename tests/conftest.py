@@ -0,0 +1,21 @@
+"""
+공통 fixture: 로컬 Supabase 대역 (local_supabase.py)
+
+실제 Supabase 프로젝트 없이 RPC / 테이블 동작을 확인.
+"""
+
+import pytest
+
+from local_supabase import LocalDatabase, LocalSupabaseClient
+
+
+@pytest.fixture
+def db():
+    database = LocalDatabase()
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def client(db):
+    return LocalSupabaseClient(db)
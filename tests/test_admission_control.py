@@ -0,0 +1,89 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from admission_control import ACCEPT, DEFER, REJECT, AdmissionController
+from command_records import parse_command
+
+
+def command(command_type: str = 'EXIT_GATE_SINGLE', created_at: str = None):
+    payload = {'gate_id': 'EXIT-01'} if command_type != 'PARKING_GUIDE' else {}
+    return parse_command({'command_id': str(uuid.uuid4()), 'status': 'pending',
+                          'command_type': command_type, 'payload': payload,
+                          'created_at': created_at})
+
+
+def test_overload_hysteresis_between_watermarks():
+    admission = AdmissionController(capacity=10, quotas={})  # 진입 7건, 해제 4건
+    admitted = [command() for _ in range(7)]
+    assert all(admission.admit(c)[0] == ACCEPT for c in admitted)
+    assert not admission.overloaded
+
+    # 7건에서 다음 명령이 오면 과부하 → 안내는 바로 거절, 출차는 계속 수락
+    assert admission.admit(command())[0] == ACCEPT
+    assert admission.overloaded
+    assert admission.admit(command('PARKING_GUIDE'))[0] == REJECT
+
+    # 진입 기준 아래로 내려와도 해제 기준(4건)까지는 과부하 유지 (경계에서 흔들리지 않음)
+    for c in admitted[:3]:
+        admission.release(c.command_id)
+    assert admission.stats()['in_system'] == 5
+    assert admission.overloaded
+    assert admission.admit(command('PARKING_GUIDE'))[0] == REJECT
+
+    admission.release(admitted[3].command_id)
+    assert not admission.overloaded
+    assert admission.admit(command('PARKING_GUIDE'))[0] == ACCEPT
+
+
+def test_deferred_commands_recover_from_oldest_created_at():
+    recovered = []
+    admission = AdmissionController(capacity=2, quotas={}, recover_interval=0,
+                                    on_recover=recovered.append)
+    first, second = command(), command()
+    assert admission.admit(first)[0] == admission.admit(second)[0] == ACCEPT
+
+    decision, reason = admission.admit(command(created_at='2024-03-01T09:00:05+00:00'))
+    assert decision == DEFER and 'capacity' in reason
+    admission.admit(command(created_at='2024-03-01T09:00:01.5+00:00'))
+
+    admission.release(first.command_id)
+    assert recovered == []  # 해제 기준(0건)까지 기다림
+    admission.release(second.command_id)
+    assert [since.isoformat() for since in recovered] == ['2024-03-01T09:00:01.500000+00:00']
+    assert admission.stats()['deferred_pending'] == 0
+
+
+def test_async_controller_defers_and_resumes_through_catch_up(db):
+    pytest.importorskip('supabase')
+    from local_supabase import AsyncLocalSupabaseClient
+    from ros2_exit_controller_async import AsyncExitController
+
+    rows = db.insert('ros2_commands', [
+        {'command_type': 'EXIT_GATE_SINGLE', 'payload': {'gate_id': f'EXIT-0{i}'}}
+        for i in range(1, 4)
+    ])
+    # 1건씩만 받고, 복구는 타이머 스레드를 거치도록 간격을 둠
+    admission = AdmissionController(capacity=1, quotas={}, recover_interval=0.05)
+
+    def finished():
+        return all(r['status'] == 'completed' for r in db.select('ros2_commands'))
+
+    async def run():
+        controller = AsyncExitController(AsyncLocalSupabaseClient(db), coalesce_window=0,
+                                         simulate_feedback=True, admission=admission)
+        controller.feedback_simulator.gate_close_seconds = 0.01
+        for row in rows:
+            controller.ingest_command(row)
+        deadline = time.monotonic() + 10
+        while not finished() and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        await controller.drain()
+
+    asyncio.run(run())
+    stats = admission.stats()
+    assert finished()
+    assert stats['deferred'] >= 2 and stats['recoveries'] >= 1
+    assert stats['in_system'] == 0
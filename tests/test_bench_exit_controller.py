@@ -0,0 +1,23 @@
+"""
+벤치마크 경로 스모크 테스트 (LocalSupabaseServer: PostgREST HTTP + Realtime WebSocket 스텁)
+"""
+
+import pytest
+
+from bench_exit_controller import parse_args, run_benchmark
+
+
+def test_http_requires_async():
+    with pytest.raises(SystemExit):
+        parse_args(['--http'])
+
+
+def test_commands_run_through_http_stub():
+    pytest.importorskip('supabase')
+    args = parse_args(['--async', '--http', '--commands', '6', '--timeout', '60'])
+    result = run_benchmark(args)
+
+    assert result['config']['transport'] == 'http'
+    assert (result['completed'], result['failed'], result['unfinished']) == (6, 0, 0)
+    # 선점 / 상태 기록이 실제로 HTTP 요청으로 서버를 거침
+    assert result['db_requests'] > 0 and result['status_write_requests'] > 0
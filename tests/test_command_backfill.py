@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from command_backfill import CommandBackfill, SeenIdSet, parse_timestamp
+
+
+def insert_pending(db, created_at: datetime, count: int = 1):
+    return [db.insert('ros2_commands', [{
+        'command_type': 'EXIT_GATE_SINGLE',
+        'created_at': created_at.isoformat(),
+        'payload': {'gate_id': 'EXIT-01', 'duration_seconds': 0.05},
+    }])[0]['command_id'] for _ in range(count)]
+
+
+def test_reads_all_pages_including_ties_on_created_at(db, client):
+    now = datetime.now(timezone.utc)
+    ids = insert_pending(db, now - timedelta(seconds=30), count=5)
+    ids += insert_pending(db, now - timedelta(seconds=20), count=3)
+    received = []
+    backfill = CommandBackfill(client, on_command=lambda row: received.append(row['command_id']),
+                               batch_size=2)
+
+    assert backfill.run() == 8
+    assert sorted(received) == sorted(ids)
+
+
+def test_watermark_moves_to_run_start_minus_skew(db, client):
+    backfill = CommandBackfill(client, on_command=lambda row: None, clock_skew_seconds=5)
+    before = datetime.now(timezone.utc)
+    backfill.run()
+
+    assert before - timedelta(seconds=5) <= backfill.watermark <= datetime.now(timezone.utc)
+
+
+def test_command_older_than_watermark_needs_rewind(db, client):
+    received = []
+    backfill = CommandBackfill(client, on_command=lambda row: received.append(row['command_id']))
+    backfill.run()
+
+    # 실행 대기열에서 오래 기다리다 선점에 실패한 명령 (watermark보다 오래됨)
+    created_at = backfill.watermark - timedelta(seconds=30)
+    command_id, = insert_pending(db, created_at)
+    backfill.run()
+    assert received == []
+
+    backfill.rewind(created_at)
+    backfill.run()
+    assert received == [command_id]
+
+
+def test_rewind_during_run_is_kept_for_next_run(db, client):
+    old = datetime.now(timezone.utc) - timedelta(minutes=2)
+    rewound = []
+
+    def on_command(row):
+        # catch-up 도중 다른 스레드가 보류 / 선점 실패로 rewind
+        if not rewound:
+            backfill.rewind(old)
+            rewound.append(row['command_id'])
+
+    backfill = CommandBackfill(client, on_command=on_command)
+    insert_pending(db, datetime.now(timezone.utc))
+    backfill.run()
+
+    assert backfill.watermark <= old
+
+
+def test_seen_id_set_is_bounded():
+    seen = SeenIdSet(capacity=2)
+    assert seen.add('a') and seen.add('b')
+    assert not seen.add('a')
+    assert seen.add('c')         # 'b'가 가장 오래됨 → 밀려남
+    assert 'b' not in seen and 'a' in seen and len(seen) == 2
+
+
+class ClaimFailingClient:
+    """claim_ros2_command를 failures번 실패시키는 클라이언트"""
+
+    def __init__(self, client, failures: int):
+        self.client = client
+        self.failures = failures
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def rpc(self, name, params=None):
+        if name == 'claim_ros2_command' and self.failures:
+            self.failures -= 1
+            raise ConnectionError('PostgREST unavailable')
+        return self.client.rpc(name, params)
+
+
+def test_claim_error_rewinds_catch_up_to_command(db, client):
+    pytest.importorskip('supabase')
+    from ros2_exit_controller import ExitController
+
+    controller = ExitController(client=ClaimFailingClient(client, failures=1),
+                                coalesce_window=0)
+    try:
+        created_at = datetime.now(timezone.utc) - timedelta(minutes=10)
+        command_id, = insert_pending(db, created_at)
+        row = db.select('ros2_commands')[0]
+
+        controller.ingest_command(row)
+        controller.command_executor.wait_idle(timeout=5)
+        assert controller.backfill.watermark <= parse_timestamp(row['created_at'])
+        assert command_id not in controller.seen_ids
+
+        assert controller.backfill.run() == 1
+        controller.command_executor.wait_idle(timeout=5)
+        controller.status_writer.flush()
+        assert db.select('ros2_commands')[0]['status'] == 'completed'
+    finally:
+        controller.command_executor.shutdown(wait=True)
+        controller.claimer.stop()
+        controller.status_writer.close(timeout=1)
@@ -0,0 +1,251 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from command_claim import CommandClaimer
+from command_status_writer import CommandStatusWriter
+
+
+def insert_command(db, **row):
+    row.setdefault('command_type', 'EXIT_GATE_SINGLE')
+    row.setdefault('payload', {'gate_id': 'EXIT-01', 'duration_seconds': 0.05})
+    return db.insert('ros2_commands', [row])[0]['command_id']
+
+
+def command_row(db, command_id):
+    return next(r for r in db.select('ros2_commands') if r['command_id'] == command_id)
+
+
+def expire_lease(db, command_id):
+    past = (datetime.now(timezone.utc) - timedelta(seconds=1)).isoformat()
+    db.update('ros2_commands', {'lease_expires_at': past},
+              [lambda r: r['command_id'] == command_id])
+
+
+def apply(client, *updates):
+    return client.rpc('apply_ros2_command_status', {'p_updates': list(updates)}).execute().data
+
+
+# ----- claim / heartbeat / requeue RPC -----
+
+def test_only_one_worker_claims_a_command(db, client):
+    command_id = insert_command(db)
+    a = CommandClaimer(client, worker_id='a')
+    b = CommandClaimer(client, worker_id='b')
+
+    assert a.claim(command_id) is not None
+    assert b.claim(command_id) is None
+
+    row = command_row(db, command_id)
+    assert row['status'] == 'processing'
+    assert row['claimed_by'] == 'a'
+    assert row['attempt_count'] == 1
+    assert a.holds(command_id) and not b.holds(command_id)
+
+
+def test_heartbeat_extends_only_own_leases(db, client):
+    command_id = insert_command(db)
+    a = CommandClaimer(client, worker_id='a', lease_seconds=30)
+    a.claim(command_id)
+    expire_lease(db, command_id)
+
+    b = CommandClaimer(client, worker_id='b')
+    b._held.add(command_id)
+    assert b.heartbeat() == 0
+    assert a.heartbeat() == 1
+    assert client.rpc('requeue_expired_ros2_commands', {}).execute().data == []
+
+
+def test_expired_lease_is_requeued_then_failed_after_max_attempts(db, client):
+    command_id = insert_command(db)
+    requeued = []
+    a = CommandClaimer(client, worker_id='a', max_attempts=2, on_requeued=requeued.append)
+
+    for attempt in (1, 2):
+        assert a.claim(command_id) is not None
+        expire_lease(db, command_id)
+        a.reap_expired()
+
+    row = command_row(db, command_id)
+    assert [r['status'] for r in requeued] == ['pending']
+    assert row['status'] == 'failed'
+    assert row['claimed_by'] is None
+    assert 'Lease expired (2 attempts' in row['error_message']
+
+
+# ----- apply_ros2_command_status 선점 검사 -----
+
+def test_claimant_write_is_applied(db, client):
+    command_id = insert_command(db)
+    CommandClaimer(client, worker_id='a').claim(command_id)
+
+    assert apply(client, {'command_id': command_id, 'status': 'completed',
+                          'claimed_by': 'a'}) == 1
+    row = command_row(db, command_id)
+    assert row['status'] == 'completed'
+    assert row['lease_expires_at'] is None
+
+
+def test_stale_worker_cannot_overwrite_requeued_row(db, client):
+    command_id = insert_command(db)
+    CommandClaimer(client, worker_id='a').claim(command_id)
+    expire_lease(db, command_id)
+    client.rpc('requeue_expired_ros2_commands', {}).execute()
+
+    assert apply(client, {'command_id': command_id, 'status': 'completed',
+                          'claimed_by': 'a'}) == 0
+    assert command_row(db, command_id)['status'] == 'pending'
+
+
+def test_stale_worker_cannot_overwrite_new_claimant(db, client):
+    command_id = insert_command(db)
+    CommandClaimer(client, worker_id='a').claim(command_id)
+    expire_lease(db, command_id)
+    client.rpc('requeue_expired_ros2_commands', {}).execute()
+    CommandClaimer(client, worker_id='b').claim(command_id)
+
+    assert apply(client, {'command_id': command_id, 'status': 'failed',
+                          'claimed_by': 'a'}) == 0
+    assert command_row(db, command_id)['claimed_by'] == 'b'
+
+
+def test_unclaimed_write_only_applies_to_pending_rows(db, client):
+    pending_id = insert_command(db)
+    claimed_id = insert_command(db)
+    CommandClaimer(client, worker_id='healthy').claim(claimed_id)
+
+    # 과부하 인스턴스의 거절: 아직 pending이면 반영, 다른 인스턴스가 실행 중이면 무시
+    count = apply(client,
+                  {'command_id': pending_id, 'status': 'failed', 'error_message': 'Shed'},
+                  {'command_id': claimed_id, 'status': 'failed', 'error_message': 'Shed'})
+    assert count == 1
+    assert command_row(db, pending_id)['status'] == 'failed'
+    assert command_row(db, claimed_id)['status'] == 'processing'
+
+
+def test_requeue_write_clears_claim(db, client):
+    command_id = insert_command(db)
+    CommandClaimer(client, worker_id='a').claim(command_id)
+
+    apply(client, {'command_id': command_id, 'status': 'pending', 'claimed_by': 'a'})
+    row = command_row(db, command_id)
+    assert row['status'] == 'pending'
+    assert row['claimed_by'] is None
+    assert CommandClaimer(client, worker_id='b').claim(command_id) is not None
+
+
+def test_status_writer_sends_claimant_only_for_claimed_commands(db, client):
+    pending_id = insert_command(db)
+    claimed_id = insert_command(db)
+    CommandClaimer(client, worker_id='w').claim(claimed_id)
+    writer = CommandStatusWriter(client, worker_id='w')
+
+    writer.record(pending_id, 'failed', 'Command queue full', claimed=False)
+    writer.record(claimed_id, 'completed')
+    assert writer.flush() == 2
+
+    assert command_row(db, pending_id)['status'] == 'failed'
+    assert command_row(db, claimed_id)['status'] == 'completed'
+
+
+# ----- 선점은 최종 상태 기록이 확인될 때까지 유지 -----
+
+class GatedStatusClient:
+    """apply_ros2_command_status만 open 전까지 실패시키는 클라이언트"""
+
+    def __init__(self, client):
+        self.client = client
+        self.open = False
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def rpc(self, name, params=None):
+        if name == 'apply_ros2_command_status' and not self.open:
+            raise ConnectionError('PostgREST unavailable')
+        return self.client.rpc(name, params)
+
+
+def test_controller_keeps_claim_until_final_status_is_acknowledged(db, client):
+    pytest.importorskip('supabase')
+    from ros2_exit_controller import ExitController
+
+    gated = GatedStatusClient(client)
+    controller = ExitController(client=gated, coalesce_window=0, worker_id='w')
+    try:
+        command_id = insert_command(db)
+        controller.ingest_command(command_row(db, command_id))
+        controller.command_executor.wait_idle(timeout=5)
+
+        # 게이트 사이클은 끝났지만 completed 기록이 실패 중 → 하트비트 계속
+        assert controller.status_writer.is_pending(command_id)
+        assert controller.claimer.holds(command_id)
+
+        gated.open = True
+        controller.status_writer.flush()
+        assert not controller.claimer.holds(command_id)
+        assert command_row(db, command_id)['status'] == 'completed'
+    finally:
+        controller.command_executor.shutdown(wait=True)
+        controller.claimer.stop()
+        controller.status_writer.close(timeout=1)
+
+
+
+def requeued_command(db, client):
+    """다른 컨트롤러가 잡고 있다가 리스가 만료된 명령 ID"""
+    command_id = insert_command(db)
+    CommandClaimer(client, worker_id='dead').claim(command_id)
+    expire_lease(db, command_id)
+    return command_id
+
+
+def test_requeued_command_is_journaled_and_run(db, client, tmp_path):
+    pytest.importorskip('supabase')
+    from command_journal import CLAIMED, COMPLETED, RECEIVED, CommandJournal, read_journal
+    from ros2_exit_controller import ExitController
+
+    path = str(tmp_path / 'commands.journal')
+    journal = CommandJournal(path)
+    journal.open()
+    controller = ExitController(client=client, coalesce_window=0, worker_id='w',
+                                journal=journal)
+    try:
+        command_id = requeued_command(db, client)
+        controller.seen_ids.add(command_id)   # 처음 INSERT 때 이미 받은 ID
+        controller.claimer.reap_expired()
+        controller.command_executor.wait_idle(timeout=5)
+        controller.status_writer.flush()
+
+        assert command_row(db, command_id)['status'] == 'completed'
+        journal.flush()
+        events = [r.event for r in read_journal(path)[0] if r.command_id == command_id]
+        assert events[:2] == [RECEIVED, CLAIMED] and events[-1] == COMPLETED
+    finally:
+        controller.command_executor.shutdown(wait=True)
+        controller.claimer.stop()
+        controller.status_writer.close(timeout=1)
+        journal.close()
+
+
+def test_requeued_command_goes_through_admission(db, client):
+    pytest.importorskip('supabase')
+    from admission_control import AdmissionController
+    from ros2_exit_controller import ExitController
+
+    admission = AdmissionController(capacity=1, quotas={}, recover_interval=60)
+    controller = ExitController(client=client, coalesce_window=0, worker_id='w',
+                                admission=admission)
+    try:
+        busy_id, command_id = insert_command(db), requeued_command(db, client)
+        admission.admit(controller.parse_command(command_row(db, busy_id)))
+        controller.claimer.reap_expired()
+
+        # 수신 제어에서 보류 → pending 그대로, 선점 / 실행하지 않음
+        assert admission.stats()['deferred'] == 1
+        assert command_row(db, command_id)['status'] == 'pending'
+        assert controller.claimer.stats()['claimed'] == 0
+    finally:
+        controller.command_executor.shutdown(wait=True)
+        controller.claimer.stop()
+        controller.status_writer.close(timeout=1)
@@ -0,0 +1,70 @@
+import threading
+import time
+
+from command_executor import KeyedCommandExecutor
+
+
+def test_same_key_runs_in_submission_order():
+    executor = KeyedCommandExecutor(max_workers=4)
+    order = []
+
+    def run(i):
+        time.sleep(0.001 * (5 - i))
+        order.append(i)
+
+    for i in range(5):
+        assert executor.submit('gate:EXIT-01', run, i)
+    executor.shutdown(wait=True)
+
+    assert order == [0, 1, 2, 3, 4]
+
+
+def test_different_keys_run_in_parallel():
+    executor = KeyedCommandExecutor(max_workers=2)
+    barrier = threading.Barrier(2, timeout=2)
+
+    # 두 키가 동시에 실행되지 않으면 Barrier가 타임아웃 → BrokenBarrierError
+    executor.submit('gate:EXIT-01', barrier.wait)
+    executor.submit('gate:EXIT-02', barrier.wait)
+    executor.shutdown(wait=True)
+
+    assert executor.stats()['failed'] == 0
+
+
+def test_rejects_when_queue_is_full():
+    executor = KeyedCommandExecutor(max_workers=1, max_pending=2)
+    release = threading.Event()
+
+    executor.submit('a', release.wait)
+    while executor.in_flight == 0:
+        time.sleep(0.001)
+    assert executor.submit('a', lambda: None)
+    assert executor.submit('b', lambda: None)
+    assert not executor.submit('c', lambda: None)
+
+    release.set()
+    executor.shutdown(wait=True)
+    stats = executor.stats()
+    assert stats['rejected'] == 1
+    assert stats['completed'] == 3
+
+
+def test_failing_command_does_not_stop_key_queue():
+    executor = KeyedCommandExecutor(max_workers=1)
+    ran = []
+
+    def boom():
+        raise RuntimeError('gate jammed')
+
+    executor.submit('gate:EXIT-01', boom)
+    executor.submit('gate:EXIT-01', ran.append, 'next')
+    executor.shutdown(wait=True)
+
+    assert ran == ['next']
+    assert executor.stats()['failed'] == 1
+
+
+def test_shutdown_rejects_new_commands():
+    executor = KeyedCommandExecutor(max_workers=1)
+    executor.shutdown(wait=True)
+    assert not executor.submit('a', lambda: None)
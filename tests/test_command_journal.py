@@ -0,0 +1,179 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from command_journal import (CLAIMED, COMPLETED, FAILED, GATE_CLOSED, GATE_OPENED, PUBLISHED,
+                             RECEIVED, CommandJournal, encode_record, read_journal, reconcile)
+
+
+def write_journal(path: str, events):
+    journal = CommandJournal(path)
+    journal.open()
+    for event in events:
+        journal.append(*event)
+    journal.close()
+
+
+@pytest.mark.parametrize('damage', ['truncated', 'bad_crc'])
+def test_torn_tail_is_dropped(tmp_path, damage):
+    path = str(tmp_path / 'commands.journal')
+    write_journal(path, [(RECEIVED, 'c1'), (CLAIMED, 'c1', {'worker': 'w1'}),
+                         (RECEIVED, 'c2'), (COMPLETED, 'c2')])
+
+    # 다음 레코드를 쓰다 죽음 (길이만큼 안 써짐 / 내용이 깨짐)
+    record = bytearray(encode_record(PUBLISHED, 'c1', {'gate': 'EXIT-01'}))
+    if damage == 'truncated':
+        record = record[:-3]
+    else:
+        record[-1] ^= 0xFF
+    with open(path, 'ab') as f:
+        f.write(record)
+
+    journal = CommandJournal(path)
+    in_flight = journal.open()
+    try:
+        assert list(in_flight) == ['c1']
+        assert (in_flight['c1']['last_event'], in_flight['c1']['worker_id']) == (CLAIMED, 'w1')
+        assert journal.stats()['torn_bytes'] == len(record)
+    finally:
+        journal.close()
+
+    # 정리된 파일에는 진행 중 명령만, 꼬리 없음
+    records, valid_end, file_size = read_journal(path)
+    assert [r.event for r in records] == [RECEIVED, CLAIMED]
+    assert valid_end == file_size == os.path.getsize(path)
+
+
+def test_reconcile_by_last_event(db, client, tmp_path):
+    ids = {name: f'00000000-0000-0000-0000-00000000000{i}'
+           for i, name in enumerate(['closed', 'opened', 'claimed', 'stolen', 'done'], 1)}
+    db.insert('ros2_commands', [
+        {'command_id': ids['closed'], 'status': 'processing', 'claimed_by': 'w1'},
+        {'command_id': ids['opened'], 'status': 'processing', 'claimed_by': 'w1'},
+        {'command_id': ids['claimed'], 'status': 'processing', 'claimed_by': 'w1'},
+        {'command_id': ids['stolen'], 'status': 'processing', 'claimed_by': 'w2'},
+        {'command_id': ids['done'], 'status': 'completed'},
+    ])
+    worker = {'worker': 'w1'}
+    path = str(tmp_path / 'commands.journal')
+    write_journal(path, [
+        (CLAIMED, ids['closed'], worker), (PUBLISHED, ids['closed']),
+        (GATE_OPENED, ids['closed']), (GATE_CLOSED, ids['closed']),
+        (CLAIMED, ids['opened'], worker), (PUBLISHED, ids['opened']),
+        (GATE_OPENED, ids['opened']),
+        (RECEIVED, ids['claimed']), (CLAIMED, ids['claimed'], worker),
+        (CLAIMED, ids['stolen'], worker),
+        (CLAIMED, ids['done'], worker),
+    ])
+
+    journal = CommandJournal(path)
+    result = reconcile(client, journal.open(), journal)
+    journal.close()
+
+    assert result['completed'] == [ids['closed']]
+    assert result['failed'] == [ids['opened']]
+    assert [row['command_id'] for row in result['requeued']] == [ids['claimed']]
+    assert sorted(result['settled']) == sorted([ids['stolen'], ids['done']])
+
+    rows = {row['command_id']: row for row in db.select('ros2_commands')}
+    assert rows[ids['closed']]['status'] == 'completed'
+    assert rows[ids['opened']]['status'] == 'failed'
+    assert 'gate state unknown' in rows[ids['opened']]['error_message']
+    assert (rows[ids['claimed']]['status'], rows[ids['claimed']]['claimed_by']) == ('pending', None)
+    assert (rows[ids['stolen']]['status'], rows[ids['stolen']]['claimed_by']) == ('processing', 'w2')
+
+    # 복구 결과까지 저널에 남아 다음 재시작에는 진행 중 명령 없음
+    assert CommandJournal(path).open() == {}
+
+
+def test_append_many_waits_for_fsync_once(tmp_path):
+    journal = CommandJournal(str(tmp_path / 'commands.journal'))
+    journal.open()
+    journal.start()
+    try:
+        journal.append_many(PUBLISHED, ['c1', 'c2', 'c3'], {'gate': 'EXIT-01'}, durable=True)
+        stats = journal.stats()
+        # 돌아왔으면 세 레코드 모두 디스크에 있음
+        assert (stats['appended'], stats['durable_waits'], stats['in_flight']) == (3, 1, 3)
+        records, _, _ = read_journal(journal.path)
+        assert [(r.command_id, r.detail) for r in records] == \
+            [(c, {'gate': 'EXIT-01'}) for c in ('c1', 'c2', 'c3')]
+    finally:
+        journal.close()
+
+
+def test_merged_exit_cycle_journals_published_with_one_durable_wait(client, tmp_path):
+    pytest.importorskip('supabase')
+    from command_records import parse_command
+    from ros2_exit_controller import ExitController
+
+    path = str(tmp_path / 'commands.journal')
+    journal = CommandJournal(path)
+    journal.open()
+    journal.start()
+    controller = ExitController(client=client, coalesce_window=0, simulate_feedback=True,
+                                journal=journal)
+    controller.feedback_simulator.gate_close_seconds = 0.01
+    commands = [parse_command({
+        'command_id': f'00000000-0000-0000-0000-00000000000{i}', 'status': 'processing',
+        'command_type': 'EXIT_GATE_SINGLE',
+        'payload': {'gate_id': 'EXIT-01', 'duration_seconds': 1},
+    }) for i in (1, 2, 3)]
+    try:
+        controller.execute_exit_gate(commands)
+        assert journal.stats()['durable_waits'] == 1
+    finally:
+        controller.command_executor.shutdown(wait=True)
+        controller.claimer.stop()
+        controller.status_writer.close(timeout=1)
+        journal.close()
+
+    records, _, _ = read_journal(path)
+    events = [r.event for r in records]
+    # 세 명령의 PUBLISHED가 모두 게이트 열기 전에
+    assert events[:6] == [PUBLISHED] * 3 + [GATE_OPENED] * 3
+
+
+def test_async_controller_journals_and_recovers(db, client, tmp_path):
+    pytest.importorskip('supabase')
+    from local_supabase import AsyncLocalSupabaseClient
+    from ros2_exit_controller_async import AsyncExitController
+
+    row, = db.insert('ros2_commands', [{
+        'command_type': 'EXIT_GATE_SINGLE', 'status': 'processing', 'claimed_by': 'old-worker',
+        'payload': {'gate_id': 'EXIT-01', 'duration_seconds': 1},
+    }])
+    command_id = row['command_id']
+    path = str(tmp_path / 'commands.journal')
+    # 발행 전에 죽은 컨트롤러의 저널
+    write_journal(path, [(RECEIVED, command_id), (CLAIMED, command_id, {'worker': 'old-worker'})])
+
+    journal = CommandJournal(path)
+    in_flight = journal.open()
+    journal.start()
+
+    def status():
+        return db.select('ros2_commands')[0]['status']
+
+    async def run():
+        controller = AsyncExitController(AsyncLocalSupabaseClient(db), coalesce_window=0,
+                                         simulate_feedback=True, journal=journal,
+                                         worker_id='new-worker')
+        controller.feedback_simulator.gate_close_seconds = 0.01
+        await controller.recover_from_journal(in_flight)
+        deadline = time.monotonic() + 10
+        while status() != 'completed' and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        await controller.drain()
+
+    asyncio.run(run())
+    journal.close()
+
+    assert status() == 'completed'
+    records, _, _ = read_journal(path)
+    events = [r.event for r in records if r.command_id == command_id]
+    # 복구 정리(FAILED: requeued) 뒤 새 컨트롤러가 처음부터 다시 실행
+    assert events[events.index(FAILED) + 1:] == [RECEIVED, CLAIMED, PUBLISHED, GATE_OPENED,
+                                                 GATE_CLOSED, COMPLETED]
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from command_backfill import parse_timestamp
+from command_metrics import CommandMetrics
+from command_records import parse_command
+
+
+def command(command_id: str, created_at: str):
+    return parse_command({'command_id': command_id, 'status': 'pending',
+                          'command_type': 'EXIT_GATE_SINGLE', 'created_at': created_at})
+
+
+@pytest.mark.parametrize('value, expected', [
+    # Postgres는 끝의 0을 잘라 보냄 (Python 3.11 전의 fromisoformat은 거부)
+    ('2024-03-01T09:00:05.12345+00:00', datetime(2024, 3, 1, 9, 0, 5, 123450, timezone.utc)),
+    ('2024-03-01 09:00:05.1+00', datetime(2024, 3, 1, 9, 0, 5, 100000, timezone.utc)),
+    ('2024-03-01T09:00:05.1234567Z', datetime(2024, 3, 1, 9, 0, 5, 123456, timezone.utc)),
+    ('2024-03-01T18:00:05+09:00', datetime(2024, 3, 1, 9, 0, 5, tzinfo=timezone.utc)),
+    ('2024-03-01T09:00:05', datetime(2024, 3, 1, 9, 0, 5, tzinfo=timezone.utc)),
+])
+def test_parse_timestamp_accepts_postgres_forms(value, expected):
+    assert parse_timestamp(value) == expected
+
+
+def test_parse_timestamp_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_timestamp('yesterday')
+
+
+def test_delivery_latency_uses_trimmed_created_at():
+    metrics = CommandMetrics()
+    created = datetime.now(timezone.utc) - timedelta(seconds=2)
+    created_at = created.strftime('%Y-%m-%dT%H:%M:%S.%f').rstrip('0') + '+00:00'
+    metrics.mark('c1', 'delivered', command('c1', created_at))
+
+    assert 'ros2_command_stage_seconds_count{stage="delivery",command_type="EXIT_GATE_SINGLE"' \
+        in metrics.render_prometheus()
+
+
+def test_metrics_error_does_not_propagate():
+    metrics = CommandMetrics()
+    metrics.mark('c1', 'delivered', command('c1', 'not a timestamp'))
+    metrics.mark('c2', 'delivered', object())
+
+    assert 'ros2_command_metrics_errors_total 2' in metrics.render_prometheus()
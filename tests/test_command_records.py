@@ -0,0 +1,105 @@
+import pytest
+
+from command_records import (CommandType, CommandValidationError, HandlerRegistry,
+                             parse_command)
+
+
+def row(**overrides):
+    base = {'command_id': 'c1', 'status': 'pending', 'command_type': 'EXIT_GATE_DOUBLE',
+            'payload': {'gate_id': 'EXIT-02', 'duration_seconds': 15}}
+    base.update(overrides)
+    return base
+
+
+def test_parse_exit_command_fields():
+    command = parse_command(row(license_plate='12가3456'))
+    assert (command.type, command.vehicle_count, command.gate_id, command.duration_seconds) == \
+        (CommandType.EXIT_GATE_DOUBLE, 2, 'EXIT-02', 15)
+    assert command.as_row()['command_type'] == 'EXIT_GATE_DOUBLE'
+    assert not hasattr(command, 'get')
+
+
+@pytest.mark.parametrize('status', [None, '', 7])
+def test_missing_status_is_rejected(status):
+    values = row(status=status)
+    if status is None:
+        del values['status']
+    with pytest.raises(CommandValidationError) as error:
+        parse_command(values)
+    assert (error.value.reason, error.value.command_id) == ('Missing status', 'c1')
+
+
+@pytest.mark.parametrize('command_type', ['EXIT_GATE_TRIPLE', None, 3])
+def test_unknown_command_type_is_rejected(command_type):
+    with pytest.raises(CommandValidationError) as error:
+        parse_command(row(command_type=command_type))
+    assert error.value.reason == f'Unknown command type: {command_type}'
+    assert error.value.command_id == 'c1'
+
+
+@pytest.mark.parametrize('payload', ['{"gate_id": "EXIT-01"}', ['EXIT-01'], 5])
+def test_non_object_payload_is_rejected(payload):
+    with pytest.raises(CommandValidationError) as error:
+        parse_command(row(payload=payload))
+    assert error.value.reason == 'payload must be an object'
+
+
+def test_missing_payload_uses_defaults():
+    command = parse_command(row(command_type='EXIT_GATE_SINGLE', payload=None))
+    assert (command.gate_id, command.duration_seconds, command.payload) == ('EXIT-01', 10, {})
+
+
+@pytest.mark.parametrize('duration, reason', [
+    ('15', 'payload.duration_seconds must be a number'),
+    (True, 'payload.duration_seconds must be a number'),
+    (0, 'payload.duration_seconds out of range: 0'),
+    (-5, 'payload.duration_seconds out of range: -5'),
+    (10 ** 6, f'payload.duration_seconds out of range: {10 ** 6}'),
+])
+def test_bad_duration_is_rejected(duration, reason):
+    with pytest.raises(CommandValidationError) as error:
+        parse_command(row(payload={'gate_id': 'EXIT-02', 'duration_seconds': duration}))
+    assert error.value.reason == reason
+
+
+def test_handler_registry_dispatches_by_type():
+    calls = []
+    registry = HandlerRegistry() \
+        .register(CommandType.EXIT_GATE_SINGLE, lambda c: calls.append(('single', c.command_id))) \
+        .register(CommandType.EXIT_GATE_DOUBLE, lambda c: calls.append(('double', c.command_id)))
+
+    registry.dispatch(parse_command(row(command_id='a', command_type='EXIT_GATE_SINGLE')))
+    registry.dispatch(parse_command(row(command_id='b')))
+    assert calls == [('single', 'a'), ('double', 'b')]
+    assert CommandType.EXIT_GATE_SINGLE in registry
+    assert CommandType.PARKING_GUIDE not in registry
+    assert registry.handler_for(CommandType.PARKING_GUIDE) is None
+
+    with pytest.raises(KeyError):
+        registry.dispatch(parse_command(row(command_type='PARKING_GUIDE', payload={})))
+
+
+def test_controller_fails_invalid_row_without_submitting(db, client):
+    pytest.importorskip('supabase')
+    from ros2_exit_controller import ExitController
+
+    bad, = db.insert('ros2_commands', [{
+        'command_type': 'EXIT_GATE_SINGLE',
+        'payload': {'gate_id': 'EXIT-01', 'duration_seconds': 'soon'},
+    }])
+    controller = ExitController(client=client, coalesce_window=0, worker_id='w')
+    submitted = []
+    controller.submit_command = submitted.append
+    try:
+        assert controller.parse_command(bad) is None
+        assert controller.ingest_command(bad) is True
+    finally:
+        controller.command_executor.shutdown(wait=True)
+        controller.claimer.stop()
+        controller.status_writer.close(timeout=1)
+
+    assert submitted == []
+    stored, = db.select('ros2_commands')
+    assert stored['status'] == 'failed'
+    assert stored['error_message'] == \
+        'Invalid command: payload.duration_seconds must be a number'
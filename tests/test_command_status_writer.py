@@ -0,0 +1,65 @@
+from command_status_writer import CommandStatusWriter, merge_status_update
+
+
+class FlakyClient:
+    """첫 failures번 RPC는 실패하고 이후는 client로 전달"""
+
+    def __init__(self, client, failures: int):
+        self.client = client
+        self.failures = failures
+
+    def rpc(self, name, params):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('network down')
+        return self.client.rpc(name, params)
+
+
+def test_merge_keeps_terminal_status_and_latest_fields():
+    merged = merge_status_update(
+        {'command_id': 'c', 'status': 'completed', 'completed_at': 't2'},
+        {'command_id': 'c', 'status': 'processing', 'executed_at': 't1'},
+    )
+    assert merged['status'] == 'completed'
+    assert merged['executed_at'] == 't1'
+    assert merged['completed_at'] == 't2'
+
+
+def test_updates_for_same_command_collapse_into_one_row(db, client):
+    command = db.insert('ros2_commands', [{'command_type': 'EXIT_GATE_SINGLE'}])[0]
+    writer = CommandStatusWriter(client)
+
+    writer.record(command['command_id'], 'processing')
+    writer.record(command['command_id'], 'completed')
+    assert writer.flush() == 1
+
+    row = db.select('ros2_commands')[0]
+    assert row['status'] == 'completed'
+    assert row['executed_at'] and row['completed_at']
+    assert writer.stats()['collapsed'] == 1
+    assert db.stats['rpc:apply_ros2_command_status'] == 1
+
+
+def test_failed_batch_is_retried_and_acknowledged(db, client):
+    command = db.insert('ros2_commands', [{'command_type': 'EXIT_GATE_SINGLE'}])[0]
+    acked = []
+    writer = CommandStatusWriter(FlakyClient(client, failures=1), on_flushed=acked.extend)
+
+    writer.record(command['command_id'], 'failed', 'Command queue full')
+    assert writer.flush() == 0
+    assert writer.pending_count == 1
+    assert acked == []
+
+    assert writer.flush() == 1
+    assert acked == [command['command_id']]
+    assert db.select('ros2_commands')[0]['error_message'] == 'Command queue full'
+
+
+def test_gives_up_after_max_retries():
+    writer = CommandStatusWriter(FlakyClient(None, failures=10), max_retries=2)
+    writer.record('c', 'completed')
+    for _ in range(3):
+        writer.flush()
+
+    assert writer.pending_count == 0
+    assert writer.stats()['dropped'] == 1
@@ -0,0 +1,75 @@
+import gzip
+import json
+
+import pytest
+
+from command_trace import (TRACE_FORMAT, TraceWriter, compare_runs, read_trace, replay,
+                           synthesize_rush_hour, trace_row)
+
+
+def test_trace_row_strips_server_columns():
+    command = {'command_id': 'c1', 'status': 'processing', 'claimed_by': 'w1',
+               'created_at': '2024-03-04T08:00:00+00:00', 'attempt_count': 2,
+               'command_type': 'EXIT_GATE_SINGLE', 'payload': {'gate_id': 'EXIT-01'}}
+    assert trace_row('ros2_commands', command) == {
+        'command_type': 'EXIT_GATE_SINGLE', 'payload': {'gate_id': 'EXIT-01'}}
+
+    task = {'task_id': 't1', 'status': 'in_progress', 'assigned_robot': 'R-01', 'done': False,
+            'task_type': 'EXIT', 'priority': 1}
+    assert trace_row('tasks', task) == {'task_type': 'EXIT', 'priority': 1}
+
+    # 그 외 테이블은 기본 키와 created_at만
+    event = {'event_id': 'e1', 'created_at': 'now', 'status': 'entered', 'spot_id': 'A-01'}
+    assert trace_row('parking_events', event) == {'status': 'entered', 'spot_id': 'A-01'}
+
+
+@pytest.mark.parametrize('name', ['trace.jsonl', 'trace.jsonl.gz'])
+def test_round_trip_sorts_events(tmp_path, name):
+    path = str(tmp_path / name)
+    writer = TraceWriter(path, 'synthetic', seed=3)
+    writer.write(1.5, 'tasks', {'task_id': 't1', 'task_type': 'EXIT'})
+    writer.write(0.25, 'ros2_commands', {'command_id': 'c1', 'command_type': 'PARKING_GUIDE',
+                                         'license_plate': '12가3456'})
+    writer.close()
+    assert writer.events == 2
+
+    header, events = read_trace(path)
+    assert (header['format'], header['source'], header['seed'], header['tables']) == \
+        (TRACE_FORMAT, 'synthetic', 3, ['ros2_commands', 'tasks'])
+    assert [(e.offset, e.table, e.row) for e in events] == [
+        (0.25, 'ros2_commands', {'command_type': 'PARKING_GUIDE', 'license_plate': '12가3456'}),
+        (1.5, 'tasks', {'task_type': 'EXIT'}),
+    ]
+    with open(path, 'rb') as f:
+        assert (f.read(2) == b'\x1f\x8b') == name.endswith('.gz')
+
+
+def test_rejects_other_files_and_versions(tmp_path):
+    other = tmp_path / 'other.jsonl'
+    other.write_text('{"format": "something-else"}\n')
+    with pytest.raises(ValueError, match='Not a command trace'):
+        read_trace(str(other))
+
+    future = tmp_path / 'future.jsonl.gz'
+    with gzip.open(future, 'wt', encoding='utf-8') as f:
+        f.write(json.dumps({'format': TRACE_FORMAT, 'version': 99}) + '\n')
+    with pytest.raises(ValueError, match='Unsupported trace version: 99'):
+        read_trace(str(future))
+
+
+def test_replay_max_speed_smoke(tmp_path):
+    pytest.importorskip('supabase')
+    path = str(tmp_path / 'rush.jsonl.gz')
+    written = synthesize_rush_hour(path, minutes=0.5, peak_per_minute=40,
+                                   base_per_minute=20, seed=5)
+    header, events = read_trace(path)
+    assert len(events) == written > 0 and header['source'] == 'synthetic'
+
+    result = replay(events, speed=0, workers=4, timeout=30, trace_name='rush')
+    commands = sum(1 for e in events if e.table == 'ros2_commands')
+    assert (result['commands'], result['completed'], result['failed'], result['unfinished']) \
+        == (commands, commands, 0, 0)
+    assert result['tasks'] == result['tasks_completed'] == len(events) - commands
+    # 기준 대비 비교 표 (자기 자신과 비교하면 변화 0%)
+    lines = compare_runs([result, dict(result)])
+    assert any(line.startswith('commands_per_second') and '(+0%)' in line for line in lines)
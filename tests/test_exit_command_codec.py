@@ -0,0 +1,65 @@
+import pytest
+
+from exit_command_codec import (MESSAGE_SIZE, CommandTransport, ExitCommandPublisher,
+                                InProcessTransport, decode, encode_exit, encode_guide,
+                                pack_exit_into, pack_guide_into)
+
+# gate_id / location_id는 VARCHAR(20)
+LONGEST_ID = 'X' * 20
+
+
+def test_exit_round_trip():
+    message = encode_exit(LONGEST_ID, 2, 12.5, 'A_1_2', cycle_id=7, sequence=3,
+                          timestamp_us=1_700_000_000_000_000)
+    assert len(message) == MESSAGE_SIZE
+    assert decode(message).to_dict() == {
+        'kind': 'EXIT', 'gate_id': LONGEST_ID, 'vehicle_count': 2, 'duration_seconds': 12.5,
+        'parking_spot': 'A_1_2', 'cycle_id': 7, 'sequence': 3,
+        'timestamp_us': 1_700_000_000_000_000,
+    }
+
+
+def test_guide_round_trip():
+    view = decode(encode_guide(LONGEST_ID, 3, '준비구역_A1', sequence=9, timestamp_us=5))
+    assert (view.target_spot, view.prep_location, view.duration_seconds) == \
+        (LONGEST_ID, '준비구역_A1', 3.0)
+    assert view.to_dict()['sequence'] == 9
+
+
+def test_pack_into_shared_buffer_matches_encode():
+    buffer = bytearray(MESSAGE_SIZE * 2)
+    pack_exit_into(buffer, 0, 'EXIT-01', 1, 10, 'B_2_1', cycle_id=42, timestamp_us=0)
+    pack_guide_into(buffer, MESSAGE_SIZE, 'B_2_1', 5, 'B1', timestamp_us=0)
+
+    assert bytes(buffer[:MESSAGE_SIZE]) == encode_exit('EXIT-01', 1, 10, 'B_2_1', cycle_id=42,
+                                                       timestamp_us=0)
+    view = memoryview(buffer)
+    assert (decode(view).gate_id, decode(view).cycle_id) == ('EXIT-01', 42)
+    assert decode(view, MESSAGE_SIZE).prep_location == 'B1'
+
+
+@pytest.mark.parametrize('message', [
+    b'PK',
+    b'XX' + encode_exit('EXIT-01', 1, 1)[2:],
+    encode_exit('EXIT-01', 1, 1)[:2] + b'\x02' + encode_exit('EXIT-01', 1, 1)[3:],
+    encode_exit('EXIT-01', 1, 1)[:-1],
+])
+def test_decode_rejects_malformed(message):
+    with pytest.raises(ValueError):
+        decode(message)
+
+
+def test_field_longer_than_slot_is_rejected():
+    with pytest.raises(ValueError):
+        encode_exit('가' * 11, 1, 1)  # 33바이트
+
+
+def test_transport_interface_is_abstract():
+    with pytest.raises(TypeError):
+        CommandTransport()
+
+    received = []
+    transport = InProcessTransport()
+    transport.subscribe(lambda data: received.append(decode(data).to_dict()))
+    ExitCommandPublisher(transport).publish_exit('EXIT-01', 2, 10, 'A_1_2', cycle_id=5)
+    assert (received[0]['gate_id'], received[0]['cycle_id']) == ('EXIT-01', 5)
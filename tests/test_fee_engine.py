@@ -0,0 +1,72 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from fee_engine import FeeEngine, calculate_fee, to_datetime64
+
+# 001_initial_schema.sql의 기본 요금 정책
+DEFAULT_POLICY = {
+    'policy_name': '기본 요금 정책', 'base_time_minutes': 30, 'base_fee': 2000,
+    'additional_unit_minutes': 10, 'additional_fee': 1000, 'free_minutes': 10,
+    'daily_max_fee': 20000, 'is_active': True, 'valid_from': '2000-01-01T00:00:00+00:00',
+}
+
+
+def sessions(count: int, seed: int = 3):
+    """경계값(무료 / 기본 시간 / 단위 / 일 최대 / 30초 반올림) + 임의 주차 시간"""
+    rng = random.Random(seed)
+    start = datetime(2024, 5, 1, 8, 0, tzinfo=timezone.utc)
+    durations = [timedelta(minutes=m, seconds=s)
+                 for m in (0, 9, 10, 11, 39, 40, 41, 49, 50, 51, 209, 210, 211, 1440)
+                 for s in (0, 29, 30, 59)]
+    durations += [timedelta(seconds=rng.randrange(0, 2 * 86400),
+                            microseconds=rng.randrange(0, 1_000_000)) for _ in range(count)]
+    return [(start + timedelta(minutes=i), start + timedelta(minutes=i) + d)
+            for i, d in enumerate(durations)]
+
+
+@pytest.mark.parametrize('policy', [
+    DEFAULT_POLICY,
+    dict(DEFAULT_POLICY, base_fee='1500.50', additional_fee='333.33', additional_unit_minutes=7,
+         free_minutes=0, daily_max_fee=None),
+])
+def test_matches_sql_calculate_parking_fee(db, client, policy):
+    db.insert('parking_fee_policy', [policy])
+    pairs = sessions(300)
+
+    engine = FeeEngine()
+    engine.load(client)
+    result = engine.price(to_datetime64(e for e, _ in pairs), to_datetime64(x for _, x in pairs))
+
+    for i, (entry, exit_) in enumerate(pairs):
+        sql = client.rpc('calculate_parking_fee', {
+            'p_entry_time': entry.isoformat(), 'p_exit_time': exit_.isoformat(),
+        }).execute().data[0]
+        actual = {key: result[key][i].item() for key in sql}
+        assert actual == pytest.approx(sql), (entry, exit_)
+
+        reference = calculate_fee(engine.policies[0], entry, exit_)
+        assert float(reference['total_fee']) == pytest.approx(sql['total_fee'])
+
+
+def test_latest_active_policy_wins(db, client):
+    db.insert('parking_fee_policy', [
+        dict(DEFAULT_POLICY, created_at='2024-01-01T00:00:00+00:00'),
+        dict(DEFAULT_POLICY, base_fee=5000, created_at='2024-02-01T00:00:00+00:00'),
+        dict(DEFAULT_POLICY, base_fee=9000, is_active=False,
+             created_at='2024-03-01T00:00:00+00:00'),
+    ])
+    engine = FeeEngine()
+    engine.load(client)
+
+    entry = datetime(2024, 5, 1, 8, 0, tzinfo=timezone.utc)
+    priced, = engine.price_sessions([{'session_id': 's1', 'entry_time': entry,
+                                      'exit_time': entry + timedelta(minutes=30)}])
+    sql = client.rpc('calculate_parking_fee', {
+        'p_entry_time': entry.isoformat(),
+        'p_exit_time': (entry + timedelta(minutes=30)).isoformat(),
+    }).execute().data[0]
+    assert priced['total_fee'] == sql['total_fee'] == 5000
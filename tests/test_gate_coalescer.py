@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+
+from command_records import parse_command
+from gate_coalescer import GateCycleCoalescer, merged_duration
+
+
+def exit_command(command_id: str, command_type: str = 'EXIT_GATE_SINGLE', duration: float = 10):
+    return parse_command({'command_id': command_id, 'status': 'pending',
+                          'command_type': command_type,
+                          'payload': {'gate_id': 'EXIT-01', 'duration_seconds': duration}})
+
+
+class ManualSchedule:
+    """주입하는 schedule: 타이머를 직접 발화"""
+
+    class Handle:
+        def __init__(self, fn, args):
+            self.fn, self.args, self.cancelled = fn, args, False
+
+        def cancel(self):
+            self.cancelled = True
+
+        def fire(self):
+            self.fn(*self.args)
+
+    def __init__(self):
+        self.handles = []
+        self.delays = []
+
+    def __call__(self, delay, fn, *args):
+        self.delays.append(delay)
+        handle = self.Handle(fn, args)
+        self.handles.append(handle)
+        return handle
+
+
+@pytest.fixture
+def cycles():
+    return []
+
+
+def coalescer(cycles, schedule=None, **options):
+    def submit(gate_id, commands):
+        cycles.append((gate_id, [c.command_id for c in commands]))
+    return GateCycleCoalescer(submit, schedule=schedule, **options)
+
+
+def test_merged_duration_adds_extra_per_command():
+    commands = [exit_command('a', duration=8), exit_command('b', duration=12)]
+    assert merged_duration(commands, 5) == 17
+
+
+def test_window_flush_merges_same_gate(cycles):
+    schedule = ManualSchedule()
+    gate = coalescer(cycles, schedule, window_seconds=0.5)
+    gate.offer('EXIT-01', exit_command('a'))
+    gate.offer('EXIT-01', exit_command('b'))
+    gate.offer('EXIT-02', exit_command('c'))
+
+    assert cycles == [] and schedule.delays == [0.5, 0.5]
+    schedule.handles[0].fire()
+    assert cycles == [('EXIT-01', ['a', 'b'])]
+
+    stats = gate.stats()
+    assert (stats['cycles'], stats['cycles_saved'], stats['held']) == (1, 1, 1)
+
+
+def test_window_flush_with_real_timer(cycles):
+    gate = coalescer(cycles, window_seconds=0.02)
+    gate.offer('EXIT-01', exit_command('a'))
+    deadline = time.monotonic() + 5
+    while not cycles and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert cycles == [('EXIT-01', ['a'])]
+    assert gate.stats()['avg_added_wait_seconds'] >= 0.02
+
+
+def test_max_vehicles_splits_batches(cycles):
+    schedule = ManualSchedule()
+    gate = coalescer(cycles, schedule, max_vehicles=4)
+    gate.offer('EXIT-01', exit_command('a', 'EXIT_GATE_DOUBLE'))
+    gate.offer('EXIT-01', exit_command('b'))
+    # 2 + 1 + 2 > 4 → 앞 묶음 먼저 내보내고 새 묶음 시작
+    gate.offer('EXIT-01', exit_command('c', 'EXIT_GATE_DOUBLE'))
+    assert cycles == [('EXIT-01', ['a', 'b'])]
+    assert schedule.handles[0].cancelled
+
+    # 2 + 2 = 4 → 기다리지 않고 바로 실행
+    gate.offer('EXIT-01', exit_command('d', 'EXIT_GATE_DOUBLE'))
+    assert cycles[-1] == ('EXIT-01', ['c', 'd'])
+    assert gate.stats()['held'] == 0
+
+
+def test_flush_all_drains_every_gate(cycles):
+    gate = coalescer(cycles, ManualSchedule())
+    gate.offer('EXIT-01', exit_command('a'))
+    gate.offer('EXIT-02', exit_command('b'))
+    gate.flush_all()
+
+    assert sorted(cycles) == [('EXIT-01', ['a']), ('EXIT-02', ['b'])]
+    assert gate.stats()['held'] == 0
+
+
+def test_fired_timer_does_not_flush_next_batch_early(cycles):
+    schedule = ManualSchedule()
+    gate = coalescer(cycles, schedule, max_vehicles=2)
+    gate.offer('EXIT-01', exit_command('a'))
+    stale = schedule.handles[0]
+    gate.offer('EXIT-01', exit_command('b'))       # 최대 대수 → 즉시 실행
+    gate.offer('EXIT-01', exit_command('c'))       # 새 묶음 + 새 타이머
+
+    # cancel() 전에 이미 발화해서 락을 기다리던 타이머
+    stale.fire()
+    assert cycles == [('EXIT-01', ['a', 'b'])]
+    assert gate.stats()['stale_timers'] == 1
+
+    schedule.handles[1].fire()
+    assert cycles[-1] == ('EXIT-01', ['c'])
+
+
+def test_submit_cycle_runs_outside_lock():
+    gate = None
+    reentered = []
+
+    def submit(gate_id, commands):
+        # 락 안에서 호출하면 같은 스레드에서 offer가 막힘
+        acquired = gate._lock.acquire(timeout=1)
+        if acquired:
+            gate._lock.release()
+        reentered.append(acquired)
+        if commands[0].command_id == 'a':
+            gate.offer('EXIT-02', exit_command('b'))
+            gate.flush('EXIT-02')
+
+    gate = GateCycleCoalescer(submit, schedule=ManualSchedule())
+    gate.offer('EXIT-01', exit_command('a'))
+    thread = threading.Thread(target=gate.flush, args=('EXIT-01',), daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert reentered == [True, True]
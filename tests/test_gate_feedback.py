@@ -0,0 +1,65 @@
+import pytest
+
+from exit_command_codec import decode, decode_exit_string, encode_exit, encode_exit_string
+from gate_feedback import CompletionSignals, CycleIds, gate_key, parse_feedback_message
+
+
+def test_parse_closed_with_cycle_id():
+    assert parse_feedback_message('CLOSED|EXIT-01|42') == (('gate', 'EXIT-01', '42'), 'closed')
+    assert parse_feedback_message('GUIDE_DONE|abc') == (('guide', 'abc'), 'done')
+    assert parse_feedback_message('CLOSED|') is None
+    assert parse_feedback_message('OPENED|EXIT-01|1') is None
+
+
+def test_cycle_ids_wrap_at_u32():
+    ids = CycleIds(start=0xFFFFFFFF)
+    assert [ids.next(), ids.next()] == [0xFFFFFFFF, 0]
+
+
+def test_late_closed_from_timed_out_cycle_does_not_complete_next_cycle():
+    signals = CompletionSignals()
+    ids = CycleIds(start=7)
+
+    first = signals.expect(gate_key('EXIT-01', ids.next()))
+    assert signals.wait(first, 0.01) is None
+
+    # 다음 사이클 대기 중에 이전 사이클(7)의 닫힘 신호가 늦게 도착
+    second_id = ids.next()
+    second = signals.expect(gate_key('EXIT-01', second_id))
+    assert not signals.signal(*parse_feedback_message('CLOSED|EXIT-01|7'))
+    assert not signals.signal(*parse_feedback_message('CLOSED|EXIT-01'))
+    assert not second.event.is_set()
+
+    assert signals.signal(*parse_feedback_message(f'CLOSED|EXIT-01|{second_id}'))
+    assert signals.wait(second, 0.01) == 'closed'
+    stats = signals.stats()
+    assert (stats['signaled'], stats['timed_out'], stats['unmatched']) == (1, 1, 2)
+
+
+def test_exit_command_carries_cycle_id():
+    assert decode(encode_exit('EXIT-01', 2, 10, 'A_1_2', cycle_id=99)).cycle_id == 99
+    assert decode_exit_string(encode_exit_string('EXIT-01', 2, 10, 'A_1_2', 99))['cycle_id'] == 99
+    assert decode_exit_string('EXIT|EXIT-01|2|10|A_1_2')['cycle_id'] is None
+
+
+def test_controller_completes_on_echoed_cycle_id(client):
+    pytest.importorskip('supabase')
+    from command_records import parse_command
+    from ros2_exit_controller import ExitController
+
+    controller = ExitController(client=client, coalesce_window=0, simulate_feedback=True,
+                                fail_on_timeout=True)
+    controller.feedback_simulator.gate_close_seconds = 0.01
+    try:
+        command = parse_command({
+            'command_id': '00000000-0000-0000-0000-000000000001', 'status': 'processing',
+            'command_type': 'EXIT_GATE_SINGLE',
+            'payload': {'gate_id': 'EXIT-01', 'duration_seconds': 1},
+        })
+        controller.execute_exit_gate([command])
+        stats = controller.completion.stats()
+        assert (stats['signaled'], stats['timed_out']) == (1, 0)
+    finally:
+        controller.command_executor.shutdown(wait=True)
+        controller.claimer.stop()
+        controller.status_writer.close(timeout=1)
@@ -0,0 +1,58 @@
+import json
+import os
+
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+from history_exporter import HistoryExporter
+
+
+def exported(output_dir: str, table: str):
+    """PK별 최신 updated_at 행 (읽는 쪽 규칙)"""
+    latest = {}
+    for name in sorted(os.listdir(os.path.join(output_dir, table))):
+        for row in pq.read_table(os.path.join(output_dir, table, name)).to_pylist():
+            current = latest.get(row['session_id'])
+            if current is None or row['updated_at'] >= current['updated_at']:
+                latest[row['session_id']] = row
+    return latest
+
+
+def test_updated_sessions_are_exported_again(db, client, tmp_path):
+    db.insert('parking_sessions', [{'session_id': f's{i}', 'status': 'parked'} for i in range(5)])
+    output_dir = str(tmp_path)
+
+    assert HistoryExporter(client, output_dir, settle_seconds=0,
+                           page_size=2).export_table('parking_sessions') == 5
+    assert HistoryExporter(client, output_dir, settle_seconds=0).export_table('parking_sessions') == 0
+
+    # 내보낸 뒤 출차 → updated_at이 워터마크 뒤로 이동
+    db.update('parking_sessions', {'status': 'exited'}, [lambda row: row['session_id'] == 's1'])
+    assert HistoryExporter(client, output_dir, settle_seconds=0).export_table('parking_sessions') == 1
+
+    latest = exported(output_dir, 'parking_sessions')
+    assert len(latest) == 5
+    assert latest['s1']['status'] == 'exited'
+
+
+def test_recent_updates_wait_for_settle(db, client, tmp_path):
+    db.insert('parking_sessions', [{'session_id': 's1', 'status': 'parked'}])
+    exporter = HistoryExporter(client, str(tmp_path), settle_seconds=3600)
+
+    assert exporter.export_table('parking_sessions') == 0
+
+
+def test_created_at_checkpoint_restarts_from_beginning(db, client, tmp_path):
+    db.insert('ros2_commands', [{'command_type': 'EXIT_GATE_SINGLE'} for _ in range(3)])
+    last = max(row['created_at'] for row in db.tables['ros2_commands'])
+    # 키를 기록하지 않은 예전 체크포인트 (created_at 워터마크)
+    checkpoint = {'ros2_commands': {'last_key': last, 'last_id': 'ffffffff', 'next_part': 1,
+                                    'rows': 3, 'files': ['ros2_commands-000000.parquet']}}
+    with open(tmp_path / 'checkpoint.json', 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+
+    exporter = HistoryExporter(client, str(tmp_path), settle_seconds=0)
+    assert exporter.export_table('ros2_commands') == 3
+    assert exporter.checkpoint['ros2_commands']['key'] == 'updated_at'
@@ -0,0 +1,95 @@
+import pytest
+
+from occupancy_index import OccupancyIndex
+
+
+def layout():
+    return [
+        {'location_id': 'PREP', 'location_type': 'preparation', 'x': 0.0, 'y': 0.0},
+        {'location_id': 'A_1_1', 'location_type': 'parking', 'zone': 'A', 'x': 1.0, 'y': 0.0},
+        {'location_id': 'A_1_2', 'location_type': 'parking', 'zone': 'A', 'x': 2.0, 'y': 0.0},
+        {'location_id': 'B_1_1', 'location_type': 'parking', 'zone': 'B', 'x': 3.0, 'y': 0.0,
+         'is_occupied': True},
+    ]
+
+
+def update(location_id: str, **values):
+    return {'eventType': 'UPDATE', 'new': dict(location_id=location_id, **values)}
+
+
+def test_counts_without_int_bit_count():
+    index = OccupancyIndex()
+    index.load_rows(layout())
+
+    assert index.free_count() == 2
+    assert index.free_count(zone='B') == 0
+    assert index.stats()['free'] == 2
+
+
+def test_release_frees_only_unconfirmed_reservations():
+    index = OccupancyIndex()
+    index.load_rows(layout())
+
+    spot = index.nearest_free('PREP', reserve=True)
+    assert spot == 'A_1_1' and not index.is_free(spot)
+    # 예약 직후 다른 컬럼만 바뀐 UPDATE(is_occupied=false 그대로)는 예약을 풀지 않음
+    index.on_change(update(spot, is_occupied=False, vehicle_id=None))
+    assert not index.is_free(spot)
+
+    assert index.release(spot)
+    assert index.is_free(spot)
+    assert not index.release(spot)
+
+    # DB에서 점유가 확인된 예약은 되돌리지 않음
+    spot = index.nearest_free('PREP', reserve=True)
+    index.on_change(update(spot, is_occupied=True))
+    assert not index.release(spot)
+    assert not index.is_free(spot)
+
+
+def test_consistency_check_keeps_active_and_repairs_expired_reservations():
+    index = OccupancyIndex(reservation_seconds=60)
+    index.load_rows(layout())
+    spot = index.nearest_free('PREP', reserve=True)
+
+    assert index.check_rows(layout()) == []
+    assert not index.is_free(spot)
+
+    index.reservation_seconds = 0
+    assert index.check_rows(layout()) == [spot]
+    assert index.is_free(spot)
+    assert index.stats()['reserved'] == 0
+
+
+def test_check_consistency_reloads_layout_changes(db, client):
+    db.upsert('parking_locations', layout())
+    index = OccupancyIndex()
+    index.load(client)
+
+    db.upsert('parking_locations', [{'location_id': 'C_1_1', 'location_type': 'parking',
+                                     'zone': 'C', 'x': 9.0, 'y': 0.0}])
+    assert index.check_consistency(client) == ['C_1_1']
+    assert index.free_count(zone='C') == 1
+
+
+def test_guide_timeout_releases_picked_spot(client):
+    pytest.importorskip('supabase')
+    from command_records import parse_command
+    from ros2_exit_controller import ExitController
+
+    index = OccupancyIndex()
+    index.load_rows(layout())
+    controller = ExitController(client=client, coalesce_window=0, occupancy_index=index)
+    try:
+        command = parse_command({
+            'command_id': '00000000-0000-0000-0000-000000000002', 'status': 'processing',
+            'command_type': 'PARKING_GUIDE',
+            'payload': {'prep_location': 'PREP', 'duration_seconds': 0.01},
+        })
+        controller.execute_parking_guide(command)
+        assert index.is_free('A_1_1')
+        assert index.stats()['released'] == 1
+    finally:
+        controller.command_executor.shutdown(wait=True)
+        controller.claimer.stop()
+        controller.status_writer.close(timeout=1)
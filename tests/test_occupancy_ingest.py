@@ -0,0 +1,72 @@
+import pytest
+
+from occupancy_ingest import OccupancyIngest
+
+FPS = 30
+
+
+@pytest.fixture
+def ingest(client):
+    return OccupancyIngest(client, on_threshold=0.7, off_threshold=0.3, debounce_seconds=0.5)
+
+
+def feed(ingest, probabilities, start: float = 0.0, spot: str = 'A-01') -> int:
+    """30fps로 한 주차면 프레임 입력. 확정된 변경 수 합계"""
+    indices = ingest.register_spots([spot])
+    return sum(ingest.ingest_array(indices, [p], at=start + frame / FPS)
+               for frame, p in enumerate(probabilities))
+
+
+def test_initial_state_commits_after_debounce(ingest):
+    assert feed(ingest, [0.9] * 15) == 0
+    assert feed(ingest, [0.9], start=0.5) == 1
+    assert ingest.snapshot() == {'A-01': True}
+    assert ingest.stats()['initial'] == 1
+
+
+def test_flipped_verdict_restarts_debounce_for_unknown_spot(ingest):
+    # 0.5초 동안 점유였다가 빈자리 한 프레임 → 빈자리로 확정하면 안 됨
+    assert feed(ingest, [0.9] * 15) == 0
+    assert feed(ingest, [0.1], start=0.5) == 0
+    assert ingest.snapshot() == {}
+
+    # 빈자리 판정이 0.5초 유지되면 확정
+    assert feed(ingest, [0.1] * 14, start=0.5 + 1 / FPS) == 0
+    assert feed(ingest, [0.1], start=1.0) == 1
+    assert ingest.snapshot() == {'A-01': False}
+
+
+def test_hysteresis_band_keeps_state(ingest):
+    feed(ingest, [0.1] * 16)
+    assert ingest.snapshot() == {'A-01': False}
+
+    # on_threshold 미만은 점유 판정으로 세지 않음
+    assert feed(ingest, [0.5, 0.65, 0.69] * 10, start=1.0) == 0
+    assert feed(ingest, [0.7] * 16, start=2.0) == 1
+    assert ingest.snapshot() == {'A-01': True}
+    # 빈자리 쪽도 off_threshold 초과면 유지
+    assert feed(ingest, [0.31] * 30, start=3.0) == 0
+    assert ingest.stats()['changes'] == 1
+
+
+def test_short_flicker_is_debounced(ingest):
+    feed(ingest, [0.9] * 16)
+    # 가림 / 조명으로 0.3초 동안 빈자리 → 다시 점유: 변경 없음
+    assert feed(ingest, [0.1] * 9 + [0.9] * 30, start=1.0) == 0
+    # 중간에 애매한 프레임이 끼면 대기 시간이 다시 시작
+    assert feed(ingest, [0.1] * 10 + [0.5] + [0.1] * 10, start=3.0) == 0
+    assert ingest.snapshot() == {'A-01': True}
+
+
+def test_flush_upserts_committed_changes_once(db, ingest):
+    feed(ingest, [0.9] * 16, spot='A-01')
+    feed(ingest, [0.1] * 16, spot='A-02')
+    feed(ingest, [0.5] * 16, spot='A-03')
+
+    assert ingest.flush() == 2
+    assert ingest.flush() == 0
+    rows = {row['spot_id']: row for row in db.select('parking_current_status')}
+    assert set(rows) == {'A-01', 'A-02'}
+    assert (rows['A-01']['is_occupied'], rows['A-01']['confidence']) == (True, 0.9)
+    assert (rows['A-02']['is_occupied'], rows['A-02']['confidence']) == (False, 0.9)
+    assert db.stats['upsert'] == 1
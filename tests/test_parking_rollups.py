@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from parking_rollups import ParkingRollups
+
+
+def parked(session_id: str, spot_id: str):
+    return {'eventType': 'INSERT', 'new': {
+        'session_id': session_id, 'status': 'parked', 'parking_spot_id': spot_id,
+        'entry_time': datetime.now(timezone.utc).isoformat()}}
+
+
+def test_zone_comes_from_parking_locations(db, client):
+    # 주차면 ID 모양과 구역이 무관한 배치 (ID 앞 글자로는 알 수 없음)
+    db.upsert('parking_locations', [
+        {'location_id': 'A_1_1', 'location_type': 'parking', 'zone': 'VIP'},
+        {'location_id': '017', 'location_type': 'parking', 'zone': 'B'},
+    ])
+    rollups = ParkingRollups(client)
+
+    rollups.on_session(parked('s1', 'A_1_1'))
+    rollups.on_session(parked('s2', '017'))
+    rollups.on_session(parked('s3', 'Z_9_9'))
+
+    stats = rollups.stats()
+    assert stats['occupied'] == {'VIP': 1, 'B': 1}
+    assert stats['ignored'] == 1
+
+
+def test_load_resumes_occupancy_by_location_zone(db, client):
+    db.upsert('parking_locations', [{'location_id': 'A_1_1', 'zone': 'EAST'}])
+    db.insert('parking_sessions', [{'session_id': 's1', 'status': 'parked',
+                                    'parking_spot_id': 'A_1_1'}])
+    rollups = ParkingRollups(client)
+
+    assert rollups.load() == 1
+    assert rollups.stats()['occupied'] == {'EAST': 1}
@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pytest
+
+from realtime_hub import RealtimeHub
+
+
+def wait_until(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError('timed out')
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def hub(client):
+    hub = RealtimeHub(client, name='test-hub', rejoin_backoff=0.01)
+    yield hub
+    hub.close(drain=False)
+
+
+def test_bindings_collapse_events_per_table_and_filter(hub):
+    noop = lambda payload: None
+    hub.route('tasks', noop, event='INSERT')
+    hub.route('tasks', noop, event='UPDATE')
+    hub.route('robots', noop, event='UPDATE')
+    hub.route('robots', noop, event='UPDATE', name='robots:second')
+    hub.route('ros2_commands', noop, event='INSERT', filter='status=eq.pending')
+    hub.route('ros2_commands', noop, event='DELETE')
+
+    assert sorted(hub.bindings(), key=str) == sorted([
+        ('tasks', '*', None),
+        ('robots', 'UPDATE', None),
+        ('ros2_commands', 'INSERT', 'status=eq.pending'),
+        ('ros2_commands', 'DELETE', None),
+    ], key=str)
+
+
+def test_collapsed_binding_still_routes_by_event(db, hub):
+    inserts, updates = [], []
+    hub.route('tasks', lambda p: inserts.append(p['new']['task_id']), event='INSERT')
+    hub.route('tasks', lambda p: updates.append(p['new']['status']), event='UPDATE')
+    hub.start()
+
+    task, = db.insert('tasks', [{'task_type': 'EXIT'}])
+    db.update('tasks', {'status': 'in_progress'}, [lambda row: True])
+    wait_until(lambda: inserts and updates)
+
+    assert (inserts, updates) == ([task['task_id']], ['in_progress'])
+    assert hub.stats()['tables']['tasks']['avg_fanout'] == 1.0
+
+
+def test_slow_handler_does_not_block_other_routes(db, hub):
+    release = threading.Event()
+    slow, fast = [], []
+
+    def slow_handler(payload):
+        release.wait(5)
+        slow.append(payload['new']['task_id'])
+
+    hub.route('tasks', slow_handler, event='INSERT', name='slow')
+    hub.route('tasks', lambda p: fast.append(p['new']['task_id']), event='INSERT', name='fast')
+    hub.start()
+
+    rows = db.insert('tasks', [{'task_type': 'EXIT'} for _ in range(5)])
+    wait_until(lambda: len(fast) == 5)
+    assert slow == []
+    assert hub.stats()['handlers']['slow']['queue_depth'] >= 3
+
+    release.set()
+    wait_until(lambda: len(slow) == 5)
+    assert slow == fast == [row['task_id'] for row in rows]
+
+
+def test_full_queue_drops_oldest_and_reports(db, hub):
+    started, release = threading.Event(), threading.Event()
+    seen, drops = [], []
+
+    def handler(payload):
+        started.set()
+        release.wait(5)
+        seen.append(payload['new']['vehicle_plate'])
+
+    hub.route('tasks', handler, event='INSERT', name='small', queue_size=2,
+              on_drop=drops.append)
+    hub.start()
+
+    db.insert('tasks', [{'task_type': 'EXIT', 'vehicle_plate': 'car-0'}])
+    assert started.wait(5)
+    # 핸들러가 car-0에 묶인 동안 4건 → 큐(2)에는 마지막 2건만 남음
+    db.insert('tasks', [{'task_type': 'EXIT', 'vehicle_plate': f'car-{i}'} for i in range(1, 5)])
+    wait_until(lambda: hub.stats()['handlers']['small']['dropped'] == 2)
+
+    release.set()
+    wait_until(lambda: len(seen) == 3 and drops)
+    assert seen == ['car-0', 'car-3', 'car-4']
+    assert drops == [2]
+
+
+def test_rejoins_after_channel_error(db, client):
+    states = []
+    hub = RealtimeHub(client, name='test-hub', rejoin_backoff=0.01)
+    received = []
+    hub.route('tasks', lambda p: received.append(p['new']['task_id']), event='INSERT')
+    hub.on_state(lambda status, error: states.append(status))
+    hub.start()
+    try:
+        assert hub.stats()['state'] == 'SUBSCRIBED'
+        hub._on_status('CHANNEL_ERROR', RuntimeError('socket closed'))
+        wait_until(lambda: states[-1] == 'SUBSCRIBED' and len(states) == 3)
+
+        # 새 채널로 계속 수신 (이전 채널의 리스너는 해제되어 중복 없음)
+        task, = db.insert('tasks', [{'task_type': 'EXIT'}])
+        wait_until(lambda: received)
+        time.sleep(0.05)
+        assert received == [task['task_id']]
+
+        stats = hub.stats()['tables']['tasks']
+        assert states == ['SUBSCRIBED', 'CHANNEL_ERROR', 'SUBSCRIBED']
+        assert stats['reconnects'] == 1 and stats['last_reconnect_ms'] >= 10
+        assert stats['first_event_after_reconnect_ms'] is not None
+    finally:
+        hub.close()
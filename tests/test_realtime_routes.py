@@ -0,0 +1,94 @@
+"""
+라이브러리 모듈의 route(hub): 프로세스 채널 하나(RealtimeHub)로 동기화되는지 확인
+"""
+
+import time
+
+import pytest
+
+from realtime_hub import RealtimeHub
+
+
+def wait_until(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError('timed out')
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def hub(client):
+    hub = RealtimeHub(client, name='test-hub')
+    yield hub
+    hub.close(drain=False)
+
+
+def test_task_scheduler_follows_tasks_through_hub(db, client, hub):
+    from task_scheduler import TaskScheduler
+
+    scheduler = TaskScheduler(client).route(hub)
+    hub.start()
+
+    low, high = db.insert('tasks', [{'task_type': 'EXIT', 'priority': 1},
+                                    {'task_type': 'EXIT', 'priority': 5}])
+    wait_until(lambda: len(scheduler) == 2)
+    db.update('tasks', {'status': 'failed'}, [lambda row: row['task_id'] == high['task_id']])
+    wait_until(lambda: len(scheduler) == 1)
+
+    assert scheduler.pop()['task_id'] == low['task_id']
+
+
+def test_robot_allocator_follows_robots_through_hub(db, client, hub):
+    from robot_allocator import RobotAllocator
+
+    allocator = RobotAllocator().route(hub)
+    hub.start()
+
+    db.upsert('parking_locations', [{'location_id': 'A_1_1', 'x': 10.0, 'y': 0.0}])
+    db.upsert('robots', [{'robot_id': 'R-01', 'current_x': 0.0, 'current_y': 0.0,
+                          'battery_level': 90, 'status': 'idle'},
+                         {'robot_id': 'R-02', 'current_x': 50.0, 'current_y': 0.0,
+                          'battery_level': 90, 'status': 'idle'}])
+    wait_until(lambda: allocator.stats()['available'] == 2
+               and allocator.target_position({'start_location': 'A_1_1'}) is not None)
+
+    # 가까운 R-01이 충전하러 가면 먼 R-02가 배정됨
+    db.update('robots', {'status': 'charging'}, [lambda row: row['robot_id'] == 'R-01'])
+    wait_until(lambda: allocator.stats()['available'] == 1)
+    assert allocator.assign({'start_location': 'A_1_1'})['assigned_robot'] == 'R-02'
+
+
+def test_route_planner_follows_locations_through_hub(db, client, hub):
+    from route_planner import RoutePlanner, _layout
+
+    db.upsert('parking_locations', _layout(8, lane_depth=2, occupancy=0.0, seed=1))
+    planner = RoutePlanner(client).route(hub)
+    planner.load()
+    hub.start()
+    assert planner.stats()['free'] == 8
+
+    # 점유 변경 → 빈자리만 갱신, 좌표 변경 → 다음 계획 때 재구성
+    db.update('parking_locations', {'is_occupied': True},
+              [lambda row: row['location_id'] == 'P_1_1'])
+    wait_until(lambda: planner.stats()['free'] == 7)
+    db.update('parking_locations', {'x': 99.0}, [lambda row: row['location_id'] == 'P_2'])
+    wait_until(lambda: planner.stats()['dirty'])
+
+
+def test_parking_rollups_follow_events_through_hub(db, client, hub):
+    from parking_rollups import ParkingRollups
+
+    db.upsert('parking_locations', [{'location_id': 'A_1_1', 'zone': 'VIP'}])
+    rollups = ParkingRollups(client).route(hub)
+    hub.start()
+
+    db.insert('parking_events', [{'gate_id': 'GATE-01', 'event_type': 'entry'}])
+    db.insert('parking_sessions', [{'session_id': 's1', 'status': 'parked',
+                                    'parking_spot_id': 'A_1_1'}])
+    wait_until(lambda: rollups.stats()['occupied'] == {'VIP': 1})
+    db.update('parking_sessions', {'status': 'exited'}, [lambda row: row['session_id'] == 's1'])
+    wait_until(lambda: rollups.stats()['sessions_ended'] == 1)
+
+    assert rollups.stats()['events'] == 1
+    assert rollups.flush() > 0
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from command_records import parse_command
+from reference_cache import ReferenceCache
+
+
+def wait_until(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError('timed out')
+        time.sleep(0.005)
+
+
+def test_bound_channel_invalidates_on_change(db, client):
+    db.insert('vehicles', [{'vehicle_id': 'v1', 'license_plate': '12가3456',
+                            'vehicle_type': 'SUV'}])
+    reference = ReferenceCache(client)
+    channel = reference.bind_channel(client.channel('reference')).subscribe(
+        reference.on_subscribe_state)
+    try:
+        assert reference.vehicle('12가3456').vehicle_type == 'SUV'
+        assert reference.vehicle('99나9999') is None
+
+        db.update('vehicles', {'vehicle_type': 'EV'}, [lambda row: row['vehicle_id'] == 'v1'])
+        db.insert('vehicles', [{'vehicle_id': 'v2', 'license_plate': '99나9999'}])
+        wait_until(lambda: reference.stats()['vehicles']['invalidations'] == 2)
+
+        assert reference.vehicle('12가3456').vehicle_type == 'EV'
+        assert reference.vehicle('99나9999').vehicle_id == 'v2'
+    finally:
+        channel.unsubscribe()
+
+
+def test_peek_never_fetches(db, client):
+    db.insert('parking_locations', [{'location_id': 'A_1_2', 'zone': 'A'}])
+    reference = ReferenceCache(client)
+
+    assert reference.locations.peek('A_1_2') == (False, None)
+    assert reference.locations.stats()['fetches'] == 0
+    reference.location('A_1_2')
+    reference.location('B_9_9')
+    assert reference.locations.peek('A_1_2')[1].zone == 'A'
+    assert reference.locations.peek('B_9_9') == (True, None)   # "없음" 항목
+    assert reference.locations.stats()['fetches'] == 2
+
+
+def test_async_controller_uses_async_client(db):
+    pytest.importorskip('supabase')
+    from local_supabase import AsyncLocalSupabaseClient
+    from ros2_exit_controller_async import AsyncExitController
+
+    db.insert('parking_locations', [{'location_id': 'A_1_2', 'zone': 'A', 'floor': 'B1'}])
+    db.insert('vehicles', [{'vehicle_id': 'v1', 'license_plate': '12가3456',
+                            'vehicle_type': 'SUV'}])
+    command = parse_command({'command_id': 'c1', 'status': 'pending',
+                             'command_type': 'EXIT_GATE_SINGLE', 'payload': {'gate_id': 'EXIT-01'},
+                             'license_plate': '12가3456', 'parking_spot_id': 'Z_9_9'})
+
+    async def run():
+        client = AsyncLocalSupabaseClient(db)
+        reference = ReferenceCache(client)
+        await reference.load_async()
+        controller = AsyncExitController(client, coalesce_window=0, reference=reference)
+        # 같은 미스를 동시에 조회해도 DB 조회는 한 번
+        labels = await asyncio.gather(*(controller.command_labels(command) for _ in range(3)))
+        await controller.drain()
+        return reference, labels
+
+    reference, labels = asyncio.run(run())
+    assert labels == [('12가3456 (등록 SUV)', 'Z_9_9')] * 3
+    # 주차면: load_async 1회 + 없는 주차면 미스 1회 / 차량: 미스 1회, 나머지는 기다렸다 hit
+    assert reference.locations.stats()['fetches'] == 2
+    assert reference.vehicles.stats()['fetches'] == 1
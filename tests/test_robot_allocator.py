@@ -0,0 +1,97 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from robot_allocator import RobotAllocator, hungarian
+
+
+def robot(robot_id: str, x: float, battery: int = 90, status: str = 'idle'):
+    return {'robot_id': robot_id, 'current_x': x, 'current_y': 0.0,
+            'battery_level': battery, 'status': status}
+
+
+@pytest.fixture
+def allocator():
+    allocator = RobotAllocator()
+    for i, x in enumerate((0.0, 50.0, 100.0)):
+        allocator.update_location({'location_id': f'P-{i}', 'x': x, 'y': 0.0})
+    return allocator
+
+
+def test_reservation_survives_idle_telemetry(allocator):
+    allocator.update_robot(robot('R-01', 0.0))
+    allocator.update_robot(robot('R-02', 80.0))
+
+    assert allocator.assign({'start_location': 'P-0'})['assigned_robot'] == 'R-01'
+    # 배정 직후 텔레메트리 UPDATE (아직 idle)
+    allocator.update_robot(robot('R-01', 1.0))
+    assert allocator.assign({'start_location': 'P-0'})['assigned_robot'] == 'R-02'
+    assert allocator.stats()['available'] == 0
+
+    allocator.release('R-01')
+    assert allocator.stats()['available'] == 1
+
+
+def test_reservation_ends_when_robot_leaves_idle(allocator):
+    allocator.update_robot(robot('R-01', 0.0))
+    assert allocator.assign({'start_location': 'P-0'})['assigned_robot'] == 'R-01'
+
+    allocator.update_robot(robot('R-01', 0.0, status='busy'))
+    allocator.update_robot(robot('R-01', 0.0))
+    assert allocator.assign({'start_location': 'P-0'})['assigned_robot'] == 'R-01'
+
+
+def test_battery_threshold_excludes_robot(allocator):
+    allocator.update_robot(robot('R-low', 0.0, battery=allocator.battery_threshold - 1))
+    allocator.update_robot(robot('R-ok', 100.0, battery=allocator.battery_threshold))
+
+    assert allocator.best_robot((0.0, 0.0), reserve=False) == 'R-ok'
+    allocator.update_robot(robot('R-ok', 100.0, battery=5))
+    assert allocator.best_robot((0.0, 0.0)) is None
+    assert allocator.stats()['no_robot'] == 1
+
+
+def test_assign_batch_minimizes_total_distance(allocator):
+    # 작업 순서대로 탐욕 배정하면 t1이 R-a를 가져가 총 거리 105, 최소 매칭은 95
+    allocator.update_robot(robot('R-a', 45.0))
+    allocator.update_robot(robot('R-b', 100.0))
+    allocator.update_robot(robot('R-far', 500.0))
+
+    tasks = [{'task_id': 't1', 'start_location': 'P-1'},
+             {'task_id': 't0', 'start_location': 'P-0'},
+             {'task_id': 'no-location', 'start_location': 'missing'}]
+    assignment = allocator.assign_batch(tasks)
+
+    assert assignment == {'t0': 'R-a', 't1': 'R-b'}
+    assert allocator.stats()['available'] == 1
+    # 남은 로봇 1대 → 가까운 작업 하나만 배정
+    assert allocator.assign_batch(tasks) == {'t1': 'R-far'}
+    assert allocator.stats()['no_robot'] == 1
+
+
+def brute_force(cost: np.ndarray) -> float:
+    n, m = cost.shape
+    if n > m:
+        return brute_force(cost.T)
+    return min(cost[range(n), list(cols)].sum() for cols in itertools.permutations(range(m), n))
+
+
+@pytest.mark.parametrize('shape', [(3, 3), (3, 5), (5, 3), (1, 4), (0, 3)])
+def test_hungarian_matches_brute_force(shape):
+    cost = np.random.default_rng(sum(shape)).uniform(0, 100, shape)
+    rows, cols = hungarian(cost)
+
+    assert len(rows) == min(shape) and len(set(cols)) == len(cols)
+    if min(shape):
+        assert cost[rows, cols].sum() == pytest.approx(brute_force(cost))
+
+
+def test_hungarian_matches_scipy():
+    optimize = pytest.importorskip('scipy.optimize')
+    rng = np.random.default_rng(3)
+    for shape in [(8, 8), (6, 20), (20, 6)]:
+        cost = rng.uniform(0, 100, shape)
+        rows, cols = hungarian(cost)
+        ref_rows, ref_cols = optimize.linear_sum_assignment(cost)
+        assert cost[rows, cols].sum() == pytest.approx(cost[ref_rows, ref_cols].sum())
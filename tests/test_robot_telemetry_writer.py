@@ -0,0 +1,73 @@
+import pytest
+
+from robot_telemetry_writer import RobotTelemetryWriter
+
+
+@pytest.fixture
+def writer(client):
+    # 속도 제한 / heartbeat 없이 데드밴드만 확인
+    return RobotTelemetryWriter(client, max_rate_hz=1e6, heartbeat_seconds=0)
+
+
+def robot_row(db, robot_id='R-01'):
+    return next(r for r in db.select('robots') if r['robot_id'] == robot_id)
+
+
+def test_small_changes_stay_in_deadband(db, writer):
+    writer.record('R-01', x=1.0, y=1.0, orientation=0.0, battery_level=80)
+    assert writer.flush() == 1
+
+    writer.record('R-01', x=1.01, y=1.02, orientation=0.01, battery_level=80.4)
+    assert writer.flush() == 0
+    assert writer.stats()['deadband'] == 1
+
+    # 샘플끼리가 아니라 기록된 값과 비교 → 누적 이동은 기록됨
+    writer.record('R-01', x=1.04, y=1.04)
+    assert writer.flush() == 1
+    assert (robot_row(db)['current_x'], robot_row(db)['current_y']) == (1.04, 1.04)
+
+
+def test_samples_coalesce_and_rate_limit(db, client):
+    writer = RobotTelemetryWriter(client, max_rate_hz=0.001, heartbeat_seconds=0)
+    writer.record('R-01', x=0.0, y=0.0)
+    writer.record('R-01', x=1.0, y=0.0)
+    assert writer.flush() == 1
+
+    writer.record('R-01', x=5.0, y=0.0)
+    assert writer.flush() == 0
+    stats = writer.stats()
+    assert (stats['coalesced'], stats['rate_limited'], stats['pending']) == (1, 1, 1)
+
+    # close()는 속도 제한을 무시하고 마지막 샘플 기록
+    writer.close()
+    assert robot_row(db)['current_x'] == 5.0
+    assert db.stats['upsert'] == 2
+
+
+def test_status_and_battery_alert_bypass_deadband(db, client):
+    writer = RobotTelemetryWriter(client, max_rate_hz=1e6, battery_deadband=5,
+                                  heartbeat_seconds=0)
+    writer.record('R-01', x=0.0, y=0.0, battery_level=31, status='idle')
+    assert writer.flush() == 1
+
+    writer.record('R-01', x=0.0, y=0.0, status='charging')
+    assert writer.flush() == 1
+    assert robot_row(db)['status'] == 'charging'
+
+    # 31 → 29: 데드밴드(5) 미만이지만 알림 기준(30) 통과
+    writer.record('R-01', battery_level=29)
+    assert writer.flush() == 1
+    assert robot_row(db)['battery_level'] == 29
+
+
+def test_upsert_sends_only_sampled_columns(db, writer):
+    writer.record('R-01', x=0.0, y=0.0, battery_level=80, status='idle')
+    assert writer.flush() == 1
+
+    # 다른 프로세스(작업 배분)가 status 변경
+    db.update('robots', {'status': 'busy'}, [lambda row: row['robot_id'] == 'R-01'])
+
+    writer.record('R-01', x=3.0, y=4.0)
+    assert writer.flush() == 1
+    row = robot_row(db)
+    assert (row['status'], row['battery_level'], row['current_x']) == ('busy', 80, 3.0)
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+import route_planner
+from route_planner import RoutePlanner, _layout
+
+
+def planner_for(spots: int, lane_depth: int, occupied=(), occupancy: float = 0.0):
+    """
+    _layout 격자: 줄 4개 (P_1 (0,0), P_2 (3,0), P_3 (0,8), P_4 (3,8)),
+    P_n_k는 준비 위치에서 1.5 + k만큼 안쪽
+    """
+    planner = RoutePlanner()
+    planner.load_rows(_layout(spots, lane_depth, occupancy, seed=1))
+    for spot in occupied:
+        planner.set_occupied(spot, True)
+    return planner
+
+
+def test_unblocked_exit_is_single_task():
+    planner = planner_for(8, 2, occupied=['P_1_2'])
+    plan = planner.plan_exit('P_1_2', vehicle_plate='12가3456', priority=3)
+
+    assert not plan['blocked']
+    assert [t['task_type'] for t in plan['tasks']] == ['EXIT']
+    assert plan['tasks'][0]['target_location'] == 'P_1'
+    assert plan['cost'] == pytest.approx(3.5)
+
+
+def test_blocked_exit_moves_front_vehicle_first():
+    planner = planner_for(8, 2, occupied=['P_1_1', 'P_1_2'])
+    plan = planner.plan_exit('P_1_2', vehicle_plate='12가3456',
+                             vehicles={'P_1_1': '34나5678'}, priority=3)
+
+    move, exit_task = plan['tasks']
+    assert plan['blocked']
+    assert (move['task_type'], move['vehicle_plate'], move['start_location'],
+            move['target_location'], move['priority']) == \
+        ('MOVE', '34나5678', 'P_1_1', 'P_2_1', 4)
+    assert (exit_task['task_type'], exit_task['blocking_vehicle'],
+            exit_task['blocking_location'], exit_task['temp_location']) == \
+        ('EXIT', '34나5678', 'P_1_1', 'P_2_1')
+    # MOVE 2.5 + 3 + 2.5, EXIT 3.5
+    assert plan['cost'] == pytest.approx(11.5)
+    # 계획만 세우고 점유 상태는 바꾸지 않음
+    assert planner.stats()['free'] == 6
+
+
+def test_temp_location_skips_exiting_lane_and_blocked_spots():
+    # P_1_1이 비어 있어도 출차 중인 줄이므로 임시 위치가 될 수 없음
+    planner = planner_for(12, 3, occupied=['P_1_2', 'P_1_3'])
+    plan = planner.plan_exit('P_1_3')
+    assert plan['tasks'][0]['target_location'] == 'P_2_1'
+
+    # P_2_2는 가깝지만 앞(P_2_1)이 막혀 있음 → 다음으로 가까운 줄의 맨 앞 칸
+    planner.set_occupied('P_2_1', True)
+    plan = planner.plan_exit('P_1_3')
+    assert plan['tasks'][0]['target_location'] == 'P_3_1'
+
+
+def test_no_temp_location_returns_empty_plan():
+    planner = planner_for(8, 2, occupancy=1.0)
+    plan = planner.plan_exit('P_1_2')
+
+    assert plan == {'tasks': [], 'cost': float('inf'), 'blocked': True}
+    stats = planner.stats()
+    assert (stats['no_temp_location'], stats['free']) == (1, 0)
+
+
+def test_builtin_dijkstra_matches_scipy(monkeypatch):
+    pytest.importorskip('scipy.sparse.csgraph')
+    rows = _layout(400, 2, 0.5, seed=4)
+    with_scipy = RoutePlanner(neighbors=3)
+    with_scipy.load_rows(rows)
+    assert with_scipy.stats()['solver'] == 'scipy'
+
+    monkeypatch.setattr(route_planner, 'dijkstra', None)
+    builtin = RoutePlanner(neighbors=3)
+    builtin.load_rows(rows)
+    assert builtin.stats()['solver'] == 'builtin'
+
+    np.testing.assert_allclose(builtin._distances, with_scipy._distances, rtol=1e-5)
+    assert builtin.distance('P_1_2', 'P_200_1') == pytest.approx(
+        with_scipy.distance('P_1_2', 'P_200_1'), rel=1e-5)
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from task_scheduler import TaskScheduler
+
+
+def task(task_id: str, task_type: str = 'EXIT', priority: int = 0, minutes_ago: float = 0):
+    created = datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)
+    return {'task_id': task_id, 'task_type': task_type, 'priority': priority,
+            'status': 'pending', 'created_at': created.isoformat()}
+
+
+def test_aging_lets_old_low_priority_task_go_first():
+    scheduler = TaskScheduler(aging_per_minute=1.0)
+    scheduler.push(task('new-high', priority=5))
+    scheduler.push(task('old-low', priority=0, minutes_ago=10))
+
+    assert scheduler.effective_priority(scheduler.peek()) == pytest.approx(10, abs=0.1)
+    assert [scheduler.pop()['task_id'] for _ in range(2)] == ['old-low', 'new-high']
+
+
+def test_without_aging_priority_wins():
+    scheduler = TaskScheduler(aging_per_minute=0)
+    scheduler.push(task('old-low', priority=0, minutes_ago=10))
+    scheduler.push(task('new-high', priority=5))
+
+    assert scheduler.pop()['task_id'] == 'new-high'
+
+
+def test_pop_only_requested_task_types():
+    scheduler = TaskScheduler()
+    scheduler.push(task('exit', 'EXIT', priority=9))
+    scheduler.push(task('enter', 'ENTER', priority=1))
+    assert not scheduler.push(task('unknown', 'WASH'))
+
+    assert scheduler.pop(['ENTER', 'PARK'])['task_id'] == 'enter'
+    assert scheduler.pop(['ENTER', 'PARK']) is None
+    assert scheduler.stats()['queued']['EXIT'] == 1
+
+
+def test_lazy_delete_compacts_heaps():
+    scheduler = TaskScheduler()
+    for i in range(1100):
+        scheduler.push(task(f't{i:04d}', priority=i))
+    for i in range(1100 - 75, 0, -1):
+        scheduler.remove(f't{i:04d}')
+
+    # 지연 삭제가 남은 작업 수를 넘으면 heap을 다시 만듦
+    stats = scheduler.stats()
+    assert stats['removed'] == 1025
+    assert stats['stale_entries'] < 1024
+    assert len(scheduler._heaps['EXIT']) == len(scheduler) + stats['stale_entries']
+
+    order = [scheduler.pop()['task_id'] for _ in range(len(scheduler))]
+    assert order == [f't{i:04d}' for i in range(1099, 1025, -1)] + ['t0000']
+
+
+def test_dispatch_skips_task_claimed_elsewhere(db, client):
+    first, second = db.insert('tasks', [{'task_type': 'EXIT', 'priority': 5},
+                                        {'task_type': 'EXIT', 'priority': 1}])
+    scheduler = TaskScheduler(client)
+    assert scheduler.load() == 2
+
+    # 다른 스케줄러가 먼저 선점 (이 스케줄러는 아직 모름)
+    db.update('tasks', {'status': 'in_progress'}, [lambda row: row['task_id'] == first['task_id']])
+
+    claimed = scheduler.dispatch('R-01')
+    assert claimed['task_id'] == second['task_id']
+    assert (claimed['status'], claimed['assigned_robot']) == ('in_progress', 'R-01')
+    assert scheduler.stats()['claim_lost'] == 1
+    assert scheduler.dispatch('R-01') is None
+
+
+class FailingClient:
+    def table(self, name):
+        raise ConnectionError('PostgREST unavailable')
+
+
+def test_dispatch_restores_task_when_update_fails():
+    scheduler = TaskScheduler(FailingClient())
+    scheduler.push(task('t1', priority=3))
+
+    with pytest.raises(ConnectionError):
+        scheduler.dispatch('R-01')
+
+    assert len(scheduler) == 1
+    assert scheduler.stats()['restored'] == 1
+    assert scheduler.pop()['task_id'] == 't1'